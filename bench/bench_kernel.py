@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# BENCH KERNEL.py
+#   by Lut99
+#
+# Created:
+#   19 Oct 2026, 13:38:12
+# Last edited:
+#   19 Oct 2026, 17:18:44
+# Auto updated?
+#   Yes
+#
+# Description:
+#   Benchmarks the latency and throughput of the BraneScript kernel, by
+#   firing execute requests at one or more `bscript` kernels that run
+#   against a (mock) `libbrane_cli.so`.
+#
+#   Any `BRANE_MOCK_*` environment variables are passed to the kernels,
+#   which allows configuring the mock library (see
+#   `bench/mock_brane_cli.cpp`).
+#
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import typing
+
+try:
+    import jupyter_client
+except ImportError:
+    print("This benchmark requires the `jupyter_client` package (install it with `pip3 install jupyter_client`)", file=sys.stderr)
+    exit(1)
+
+
+##### HELPER FUNCTIONS #####
+def percentile(samples: typing.List[float], p: float) -> float:
+    """
+        Computes the given percentile of a list of samples, interpolating between the closest ranks.
+
+        # Arguments
+        - `samples`: The samples to compute the percentile of. Must be non-empty.
+        - `p`: The percentile to compute, in the range [0, 100].
+
+        # Returns
+        The percentile.
+    """
+
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * p / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def write_kernelspec(jupyter_dir: str, bscript: str, libbrane: str, data_dir: str) -> str:
+    """
+        Writes a kernelspec that runs the given `bscript` executable against the given library.
+
+        # Arguments
+        - `jupyter_dir`: The directory to write the kernelspec to (as `kernels/<name>/kernel.json`). Should be added to `JUPYTER_PATH`.
+        - `bscript`: The path to the `bscript` executable.
+        - `libbrane`: The path to the `libbrane_cli.so` to load in the kernel.
+        - `data_dir`: The data directory to give the kernel.
+
+        # Returns
+        The name of the kernelspec.
+    """
+
+    # Collect the environment for the kernel
+    env = {
+        "LIBBRANE_PATH": os.path.abspath(libbrane),
+        "BRANE_API_ADDR": "http://127.0.0.1:50051",
+        "BRANE_DRV_ADDR": "http://127.0.0.1:50053",
+        "BRANE_CERTS_DIR": data_dir,
+        "BRANE_DATA_DIR": data_dir,
+        "BRANE_RESULT_USER": "bench",
+    }
+    for (key, value) in os.environ.items():
+        if key.startswith("BRANE_MOCK_") or key in [ "BRANE_MAX_JOBS", "BRANE_MAX_BACKGROUND", "BRANE_BACKGROUND_DOWNLOADS", "BRANE_CACHE_SIZE" ]:
+            env[key] = value
+
+    # Write it
+    name = "bscript-bench"
+    os.makedirs(os.path.join(jupyter_dir, "kernels", name), exist_ok=True)
+    with open(os.path.join(jupyter_dir, "kernels", name, "kernel.json"), "w") as h:
+        json.dump({
+            "display_name": "BraneScript (benchmark)",
+            "argv": [ bscript, "-f", "{connection_file}" ],
+            "language": "BraneScript",
+            "env": env,
+        }, h)
+    return name
+
+
+
+def execute(client: jupyter_client.BlockingKernelClient, code: str, timeout: float) -> typing.Tuple[float, bool, int]:
+    """
+        Executes a snippet on a kernel and waits until it is completely handled (i.e., the kernel has published all output and is idle again).
+
+        # Arguments
+        - `client`: The client of the kernel to execute on.
+        - `code`: The snippet to execute.
+        - `timeout`: The maximum time to wait for any message, in seconds.
+
+        # Returns
+        A tuple with the latency in seconds, whether the execution succeeded, and the number of bytes of output published.
+    """
+
+    start = time.perf_counter()
+    msg_id = client.execute(code, store_history=True)
+
+    # Wait until the kernel reports being idle for our request, counting output on the way
+    n_bytes = 0
+    while True:
+        msg = client.get_iopub_msg(timeout=timeout)
+        if msg["parent_header"].get("msg_id") != msg_id: continue
+        if msg["msg_type"] in [ "execute_result", "display_data", "update_display_data" ]:
+            n_bytes += sum([ len(str(v)) for v in msg["content"]["data"].values() ])
+        elif msg["msg_type"] == "stream":
+            n_bytes += len(msg["content"]["text"])
+        elif msg["msg_type"] == "status" and msg["content"]["execution_state"] == "idle":
+            break
+    latency = time.perf_counter() - start
+
+    # Get the reply too, to see if it succeeded
+    while True:
+        reply = client.get_shell_msg(timeout=timeout)
+        if reply["parent_header"].get("msg_id") == msg_id: break
+    return (latency, reply["content"]["status"] == "ok", n_bytes)
+
+
+
+class KernelRun:
+    """
+        Runs the benchmark requests against a single kernel, in its own thread.
+    """
+
+    kernel_name : str
+    code        : str
+    n_requests  : int
+    n_warmup    : int
+    timeout     : float
+
+    startup     : float
+    latencies   : typing.List[float]
+    failures    : int
+    n_bytes     : int
+    error       : typing.Optional[str]
+
+
+    def __init__(self, kernel_name: str, code: str, n_requests: int, n_warmup: int, timeout: float):
+        """
+            Constructor for the KernelRun.
+
+            # Arguments
+            - `kernel_name`: The name of the kernelspec to start.
+            - `code`: The snippet to execute for every request.
+            - `n_requests`: The number of requests to measure.
+            - `n_warmup`: The number of requests to execute before measuring.
+            - `timeout`: The maximum time to wait for any message, in seconds.
+
+            # Returns
+            A new KernelRun instance.
+        """
+
+        self.kernel_name = kernel_name
+        self.code = code
+        self.n_requests = n_requests
+        self.n_warmup = n_warmup
+        self.timeout = timeout
+
+        self.startup = 0.0
+        self.latencies = []
+        self.failures = 0
+        self.n_bytes = 0
+        self.error = None
+
+    def run(self):
+        """
+            Starts the kernel, runs the requests and shuts the kernel down again.
+
+            Any errors are stored in `error` instead of raised, as this runs in a thread.
+        """
+
+        km = jupyter_client.KernelManager(kernel_name=self.kernel_name)
+        try:
+            # Start the kernel and wait until it answers
+            start = time.perf_counter()
+            km.start_kernel()
+            client = km.blocking_client()
+            client.start_channels()
+            client.wait_for_ready(timeout=self.timeout)
+            self.startup = time.perf_counter() - start
+
+            # Run the requests
+            for i in range(self.n_warmup + self.n_requests):
+                (latency, ok, n_bytes) = execute(client, self.code, self.timeout)
+                if i < self.n_warmup: continue
+                self.latencies.append(latency)
+                self.n_bytes += n_bytes
+                if not ok: self.failures += 1
+            client.stop_channels()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            km.shutdown_kernel(now=True)
+
+
+
+
+
+##### ENTRYPOINT #####
+def main(bscript: str, libbrane: str, n_kernels: int, n_requests: int, n_warmup: int, code: str, timeout: float, output: typing.Optional[str]) -> int:
+    """
+        Entrypoint to the script.
+
+        # Arguments
+        - `bscript`: The path to the `bscript` executable to benchmark.
+        - `libbrane`: The path to the `libbrane_cli.so` to load in the kernels.
+        - `n_kernels`: The number of kernels to run in parallel.
+        - `n_requests`: The number of requests to measure per kernel.
+        - `n_warmup`: The number of requests per kernel to execute before measuring.
+        - `code`: The snippet to execute for every request.
+        - `timeout`: The maximum time to wait for any message, in seconds.
+        - `output`: If given, writes the results as JSON to this file.
+
+        # Returns
+        The exit code of the script.
+    """
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Prepare the kernelspec (and a data directory for it)
+        data_dir = os.path.join(tmp, "data")
+        os.makedirs(data_dir)
+        kernel_name = write_kernelspec(tmp, bscript, libbrane, data_dir)
+        os.environ["JUPYTER_PATH"] = tmp + (os.pathsep + os.environ["JUPYTER_PATH"] if "JUPYTER_PATH" in os.environ else "")
+
+        # Run the kernels in parallel
+        print(f"Running {n_requests} request(s) (after {n_warmup} warm-up request(s)) on {n_kernels} kernel(s)...")
+        runs = [ KernelRun(kernel_name, code, n_requests, n_warmup, timeout) for _ in range(n_kernels) ]
+        threads = [ threading.Thread(target=r.run) for r in runs ]
+        start = time.perf_counter()
+        for t in threads: t.start()
+        for t in threads: t.join()
+        wall = time.perf_counter() - start
+
+    # Check for errors
+    errors = [ r.error for r in runs if r.error is not None ]
+    for error in errors:
+        print(f"Kernel failed: {error}", file=sys.stderr)
+    latencies = [ l for r in runs for l in r.latencies ]
+    if len(latencies) == 0:
+        print("No requests completed", file=sys.stderr)
+        return 1
+
+    # Report
+    results = {
+        "kernels": n_kernels,
+        "requests": len(latencies),
+        "failures": sum([ r.failures for r in runs ]),
+        "startup_ms": { "mean": 1000.0 * sum([ r.startup for r in runs ]) / len(runs), "max": 1000.0 * max([ r.startup for r in runs ]) },
+        "latency_ms": { f"p{p}": 1000.0 * percentile(latencies, p) for p in [ 50, 95, 99 ] },
+        "throughput_rps": len(latencies) / wall,
+        "output_bytes": sum([ r.n_bytes for r in runs ]),
+        "mock": { k: v for (k, v) in os.environ.items() if k.startswith("BRANE_MOCK_") },
+    }
+    results["latency_ms"]["max"] = 1000.0 * max(latencies)
+    print(f"Kernel startup  : {results['startup_ms']['mean']:.1f} ms (mean), {results['startup_ms']['max']:.1f} ms (max)")
+    print(f"Latency         : p50 {results['latency_ms']['p50']:.2f} ms, p95 {results['latency_ms']['p95']:.2f} ms, p99 {results['latency_ms']['p99']:.2f} ms, max {results['latency_ms']['max']:.2f} ms")
+    print(f"Throughput      : {results['throughput_rps']:.1f} requests/s ({results['requests']} requests, {results['failures']} failed)")
+    print(f"Output published: {results['output_bytes']} bytes")
+    if output is not None:
+        with open(output, "w") as h:
+            json.dump(results, h, indent=4)
+        print(f"Results written to '{output}'")
+
+    # Done
+    return 0 if len(errors) == 0 else 1
+
+
+
+# Actual entrypoint
+if __name__ == "__main__":
+    # Define the arguments
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--bscript", default="bscript", help="The `bscript` kernel executable to benchmark.")
+    parser.add_argument("--libbrane", default="./build/bench/libbrane_cli.so", help="The (mock) `libbrane_cli.so` to load in the kernels.")
+    parser.add_argument("-k", "--kernels", type=int, default=1, help="The number of kernels to run in parallel.")
+    parser.add_argument("-n", "--requests", type=int, default=100, help="The number of requests to measure per kernel.")
+    parser.add_argument("-w", "--warmup", type=int, default=5, help="The number of requests per kernel to execute before measuring.")
+    parser.add_argument("-c", "--code", default="println(\"Hello, world!\");", help="The snippet to execute for every request.")
+    parser.add_argument("-t", "--timeout", type=float, default=60.0, help="The maximum time to wait for any message from a kernel, in seconds.")
+    parser.add_argument("-o", "--output", help="If given, writes the results as JSON to this file.")
+
+    # Parse the arguments & run
+    args = parser.parse_args()
+    exit(main(args.bscript, args.libbrane, args.kernels, args.requests, args.warmup, args.code, args.timeout, args.output))
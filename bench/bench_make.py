@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+# BENCH MAKE.py
+#   by Lut99
+#
+# Created:
+#   19 Oct 2026, 23:16:40
+# Last edited:
+#   19 Oct 2026, 23:16:40
+# Auto updated?
+#   Yes
+#
+# Description:
+#   Benchmarks the scheduler and up-to-date checks of `make.py` itself,
+#   by building synthetic target graphs of configurable size: deep
+#   chains, wide fans, stacked diamonds and fans of commands that call a
+#   fake `docker` executable.
+#
+#   Every graph is built from scratch, then again without changes (the
+#   no-op build), and then again after touching a single source. Results
+#   are appended to a history file, so that changes to `make.py` can be
+#   compared against earlier runs.
+#
+
+import argparse
+import contextlib
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+
+##### GLOBALS #####
+# The fake `docker` executable, which only creates the file given with `-o` (if any).
+FAKE_DOCKER = """#!/bin/sh
+while [ $# -gt 0 ]; do
+    if [ "$1" = "-o" ]; then : > "$2"; shift; fi
+    shift
+done
+"""
+
+
+
+
+
+##### HELPER FUNCTIONS #####
+def load_make(path: str) -> typing.Any:
+    """
+        Imports `make.py` as a module, without running its entrypoint.
+
+        # Arguments
+        - `path`: The path to `make.py`.
+
+        # Returns
+        The module.
+    """
+
+    spec = importlib.util.spec_from_file_location("make", path)
+    if spec is None or spec.loader is None: raise RuntimeError(f"Cannot import '{path}'")
+    make = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(make)
+    return make
+
+def parse_sizes(raw: str) -> typing.List[int]:
+    """
+        Parses a comma-separated list of file sizes (e.g., `1K,64K,1M`).
+
+        # Arguments
+        - `raw`: The list to parse.
+
+        # Returns
+        The sizes, in bytes.
+    """
+
+    units = { "": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3 }
+    sizes = []
+    for size in raw.split(","):
+        size = size.strip().upper()
+        unit = size[-1] if len(size) > 0 and size[-1] in units else ""
+        sizes.append(int(float(size[:len(size) - len(unit)]) * units[unit]))
+    return sizes
+
+
+
+class Counters:
+    """
+        Counts how often the hot paths of `make.py` are called while building.
+    """
+
+    visits   : int
+    checks   : int
+    resolves : int
+    spawns   : int
+
+
+    def __init__(self, make: typing.Any):
+        """
+            Constructor for the Counters, which wraps the functions to count in the given module. Should only be called once per module.
+
+            # Arguments
+            - `make`: The `make.py` module.
+
+            # Returns
+            A new Counters instance.
+        """
+
+        self.reset()
+        counters = self
+
+        # `build()` calls itself through the module, so wrapping it there counts every visit
+        build = make.build
+        def counted_build(*args, **kwargs):
+            counters.visits += 1
+            return build(*args, **kwargs)
+        make.build = counted_build
+
+        # Every target class has its own `is_outdated()`
+        for cls in [ c for c in vars(make).values() if isinstance(c, type) and issubclass(c, make.Target) ]:
+            if "is_outdated" not in cls.__dict__: continue
+            def counted_is_outdated(self, _is_outdated=cls.__dict__["is_outdated"]):
+                counters.checks += 1
+                return _is_outdated(self)
+            cls.is_outdated = counted_is_outdated
+
+        resolve = make.ResolveArgs.__call__
+        def counted_resolve(self, key):
+            counters.resolves += 1
+            return resolve(self, key)
+        make.ResolveArgs.__call__ = counted_resolve
+
+        execute = make.Process.execute
+        def counted_execute(self, *args, **kwargs):
+            counters.spawns += 1
+            return execute(self, *args, **kwargs)
+        make.Process.execute = counted_execute
+
+    def reset(self):
+        """
+            Resets all counters to zero.
+        """
+
+        self.visits = 0
+        self.checks = 0
+        self.resolves = 0
+        self.spawns = 0
+
+    def dict(self) -> typing.Dict[str, int]:
+        """
+            Returns the counters as a dictionary.
+        """
+
+        return { "visits": self.visits, "checks": self.checks, "resolves": self.resolves, "spawns": self.spawns }
+
+
+
+def generate(make: typing.Any, shape: str, size: int, root: str, sources: typing.List[str]) -> typing.Tuple[typing.Dict[str, typing.Any], str, typing.List[str]]:
+    """
+        Generates a synthetic target graph.
+
+        # Arguments
+        - `make`: The `make.py` module.
+        - `shape`: The shape of the graph: `chain`, `fan`, `diamond` or `command`.
+        - `size`: The number of targets in chains, fans and command fans, or the number of stacked diamonds.
+        - `root`: The directory in which the targets write their outputs.
+        - `sources`: The source files that the targets copy (cycled through).
+
+        # Returns
+        A tuple of the targets, the identifier of the target to build and the paths of all outputs (to remove before a full build).
+    """
+
+    targets = []
+    outputs = []
+    def copy(id: str, i: int, deps: typing.List[str]):
+        output = os.path.join(root, shape, f"{id}.bin")
+        targets.append(make.CopyFileTarget(id, sources[i % len(sources)], output, deps=deps))
+        outputs.append(os.path.join(root, shape, f"{id}.bin"))
+
+    if shape == "chain":
+        # Every target depends on the one before it, alternating directories and copies
+        for i in range(size):
+            deps = [ f"node-{i - 1}" ] if i > 0 else []
+            if i % 2 == 0:
+                targets.append(make.MakeDirTarget(f"node-{i}", os.path.join(root, shape, f"dir-{i}"), deps=deps))
+                outputs.append(os.path.join(root, shape, f"dir-{i}"))
+            else:
+                copy(f"node-{i}", i, deps)
+        top = f"node-{size - 1}"
+    elif shape == "fan":
+        # A single target depends on all the others
+        targets.append(make.MakeDirTarget("node-dir", os.path.join(root, shape)))
+        for i in range(size): copy(f"node-{i}", i, [ "node-dir" ])
+        targets.append(make.ArrayTarget("all", [], deps=[ f"node-{i}" for i in range(size) ]))
+        top = "all"
+    elif shape == "diamond":
+        # Every diamond splits in two and joins again, and the next one starts where the previous one joined
+        for i in range(size):
+            deps = [ f"join-{i - 1}" ] if i > 0 else []
+            copy(f"left-{i}", 2 * i, deps)
+            copy(f"right-{i}", 2 * i + 1, deps)
+            targets.append(make.MakeDirTarget(f"join-{i}", os.path.join(root, shape, f"join-{i}"), deps=[ f"left-{i}", f"right-{i}" ]))
+            outputs.append(os.path.join(root, shape, f"join-{i}"))
+        top = f"join-{size - 1}"
+    elif shape == "command":
+        # Commands that call `docker` (which is fake), with a source and an output each
+        targets.append(make.MakeDirTarget("node-dir", os.path.join(root, shape)))
+        for i in range(size):
+            output = os.path.join(root, shape, f"node-{i}.tar")
+            targets.append(make.CommandTarget(f"node-{i}", [[ "$docker", "save", "-o", output, f"image-{i}" ]], sources=[ sources[i % len(sources)] ], outputs=[ output ], deps=[ "node-dir" ]))
+            outputs.append(os.path.join(root, shape, f"node-{i}.tar"))
+        targets.append(make.ArrayTarget("all", [], deps=[ f"node-{i}" for i in range(size) ]))
+        top = "all"
+    else:
+        raise ValueError(f"Unknown graph shape '{shape}'")
+
+    return ({ t.id: t for t in targets }, top, outputs)
+
+def clean(outputs: typing.List[str]):
+    """
+        Removes the outputs of a graph, so that the next build is a full one.
+
+        # Arguments
+        - `outputs`: The outputs to remove.
+    """
+
+    for output in reversed(outputs):
+        if os.path.isdir(output): os.rmdir(output)
+        elif os.path.exists(output): os.remove(output)
+
+
+
+def measure(make: typing.Any, counters: Counters, top: str) -> typing.Tuple[float, typing.Dict[str, int]]:
+    """
+        Builds the given target once.
+
+        # Arguments
+        - `make`: The `make.py` module.
+        - `counters`: The `Counters` to report the calls of.
+        - `top`: The identifier of the target to build.
+
+        # Returns
+        A tuple of the time the build took, in seconds, and the calls made while building.
+    """
+
+    counters.reset()
+    # (`Process` passes `sys.stdout` to its children, so it must be a real file)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        make.build(make.TARGETS[top], make.Arch.default(), make.Os.default(), False, False)
+        duration = time.perf_counter() - start
+    return (duration, counters.dict())
+
+def git_commit(repo: str) -> typing.Optional[str]:
+    """
+        Returns the commit that the given repository is at, for the history.
+
+        # Arguments
+        - `repo`: The repository.
+
+        # Returns
+        The (short) hash of the commit, with a `+` if there are uncommitted changes, or `None` if it cannot be determined.
+    """
+
+    try:
+        commit = subprocess.run([ "git", "-C", repo, "rev-parse", "--short", "HEAD" ], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run([ "git", "-C", repo, "status", "--porcelain", "--untracked-files=no" ], capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("+" if len(dirty) > 0 else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+
+
+
+##### ENTRYPOINT #####
+def main(make_path: str, shapes: typing.List[str], n_targets: int, n_diamonds: int, n_commands: int, sizes: typing.List[int], repeats: int, output: typing.Optional[str]) -> int:
+    """
+        Entrypoint to the script.
+
+        # Arguments
+        - `make_path`: The path to the `make.py` to benchmark.
+        - `shapes`: The graph shapes to benchmark.
+        - `n_targets`: The number of targets in chains and fans.
+        - `n_diamonds`: The number of stacked diamonds.
+        - `n_commands`: The number of targets in command fans.
+        - `sizes`: The sizes of the source files (cycled through by the targets).
+        - `repeats`: The number of times to measure every build.
+        - `output`: If given, appends the results as JSON to the history in this file.
+
+        # Returns
+        The exit code of the script.
+    """
+
+    make = load_make(make_path)
+    make.DEBUG = False
+    # Deep chains recurse as deep as they are long
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * n_targets + 1000))
+
+    results: typing.Dict[str, typing.Any] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Prepare the sources and the fake `docker`
+        src_dir = os.path.join(tmp, "src")
+        os.makedirs(src_dir)
+        sources = []
+        for (i, size) in enumerate(sizes):
+            sources.append(os.path.join(src_dir, f"source-{i}.bin"))
+            with open(sources[-1], "wb") as h:
+                h.write(os.urandom(min(size, 1024 * 1024)) * (size // (1024 * 1024)) + os.urandom(size % (1024 * 1024)))
+        docker = os.path.join(tmp, "docker")
+        with open(docker, "w") as h:
+            h.write(FAKE_DOCKER)
+        os.chmod(docker, 0o755)
+        make.TARGET_ARGS["docker"] = [ docker ]
+        counters = Counters(make)
+
+        for shape in shapes:
+            size = { "diamond": n_diamonds, "command": n_commands }.get(shape, n_targets)
+            (make.TARGETS, top, outputs) = generate(make, shape, size, os.path.join(tmp, "out"), sources)
+            print(f"Benchmarking '{shape}' graph of {len(make.TARGETS)} target(s)...")
+
+            # Measure full builds, no-op builds and builds after touching one source
+            samples: typing.Dict[str, typing.List[float]] = { "full": [], "noop": [], "touch": [] }
+            calls: typing.Dict[str, typing.Dict[str, int]] = {}
+            for _ in range(repeats):
+                clean(outputs)
+                (duration, calls["full"]) = measure(make, counters, top)
+                samples["full"].append(duration)
+                (duration, calls["noop"]) = measure(make, counters, top)
+                samples["noop"].append(duration)
+                os.utime(sources[0])
+                (duration, calls["touch"]) = measure(make, counters, top)
+                samples["touch"].append(duration)
+
+            results[shape] = { "targets": len(make.TARGETS) }
+            for (kind, durations) in samples.items():
+                results[shape][kind] = { "median_ms": 1000.0 * statistics.median(durations), "min_ms": 1000.0 * min(durations), "calls": calls[kind] }
+                c = calls[kind]
+                print(f"    {kind:<5}: {results[shape][kind]['median_ms']:10.2f} ms (median), {results[shape][kind]['min_ms']:10.2f} ms (min); {c['visits']} visit(s), {c['checks']} check(s), {c['resolves']} lookup(s), {c['spawns']} process(es)")
+
+    # Compare against the last run, if any
+    history = []
+    if output is not None and os.path.exists(output):
+        with open(output, "r") as h:
+            history = json.load(h)
+    if len(history) > 0:
+        last = history[-1]
+        print(f"\nCompared to the last run ({last['date']}, commit {last['commit']}):")
+        for (shape, result) in results.items():
+            if shape not in last["results"] or last["results"][shape]["targets"] != result["targets"]: continue
+            changes = [ f"{kind} {100.0 * (result[kind]['median_ms'] / last['results'][shape][kind]['median_ms'] - 1.0):+.1f}%" for kind in [ "full", "noop", "touch" ] if last["results"][shape][kind]["median_ms"] > 0 ]
+            print(f"    {shape:<8}: {', '.join(changes)}")
+
+    # Write the history
+    if output is not None:
+        history.append({
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(os.path.dirname(os.path.abspath(make_path))),
+            "python": platform.python_version(),
+            "repeats": repeats,
+            "sizes": sizes,
+            "results": results,
+        })
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as h:
+            json.dump(history, h, indent=4)
+        print(f"Results appended to '{output}'")
+
+    # Done
+    return 0
+
+
+
+# Actual entrypoint
+if __name__ == "__main__":
+    # Define the arguments
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--make", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "make.py"), help="The `make.py` to benchmark.")
+    parser.add_argument("-g", "--graphs", default="chain,fan,diamond,command", help="The shapes of the graphs to benchmark, as a comma-separated list of 'chain', 'fan', 'diamond' and 'command'.")
+    parser.add_argument("-n", "--targets", type=int, default=2000, help="The number of targets in the chains and fans.")
+    parser.add_argument("-d", "--diamonds", type=int, default=10, help="The number of diamonds stacked on top of each other. Note that the number of visits doubles with every diamond.")
+    parser.add_argument("-c", "--commands", type=int, default=100, help="The number of targets in the fan of commands, each of which spawns a process.")
+    parser.add_argument("-s", "--sizes", default="1K,64K,1M", help="The sizes of the source files that the targets copy, as a comma-separated list.")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="The number of times to measure every build.")
+    parser.add_argument("-o", "--output", help="If given, appends the results as JSON to the history in this file.")
+
+    # Parse the arguments & run
+    args = parser.parse_args()
+    exit(main(args.make, [ s.strip() for s in args.graphs.split(",") ], args.targets, args.diamonds, args.commands, parse_sizes(args.sizes), args.repeats, args.output))
@@ -0,0 +1,781 @@
+#!/usr/bin/env python3
+# FAKE BRANE.py
+#   by Lut99
+#
+# Created:
+#   19 Oct 2026, 14:05:31
+# Last edited:
+#   19 Oct 2026, 14:05:31
+# Auto updated?
+#   Yes
+#
+# Description:
+#   Implements a local stand-in for a Brane instance, for performance
+#   testing the IDE end-to-end (i.e., with the real `libbrane_cli.so`)
+#   without a real instance.
+#
+#   It serves three things:
+#   - An API service (`BRANE_API_ADDR`) with synthetic package and data
+#     indices of configurable size.
+#   - A driver service (`BRANE_DRV_ADDR`) that accepts workflows and
+#     answers them after a scripted delay with scripted output.
+#   - A registry that serves the datasets returned by workflows for
+#     download, at a configurable rate.
+#
+#   All timings are recorded and summarized when the service is stopped.
+#
+#   The wire formats mirror those of Brane v3.0.0. Note that the driver
+#   service requires the `grpcio` package (`pip3 install grpcio`).
+#
+
+import argparse
+import concurrent.futures
+import datetime
+import gzip
+import http.server
+import io
+import json
+import os
+import random
+import signal
+import ssl
+import subprocess
+import sys
+import tarfile
+import threading
+import time
+import typing
+import urllib.parse
+import uuid
+
+try:
+    import grpc
+except ImportError:
+    print("This service requires the `grpcio` package (install it with `pip3 install grpcio`)", file=sys.stderr)
+    exit(1)
+
+
+##### GLOBALS #####
+# The gRPC service implemented by the driver.
+DRIVER_SERVICE = "driving.DriverService"
+# The size of the blocks in which datasets are generated and sent.
+BLOCK_SIZE = 1024 * 1024
+
+# Whether to print debug messages
+DEBUG: bool = False
+
+
+
+
+
+##### HELPER FUNCTIONS #####
+def encode_varint(value: int) -> bytes:
+    """
+        Encodes an unsigned integer as a protobuf varint.
+
+        # Arguments
+        - `value`: The value to encode.
+
+        # Returns
+        The encoded bytes.
+    """
+
+    result = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value == 0:
+            result.append(byte)
+            return bytes(result)
+        result.append(byte | 0x80)
+
+def encode_message(fields: typing.List[typing.Tuple[int, typing.Union[bool, str]]]) -> bytes:
+    """
+        Encodes a protobuf message that only consists of string and boolean fields.
+
+        We do this by hand, so that we don't need to compile the `.proto` files of Brane.
+
+        # Arguments
+        - `fields`: The fields to encode, as (field number, value) pairs. Fields that are `None` are omitted.
+
+        # Returns
+        The encoded message.
+    """
+
+    result = bytearray()
+    for (number, value) in fields:
+        if value is None: continue
+        if type(value) == bool:
+            result += encode_varint(number << 3 | 0) + encode_varint(int(value))
+        else:
+            raw = typing.cast(str, value).encode()
+            result += encode_varint(number << 3 | 2) + encode_varint(len(raw)) + raw
+    return bytes(result)
+
+def decode_message(raw: bytes) -> typing.Dict[int, typing.Union[int, bytes]]:
+    """
+        Decodes a protobuf message, without knowing its schema.
+
+        # Arguments
+        - `raw`: The encoded message.
+
+        # Returns
+        A map of field numbers to their (last) value, which is an integer for varints and the raw bytes for anything length-delimited.
+
+        # Errors
+        This function raises a `ValueError` if the message is malformed or uses fixed-width fields.
+    """
+
+    def read_varint(i: int) -> typing.Tuple[int, int]:
+        value, shift = 0, 0
+        while True:
+            if i >= len(raw): raise ValueError("Truncated varint")
+            value |= (raw[i] & 0x7F) << shift
+            shift += 7
+            i += 1
+            if raw[i - 1] & 0x80 == 0: return (value, i)
+
+    fields: typing.Dict[int, typing.Union[int, bytes]] = {}
+    i = 0
+    while i < len(raw):
+        (key, i) = read_varint(i)
+        (number, wire) = (key >> 3, key & 0x7)
+        if wire == 0:
+            (fields[number], i) = read_varint(i)
+        elif wire == 2:
+            (length, i) = read_varint(i)
+            fields[number] = raw[i:i + length]
+            i += length
+        else:
+            raise ValueError(f"Unsupported wire type {wire} for field {number}")
+    return fields
+
+
+
+def full_value(kind: str, content: str) -> str:
+    """
+        Serializes a workflow result the way the driver sends it to the client (i.e., Brane's `FullValue`).
+
+        # Arguments
+        - `kind`: The kind of value to return (`void`, `string` or `data`).
+        - `content`: The string to return if `kind` is `string`, or the name of the dataset if it is `data`.
+
+        # Returns
+        The serialized value.
+    """
+
+    if kind == "void":
+        return json.dumps({ "kind": "void" })
+    elif kind == "string":
+        return json.dumps({ "kind": "string", "value": content })
+    elif kind == "data":
+        return json.dumps({ "kind": "data", "value": content })
+    else:
+        raise ValueError(f"Unknown result kind '{kind}'")
+
+def payload(n_bytes: int, prefix: str) -> str:
+    """
+        Generates a deterministic text payload of the given size.
+
+        # Arguments
+        - `n_bytes`: The size of the payload.
+        - `prefix`: Something to start every line with.
+
+        # Returns
+        The payload.
+    """
+
+    lines = []
+    size, i = 0, 0
+    while size < n_bytes:
+        line = f"{prefix} line {i}\n"
+        lines.append(line)
+        size += len(line)
+        i += 1
+    return "".join(lines)[:n_bytes]
+
+
+
+def generate_certs(dir: str, location: str, user: str, hosts: typing.List[str]):
+    """
+        Generates a certificate authority with a server and client certificate, as Brane uses them to authenticate downloads.
+
+        Nothing is generated if the certificates already exist.
+
+        # Arguments
+        - `dir`: The directory to generate the certificates in. The server certificates end up in `<dir>/server`, the client certificates in `<dir>/certs/<location>` (which is where the IDE expects them).
+        - `location`: The name of the location that the registry pretends to be.
+        - `user`: The name of the user to generate a client certificate for.
+        - `hosts`: The hostnames (or IPs) by which the registry may be reached.
+
+        # Errors
+        This function raises a `RuntimeError` if `openssl` failed.
+    """
+
+    server_dir = os.path.join(dir, "server")
+    client_dir = os.path.join(dir, "certs", location)
+    if os.path.exists(os.path.join(server_dir, "server.pem")) and os.path.exists(os.path.join(client_dir, "client-id.pem")): return
+    os.makedirs(server_dir, exist_ok=True)
+    os.makedirs(client_dir, exist_ok=True)
+
+    def openssl(*args: str):
+        handle = subprocess.run([ "openssl" ] + list(args), cwd=server_dir, capture_output=True)
+        if handle.returncode != 0:
+            raise RuntimeError(f"Failed to run 'openssl {' '.join(args)}': {handle.stderr.decode()}")
+
+    # Generate the authority
+    print(f"Generating certificates in '{dir}'...")
+    openssl("req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "3650", "-subj", "/CN=Fake Brane CA", "-keyout", "ca-key.pem", "-out", "ca.pem")
+
+    # Generate the server & client certificates
+    sans = ",".join([ (f"IP:{h}" if h.replace(".", "").isdigit() else f"DNS:{h}") for h in hosts ])
+    with open(os.path.join(server_dir, "server.ext"), "w") as h:
+        h.write(f"subjectAltName={sans}\nextendedKeyUsage=serverAuth\n")
+    with open(os.path.join(server_dir, "client.ext"), "w") as h:
+        h.write("extendedKeyUsage=clientAuth\n")
+    for (name, subject) in [ ("server", f"/CN={hosts[0]}"), ("client", f"/CN={user}") ]:
+        openssl("req", "-newkey", "rsa:2048", "-nodes", "-subj", subject, "-keyout", f"{name}-key.pem", "-out", f"{name}.csr")
+        openssl("x509", "-req", "-days", "3650", "-in", f"{name}.csr", "-CA", "ca.pem", "-CAkey", "ca-key.pem", "-CAcreateserial", "-extfile", f"{name}.ext", "-out", f"{name}.pem")
+
+    # Put the client side where the IDE expects it
+    with open(os.path.join(server_dir, "ca.pem"), "r") as h:
+        ca = h.read()
+    with open(os.path.join(client_dir, "ca.pem"), "w") as h:
+        h.write(ca)
+    with open(os.path.join(server_dir, "client.pem"), "r") as c, open(os.path.join(server_dir, "client-key.pem"), "r") as k:
+        identity = c.read() + k.read()
+    with open(os.path.join(client_dir, "client-id.pem"), "w") as h:
+        h.write(identity)
+
+
+
+
+
+##### HELPER STRUCTS #####
+class Config:
+    """
+        Collects the settings of the fake Brane instance.
+    """
+
+    packages       : int
+    functions      : int
+    datasets       : int
+    location       : str
+    index_delay    : float
+    session_delay  : float
+    execute_delay  : float
+    stdout_bytes   : int
+    result_kind    : str
+    result_bytes   : int
+    download_rate  : int
+    registry_addr  : str
+
+
+    def __init__(self, args: argparse.Namespace):
+        """
+            Constructor for the Config.
+
+            # Arguments
+            - `args`: The parsed command-line arguments to take the settings from.
+
+            # Returns
+            A new Config instance.
+        """
+
+        self.packages = args.packages
+        self.functions = args.functions
+        self.datasets = args.datasets
+        self.location = args.location
+        self.index_delay = args.index_latency / 1000.0
+        self.session_delay = args.session_latency / 1000.0
+        self.execute_delay = args.execute_latency / 1000.0
+        self.stdout_bytes = args.stdout_bytes
+        self.result_kind = args.result_kind
+        self.result_bytes = args.result_bytes
+        self.download_rate = args.download_rate
+        self.registry_addr = f"{'http' if args.no_tls else 'https'}://{args.advertise}:{args.registry_port}"
+
+class Stats:
+    """
+        Keeps track of how long the fake instance took to handle every kind of request, and how much it sent.
+    """
+
+    _lock     : threading.Lock
+    _timings  : typing.Dict[str, typing.List[float]]
+    _bytes    : typing.Dict[str, int]
+    _start    : float
+
+
+    def __init__(self):
+        """
+            Constructor for the Stats.
+
+            # Returns
+            A new Stats instance.
+        """
+
+        self._lock = threading.Lock()
+        self._timings = {}
+        self._bytes = {}
+        self._start = time.perf_counter()
+
+    def record(self, what: str, duration: float, n_bytes: int = 0):
+        """
+            Records that a request was handled.
+
+            # Arguments
+            - `what`: The kind of request (e.g., `api:/graphql`).
+            - `duration`: How long it took to handle the request, in seconds.
+            - `n_bytes`: The number of bytes sent in the reply.
+        """
+
+        with self._lock:
+            self._timings.setdefault(what, []).append(duration)
+            self._bytes[what] = self._bytes.get(what, 0) + n_bytes
+
+    def summary(self) -> typing.Dict[str, typing.Any]:
+        """
+            Summarizes the recorded requests.
+
+            # Returns
+            A JSON-compatible map of request kinds to their count, mean/p95/max time (in milliseconds), bytes sent and throughput (in bytes per second of handling time).
+        """
+
+        with self._lock:
+            result: typing.Dict[str, typing.Any] = { "uptime_s": time.perf_counter() - self._start, "requests": {} }
+            for (what, timings) in sorted(self._timings.items()):
+                ordered = sorted(timings)
+                total = sum(ordered)
+                result["requests"][what] = {
+                    "count": len(ordered),
+                    "mean_ms": 1000.0 * total / len(ordered),
+                    "p95_ms": 1000.0 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                    "max_ms": 1000.0 * ordered[-1],
+                    "bytes": self._bytes[what],
+                    "throughput_bps": self._bytes[what] / total if total > 0 else 0.0,
+                }
+            return result
+
+class DatasetReader(io.RawIOBase):
+    """
+        A file-like object that produces a (deterministic, incompressible) dataset of a given size at a given rate, without keeping it in memory.
+    """
+
+    _block     : bytes
+    _remaining : int
+    _rate      : int
+    _start     : float
+    _sent      : int
+
+
+    def __init__(self, block: bytes, size: int, rate: int):
+        """
+            Constructor for the DatasetReader.
+
+            # Arguments
+            - `block`: A block of random data to repeat until the dataset is complete.
+            - `size`: The total size of the dataset.
+            - `rate`: The maximum rate at which to produce the dataset, in bytes per second. `0` means unlimited.
+
+            # Returns
+            A new DatasetReader instance.
+        """
+
+        self._block = block
+        self._remaining = size
+        self._rate = rate
+        self._start = time.perf_counter()
+        self._sent = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), len(self._block), self._remaining)
+        if n == 0: return 0
+
+        # Throttle if we're ahead of schedule
+        if self._rate > 0:
+            ahead = (self._sent + n) / self._rate - (time.perf_counter() - self._start)
+            if ahead > 0: time.sleep(ahead)
+
+        buffer[:n] = self._block[:n]
+        self._remaining -= n
+        self._sent += n
+        return n
+
+
+
+
+
+##### SERVICES #####
+class ApiHandler(http.server.BaseHTTPRequestHandler):
+    """
+        Handles requests to the fake API service, i.e., the package and data indices.
+    """
+
+    config : Config
+    stats  : Stats
+
+
+    def log_message(self, format: str, *args: typing.Any):
+        # Only log in debug mode, we're benchmarking after all
+        if DEBUG: super().log_message(format, *args)
+
+    def reply(self, status: int, body: typing.Union[str, bytes], content_type: str = "application/json"):
+        """
+            Sends a complete reply.
+
+            # Arguments
+            - `status`: The HTTP status code to send.
+            - `body`: The body of the reply.
+            - `content_type`: The content type of the body.
+        """
+
+        raw = body.encode() if type(body) == str else typing.cast(bytes, body)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        start = time.perf_counter()
+        path = urllib.parse.urlparse(self.path).path.rstrip("/")
+
+        if path == "/version":
+            body = "3.0.0"
+        elif path == "/health":
+            body = "OK"
+        elif path == "/data/info":
+            time.sleep(self.config.index_delay)
+            body = json.dumps(data_index(self.config))
+        elif path.startswith("/data/info/"):
+            name = urllib.parse.unquote(path[len("/data/info/"):])
+            body = json.dumps(data_info(self.config, name))
+        elif path == "/infra/registries":
+            body = json.dumps({ self.config.location: self.config.registry_addr })
+        elif path == f"/infra/registries/{self.config.location}":
+            body = json.dumps(self.config.registry_addr)
+        else:
+            self.reply(404, f"Unknown path '{path}'", content_type="text/plain")
+            return
+
+        self.reply(200, body)
+        self.stats.record(f"api:{'/data/info/<name>' if path.startswith('/data/info/') else path}", time.perf_counter() - start, len(body))
+
+    def do_POST(self):
+        start = time.perf_counter()
+        path = urllib.parse.urlparse(self.path).path.rstrip("/")
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        if path != "/graphql":
+            self.reply(404, f"Unknown path '{path}'", content_type="text/plain")
+            return
+
+        # We assume the query is the one for the package index
+        time.sleep(self.config.index_delay)
+        body = json.dumps({ "data": { "packages": package_index(self.config) } })
+        self.reply(200, body)
+        self.stats.record("api:/graphql", time.perf_counter() - start, len(body))
+
+class RegistryHandler(http.server.BaseHTTPRequestHandler):
+    """
+        Handles requests to the fake registry, i.e., dataset downloads.
+    """
+
+    config : Config
+    stats  : Stats
+    block  : bytes
+
+
+    def log_message(self, format: str, *args: typing.Any):
+        if DEBUG: super().log_message(format, *args)
+
+    def do_GET(self):
+        start = time.perf_counter()
+        path = urllib.parse.urlparse(self.path).path.rstrip("/")
+        for prefix in [ "/data/download/", "/results/download/" ]:
+            if path.startswith(prefix): break
+        else:
+            self.send_error(404, f"Unknown path '{path}'")
+            return
+        name = urllib.parse.unquote(path[len(prefix):])
+
+        # Stream the dataset as a tarball (without a length, so the connection closes when it's done)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/gzip")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        counter = CountingWriter(self.wfile)
+        with gzip.GzipFile(fileobj=counter, mode="wb", compresslevel=1) as gz, tarfile.open(fileobj=gz, mode="w|") as tar:
+            info = tarfile.TarInfo("data.bin")
+            info.size = self.config.result_bytes
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BufferedReader(DatasetReader(self.block, info.size, self.config.download_rate), buffer_size=BLOCK_SIZE))
+        self.stats.record(f"registry:{prefix}<name>", time.perf_counter() - start, counter.n_bytes)
+        if DEBUG: print(f"Sent dataset '{name}' ({counter.n_bytes} bytes)")
+
+class CountingWriter(io.RawIOBase):
+    """
+        Wraps a writable file to count how many bytes are written to it.
+    """
+
+    _inner  : typing.BinaryIO
+    n_bytes : int
+
+
+    def __init__(self, inner: typing.BinaryIO):
+        self._inner = inner
+        self.n_bytes = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._inner.write(data)
+        self.n_bytes += len(data)
+        return len(data)
+
+
+
+class Driver:
+    """
+        Implements the fake driver service.
+    """
+
+    config   : Config
+    stats    : Stats
+    _lock    : threading.Lock
+    _counter : int
+
+
+    def __init__(self, config: Config, stats: Stats):
+        """
+            Constructor for the Driver.
+
+            # Arguments
+            - `config`: The settings of the fake instance.
+            - `stats`: The statistics to record our requests in.
+
+            # Returns
+            A new Driver instance.
+        """
+
+        self.config = config
+        self.stats = stats
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def handler(self) -> grpc.GenericRpcHandler:
+        """
+            Returns the gRPC handler that dispatches requests to this Driver.
+        """
+
+        return grpc.method_handlers_generic_handler(DRIVER_SERVICE, {
+            "CreateSession": grpc.unary_unary_rpc_method_handler(self.create_session, request_deserializer=decode_message, response_serializer=encode_message),
+            "Check": grpc.unary_unary_rpc_method_handler(self.check, request_deserializer=decode_message, response_serializer=encode_message),
+            "Execute": grpc.unary_stream_rpc_method_handler(self.execute, request_deserializer=decode_message, response_serializer=encode_message),
+        })
+
+    def create_session(self, _request: typing.Dict[int, typing.Any], _context: grpc.ServicerContext) -> typing.List[typing.Tuple[int, typing.Any]]:
+        start = time.perf_counter()
+        time.sleep(self.config.session_delay)
+        self.stats.record("driver:CreateSession", time.perf_counter() - start)
+        return [ (1, str(uuid.uuid4())) ]
+
+    def check(self, _request: typing.Dict[int, typing.Any], _context: grpc.ServicerContext) -> typing.List[typing.Tuple[int, typing.Any]]:
+        self.stats.record("driver:Check", 0.0)
+        return [ (1, True) ]
+
+    def execute(self, request: typing.Dict[int, typing.Any], _context: grpc.ServicerContext) -> typing.Iterator[typing.List[typing.Tuple[int, typing.Any]]]:
+        start = time.perf_counter()
+        with self._lock:
+            n = self._counter
+            self._counter += 1
+        if DEBUG: print(f"Executing workflow {n} ({len(request.get(2, b''))} bytes) in session '{request.get(1, b'').decode()}'")
+
+        # Pretend to run it, then send the output and the result
+        time.sleep(self.config.execute_delay)
+        prints = payload(self.config.stdout_bytes, f"workflow {n}")
+        if len(prints) > 0:
+            yield [ (1, False), (4, prints) ]
+        value = full_value(self.config.result_kind, f"fake_result_{n}" if self.config.result_kind == "data" else payload(self.config.result_bytes, f"result {n}"))
+        yield [ (1, True), (5, value) ]
+        self.stats.record("driver:Execute", time.perf_counter() - start, len(prints) + len(value))
+
+
+
+def package_index(config: Config) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+        Generates the synthetic package index, in the format returned by Brane's GraphQL API.
+
+        # Arguments
+        - `config`: The settings that determine the size of the index.
+
+        # Returns
+        The list of packages.
+    """
+
+    created = datetime.datetime(2023, 10, 22, tzinfo=datetime.timezone.utc).isoformat()
+    packages = []
+    for p in range(config.packages):
+        functions = { f"func_{f}": { "parameters": [ { "name": "input", "type": "string" } ], "pattern": None, "return_type": "string", "requirements": None } for f in range(config.functions) }
+        packages.append({
+            "created": created,
+            "description": f"Synthetic package {p}",
+            "detached": False,
+            "digest": f"sha256:{p:064x}",
+            "owners": [ "fake" ],
+            "id": str(uuid.UUID(int=p)),
+            "kind": "ecu",
+            "name": f"fake_package_{p}",
+            "version": "1.0.0",
+            "functionsAsJson": json.dumps(functions),
+            "typesAsJson": json.dumps({}),
+        })
+    return packages
+
+def data_info(config: Config, name: str) -> typing.Dict[str, typing.Any]:
+    """
+        Generates the synthetic metadata of a single dataset, in the format returned by Brane's API.
+
+        # Arguments
+        - `config`: The settings of the fake instance.
+        - `name`: The name of the dataset.
+
+        # Returns
+        The metadata of the dataset.
+    """
+
+    return {
+        "name": name,
+        "owners": [ "fake" ],
+        "description": f"Synthetic dataset '{name}'",
+        "created": datetime.datetime(2023, 10, 22, tzinfo=datetime.timezone.utc).isoformat(),
+        "access": { config.location: { "kind": "file", "path": f"/data/{name}" } },
+    }
+
+def data_index(config: Config) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+    """
+        Generates the synthetic data index, in the format returned by Brane's API.
+
+        # Arguments
+        - `config`: The settings that determine the size of the index.
+
+        # Returns
+        A map of dataset names to their metadata.
+    """
+
+    return { f"fake_dataset_{d}": data_info(config, f"fake_dataset_{d}") for d in range(config.datasets) }
+
+
+
+
+
+##### ENTRYPOINT #####
+def main(args: argparse.Namespace) -> int:
+    """
+        Entrypoint to the script.
+
+        # Arguments
+        - `args`: The parsed command-line arguments.
+
+        # Returns
+        The exit code of the script.
+    """
+
+    global DEBUG
+    DEBUG = args.debug
+    config = Config(args)
+    stats = Stats()
+
+    # Prepare the TLS context for the registry
+    ssl_context = None
+    if not args.no_tls:
+        try:
+            generate_certs(args.dir, args.location, args.user, [ args.advertise, "localhost", "host.docker.internal", "127.0.0.1" ])
+        except RuntimeError as e:
+            print(f"{e}", file=sys.stderr)
+            return 1
+        server_dir = os.path.join(args.dir, "server")
+        ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        ssl_context.load_cert_chain(os.path.join(server_dir, "server.pem"), os.path.join(server_dir, "server-key.pem"))
+        ssl_context.load_verify_locations(os.path.join(server_dir, "ca.pem"))
+        ssl_context.verify_mode = ssl.CERT_REQUIRED
+
+    # Start the HTTP services
+    api = http.server.ThreadingHTTPServer((args.host, args.api_port), type("BoundApiHandler", (ApiHandler,), { "config": config, "stats": stats }))
+    registry = http.server.ThreadingHTTPServer((args.host, args.registry_port), type("BoundRegistryHandler", (RegistryHandler,), { "config": config, "stats": stats, "block": random.Random(args.seed).randbytes(BLOCK_SIZE) }))
+    if ssl_context is not None:
+        registry.socket = ssl_context.wrap_socket(registry.socket, server_side=True)
+    threads = [ threading.Thread(target=s.serve_forever, daemon=True) for s in [ api, registry ] ]
+    for t in threads: t.start()
+
+    # Start the driver
+    driver = grpc.server(concurrent.futures.ThreadPoolExecutor(max_workers=args.workers))
+    driver.add_generic_rpc_handlers((Driver(config, stats).handler(),))
+    driver.add_insecure_port(f"{args.host}:{args.drv_port}")
+    driver.start()
+
+    # Wait until we're told to stop
+    print(f"Fake Brane instance running ({config.packages} packages, {config.datasets} datasets):")
+    print(f" - API      : http://{args.advertise}:{args.api_port}")
+    print(f" - Driver   : http://{args.advertise}:{args.drv_port}")
+    print(f" - Registry : {config.registry_addr} (location '{config.location}')")
+    if ssl_context is not None:
+        print(f"Use '{os.path.join(args.dir, 'certs')}' as the certificate directory of the IDE.")
+    print("Press Ctrl+C to stop.")
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda _s, _f: stop.set())
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+
+    # Shut down & report
+    driver.stop(grace=1).wait()
+    api.shutdown()
+    registry.shutdown()
+    summary = stats.summary()
+    print("\nHandled requests:")
+    for (what, s) in summary["requests"].items():
+        print(f" - {what:<32} {s['count']:>6}x  mean {s['mean_ms']:>9.2f} ms  p95 {s['p95_ms']:>9.2f} ms  max {s['max_ms']:>9.2f} ms  {s['bytes']:>12} bytes  {s['throughput_bps'] / (1024 * 1024):>8.2f} MiB/s")
+    if args.stats is not None:
+        with open(args.stats, "w") as h:
+            json.dump(summary, h, indent=4)
+        print(f"Statistics written to '{args.stats}'")
+    return 0
+
+
+
+# Actual entrypoint
+if __name__ == "__main__":
+    # Define the arguments
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--debug", action="store_true", help="If given, logs every request.")
+    parser.add_argument("--host", default="0.0.0.0", help="The address to listen on.")
+    parser.add_argument("--advertise", default="localhost", help="The hostname by which the IDE reaches this service (e.g., 'host.docker.internal' from within the IDE container).")
+    parser.add_argument("--api-port", type=int, default=50051, help="The port of the API service.")
+    parser.add_argument("--registry-port", type=int, default=50052, help="The port of the registry that serves datasets.")
+    parser.add_argument("--drv-port", type=int, default=50053, help="The port of the driver service.")
+    parser.add_argument("--workers", type=int, default=32, help="The maximum number of workflows executed in parallel.")
+    parser.add_argument("--dir", default="./build/fake-brane", help="The directory to generate certificates in.")
+    parser.add_argument("--no-tls", action="store_true", help="If given, serves the registry over plain HTTP instead of HTTPS with client certificates.")
+    parser.add_argument("--location", default="fake", help="The name of the location that the registry pretends to be.")
+    parser.add_argument("--user", default="fake", help="The name of the user to generate a client certificate for.")
+
+    parser.add_argument("--packages", type=int, default=10, help="The number of packages in the package index.")
+    parser.add_argument("--functions", type=int, default=5, help="The number of functions in every package.")
+    parser.add_argument("--datasets", type=int, default=10, help="The number of datasets in the data index.")
+    parser.add_argument("--index-latency", type=float, default=0.0, help="The time it takes to serve either index, in milliseconds.")
+    parser.add_argument("--session-latency", type=float, default=0.0, help="The time it takes to create a session, in milliseconds.")
+    parser.add_argument("--execute-latency", type=float, default=100.0, help="The time it takes to execute a workflow, in milliseconds.")
+    parser.add_argument("--stdout-bytes", type=int, default=0, help="The size of the output that every workflow prints.")
+    parser.add_argument("--result-kind", choices=[ "void", "string", "data" ], default="void", help="The kind of result that every workflow returns.")
+    parser.add_argument("--result-bytes", type=int, default=1024 * 1024, help="The size of the result of every workflow (i.e., the string returned or the dataset to download).")
+    parser.add_argument("--download-rate", type=int, default=0, help="The maximum rate at which datasets are served, in bytes per second. Use '0' for unlimited.")
+    parser.add_argument("--seed", type=int, default=42, help="The seed for the random contents of datasets.")
+    parser.add_argument("--stats", help="If given, writes the statistics of all handled requests as JSON to this file when stopped.")
+
+    # Parse the arguments & run
+    exit(main(parser.parse_args()))
@@ -0,0 +1,407 @@
+/* MOCK BRANE CLI.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 13:02:44
+ * Last edited:
+ *   20 Oct 2026, 10:03:02
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements a stand-in for `libbrane_cli.so` that does not connect to
+ *   any Brane instance, but instead sleeps and produces payloads as
+ *   configured through environment variables. Used to benchmark the
+ *   kernel.
+ *
+ *   The following environment variables are read (all optional):
+ *   - `BRANE_MOCK_INDEX_MS`: Time taken to load either index.
+ *   - `BRANE_MOCK_COMPILE_MS`: Time taken by `compiler_compile()`.
+ *   - `BRANE_MOCK_RUN_MS`: Time taken by `vm_run()`.
+ *   - `BRANE_MOCK_PROCESS_MS`: Time taken by `vm_process()`.
+ *   - `BRANE_MOCK_SERIALIZE_MS`: Time taken by `fvalue_serialize()`.
+ *   - `BRANE_MOCK_PRINTS_BYTES`: Size of the prints returned by `vm_run()`.
+ *   - `BRANE_MOCK_RESULT_BYTES`: Size of the serialized result.
+ *   - `BRANE_MOCK_RESULT_ELEMS`: If non-zero, workflows return an array of this many numbers instead of a string.
+ *   - `BRANE_MOCK_DATA_BYTES`: If non-zero, workflows return a dataset of this size that has to be downloaded.
+ *   - `BRANE_MOCK_RESULT_JSON`: If set (and no dataset is returned), workflows return this JSON value instead of a string.
+ *   - `BRANE_MOCK_TASKS`: The number of tasks reported by `vm_trace()` for every workflow (3 by default).
+ *   - `BRANE_MOCK_UPDATE_MS`: Time taken to update either index.
+ *   - `BRANE_MOCK_UPDATE_CHANGES`: The number of packages (and datasets) that every index update adds (1 by default).
+ *   - `BRANE_MOCK_DRIVER`: If `1`, every VM keeps a TCP connection to the driver endpoint (which can be any TCP server), and fails to be created or to run workflows if the driver is unreachable or closed the connection.
+ *
+ *   Snippets containing `mock_error` fail to compile, and snippets
+ *   containing `mock_fail` fail to run. Snippets containing
+ *   `mock_unknown` fail to compile with an unknown package error until
+ *   the package index has been updated.
+**/
+
+#include <atomic>
+#include <chrono>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <memory>
+#include <netdb.h>
+#include <poll.h>
+#include <string>
+#include <sys/socket.h>
+#include <sys/stat.h>
+#include <thread>
+#include <unistd.h>
+
+#include "brane/brane_cli.h"
+
+using namespace std;
+
+
+/***** TYPES *****/
+struct _error {
+    /* The error message. */
+    string message;
+};
+struct _source_error {
+    /* Any warnings. */
+    string swarns;
+    /* Any source errors. */
+    string serrs;
+    /* Any other error. */
+    string err;
+};
+
+struct _package_index {
+    /* The number of packages in the index, shared with the compilers created with it (like the real index is). */
+    shared_ptr<atomic<size_t>> n_packages;
+};
+struct _data_index {
+    /* The number of datasets in the index. */
+    shared_ptr<atomic<size_t>> n_datasets;
+};
+
+struct _workflow {
+    /* The snippet that was compiled. */
+    string source;
+    /* The end user of the workflow. */
+    string user;
+};
+struct _compiler {
+    /* The number of snippets compiled so far. */
+    size_t n_compiled;
+    /* The number of packages in the index the compiler was created with. */
+    shared_ptr<atomic<size_t>> n_packages;
+};
+
+struct _full_value {
+    /* The serialized value. */
+    string value;
+    /* The name of the dataset, if this value refers to one. */
+    string data_name;
+    /* The number of elements in the value, if it's an array of numbers. */
+    size_t n_elems;
+    /* The value as JSON, if it's given as such. */
+    string json;
+};
+struct _virtual_machine {
+    /* The number of workflows run so far. */
+    size_t n_runs;
+    /* When the last workflow started and finished running, in milliseconds since the Unix epoch. */
+    double run_start;
+    double run_end;
+    /* The connection to the driver if `BRANE_MOCK_DRIVER` is set, or -1 otherwise. */
+    int driver;
+};
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Reads a number from the given environment variable, or returns 0 if it's not set. */
+static size_t env_num(const char* name) {
+    const char* value = getenv(name);
+    return value == nullptr ? 0 : strtoul(value, nullptr, 10);
+}
+
+/* Sleeps for the number of milliseconds in the given environment variable. */
+static void delay(const char* name) {
+    size_t ms = env_num(name);
+    if (ms > 0) { this_thread::sleep_for(chrono::milliseconds(ms)); }
+}
+
+/* Returns the current time in milliseconds since the Unix epoch. */
+static double now_ms() {
+    return chrono::duration<double, milli>(chrono::system_clock::now().time_since_epoch()).count();
+}
+
+/* Connects to the given endpoint (e.g., `http://localhost:50053`).
+ *
+ * # Returns
+ * The socket, or -1 if it could not connect.
+ */
+static int connect_to(const string& endpoint) {
+    string address = endpoint.find("://") != string::npos ? endpoint.substr(endpoint.find("://") + 3) : endpoint;
+    address = address.substr(0, address.find('/'));
+    size_t colon = address.rfind(':');
+    if (colon == string::npos) { return -1; }
+    struct addrinfo hints = {};
+    hints.ai_socktype = SOCK_STREAM;
+    struct addrinfo* addrs = nullptr;
+    if (getaddrinfo(address.substr(0, colon).c_str(), address.substr(colon + 1).c_str(), &hints, &addrs) != 0) { return -1; }
+    int fd = -1;
+    for (struct addrinfo* addr = addrs; addr != nullptr && fd < 0; addr = addr->ai_next) {
+        fd = socket(addr->ai_family, addr->ai_socktype | SOCK_CLOEXEC, addr->ai_protocol);
+        if (fd >= 0 && connect(fd, addr->ai_addr, addr->ai_addrlen) != 0) {
+            close(fd);
+            fd = -1;
+        }
+    }
+    freeaddrinfo(addrs);
+    return fd;
+}
+
+/* Copies a string to a fresh `malloc`-allocated buffer. */
+static char* to_c(const string& value) {
+    char* buffer = (char*) malloc(value.size() + 1);
+    memcpy(buffer, value.c_str(), value.size() + 1);
+    return buffer;
+}
+
+/* Generates a payload of (roughly) the given size, consisting of lines of text. */
+static string payload(size_t n_bytes, const char* prefix) {
+    string result;
+    result.reserve(n_bytes + 80);
+    size_t line = 0;
+    while (result.size() < n_bytes) {
+        result += string(prefix) + " line " + to_string(line++) + "\n";
+    }
+    result.resize(n_bytes);
+    return result;
+}
+
+/* Generates a list of numbers, formatted with the given delimiters. */
+static string numbers(size_t n, const char* open, const char* sep, const char* close) {
+    string result(open);
+    for (size_t i = 0; i < n; i++) {
+        if (i > 0) { result += sep; }
+        result += to_string(i * 0.5);
+    }
+    return result + close;
+}
+
+
+
+
+
+/***** LIBRARY *****/
+extern "C" {
+    const char* version() { return "mock"; }
+    void set_force_colour(bool force) {}
+
+
+
+    void error_free(Error* err) { delete err; }
+    void error_serialize_err(Error* err, char** buffer) { *buffer = to_c(err->message); }
+    void error_print_err(Error* err) { fprintf(stderr, "%s\n", err->message.c_str()); }
+
+
+
+    void serror_free(SourceError* serr) { delete serr; }
+    bool serror_has_swarns(SourceError* serr) { return !serr->swarns.empty(); }
+    bool serror_has_serrs(SourceError* serr) { return !serr->serrs.empty(); }
+    bool serror_has_err(SourceError* serr) { return !serr->err.empty(); }
+    void serror_serialize_swarns(SourceError* serr, char** buffer) { *buffer = to_c(serr->swarns); }
+    void serror_serialize_serrs(SourceError* serr, char** buffer) { *buffer = to_c(serr->serrs); }
+    void serror_serialize_err(SourceError* serr, char** buffer) { *buffer = to_c(serr->err); }
+    void serror_print_swarns(SourceError* serr) { fprintf(stderr, "%s", serr->swarns.c_str()); }
+    void serror_print_serrs(SourceError* serr) { fprintf(stderr, "%s", serr->serrs.c_str()); }
+    void serror_print_err(SourceError* serr) { fprintf(stderr, "%s", serr->err.c_str()); }
+
+
+
+    Error* pindex_new_remote(const char* endpoint, PackageIndex** pindex) {
+        delay("BRANE_MOCK_INDEX_MS");
+        *pindex = new PackageIndex{ make_shared<atomic<size_t>>(0) };
+        return nullptr;
+    }
+    void pindex_free(PackageIndex* pindex) { delete pindex; }
+
+    Error* dindex_new_remote(const char* endpoint, DataIndex** dindex) {
+        delay("BRANE_MOCK_INDEX_MS");
+        *dindex = new DataIndex{ make_shared<atomic<size_t>>(0) };
+        return nullptr;
+    }
+    void dindex_free(DataIndex* dindex) { delete dindex; }
+    Error* pindex_update(PackageIndex* pindex, const char* endpoint, size_t* n_changed) {
+        delay("BRANE_MOCK_UPDATE_MS");
+        const char* raw = getenv("BRANE_MOCK_UPDATE_CHANGES");
+        *n_changed = raw == nullptr ? 1 : strtoul(raw, nullptr, 10);
+        *(pindex->n_packages) += *n_changed;
+        return nullptr;
+    }
+    Error* dindex_update(DataIndex* dindex, const char* endpoint, size_t* n_changed) {
+        delay("BRANE_MOCK_UPDATE_MS");
+        const char* raw = getenv("BRANE_MOCK_UPDATE_CHANGES");
+        *n_changed = raw == nullptr ? 1 : strtoul(raw, nullptr, 10);
+        *(dindex->n_datasets) += *n_changed;
+        return nullptr;
+    }
+
+
+
+    void workflow_free(Workflow* workflow) { delete workflow; }
+    void workflow_set_user(Workflow* workflow, const char* user) { workflow->user = user; }
+    Error* workflow_disassemble(Workflow* workflow, char** assembly) {
+        *assembly = to_c("<mock workflow for '" + workflow->source + "'>");
+        return nullptr;
+    }
+
+
+
+    Error* compiler_new(PackageIndex* pindex, DataIndex* dindex, Compiler** compiler) {
+        *compiler = new Compiler{ 0, pindex->n_packages };
+        return nullptr;
+    }
+    void compiler_free(Compiler* compiler) { delete compiler; }
+    SourceError* compiler_compile(Compiler* compiler, const char* what, const char* raw, Workflow** workflow) {
+        delay("BRANE_MOCK_COMPILE_MS");
+        SourceError* serr = new SourceError();
+        if (strstr(raw, "mock_error") != nullptr) {
+            serr->serrs = string("error: mock compile error in ") + what + "\n";
+            *workflow = nullptr;
+            return serr;
+        }
+        if (strstr(raw, "mock_unknown") != nullptr && *(compiler->n_packages) == 0) {
+            serr->serrs = string("error: Unknown package 'mock_unknown' in ") + what + "\n";
+            *workflow = nullptr;
+            return serr;
+        }
+        compiler->n_compiled++;
+        *workflow = new Workflow{ raw, "" };
+        return serr;
+    }
+
+
+
+    void fvalue_free(FullValue* fvalue) { delete fvalue; }
+    bool fvalue_needs_processing(FullValue* fvalue) { return !fvalue->data_name.empty(); }
+    void fvalue_serialize(FullValue* fvalue, const char* data_dir, char** result) {
+        delay("BRANE_MOCK_SERIALIZE_MS");
+        if (!fvalue->data_name.empty()) {
+            *result = to_c(string("Data<") + fvalue->data_name + "> at " + data_dir + "/" + fvalue->data_name);
+        } else if (!fvalue->json.empty()) {
+            *result = to_c(fvalue->json);
+        } else if (fvalue->n_elems > 0) {
+            *result = to_c(numbers(fvalue->n_elems, "[\n    ", ",\n    ", "\n]"));
+        } else {
+            *result = to_c(fvalue->value);
+        }
+    }
+    void fvalue_to_json(FullValue* fvalue, const char* data_dir, char** result) {
+        delay("BRANE_MOCK_SERIALIZE_MS");
+        if (!fvalue->data_name.empty()) {
+            *result = to_c("{\"data\":\"" + fvalue->data_name + "\"}");
+        } else if (!fvalue->json.empty()) {
+            *result = to_c(fvalue->json);
+        } else if (fvalue->n_elems > 0) {
+            *result = to_c(numbers(fvalue->n_elems, "[", ",", "]"));
+        } else {
+            // The payload has no special characters other than newlines
+            string escaped = "\"";
+            for (char c : fvalue->value) { escaped += c == '\n' ? string("\\n") : string(1, c); }
+            *result = to_c(escaped + "\"");
+        }
+    }
+    void fvalue_data_id(FullValue* fvalue, char** name, char** version) {
+        *name = fvalue->data_name.empty() ? nullptr : to_c(fvalue->data_name);
+        *version = fvalue->data_name.empty() ? nullptr : to_c("1");
+    }
+
+
+
+    Error* vm_new(const char* api_endpoint, const char* drv_endpoint, const char* certs_dir, PackageIndex* pindex, DataIndex* dindex, VirtualMachine** vm) {
+        int driver = -1;
+        if (env_num("BRANE_MOCK_DRIVER") == 1) {
+            driver = connect_to(drv_endpoint);
+            if (driver < 0) { return new Error{ string("failed to connect to driver '") + drv_endpoint + "': transport error: connection refused" }; }
+        }
+        *vm = new VirtualMachine{ 0, 0.0, 0.0, driver };
+        return nullptr;
+    }
+    void vm_free(VirtualMachine* vm) {
+        if (vm->driver >= 0) { close(vm->driver); }
+        delete vm;
+    }
+    Error* vm_run(VirtualMachine* vm, Workflow* workflow, char** prints, FullValue** result) {
+        // Find out whether the driver closed our connection in the meantime (e.g., because it restarted)
+        if (vm->driver >= 0) {
+            struct pollfd pfd = { vm->driver, POLLIN, 0 };
+            char byte;
+            if (poll(&pfd, 1, 0) == 1 && recv(vm->driver, &byte, 1, MSG_PEEK | MSG_DONTWAIT) <= 0) {
+                *prints = nullptr;
+                *result = nullptr;
+                return new Error{ "transport error: connection closed by the driver" };
+            }
+        }
+
+        vm->run_start = now_ms();
+        delay("BRANE_MOCK_RUN_MS");
+        vm->run_end = now_ms();
+        if (workflow->source.find("mock_fail") != string::npos) {
+            *prints = nullptr;
+            *result = nullptr;
+            return new Error{ "mock execution failure" };
+        }
+        size_t run = vm->n_runs++;
+
+        // Produce the configured payloads
+        *prints = to_c(payload(env_num("BRANE_MOCK_PRINTS_BYTES"), "print"));
+        if (env_num("BRANE_MOCK_DATA_BYTES") > 0) {
+            *result = new FullValue{ "", "mock_result_" + to_string(run), 0, "" };
+        } else {
+            const char* json = getenv("BRANE_MOCK_RESULT_JSON");
+            *result = new FullValue{ payload(env_num("BRANE_MOCK_RESULT_BYTES"), "result"), "", env_num("BRANE_MOCK_RESULT_ELEMS"), json != nullptr ? json : "" };
+        }
+        return nullptr;
+    }
+    Error* vm_process(VirtualMachine* vm, FullValue* result, const char* data_dir) {
+        delay("BRANE_MOCK_PROCESS_MS");
+        if (result->data_name.empty()) { return nullptr; }
+
+        // "Download" the dataset
+        string dir = string(data_dir) + "/" + result->data_name;
+        mkdir(dir.c_str(), 0755);
+        ofstream h(dir + "/data.bin", ios::binary);
+        h << string(env_num("BRANE_MOCK_DATA_BYTES"), '\0');
+        if (!h.good()) { return new Error{ "failed to write '" + dir + "/data.bin'" }; }
+        return nullptr;
+    }
+    Error* vm_trace(VirtualMachine* vm, char** events) {
+        // Spread the tasks over the run: first queued, then running in overlapping stretches
+        const char* raw = getenv("BRANE_MOCK_TASKS");
+        size_t n = raw == nullptr ? 3 : strtoul(raw, nullptr, 10);
+        double d = vm->run_end - vm->run_start;
+        string result = "[";
+        for (size_t i = 0; i < n; i++) {
+            double submitted = vm->run_start + d * 0.05 * i / n;
+            double started = vm->run_start + d * (0.1 + 0.4 * i / n);
+            double finished = vm->run_start + d * (0.5 + 0.5 * (i + 1) / n);
+            if (i > 0) { result += ","; }
+            result += "{\"name\":\"mock.task_" + to_string(i) + "\",\"kind\":\"task\",\"location\":\"site" + to_string(i % 2) + "\",\"submitted\":" + to_string(submitted) + ",\"scheduled\":" + to_string(submitted + d * 0.02) + ",\"started\":" + to_string(started) + ",\"finished\":" + to_string(finished) + "}";
+        }
+        if (env_num("BRANE_MOCK_DATA_BYTES") > 0) {
+            result += string(n > 0 ? "," : "") + "{\"name\":\"mock_result\",\"kind\":\"transfer\",\"location\":\"site0\",\"submitted\":" + to_string(vm->run_start) + ",\"scheduled\":null,\"started\":" + to_string(vm->run_start + d * 0.05) + ",\"finished\":" + to_string(vm->run_start + d * 0.1) + ",\"bytes\":" + to_string(env_num("BRANE_MOCK_DATA_BYTES")) + "}";
+        }
+        *events = to_c(result + "]");
+        return nullptr;
+    }
+
+    Error* vm_serialize_state(VirtualMachine* vm, char** state) {
+        // The only state we have is the number of runs so far
+        *state = to_c(to_string(vm->n_runs));
+        return nullptr;
+    }
+    Error* vm_deserialize_state(VirtualMachine* vm, const char* state) {
+        vm->n_runs = strtoul(state, nullptr, 10);
+        return nullptr;
+    }
+}
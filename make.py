@@ -5,7 +5,7 @@
 # Created:
 #   02 Aug 2023, 08:38:41
 # Last edited:
-#   05 Mar 2024, 11:41:48
+#   20 Oct 2026, 09:49:31
 # Auto updated?
 #   Yes
 #
@@ -15,14 +15,24 @@
 
 import abc
 import argparse
+import datetime
+import json
 import os
 import pathlib
 import platform
+import re
 import shlex
+import shutil
+import socket
+import stat
 import subprocess
 import sys
+import tarfile
+import tempfile
+import threading
 import time
 import typing
+import urllib.parse
 
 
 ##### GLOBALS #####
@@ -32,6 +42,11 @@ DEBUG: bool = True
 # Determines any arguments relevant only for targets
 TARGET_ARGS: typing.Dict[str, typing.Any] = {}
 
+# The sources of the unit tests (see `tests/`)
+UNIT_TEST_SOURCES: typing.List[str] = [ "./tests/main.cpp", "./tests/test_jobs.cpp", "./tests/test_utils.cpp", "./tests/test_download.cpp", "./tests/test_data_cache.cpp", "./tests/test_results.cpp", "./tests/test_outputs.cpp", "./tests/test_background.cpp", "./tests/test_sweeps.cpp", "./tests/test_dependencies.cpp", "./tests/test_timeline.cpp", "./tests/test_hibernation.cpp", "./tests/test_admission.cpp", "./tests/test_connection.cpp" ]
+# The modules in `src/` that the unit tests cover (which, unlike the rest of the kernel, build without xeus)
+UNIT_TEST_MODULES: typing.List[str] = [ "jobs", "utils", "download", "data_cache", "results", "outputs", "background", "connection", "admission", "sweeps", "dependencies", "timeline", "hibernation" ]
+
 
 
 
@@ -240,6 +255,312 @@ def get_default_certs_dir() -> str:
     # If we found it, mark its directory!
     return f"{instance}/certs"
 
+def container_notebook_path(notebook_dir: str, path: str) -> typing.Optional[str]:
+    """
+        Maps a path on the host to where it is in the IDE container, which mounts the notebook directory at `/home/brane/notebooks`.
+
+        # Arguments
+        - `notebook_dir`: The notebook directory on the host.
+        - `path`: The path on the host to map.
+
+        # Returns
+        The path in the container, or `None` if `path` is not in `notebook_dir`.
+    """
+
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(notebook_dir))
+    if rel == os.pardir or rel.startswith(os.pardir + os.sep): return None
+    return "/home/brane/notebooks" if rel == os.curdir else f"/home/brane/notebooks/{rel.replace(os.sep, '/')}"
+
+def parse_bytes(raw: str) -> int:
+    """
+        Parses a human-readable number of bytes, like the kernel does (e.g., `512M` or `10G`; the suffix is a power of 1024).
+
+        # Arguments
+        - `raw`: The string to parse.
+
+        # Returns
+        The number of bytes.
+
+        # Errors
+        This function raises a `ValueError` if the given string is not a valid size.
+    """
+
+    units = { "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3, "t": 1024 ** 4 }
+    if len(raw) > 0 and raw[-1].lower() in units:
+        return int(float(raw[:-1]) * units[raw[-1].lower()])
+    return int(float(raw))
+
+def format_bytes(n_bytes: int) -> str:
+    """
+        Formats a number of bytes as a human-readable string (e.g., `12.3 MiB`).
+
+        # Arguments
+        - `n_bytes`: The number of bytes to format.
+
+        # Returns
+        The formatted string.
+    """
+
+    value = float(n_bytes)
+    for unit in [ "B", "KiB", "MiB", "GiB" ]:
+        if value < 1024.0:
+            return f"{n_bytes} B" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024.0
+    return f"{value:.1f} TiB"
+
+def copy_file(source: str, target: str):
+    """
+        Copies a file atomically, preserving its mode and modification time.
+
+        The copy is made in a temporary file next to the target, which then replaces the target in one go; so the target is either the old or the new file, never a partial one. The contents are copied by the kernel where possible: as a reflink (sharing the data until either is changed) on filesystems that support it, and otherwise with `copy_file_range()` or `sendfile()`.
+
+        # Arguments
+        - `source`: The file to copy.
+        - `target`: The path to copy it to. Its parent directory must exist.
+    """
+
+    info = os.stat(source)
+    (handle, temp) = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", dir=(os.path.dirname(target) or "."))
+    try:
+        with open(source, "rb") as s, os.fdopen(handle, "wb") as t:
+            copied = False
+            # Try a reflink first (`FICLONE`, which only exists on Linux; hence the local import)
+            if sys.platform.startswith("linux"):
+                try:
+                    import fcntl
+                    fcntl.ioctl(t.fileno(), 0x40049409, s.fileno())
+                    copied = True
+                except OSError:
+                    pass
+            # Then try to have the kernel copy the data
+            def kernel_copy(copy: typing.Callable[[int], int]) -> bool:
+                offset = 0
+                try:
+                    while offset < info.st_size:
+                        n_bytes = copy(offset)
+                        if n_bytes == 0: break
+                        offset += n_bytes
+                except OSError:
+                    pass
+                if offset == info.st_size: return True
+                t.truncate(0)
+                return False
+            if not copied and hasattr(os, "copy_file_range"):
+                copied = kernel_copy(lambda offset: os.copy_file_range(s.fileno(), t.fileno(), info.st_size - offset, offset, offset))
+            if not copied and hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+                copied = kernel_copy(lambda offset: os.sendfile(t.fileno(), s.fileno(), offset, info.st_size - offset))
+            # Else, do it ourselves
+            if not copied:
+                shutil.copyfileobj(s, t, 1024 * 1024)
+        os.chmod(temp, stat.S_IMODE(info.st_mode))
+        os.utime(temp, ns=(info.st_atime_ns, info.st_mtime_ns))
+        os.replace(temp, target)
+    except BaseException:
+        if os.path.exists(temp): os.remove(temp)
+        raise
+
+def same_file(source: str, target: str) -> bool:
+    """
+        Checks whether a copy (see `copy_file()`) of a file is still up-to-date.
+
+        Files with a different size are different, and files with the same size and modification time are the same (since copies keep the modification time). Only otherwise are their contents compared; if they turn out the same (e.g., the original was only touched), the copy gets the modification time of the original so that they need not be compared again.
+
+        # Arguments
+        - `source`: The original file.
+        - `target`: The copy.
+
+        # Returns
+        True if `target` has the same contents as `source`, or False otherwise (including if it doesn't exist).
+    """
+
+    try:
+        source_info = os.stat(source)
+        target_info = os.stat(target)
+    except FileNotFoundError:
+        return False
+    if source_info.st_size != target_info.st_size: return False
+    if source_info.st_mtime_ns == target_info.st_mtime_ns: return True
+    with open(source, "rb") as s, open(target, "rb") as t:
+        while True:
+            buffer = s.read(1024 * 1024)
+            if buffer != t.read(1024 * 1024): return False
+            if len(buffer) == 0: break
+    try:
+        os.utime(target, ns=(target_info.st_atime_ns, source_info.st_mtime_ns))
+    except OSError as e:
+        pdebug(f"Failed to update the modification time of '{target}': {e}")
+    return True
+
+def compose_project_containers(compose: typing.List[str], env: typing.Dict[str, str]) -> typing.Optional[typing.List[typing.Dict[str, str]]]:
+    """
+        Finds the containers of a Docker Compose project.
+
+        # Arguments
+        - `compose`: The `docker compose` command to call, including the project (`-p`) and file (`-f`) to look at.
+        - `env`: The (resolved) environment with which the project is started.
+
+        # Returns
+        A list with every container's `id`, `service`, `config-hash` and `state`, or `None` if we failed to find out (the reason is already printed as debug message, then).
+    """
+
+    # Find the name of the project
+    (code, stdout, stderr) = Process(compose + [ "config", "--format", "json" ], env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+    if code != 0:
+        pdebug(f"Failed to render the configuration of the Docker Compose project: {typing.cast(str, stderr).strip()}")
+        return None
+    project = json.loads(typing.cast(str, stdout))["name"]
+
+    # List its containers (including stopped ones)
+    args = typing.cast(typing.List[str], TARGET_ARGS["docker"]) + [ "ps", "-a", "--filter", f"label=com.docker.compose.project={project}", "--format", "{{.ID}}\t{{.Label \"com.docker.compose.service\"}}\t{{.Label \"com.docker.compose.config-hash\"}}\t{{.State}}" ]
+    (code, stdout, stderr) = Process(args, env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+    if code != 0:
+        pdebug(f"Failed to list the containers of Docker Compose project '{project}': {typing.cast(str, stderr).strip()}")
+        return None
+    containers = []
+    for line in typing.cast(str, stdout).splitlines():
+        fields = line.split("\t")
+        if len(fields) != 4: continue
+        containers.append({ "id": fields[0], "service": fields[1], "config-hash": fields[2], "state": fields[3] })
+    return containers
+
+def compose_project_matches(compose: typing.List[str], env: typing.Dict[str, str]) -> typing.Tuple[bool, str]:
+    """
+        Checks whether a running Docker Compose project matches its configuration; i.e., whether `docker compose up` would leave it as it is.
+
+        This is the case if every service has a running container with the same configuration hash as Docker Compose computes for the configuration now (which covers the resolved environment, volumes, ports, etc.), created from the image that the service's image name refers to now.
+
+        # Arguments
+        - `compose`: The `docker compose` command to call, including the project (`-p`) and file (`-f`) to check.
+        - `env`: The (resolved) environment with which the project would be started.
+
+        # Returns
+        A tuple with whether it matches, and why (not).
+    """
+
+    # Get what Docker Compose wants to run
+    (code, stdout, stderr) = Process(compose + [ "config", "--format", "json" ], env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+    if code != 0: return (False, f"its configuration could not be rendered ({typing.cast(str, stderr).strip()})")
+    services: typing.Dict[str, typing.Any] = json.loads(typing.cast(str, stdout))["services"]
+    (code, stdout, stderr) = Process(compose + [ "config", "--hash", "*" ], env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+    if code != 0: return (False, f"its configuration could not be hashed ({typing.cast(str, stderr).strip()})")
+    hashes = dict([ tuple(line.split()) for line in typing.cast(str, stdout).splitlines() if len(line.split()) == 2 ])
+
+    # Get what is running
+    containers = compose_project_containers(compose, env)
+    if containers is None: return (False, "its containers could not be listed")
+    running: typing.Dict[str, str] = {}
+    for service in services:
+        matching = [ c for c in containers if c["service"] == service ]
+        if len(matching) == 0: return (False, f"service '{service}' has no container")
+        for container in matching:
+            if container["state"] != "running": return (False, f"the container of service '{service}' is {container['state']}")
+            if container["config-hash"] != hashes.get(service, None): return (False, f"the configuration of service '{service}' changed")
+            running[container["id"]] = service
+
+    # Compare the images that the containers run with the ones the services refer to
+    docker = typing.cast(typing.List[str], TARGET_ARGS["docker"])
+    ids = list(running)
+    (code, stdout, _) = Process(docker + [ "inspect", "--format", "{{.Image}}" ] + ids, env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+    if code != 0: return (False, "its containers could not be inspected")
+    for (id, image) in zip(ids, typing.cast(str, stdout).split()):
+        name = services[running[id]].get("image", None)
+        if name is None: continue
+        (code, stdout, _) = Process(docker + [ "image", "inspect", "--format", "{{.Id}}", name ], env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+        if code != 0: return (False, f"image '{name}' of service '{running[id]}' could not be inspected")
+        if typing.cast(str, stdout).strip() != image: return (False, f"image '{name}' of service '{running[id]}' was rebuilt")
+    return (True, "all services are running with the current configuration and images")
+
+def wait_healthy(container: str, timeout: float, env: typing.Dict[str, str], since: typing.Optional[float] = None):
+    """
+        Waits until a Docker container reports itself as healthy.
+
+        # Arguments
+        - `container`: The container to wait for. It must exist and have a healthcheck.
+        - `timeout`: The maximum number of seconds to wait.
+        - `env`: The environment with which to call Docker.
+        - `since`: If given, the time (as returned by `time.time()`) since which to consider the container becoming healthy (e.g., when it was started), so that we cannot miss it before we start waiting.
+
+        # Errors
+        This function raises a `RuntimeError` if the container has no healthcheck or did not become healthy in time.
+    """
+
+    # Subscribe to the container's health events first, so that we cannot miss it becoming healthy between checking and subscribing
+    docker = typing.cast(typing.List[str], TARGET_ARGS["docker"])
+    start = time.time() if since is None else since
+    events = subprocess.Popen(docker + [ "events", "--since", f"{start:.3f}", "--filter", f"container={container}", "--filter", "event=health_status", "--format", "{{.Status}}" ], env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    deadline = threading.Timer(timeout, events.kill)
+    deadline.start()
+    try:
+        # It may already be healthy (e.g., when it was already running)
+        args = docker + [ "inspect", "--format", "{{if .State.Health}}{{.State.Health.Status}}{{else}}none{{end}}", container ]
+        (code, stdout, _) = Process(args, env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+        if code != 0: raise RuntimeError(f"Failed to run command '{Process.shellify(args)}'")
+        status = typing.cast(str, stdout).strip()
+        if status == "none": raise RuntimeError(f"Container '{container}' has no healthcheck")
+
+        # Otherwise, wait until Docker tells us it is
+        if status != "healthy":
+            for line in typing.cast(typing.IO[str], events.stdout):
+                pdebug(f"Container '{container}': {line.strip()}")
+                if line.strip() == "health_status: healthy":
+                    status = "healthy"
+                    break
+        if status != "healthy":
+            raise RuntimeError(f"Container '{container}' did not become healthy within {timeout:g} seconds")
+    finally:
+        deadline.cancel()
+        events.kill()
+        events.wait()
+    pdebug(f"Container '{container}' is healthy after {time.time() - start:.2f} seconds")
+
+def free_port() -> int:
+    """
+        Finds a TCP port on localhost that is not in use right now.
+
+        # Returns
+        The port number.
+    """
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def prune_build_cache(path: str, max_size: int, max_age: float):
+    """
+        Prunes a directory of local BuildKit caches (one per image target, see `ImageTarget`).
+
+        Caches that have not been written for longer than `max_age` are removed, and then the least recently written ones until the rest fit in `max_size`.
+
+        # Arguments
+        - `path`: The directory with the caches.
+        - `max_size`: The maximum total size of the caches, in bytes. Use `0` to not limit it.
+        - `max_age`: The maximum age of a cache, in seconds. Use `0` to not limit it.
+    """
+
+    # Collect the caches, most recently written first
+    caches: typing.List[typing.Tuple[float, str, int]] = []
+    if not os.path.isdir(path): return
+    for name in os.listdir(path):
+        cache = os.path.join(path, name)
+        index = os.path.join(cache, "index.json")
+        if not os.path.isfile(index): continue
+        size = sum([ os.path.getsize(os.path.join(root, file)) for (root, _, files) in os.walk(cache) for file in files ])
+        caches.append((os.path.getmtime(index), cache, size))
+    caches.sort(reverse=True)
+
+    # Keep those that are young enough and fit
+    now = time.time()
+    total = 0
+    for (written, cache, size) in caches:
+        if max_age > 0 and now - written > max_age:
+            pdebug(f"Removing build cache '{cache}' because it was last written {(now - written) / 86400.0:.1f} days ago")
+            shutil.rmtree(cache)
+        elif max_size > 0 and total + size > max_size:
+            pdebug(f"Removing build cache '{cache}' ({format_bytes(size)}) because the build caches would exceed {format_bytes(max_size)}")
+            shutil.rmtree(cache)
+        else:
+            total += size
+
 
 
 
@@ -622,13 +943,15 @@ class Process:
 
         self.args += list(args)
 
-    def execute(self, dry_run: bool, show_cmd: bool = True) -> typing.Tuple[int, typing.Optional[str], typing.Optional[str]]:
+    def execute(self, dry_run: bool, show_cmd: bool = True, stdin: typing.Optional[typing.Callable[[typing.IO[bytes]], None]] = None, on_stderr: typing.Optional[typing.Callable[[str], None]] = None) -> typing.Tuple[int, typing.Optional[str], typing.Optional[str]]:
         """
             Executes the process.
 
             # Arguments
             - `dry_run`: If True, does not actually run the command but returns a bogus (0, "", "") (or None if applicable)
             - `show_cmd`: Whether to print the command we're executing to the stdout/stderr or not.
+            - `stdin`: If given, a function that writes the process' stdin (which is closed once it returns). Otherwise, the process inherits this process' stdin.
+            - `on_stderr`: If given, a function that is called with every line the process writes to stderr (which is still written to this process' stderr, too). Cannot be combined with `capture_stderr`.
 
             # Returns
             A tuple with:
@@ -649,13 +972,48 @@ class Process:
 
         # Run the argument if not dry_run
         if not dry_run:
-            handle = subprocess.Popen(args, env=self.env, stdout=(subprocess.PIPE if self._stdout else sys.stdout), stderr=(subprocess.PIPE if self._stderr else sys.stderr))
+            handle = subprocess.Popen(args, env=self.env, stdin=(subprocess.PIPE if stdin is not None else None), stdout=(subprocess.PIPE if self._stdout else sys.stdout), stderr=(subprocess.PIPE if self._stderr or on_stderr is not None else sys.stderr))
+            if on_stderr is not None:
+                # Write stdin in the background, so that neither of us blocks on a full pipe
+                writer = None
+                if stdin is not None:
+                    writer = threading.Thread(target=Process._write_stdin, args=(handle, stdin))
+                    writer.start()
+                for line in typing.cast(typing.IO[bytes], handle.stderr):
+                    sys.stderr.write(line.decode(errors="replace"))
+                    on_stderr(line.decode(errors="replace").rstrip("\n"))
+                if writer is not None: writer.join()
+            elif stdin is not None:
+                Process._write_stdin(handle, stdin)
             (stdout, stderr) = handle.communicate()
-            return (handle.returncode, stdout.decode() if self._stdout else None, stderr.decode() if self._stderr else None)
+            return (handle.returncode, stdout.decode() if self._stdout else None, stderr.decode() if self._stderr and on_stderr is None else None)
         else:
             # Return dummy values
             return (0, "" if self._stdout else None, "" if self._stderr else None)
 
+    @staticmethod
+    def _write_stdin(handle: subprocess.Popen, stdin: typing.Callable[[typing.IO[bytes]], None]):
+        """
+            Writes the stdin of a started process, and closes it.
+
+            # Arguments
+            - `handle`: The process to write to.
+            - `stdin`: The function that writes it.
+        """
+
+        try:
+            stdin(typing.cast(typing.IO[bytes], handle.stdin))
+        except BrokenPipeError:
+            # The process quit early; its exit code tells why
+            pass
+        finally:
+            try:
+                typing.cast(typing.IO[bytes], handle.stdin).close()
+            except BrokenPipeError:
+                pass
+            # Make sure `communicate()` doesn't touch it anymore
+            handle.stdin = None
+
     @staticmethod
     def shellify(args: typing.List[str]) -> str:
         """
@@ -1091,18 +1449,9 @@ class CopyFileTarget(Target):
                 print(f"{bold} > Creating parent directory '{parent}'...{end}")
                 if not dry_run: os.makedirs(parent)
 
-        # Open the file, write buffered
+        # Copy the file
         print(f"{bold} > Copying '{source}' to '{target}'...{end}")
-        if not dry_run:
-            with open(source, "rb") as s:
-                with open(target, "wb") as f:
-                    while True:
-                        # Read from the source
-                        buffer = s.read(65535)
-                        if len(buffer) == 0: break
-
-                        # Write to the target
-                        f.write(buffer)
+        if not dry_run: copy_file(source, target)
         return True
 
     def is_outdated(self) -> bool:
@@ -1124,17 +1473,257 @@ class CopyFileTarget(Target):
             pdebug(f"Marking target '{self.id}' as outdated because the copy target '{target}' does not exist")
             return True
 
-        # Next, compute a quick hash of the source and target to see if we need to copy
-        with open(source, "rb") as s:
-            source_hash = hash(s.read())
-        with open(target, "rb") as t:
-            target_hash = hash(t.read())
-        if source_hash != target_hash:
-            pdebug(f"Marking target '{self.id}' as outdated because source hash '{hex(source_hash)}' does not match target hash '{hex(target_hash)}'")
+        # Next, see if the target is still the same as the source
+        if not same_file(source, target):
+            pdebug(f"Marking target '{self.id}' as outdated because the copy target '{target}' differs from the source '{source}'")
             return True
 
         # Otherwise, nothing needs to happen
-        pdebug(f"Marking target '{self.id}' as up-to-date because the target '{target}' exists and its hash matches that of the source '{source}'")
+        pdebug(f"Marking target '{self.id}' as up-to-date because the target '{target}' exists and matches the source '{source}'")
+        return False
+
+class SyncDirTarget(Target):
+    """
+        Mirrors a directory tree to another location, copying only the files that changed.
+    """
+
+    _source : str
+    _target : str
+    _delete : bool
+
+
+    def __init__(self, id: str, source: str, target: str, delete: bool = True, deps: typing.List[str] = [], description: str = ""):
+        """
+            Constructor for the SyncDirTarget.
+
+            # Arguments
+            - `id`: The string identifier for this target.
+            - `source`: The directory to copy _from_.
+            - `target`: The directory to copy _to_. It (and its parents) are created if they don't exist.
+            - `delete`: If True, also removes files and directories from the target that are not in the source.
+            - `deps`: A list of target identifier to mark as dependencies of this target.
+            - `description`: Some human-readable description of what this target does.
+
+            # Returns
+            A new SyncDirTarget instance.
+        """
+
+        # Construct the super
+        super().__init__(id, deps, description)
+
+        # Set the child fields
+        self._source = source
+        self._target = target
+        self._delete = delete
+
+    def _changes(self) -> typing.Tuple[typing.List[str], typing.List[str], typing.List[str]]:
+        """
+            Finds what needs to change in the target to mirror the source.
+
+            # Returns
+            A tuple with:
+            - The directories to create, relative to the target (parents first).
+            - The files to copy, relative to the source.
+            - The files and directories to remove from the target, relative to it (children first). Empty if we don't `delete`.
+        """
+
+        # Resolve the source & targets
+        source = ResolveArgs[str]()(self._source)
+        target = ResolveArgs[str]()(self._target)
+
+        # Walk the source to find what's missing or changed
+        dirs: typing.List[str] = []
+        files: typing.List[str] = []
+        expected: typing.Set[str] = set()
+        for (root, subdirs, names) in os.walk(source):
+            rel = os.path.relpath(root, source)
+            subdirs.sort()
+            for name in subdirs:
+                path = os.path.normpath(os.path.join(rel, name))
+                expected.add(path)
+                if not os.path.isdir(os.path.join(target, path)): dirs.append(path)
+            for name in sorted(names):
+                path = os.path.normpath(os.path.join(rel, name))
+                expected.add(path)
+                if not same_file(os.path.join(source, path), os.path.join(target, path)): files.append(path)
+
+        # Walk the target to find what's superfluous
+        removed: typing.List[str] = []
+        if self._delete and os.path.isdir(target):
+            for (root, subdirs, names) in os.walk(target, topdown=False):
+                rel = os.path.relpath(root, target)
+                for name in sorted(names) + sorted(subdirs):
+                    path = os.path.normpath(os.path.join(rel, name))
+                    if path not in expected: removed.append(path)
+        return (dirs, files, removed)
+
+    def build(self, _arch: Arch, _os: Os, dry_run: bool) -> bool:
+        """
+            Builds this target.
+
+            # Arguments
+            - `arch`: The `Arch` that describes the architecture to build for.
+            - `os`: The `Os` that describes the operating system to build for.
+            - `dry_run`: If True, does not run any commands but just says it would.
+
+            # Returns
+            Whether any changes to relevant output were triggered.
+        """
+
+        # Determine colours to use
+        bold = "\033[1m" if supports_color() else ""
+        end  = "\033[0m" if supports_color() else ""
+
+        # Resolve the source & targets
+        source = ResolveArgs[str]()(self._source)
+        target = ResolveArgs[str]()(self._target)
+
+        # Apply the changes
+        (dirs, files, removed) = self._changes()
+        print(f"{bold} > Syncing '{source}' to '{target}' ({len(files)} changed file(s), {len(removed)} removed)...{end}")
+        if dry_run: return True
+        os.makedirs(target, exist_ok=True)
+        for path in removed:
+            path = os.path.join(target, path)
+            if os.path.isdir(path) and not os.path.islink(path): shutil.rmtree(path)
+            elif os.path.lexists(path): os.remove(path)
+        for path in dirs:
+            path = os.path.join(target, path)
+            if os.path.lexists(path) and not os.path.isdir(path): os.remove(path)
+            os.makedirs(path, exist_ok=True)
+        for path in files:
+            pdebug(f"Copying '{os.path.join(source, path)}' to '{os.path.join(target, path)}'")
+            copy_file(os.path.join(source, path), os.path.join(target, path))
+        return True
+
+    def is_outdated(self) -> bool:
+        """
+            Compute whether this target needs to be updated.
+
+            Note that dependencies marking themselves as outdated are already taken care of.
+
+            # Returns
+            True if it should be updated, False if it shouldn't.
+        """
+
+        # Resolve the source & targets
+        source = ResolveArgs[str]()(self._source)
+        target = ResolveArgs[str]()(self._target)
+
+        # See if anything changed
+        (dirs, files, removed) = self._changes()
+        if len(dirs) > 0 or len(files) > 0 or len(removed) > 0:
+            pdebug(f"Marking target '{self.id}' as outdated because {len(files)} file(s) in '{source}' changed and {len(dirs) + len(removed)} (sub)directories or file(s) in '{target}' need to be created or removed")
+            return True
+        pdebug(f"Marking target '{self.id}' as up-to-date because '{target}' mirrors '{source}'")
+        return False
+
+class CommandTarget(Target):
+    """
+        Runs one or more commands to produce some output files from some source files.
+    """
+
+    _commands : typing.List[typing.List[str]]
+    _sources  : typing.List[str]
+    _outputs  : typing.List[str]
+    _env      : typing.Dict[str, str]
+
+
+    def __init__(self, id: str, commands: typing.List[typing.List[str]], sources: typing.List[str] = [], outputs: typing.List[str] = [], env: typing.Dict[str, str] = dict(os.environ), deps: typing.List[str] = [], description: str = ""):
+        """
+            Constructor for the CommandTarget.
+
+            # Arguments
+            - `id`: The string identifier for this target.
+            - `commands`: The commands to run, in-order. Every argument may refer to `TARGET_ARGS` with a dollar sign (`$`); if that resolves to a list, all of its elements are passed.
+            - `sources`: The files the commands read. If any of them is newer than any of the `outputs`, the target is outdated.
+            - `outputs`: The files the commands produce. If empty, the target is always outdated. Missing parent directories are created before running the commands.
+            - `env`: The environment to run the commands in. Every value may refer to `TARGET_ARGS` with a dollar sign (`$`).
+            - `deps`: A list of target identifier to mark as dependencies of this target.
+            - `description`: Some human-readable description of what this target does.
+
+            # Returns
+            A new CommandTarget instance.
+        """
+
+        # Construct the super
+        super().__init__(id, deps, description)
+
+        # Set the child fields
+        self._commands = commands
+        self._sources = sources
+        self._outputs = outputs
+        self._env = env
+
+    def build(self, _arch: Arch, _os: Os, dry_run: bool) -> bool:
+        """
+            Builds this target.
+
+            # Arguments
+            - `arch`: The `Arch` that describes the architecture to build for.
+            - `os`: The `Os` that describes the operating system to build for.
+            - `dry_run`: If True, does not run any commands but just says it would.
+
+            # Returns
+            Whether any changes to relevant output were triggered.
+        """
+
+        # Determine colours to use
+        bold = "\033[1m" if supports_color() else ""
+        end  = "\033[0m" if supports_color() else ""
+
+        # Make sure the outputs have somewhere to go
+        for output in self._outputs:
+            parent = pathlib.Path(ResolveArgs[str]()(output)).parent
+            if not os.path.exists(parent):
+                print(f"{bold} > Creating parent directory '{parent}'...{end}")
+                if not dry_run: os.makedirs(parent)
+
+        # Run the commands in-order (splicing in any arguments that resolve to lists)
+        env = { key: ResolveArgs[str]()(value) for (key, value) in self._env.items() }
+        for command in self._commands:
+            args = []
+            for arg in command:
+                value = ResolveArgs[typing.Union[str, typing.List[str]]]()(arg)
+                if type(value) == list: args += value
+                else: args.append(typing.cast(str, value))
+            (code, _, _) = Process(args, env=env).execute(dry_run)
+            if code != 0:
+                raise RuntimeError(f"Failed to run command '{Process.shellify(args)}'")
+        return True
+
+    def is_outdated(self) -> bool:
+        """
+            Compute whether this target needs to be updated.
+
+            Note that dependencies marking themselves as outdated are already taken care of.
+
+            # Returns
+            True if it should be updated, False if it shouldn't.
+        """
+
+        # Without outputs, we cannot tell
+        if len(self._outputs) == 0:
+            pdebug(f"Marking target '{self.id}' as outdated because it has no outputs to check")
+            return True
+
+        # Find the oldest output
+        oldest = None
+        for output in self._outputs:
+            output = ResolveArgs[str]()(output)
+            if not os.path.exists(output):
+                pdebug(f"Marking target '{self.id}' as outdated because output '{output}' does not exist")
+                return True
+            mtime = os.path.getmtime(output)
+            if oldest is None or mtime < oldest: oldest = mtime
+
+        # Compare it to the sources
+        for source in self._sources:
+            source = ResolveArgs[str]()(source)
+            if os.path.getmtime(source) > typing.cast(float, oldest):
+                pdebug(f"Marking target '{self.id}' as outdated because source '{source}' is newer than its outputs")
+                return True
+        pdebug(f"Marking target '{self.id}' as up-to-date because all outputs exist and are newer than its sources")
         return False
 
 class ImageTarget(Target):
@@ -1142,24 +1731,32 @@ class ImageTarget(Target):
         Builds a Docker image.
     """
 
-    _image   : str
-    _file    : str
-    _context : str
-    _target  : typing.Optional[str]
-    _args    : typing.Dict[str, str]
+    _image      : str
+    _file       : str
+    _context    : str
+    _inputs     : typing.Optional[typing.List[str]]
+    _target     : typing.Optional[str]
+    _args       : typing.Dict[str, str]
+    _cache      : typing.Optional[str]
+    _cache_size : str
+    _cache_age  : str
 
 
-    def __init__(self, id: str, image: str, file: str = "./Dockerfile", context: str = ".", target: typing.Optional[str] = None, build_args: typing.Dict[str, str] = {}, deps: typing.List[str] = [], description: str = ""):
+    def __init__(self, id: str, image: str, file: str = "./Dockerfile", context: str = ".", inputs: typing.Optional[typing.List[str]] = None, target: typing.Optional[str] = None, build_args: typing.Dict[str, str] = {}, cache: typing.Optional[str] = None, cache_size: str = "0", cache_age: str = "0", deps: typing.List[str] = [], description: str = ""):
         """
             Constructor for the ImageTarget.
 
             # Arguments
             - `id`: The string identifier for this target.
-            - `image`: The name of the image to build.
+            - `image`: The name of the image to build. May refer to `TARGET_ARGS` with a dollar sign (`$`).
             - `file`: The Dockerfile to build.
             - `context`: The folder context to build.
-            - `target`: The target to build in the image. If omitted, builds the default target.
+            - `inputs`: If given, the files and folders (relative to `context`) that the Dockerfile uses. Only those (and the Dockerfile) are sent to Docker, streamed as a tar, instead of the whole `context`.
+            - `target`: The target to build in the image. If omitted, builds the default target. May refer to `TARGET_ARGS` with a dollar sign (`$`).
             - `build_args`: Any build arguments to set. Note that 'ARCH' and 'OS' are set automatically.
+            - `cache`: If given (and not empty), a directory in which to keep a local BuildKit cache of all stages, which is imported before and exported after every build. May refer to `TARGET_ARGS` with a dollar sign (`$`).
+            - `cache_size`: The maximum size of all caches in `cache` (e.g., `20G`). Use `0` to not limit it. May refer to `TARGET_ARGS` with a dollar sign (`$`).
+            - `cache_age`: The maximum number of days since a cache in `cache` was last written. Use `0` to not limit it. May refer to `TARGET_ARGS` with a dollar sign (`$`).
             - `deps`: A list of target identifier to mark as dependencies of this target.
             - `description`: Some human-readable description of what this target does.
 
@@ -1171,11 +1768,15 @@ class ImageTarget(Target):
         super().__init__(id, deps, description)
 
         # Construct ourselves
-        self._image   = image
-        self._file    = file
-        self._context = context
-        self._target  = target
-        self._args    = build_args
+        self._image      = image
+        self._file       = file
+        self._context    = context
+        self._inputs     = inputs
+        self._target     = target
+        self._args       = build_args
+        self._cache      = cache
+        self._cache_size = cache_size
+        self._cache_age  = cache_age
 
     def build(self, arch: Arch, os_: Os, dry_run: bool) -> bool:
         """
@@ -1191,24 +1792,55 @@ class ImageTarget(Target):
         """
 
         # Construct the Docker arguments
-        args = typing.cast(typing.List[str], TARGET_ARGS["docker"]) + [ "build", "--load", "-t", self._image ]
+        args = typing.cast(typing.List[str], TARGET_ARGS["docker"]) + [ "build", "--load", "-t", ResolveArgs[str]()(self._image) ]
         if self._target is not None:
-            args += [ "--target", self._target ]
+            args += [ "--target", ResolveArgs[str]()(self._target) ]
         for arg in self._args:
             args += [ "--build-arg", f"{arg}={self._args[arg]}" ]
         if arch != Arch.default() or os_ != Os.default():
             args += [ "--platform", f"{os_.docker()}/{arch.docker()}" ]
-        args += [ "-f", self._file, "." ]
+
+        # Import the cache of earlier builds of the same target, and export a fresh one (next to it, so that it only contains what this build used)
+        cache = ResolveArgs[str]()(self._cache) if self._cache is not None else ""
+        cache_dir = ""
+        if len(cache) > 0:
+            if not dry_run: prune_build_cache(cache, parse_bytes(ResolveArgs[str]()(self._cache_size)), float(ResolveArgs[str]()(self._cache_age)) * 86400.0)
+            cache_dir = os.path.join(cache, ResolveArgs[str]()(self._target) if self._target is not None else "default")
+            if os.path.isfile(os.path.join(cache_dir, "index.json")):
+                args += [ "--cache-from", f"type=local,src={cache_dir}" ]
+            args += [ "--cache-to", f"type=local,dest={cache_dir}.new,mode=max", "--progress", "plain" ]
+
+        if self._inputs is not None:
+            # The Dockerfile is part of the streamed context, so refer to it by its path in there
+            args += [ "-f", os.path.relpath(self._file, self._context), "-" ]
+        else:
+            args += [ "-f", self._file, self._context ]
 
         # Build the environment
         env = dict(os.environ)
         env["DOCKER_SOCKET"] = typing.cast(str, TARGET_ARGS["docker_socket"])
 
-        # Run the process
-        (code, _, _) = Process(args, env=env).execute(dry_run)
+        # Run the process, counting which steps are cached if we manage the cache
+        steps: typing.Set[str] = set()
+        cached: typing.Set[str] = set()
+        def count_step(line: str):
+            match = re.match(r"^#(\d+) (\[(?:[\w.-]+ )?\d+/\d+\]|CACHED$)", line)
+            if match is None: return
+            if match.group(2) == "CACHED": cached.add(match.group(1))
+            else: steps.add(match.group(1))
+        (code, _, _) = Process(args, env=env).execute(dry_run, stdin=(self._write_context if self._inputs is not None else None), on_stderr=(count_step if len(cache_dir) > 0 else None))
         if code != 0:
+            if os.path.isdir(f"{cache_dir}.new"): shutil.rmtree(f"{cache_dir}.new")
             raise RuntimeError(f"Failed to run command '{Process.shellify(args)}'")
 
+        # Replace the old cache with the new one, and report how much it helped
+        if len(cache_dir) > 0 and not dry_run:
+            if os.path.isdir(f"{cache_dir}.new"):
+                if os.path.isdir(cache_dir): shutil.rmtree(cache_dir)
+                os.rename(f"{cache_dir}.new", cache_dir)
+            hits = len(steps & cached)
+            print(f"Build cache '{cache_dir}': {hits}/{len(steps)} step(s) cached ({(100.0 * hits / len(steps)) if len(steps) > 0 else 0.0:.1f}%)")
+
         # Alright done!
         return True
 
@@ -1241,6 +1873,34 @@ class ImageTarget(Target):
         pdebug(f"Marking target '{self.id}' as outdated because image targets are always built (to have docker deal with cache staleness)")
         return True
 
+    def _write_context(self, handle: typing.IO[bytes]):
+        """
+            Writes the build context as a tar with only the Dockerfile and the declared inputs.
+
+            # Arguments
+            - `handle`: The stream to write the tar to.
+        """
+
+        def clean(info: tarfile.TarInfo) -> typing.Optional[tarfile.TarInfo]:
+            # Skip Python's bytecode, and don't leak who we are
+            if os.path.basename(info.name) == "__pycache__" or info.name.endswith(".pyc"): return None
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            return info
+
+        # Stream the tar (rather than writing it somewhere first), so Docker can start while we're still adding files
+        n_files = 0
+        n_bytes = 0
+        with tarfile.open(fileobj=handle, mode="w|") as tar:
+            for input in [ os.path.relpath(self._file, self._context) ] + typing.cast(typing.List[str], self._inputs):
+                path = os.path.join(self._context, input)
+                if not os.path.exists(path): raise RuntimeError(f"Input '{path}' of target '{self.id}' does not exist")
+                tar.add(path, arcname=os.path.normpath(input), filter=clean)
+            for member in tar.getmembers():
+                n_files += 1
+                n_bytes += member.size
+        pdebug(f"Sent build context of {n_files} file(s) ({format_bytes(n_bytes)}) for target '{self.id}'")
+
 class RunContainerTarget(Target):
     """
         Starts a Docker container.
@@ -1407,18 +2067,16 @@ class RunComposeTarget(Target):
             Whether any changes to relevant output were triggered.
         """
 
-        # Create the arguments
-        args = typing.cast(typing.List[str], TARGET_ARGS["docker_compose"])
-        if self._namespace is not None:
-            args += [ "-p", self._namespace ]
-        args += [ "-f", self._file, "up", "-d" ]
-
-        # Resolve the environment by adding DOCKER_SOCKET and by resolving TARGET_ARGS
-        for key in self._env:
-            self._env[key] = ResolveArgs[str]()(self._env[key])
-        self._env["DOCKER_SOCKET"] = typing.cast(str, TARGET_ARGS["docker_socket"])
+        # Don't bother Docker Compose if the project already runs as configured (which we also check here, since the image is always rebuilt first)
+        compose = self._compose()
+        if not dry_run:
+            (matches, reason) = compose_project_matches(compose, self._env)
+            if matches:
+                print(f"Docker Compose project is up-to-date ({reason})")
+                return False
 
         # Run the process
+        args = compose + [ "up", "-d" ]
         (code, _, _) = Process(args, env=self._env).execute(dry_run)
         if code != 0:
             raise RuntimeError(f"Failed to run command '{Process.shellify(args)}'")
@@ -1436,9 +2094,20 @@ class RunComposeTarget(Target):
             True if it should be updated, False if it shouldn't.
         """
 
-        # Never outdated
-        pdebug(f"Marking target '{self.id}' as outdated because compose targets are always outdated")
-        return True
+        # We're outdated unless the running project matches the configuration
+        (matches, reason) = compose_project_matches(self._compose(), self._env)
+        pdebug(f"Marking target '{self.id}' as {'up-to-date' if matches else 'outdated'} because {reason}")
+        return not matches
+
+    def _compose(self) -> typing.List[str]:
+        """
+            Resolves the environment (by adding DOCKER_SOCKET and by resolving TARGET_ARGS), and returns the `docker compose` command to run with it.
+        """
+
+        for key in self._env:
+            self._env[key] = ResolveArgs[str]()(self._env[key])
+        self._env["DOCKER_SOCKET"] = typing.cast(str, TARGET_ARGS["docker_socket"])
+        return typing.cast(typing.List[str], TARGET_ARGS["docker_compose"]) + ([ "-p", self._namespace ] if self._namespace is not None else []) + [ "-f", self._file ]
 
 class RmContainerTarget(Target):
     """
@@ -1575,15 +2244,7 @@ class RmComposeTarget(Target):
         """
 
         # Build the command
-        args = typing.cast(typing.List[str], TARGET_ARGS["docker_compose"])
-        if self._namespace is not None:
-            args += [ "-p", self._namespace ]
-        args += [ "-f", self._file, "down" ]
-
-        # Resolve the environment by adding DOCKER_SOCKET and by resolving TARGET_ARGS
-        for key in self._env:
-            self._env[key] = ResolveArgs[str]()(self._env[key])
-        self._env["DOCKER_SOCKET"] = typing.cast(str, TARGET_ARGS["docker_socket"])
+        args = self._compose() + [ "down" ]
 
         # Run it
         (code, _, _) = Process(args, env=self._env).execute(dry_run)
@@ -1602,10 +2263,24 @@ class RmComposeTarget(Target):
             True if it should be updated, False if it shouldn't.
         """
 
-        # Never outdated
-        pdebug(f"Marking target '{self.id}' as outdated because compose targets are always outdated")
+        # There's only something to tear down if the project has any containers (or if we can't tell)
+        containers = compose_project_containers(self._compose(), self._env)
+        if containers is not None and len(containers) == 0:
+            pdebug(f"Marking target '{self.id}' as up-to-date because the Docker Compose project has no containers")
+            return False
+        pdebug(f"Marking target '{self.id}' as outdated because the Docker Compose project {'may have' if containers is None else 'has'} containers")
         return True
 
+    def _compose(self) -> typing.List[str]:
+        """
+            Resolves the environment (by adding DOCKER_SOCKET and by resolving TARGET_ARGS), and returns the `docker compose` command to run with it.
+        """
+
+        for key in self._env:
+            self._env[key] = ResolveArgs[str]()(self._env[key])
+        self._env["DOCKER_SOCKET"] = typing.cast(str, TARGET_ARGS["docker_socket"])
+        return typing.cast(typing.List[str], TARGET_ARGS["docker_compose"]) + ([ "-p", self._namespace ] if self._namespace is not None else []) + [ "-f", self._file ]
+
 class ExtractContainerLogsTarget(Target):
     """
         Target that extracts a specific part of the logs of a Docker container.
@@ -1702,6 +2377,317 @@ class ExtractContainerLogsTarget(Target):
         pdebug(f"Marking target '{self.id}' as outdated because log extraction targets are always outdated")
         return True
 
+class WaitHealthyTarget(Target):
+    """
+        Target that waits until a Docker container reports itself as healthy, and then shows the address of the JupyterLab server in it.
+    """
+
+    _cont    : str
+    _msg     : str
+    _timeout : str
+
+
+    def __init__(self, id: str, container: str, message: str, timeout: str, deps: typing.List[str] = [], description: str = ""):
+        """
+            Constructor for the WaitHealthyTarget.
+
+            # Arguments
+            - `id`: The string identifier for this target.
+            - `container`: The container to wait for. It must have a healthcheck.
+            - `message`: The message to show above the address.
+            - `timeout`: The maximum number of seconds to wait for the container to become healthy. May refer to `TARGET_ARGS` with a dollar sign (`$`).
+            - `deps`: A list of target identifier to mark as dependencies of this target.
+            - `description`: Some human-readable description of what this target does.
+
+            # Returns
+            A new WaitHealthyTarget instance.
+        """
+
+        # Construct the super
+        super().__init__(id, deps, description)
+
+        # Set the properties
+        self._cont = container
+        self._msg = message
+        self._timeout = timeout
+
+    def build(self, _arch: Arch, _os: Os, dry_run: bool) -> bool:
+        """
+            Builds this target.
+
+            # Arguments
+            - `arch`: The `Arch` that describes the architecture to build for.
+            - `os`: The `Os` that describes the operating system to build for.
+            - `dry_run`: If True, does not run any commands but just says it would.
+
+            # Returns
+            Whether any changes to relevant output were triggered.
+        """
+
+        # Show the message
+        print(f"{self._msg}")
+        if dry_run: return False
+        docker = typing.cast(typing.List[str], TARGET_ARGS["docker"])
+        env = dict(os.environ)
+        env["DOCKER_SOCKET"] = typing.cast(str, TARGET_ARGS["docker_socket"])
+
+        # Wait until the server in it is ready
+        wait_healthy(self._cont, float(ResolveArgs[str]()(self._timeout)), env)
+
+        # Ask the server itself for its address (as the user running it, which `jupyter` may be installed for)
+        args = docker + [ "exec", "-u", "brane", self._cont, "bash", "-c", "PATH=\"/opt/lab/bin:$HOME/.local/bin:$PATH\" jupyter server list --json" ]
+        (code, stdout, stderr) = Process(args, env=env, capture_stdout=True, capture_stderr=True).execute(False, show_cmd=False)
+        if code != 0: raise RuntimeError(f"Failed to run command '{Process.shellify(args)}': {typing.cast(str, stderr).strip()}")
+        servers = [ json.loads(line) for line in typing.cast(str, stdout).splitlines() if len(line.strip()) > 0 ]
+        if len(servers) == 0: raise RuntimeError(f"No JupyterLab server is running in container '{self._cont}'")
+
+        # Show it (as reachable from the host, where the port is published on localhost)
+        url = urllib.parse.urlsplit(servers[0]["url"])
+        print(f"    {url._replace(netloc=f'127.0.0.1:{url.port}', path=url.path.rstrip('/') + '/lab', query=urllib.parse.urlencode({ 'token': servers[0]['token'] })).geturl()}")
+        print("")
+
+        # We say nothing happened because we didn't influence anything
+        return False
+
+    def is_outdated(self) -> bool:
+        """
+            Compute whether this target needs to be updated.
+
+            Note that dependencies marking themselves as outdated are already taken care of.
+
+            # Returns
+            True if it should be updated, False if it shouldn't.
+        """
+
+        # Waiting targets are always outdated
+        pdebug(f"Marking target '{self.id}' as outdated because waiting targets are always outdated")
+        return True
+
+class CacheUsageTarget(Target):
+    """
+        Target that reports on the usage of the dataset cache that the kernels share in the data directory.
+    """
+
+    _data_dir : str
+    _limit    : str
+
+
+    def __init__(self, id: str, data_dir: str, limit: str, deps: typing.List[str] = [], description: str = ""):
+        """
+            Constructor for the CacheUsageTarget.
+
+            # Arguments
+            - `id`: The string identifier for this target.
+            - `data_dir`: The data directory in which the cache lives (under `.cache`).
+            - `limit`: The maximum size of the cache, as given to the kernels (e.g., `10G`).
+            - `deps`: A list of target identifier to mark as dependencies of this target.
+            - `description`: Some human-readable description of what this target does.
+
+            # Returns
+            A new CacheUsageTarget instance.
+        """
+
+        # Construct the super
+        super().__init__(id, deps, description)
+
+        # Set the paths
+        self._data_dir = data_dir
+        self._limit = limit
+
+    def build(self, _arch: Arch, _os: Os, _dry_run: bool) -> bool:
+        """
+            Builds this target.
+
+            # Arguments
+            - `arch`: The `Arch` that describes the architecture to build for.
+            - `os`: The `Os` that describes the operating system to build for.
+            - `dry_run`: If True, does not run any commands but just says it would.
+
+            # Returns
+            Whether any changes to relevant output were triggered.
+        """
+
+        # Resolve the paths
+        objects = os.path.join(ResolveArgs[str]()(self._data_dir), ".cache", "objects")
+        limit = parse_bytes(ResolveArgs[str]()(self._limit))
+
+        # Collect the entries
+        entries: typing.List[typing.Tuple[float, str, str, int]] = []
+        if os.path.isdir(objects):
+            for key in os.listdir(objects):
+                if key[0] == '.': continue
+                meta_path = os.path.join(objects, key, "meta.json")
+                try:
+                    with open(meta_path, "r") as h:
+                        meta = json.load(h)
+                    entries.append((os.path.getmtime(meta_path), meta["name"], meta["version"], int(meta["size"])))
+                except (IOError, ValueError, KeyError) as e:
+                    pwarn(f"Failed to read cache entry '{meta_path}': {e}")
+        entries.sort(reverse=True)
+
+        # Show them, most recently used first
+        print(f"Dataset cache in '{objects}':")
+        if len(entries) > 0:
+            name_width = max([ len(e[1]) for e in entries ] + [ 4 ])
+            version_width = max([ len(e[2]) for e in entries ] + [ 7 ])
+            print(f"    {'NAME':<{name_width}}  {'VERSION':<{version_width}}  {'SIZE':>10}  LAST USED")
+            for (used, name, version, size) in entries:
+                print(f"    {name:<{name_width}}  {version:<{version_width}}  {format_bytes(size):>10}  {datetime.datetime.fromtimestamp(used).strftime('%Y-%m-%d %H:%M:%S')}")
+        total = sum([ e[3] for e in entries ])
+        print(f"{len(entries)} dataset(s), {format_bytes(total)} of {format_bytes(limit)} used ({(100.0 * total / limit) if limit > 0 else 0.0:.1f}%)")
+        print("")
+
+        # We report only, so nothing changed
+        return False
+
+    def is_outdated(self) -> bool:
+        """
+            Compute whether this target needs to be updated.
+
+            Note that dependencies marking themselves as outdated are already taken care of.
+
+            # Returns
+            True if it should be updated, False if it shouldn't.
+        """
+
+        # Reports are always outdated
+        pdebug(f"Marking target '{self.id}' as outdated because report targets are always outdated")
+        return True
+
+class ImageBudgetTarget(Target):
+    """
+        Target that measures the size of the IDE image and the time from starting it to JupyterLab being ready, and fails if either exceeds its budget.
+
+        The image is started in a Docker Compose project, container and port of its own, so that it does not touch an IDE that is already running. JupyterLab counts as ready once the container's healthcheck passes.
+    """
+
+    _image          : str
+    _container      : str
+    _file           : str
+    _size_budget    : str
+    _startup_budget : str
+    _output         : str
+    _namespace      : str
+    _env            : typing.Dict[str, str]
+
+
+    def __init__(self, id: str, image: str, container: str, file: str, size_budget: str, startup_budget: str, output: str, namespace: str, env: typing.Dict[str, str] = dict(os.environ), deps: typing.List[str] = [], description: str = ""):
+        """
+            Constructor for the ImageBudgetTarget.
+
+            # Arguments
+            - `id`: The string identifier for this target.
+            - `image`: The name of the image to measure.
+            - `container`: The name to give the container that the Docker Compose-file starts (through `BRANE_IDE_CONTAINER`). It must not be that of the IDE itself.
+            - `file`: The Docker Compose-file that starts the image.
+            - `size_budget`: The maximum size of the image (e.g., `800M`). Use `0` to not check it.
+            - `startup_budget`: The maximum number of seconds between starting the Docker Compose-file and JupyterLab being ready. Use `0` to not check it.
+            - `output`: The file to write the measurements to, as JSON.
+            - `namespace`: The project/namespace to run in, which must not be that of the IDE itself.
+            - `env`: Any additional environment variables to set for the run.
+            - `deps`: A list of target identifier to mark as dependencies of this target.
+            - `description`: Some human-readable description of what this target does.
+
+            # Returns
+            A new ImageBudgetTarget instance.
+        """
+
+        # Construct the super
+        super().__init__(id, deps, description)
+
+        # Construct ourselves
+        self._image          = image
+        self._container      = container
+        self._file           = file
+        self._size_budget    = size_budget
+        self._startup_budget = startup_budget
+        self._output         = output
+        self._namespace      = namespace
+        self._env            = env
+
+    def build(self, _arch: Arch, _os: Os, dry_run: bool) -> bool:
+        """
+            Builds this target.
+
+            # Arguments
+            - `arch`: The `Arch` that describes the architecture to build for.
+            - `os`: The `Os` that describes the operating system to build for.
+            - `dry_run`: If True, does not run any commands but just says it would.
+
+            # Returns
+            Whether any changes to relevant output were triggered.
+        """
+
+        # Resolve the arguments and the environment
+        image = ResolveArgs[str]()(self._image)
+        size_budget = parse_bytes(ResolveArgs[str]()(self._size_budget))
+        startup_budget = float(ResolveArgs[str]()(self._startup_budget))
+        output = ResolveArgs[str]()(self._output)
+        for key in self._env:
+            self._env[key] = ResolveArgs[str]()(self._env[key])
+        self._env["DOCKER_SOCKET"] = typing.cast(str, TARGET_ARGS["docker_socket"])
+        self._env["BRANE_IDE_CONTAINER"] = self._container
+        self._env["BRANE_IDE_PORT"] = str(free_port())
+        compose = typing.cast(typing.List[str], TARGET_ARGS["docker_compose"]) + [ "-p", self._namespace, "-f", self._file ]
+
+        # Measure the size of the image
+        args = typing.cast(typing.List[str], TARGET_ARGS["docker"]) + [ "image", "inspect", "--format", "{{.Size}}", image ]
+        (code, stdout, _) = Process(args, env=self._env, capture_stdout=True).execute(dry_run)
+        if code != 0: raise RuntimeError(f"Failed to run command '{Process.shellify(args)}'")
+        if dry_run: return False
+        size = int(typing.cast(str, stdout).strip())
+
+        # Make sure we start cold (in our own project, leaving the IDE alone), then wait until the healthcheck passes (with a generous timeout, so that we can still tell by how much it's over budget)
+        (code, _, _) = Process(compose + [ "down" ], env=self._env).execute(False)
+        if code != 0: raise RuntimeError(f"Failed to run command '{Process.shellify(compose + [ 'down' ])}'")
+        since = time.time()
+        start = time.monotonic()
+        try:
+            (code, _, _) = Process(compose + [ "up", "-d" ], env=self._env).execute(False)
+            if code != 0: raise RuntimeError(f"Failed to run command '{Process.shellify(compose + [ 'up', '-d' ])}'")
+            wait_healthy(self._container, max(4 * startup_budget, 120.0), self._env, since=since)
+            startup = time.monotonic() - start
+        finally:
+            (code, _, _) = Process(compose + [ "down" ], env=self._env).execute(False)
+            if code != 0: pwarn(f"Failed to run command '{Process.shellify(compose + [ 'down' ])}'")
+
+        # Keep track of the measurements
+        parent = os.path.dirname(output)
+        if len(parent) > 0 and not os.path.exists(parent): os.makedirs(parent)
+        with open(output, "w") as h:
+            json.dump({ "image": image, "size": size, "size_budget": size_budget, "startup": startup, "startup_budget": startup_budget }, h, indent=4)
+
+        # Report them
+        print(f"Image '{image}':")
+        print(f"    size     {format_bytes(size):>10}  (budget: {format_bytes(size_budget) if size_budget > 0 else 'none'})")
+        print(f"    startup  {f'{startup:.2f} s':>10}  (budget: {f'{startup_budget:.2f} s' if startup_budget > 0 else 'none'})")
+        print("")
+
+        # Fail if either is over budget
+        errors = []
+        if size_budget > 0 and size > size_budget:
+            errors.append(f"Image '{image}' is {format_bytes(size)}, which exceeds its budget of {format_bytes(size_budget)}")
+        if startup_budget > 0 and startup > startup_budget:
+            errors.append(f"Image '{image}' took {startup:.2f} s to start, which exceeds its budget of {startup_budget:.2f} s")
+        if len(errors) > 0: raise RuntimeError("\n".join(errors))
+
+        # We only measure, so nothing changed
+        return False
+
+    def is_outdated(self) -> bool:
+        """
+            Compute whether this target needs to be updated.
+
+            Note that dependencies marking themselves as outdated are already taken care of.
+
+            # Returns
+            True if it should be updated, False if it shouldn't.
+        """
+
+        # Budget checks are always outdated
+        pdebug(f"Marking target '{self.id}' as outdated because budget targets are always outdated")
+        return True
+
 
 
 
@@ -1710,10 +2696,14 @@ class ExtractContainerLogsTarget(Target):
 TARGETS: typing.Dict[str, Target] = { t.id: t for t in [
     ### IMAGES ###
     ImageTarget("run-image",
-        "brane-ide-server",
-        target="run",
+        "$image",
+        inputs=[ "CMakeLists.txt", "share", "src" ],
+        target="$image_target",
         build_args={"UID": str(os.getuid()), "GID": str(os.getgid())},
-        description="Builds the runtime image for the Brane IDE project."
+        cache="$build_cache",
+        cache_size="$build_cache_size",
+        cache_age="$build_cache_age",
+        description="Builds the runtime image for the Brane IDE project (or its slim variant if '--slim' is given)."
     ),
 
     ### SHELL TARGETS ###
@@ -1740,18 +2730,28 @@ TARGETS: typing.Dict[str, Target] = { t.id: t for t in [
                 "BRANE_DATA_DIR": "$brane_data_dir",
                 "BRANE_CERTS_DIR": "$brane_certs_dir",
                 "BRANE_NOTEBOOK_DIR": "$brane_notebook_dir",
+                "BRANE_BACKGROUND_DOWNLOADS": "$background_downloads",
+                "BRANE_MAX_JOBS": "$max_jobs",
+                "BRANE_MAX_BACKGROUND": "$max_background",
+                "BRANE_MAX_SUBMISSIONS": "$max_submissions",
+                "BRANE_DRIVER_CHECK": "$driver_check",
+                "BRANE_RECONNECT_TIMEOUT": "$reconnect_timeout",
+                "BRANE_CACHE_SIZE": "$cache_size",
+                "BRANE_KERNEL_POOL": "$kernel_pool",
+                "BRANE_OUTPUT_BUDGET": "$output_budget",
+                "BRANE_HIBERNATE_AFTER": "$hibernate_after",
+                "BRANE_CULL_AFTER": "$cull_after",
+                "BRANE_IDE_IMAGE": "$image",
             }
         },
         description="Starts the runtime image for the Brane IDE project without querying the token."
     ),
-    ExtractContainerLogsTarget("start-ide",
+    WaitHealthyTarget("start-ide",
         "brane-ide",
         "JupyterLab launched at:",
-        ConsecutiveExtract([ MatchedLineExtract("lab?token=", nth=1), MatchNthWordExtract(4) ]),
-        strip = True,
+        "$ready_timeout",
         deps=["start-ide-quiet"],
-        timeout=1,
-        description="Starts the runtime image for the Brane IDE project without querying the token."
+        description="Starts the runtime image for the Brane IDE project, waits until JupyterLab is ready and shows its address."
     ),
     RmComposeTarget("stop-ide",
         "./docker-compose.yml",
@@ -1765,10 +2765,140 @@ TARGETS: typing.Dict[str, Target] = { t.id: t for t in [
                 "BRANE_DATA_DIR": "$brane_data_dir",
                 "BRANE_CERTS_DIR": "$brane_certs_dir",
                 "BRANE_NOTEBOOK_DIR": "$brane_notebook_dir",
+                "BRANE_BACKGROUND_DOWNLOADS": "$background_downloads",
+                "BRANE_MAX_JOBS": "$max_jobs",
+                "BRANE_MAX_BACKGROUND": "$max_background",
+                "BRANE_MAX_SUBMISSIONS": "$max_submissions",
+                "BRANE_DRIVER_CHECK": "$driver_check",
+                "BRANE_RECONNECT_TIMEOUT": "$reconnect_timeout",
+                "BRANE_CACHE_SIZE": "$cache_size",
+                "BRANE_KERNEL_POOL": "$kernel_pool",
+                "BRANE_OUTPUT_BUDGET": "$output_budget",
+                "BRANE_HIBERNATE_AFTER": "$hibernate_after",
+                "BRANE_CULL_AFTER": "$cull_after",
+                "BRANE_IDE_IMAGE": "$image",
             }
         },
         description="Stops the runtime image for the Brane IDE project if it is running, and then removes it."
     ),
+    CommandTarget("run-notebooks",
+        [
+            [ "$docker", "cp", "./tools/run_notebooks.py", "brane-ide:/tmp/run_notebooks.py" ],
+            [ "$docker", "exec", "-u", "brane", "brane-ide", "bash", "-c", 'PATH="/opt/lab/bin:$HOME/.local/bin:$PATH" exec python3 /tmp/run_notebooks.py "$@"', "run_notebooks", "$batch_notebooks", "--parallel", "$batch_parallel", "--timeout", "$batch_timeout", "$batch_args" ],
+        ],
+        deps=["start-ide"],
+        description="Executes every notebook in '--batch-notebooks' headlessly in the running IDE container, '--batch-parallel' at a time, and writes the executed notebooks and a report with the failures and slowest cells (see `tools/run_notebooks.py`)."
+    ),
+    ### NATIVE TARGETS ###
+    CommandTarget("build-kernel",
+        [
+            [ "cmake", "-S", ".", "-B", "./build/native", "-D", "CMAKE_BUILD_TYPE=RelWithDebInfo", "$cmake_args" ],
+            [ "cmake", "--build", "./build/native", "--parallel", "$build_jobs" ],
+            [ "cmake", "-E", "copy_if_different", "./build/native/compile_commands.json", "./build/compile_commands.json" ],
+        ],
+        env={
+            **dict(os.environ),
+            # Let ccache reuse results that were compiled with the precompiled header
+            "CCACHE_SLOPPINESS": "pch_defines,time_macros,include_file_mtime,include_file_ctime",
+        },
+        description="Builds the `bscript` kernel for the host in `build/native` (using ccache and precompiled headers if available), and writes `build/compile_commands.json` for editors. Requires xeus-zmq to be installed on the host."
+    ),
+    CommandTarget("start-native-ide",
+        [[ "jupyter-lab", "--no-browser", "--notebook-dir", "$brane_notebook_dir", "--KernelSpecManager.ensure_native_kernel=False" ]],
+        env={
+            **dict(os.environ),
+            **{
+                "JUPYTER_PATH": os.path.abspath("./build/native/share/jupyter"),
+                "LIBBRANE_PATH": "$libbrane",
+                "BRANE_API_ADDR": "$brane_api",
+                "BRANE_DRV_ADDR": "$brane_drv",
+                "BRANE_DATA_DIR": "$native_data_dir",
+                "BRANE_CERTS_DIR": "$native_certs_dir",
+                "BRANE_RESULT_USER": "$brane_result_user",
+                "BRANE_BACKGROUND_DOWNLOADS": "$background_downloads",
+                "BRANE_MAX_JOBS": "$max_jobs",
+                "BRANE_MAX_BACKGROUND": "$max_background",
+                "BRANE_MAX_SUBMISSIONS": "$max_submissions",
+                "BRANE_DRIVER_CHECK": "$driver_check",
+                "BRANE_RECONNECT_TIMEOUT": "$reconnect_timeout",
+                "BRANE_CACHE_SIZE": "$cache_size",
+                "BRANE_OUTPUT_BUDGET": "$output_budget",
+                "BRANE_HIBERNATE_AFTER": "$hibernate_after",
+            }
+        },
+        deps=["build-kernel", "prepare-start-ide"],
+        description="Starts a JupyterLab server on the host with the kernel from 'build-kernel', running against the `libbrane_cli.so` given with '--libbrane'. Requires JupyterLab to be installed on the host."
+    ),
+    CommandTarget("check-notebooks",
+        [[ sys.executable, "./tools/check_notebooks.py", "$brane_notebook_dir", "--libbrane", "$libbrane", "--api", "$brane_api", "--snapshot", "$index_snapshot", "--parallel", "$build_jobs", "--output", "./build/check-notebooks.json", "$check_args" ]],
+        description="Compiles every cell of every notebook in the notebook directory with the `libbrane_cli.so` given with '--libbrane', without running anything, and reports any errors (see `tools/check_notebooks.py`). The indices are loaded from '--index-snapshot', which is recorded from the instance if it doesn't exist."
+    ),
+
+    ### BENCHMARK TARGETS ###
+    CommandTarget("mock-libbrane",
+        [[ "c++", "-std=c++14", "-O2", "-shared", "-fPIC", "-I./src", "-o", "./build/bench/libbrane_cli.so", "./bench/mock_brane_cli.cpp" ]],
+        sources=[ "./bench/mock_brane_cli.cpp", "./src/brane/brane_cli.h" ],
+        outputs=[ "./build/bench/libbrane_cli.so" ],
+        description="Compiles a mock `libbrane_cli.so` that the kernel can run against without a Brane instance."
+    ),
+    CommandTarget("bench-kernel",
+        [[ sys.executable, "./bench/bench_kernel.py", "--bscript", "$bscript", "--libbrane", "./build/bench/libbrane_cli.so", "--kernels", "$bench_kernels", "--requests", "$bench_requests", "--output", "./build/bench/bench_kernel.json" ]],
+        deps=["mock-libbrane"],
+        description="Benchmarks the latency and throughput of a local `bscript` kernel against the mock `libbrane_cli.so` (see `bench/bench_kernel.py`)."
+    ),
+
+    CommandTarget("bench-make",
+        [[ sys.executable, "./bench/bench_make.py", "--make", os.path.abspath(__file__), "--output", "./build/bench/bench_make.json", "$bench_make_args" ]],
+        description="Benchmarks the scheduler and up-to-date checks of `make.py` itself on synthetic target graphs, and compares them to the previous run (see `bench/bench_make.py`)."
+    ),
+    CommandTarget("start-fake-brane",
+        [[ sys.executable, "./bench/fake_brane.py", "--dir", "./build/fake-brane", "--advertise", "host.docker.internal", "$fake_brane_args" ]],
+        description="Runs a local stand-in for a Brane instance with synthetic indices and scripted workflow results until Ctrl+C is pressed (see `bench/fake_brane.py`)."
+    ),
+
+    ### TEST TARGETS ###
+    CommandTarget("build-tests",
+        [[ "c++", "-std=c++14", "-O1", "-g", "-Wall", "-I./src", "-I./tests", "-o", "./build/tests/bscript-tests", *UNIT_TEST_SOURCES, *[ f"./src/{module}.cpp" for module in UNIT_TEST_MODULES ], "-ldl", "-pthread" ]],
+        sources=[ *UNIT_TEST_SOURCES, "./tests/check.hpp", "./src/brane/brane_cli.h", *[ f"./src/{module}.{ext}" for module in UNIT_TEST_MODULES for ext in [ "cpp", "hpp" ] ] ],
+        outputs=[ "./build/tests/bscript-tests" ],
+        description="Compiles the unit tests of the kernel's modules (see `tests/`). Requires nlohmann/json to be installed on the host."
+    ),
+    CommandTarget("test",
+        [[ "./build/tests/bscript-tests", "./build/bench/libbrane_cli.so", "$test_filter" ]],
+        deps=["build-tests", "mock-libbrane"],
+        description="Runs the unit tests of the kernel's modules against the mock `libbrane_cli.so` (only those whose name contains '--test-filter', if given)."
+    ),
+
+    ### REPORT TARGETS ###
+    CacheUsageTarget("cache-usage",
+        "$brane_data_dir",
+        "$cache_size",
+        description="Reports which datasets are in the dataset cache that the kernels share, and how much space they use."
+    ),
+    ImageBudgetTarget("check-image-budget",
+        "$image",
+        "brane-ide-budget",
+        "./docker-compose.yml",
+        "$image_size_budget",
+        "$startup_budget",
+        "./build/image-budget.json",
+        "brane-ide-budget",
+        deps=["run-image", "prepare-start-ide"],
+        env={
+            **dict(os.environ),
+            **{
+                "DEBUG": "0",
+                "BRANE_API_URL": "$brane_api",
+                "BRANE_DRV_URL": "$brane_drv",
+                "BRANE_DATA_DIR": "$brane_data_dir",
+                "BRANE_CERTS_DIR": "$brane_certs_dir",
+                "BRANE_NOTEBOOK_DIR": "$brane_notebook_dir",
+                "BRANE_KERNEL_POOL": "$kernel_pool",
+                "BRANE_IDE_IMAGE": "$image",
+            }
+        },
+        description="Measures the size of the runtime image (or its slim variant if '--slim' is given) and the time from starting it to JupyterLab being ready, and fails if either exceeds its budget ('--image-size-budget', '--startup-budget')."
+    ),
 ] }
 
 
@@ -1931,6 +3061,39 @@ if __name__ == "__main__":
     parser.add_argument("-4", "--brane-certs-dir", default=get_default_certs_dir(), help="The notebook directory to map in the IDE container.")
     parser.add_argument("-5", "--brane-notebook-dir", default="./notebooks", help="The notebook directory to map in the IDE container.")
     parser.add_argument("-6", "--brane-result-user", default="$INSTANCE", help="The user to claim that sees the final workflow result, if any. If omitted, will read from the instance info.")
+    parser.add_argument("--background-downloads", action="store_true", help="If given, the kernel downloads workflow results in the background instead of blocking the cell until they are downloaded.")
+    parser.add_argument("--max-jobs", type=int, default=4, help="The maximum number of downloads (and other jobs) a kernel runs in the background at the same time.")
+    parser.add_argument("--max-background", type=int, default=4, help="The maximum number of `%%%%background` cells a kernel runs at the same time. Any others wait until one completes.")
+    parser.add_argument("--max-submissions", type=int, default=0, help="The maximum number of workflows that all kernels in the IDE together run at the same time. Any others wait in a queue, in which every notebook gets its turn. Use '0' to not limit them.")
+    parser.add_argument("--driver-check", type=int, default=30, help="The number of seconds between two checks of whether a kernel can still reach the driver (by opening a TCP connection to it), so that it can replace its connection before the next workflow fails on it. Use '0' to only check right before running a workflow.")
+    parser.add_argument("--reconnect-timeout", type=int, default=60, help="The maximum number of seconds a kernel keeps trying to reconnect to the driver once it lost its connection (waiting longer between every attempt).")
+    parser.add_argument("--cache-size", default="10G", help="The maximum size of the dataset cache that the kernels share in the data directory (e.g., '512M' or '10G'). Use '0' to disable it.")
+    parser.add_argument("--output-budget", default="1M", help="The maximum size of the output a single cell may publish (e.g., '100K' or '1M'). Anything larger is written to a file in the notebook's directory, and only a preview is shown. Use '0' to publish everything.")
+    parser.add_argument("--hibernate-after", type=int, default=0, help="The number of seconds a kernel may be idle before it frees its connection to the instance (and most of its memory) until the next cell runs, which restores it. Use '0' to never hibernate.")
+    parser.add_argument("--cull-after", type=int, default=0, help="The number of seconds a kernel may be idle without any notebook connected to it before JupyterLab shuts it down. Use '0' to never cull kernels.")
+    parser.add_argument("--slim", action="store_true", help="If given, builds and starts the slim variant of the runtime image, which is smaller and starts faster (see the 'run-slim' stage in the Dockerfile).")
+    parser.add_argument("--image-size-budget", default="1G", help="The maximum size of the runtime image for the 'check-image-budget' target (e.g., '800M' or '1G'). Use '0' to not check it.")
+    parser.add_argument("--startup-budget", type=float, default=30.0, help="The maximum number of seconds between starting the runtime image and JupyterLab being ready for the 'check-image-budget' target. Use '0' to not check it.")
+    parser.add_argument("--build-cache", default="", help="If given, a directory in which to keep a local BuildKit cache of every stage of the image, so that builds can reuse the layers of earlier ones without a registry (e.g., './build/cache'). Requires a builder that can export caches (e.g., 'docker buildx create --use').")
+    parser.add_argument("--build-cache-size", default="20G", help="The maximum size of the build caches in '--build-cache' (e.g., '5G'). The least recently written ones are removed first. Use '0' to not limit it.")
+    parser.add_argument("--build-cache-age", type=float, default=30, help="The maximum number of days since a build cache in '--build-cache' was last written, after which it is removed. Use '0' to not limit it.")
+    parser.add_argument("--ready-timeout", type=float, default=120, help="The maximum number of seconds that the 'start-ide' target waits for JupyterLab to become ready.")
+    parser.add_argument("--batch-notebooks", default=None, help="The directory with the notebooks to execute with the 'run-notebooks' target. Must be in '--brane-notebook-dir'. Defaults to all notebooks in it.")
+    parser.add_argument("--batch-output", default=None, help="The directory to write the executed notebooks and the report of the 'run-notebooks' target to. Must be in '--brane-notebook-dir'. Defaults to '.batch-results' in '--batch-notebooks'.")
+    parser.add_argument("--batch-parallel", type=int, default=4, help="The number of notebooks that the 'run-notebooks' target executes at the same time.")
+    parser.add_argument("--batch-timeout", type=float, default=0, help="The maximum number of seconds any cell may take with the 'run-notebooks' target. Use '0' to wait indefinitely.")
+    parser.add_argument("--kernel-pool", type=int, default=0, help="The number of BraneScript kernels to keep started ahead of time, so that opening a notebook does not have to wait for one to connect to the instance.")
+    parser.add_argument("--libbrane", default=os.environ.get("LIBBRANE_PATH", "./libbrane_cli.so"), help="The `libbrane_cli.so` that the kernel runs against with the 'start-native-ide' target.")
+    parser.add_argument("--cmake-args", default="", help="Any additional arguments to pass to CMake when configuring the 'build-kernel' target (e.g., '-D CMAKE_BUILD_TYPE=Debug').")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="The number of files to compile in parallel with the 'build-kernel' target, or of notebooks with the 'check-notebooks' target.")
+    parser.add_argument("--index-snapshot", default="./build/index-snapshot.json", help="The snapshot of the package and data indices that the 'check-notebooks' target compiles against. If it does not exist, it is recorded from '--brane-api' first. Use an empty string to always load them from the instance.")
+    parser.add_argument("--refresh-snapshot", action="store_true", help="If given, the 'check-notebooks' target records '--index-snapshot' again even if it already exists.")
+    parser.add_argument("--test-filter", default="", help="If given, the 'test' target only runs the unit tests whose name contains this.")
+    parser.add_argument("--bscript", default="bscript", help="The `bscript` kernel executable to benchmark with the 'bench-kernel' target.")
+    parser.add_argument("--bench-kernels", type=int, default=1, help="The number of kernels to benchmark in parallel with the 'bench-kernel' target.")
+    parser.add_argument("--bench-requests", type=int, default=100, help="The number of requests to send to every kernel with the 'bench-kernel' target.")
+    parser.add_argument("--bench-make-args", default="", help="Any additional arguments to pass to `bench/bench_make.py` with the 'bench-make' target (e.g., '--targets 5000 --repeats 5').")
+    parser.add_argument("--fake-brane-args", default="", help="Any additional arguments to pass to `bench/fake_brane.py` with the 'start-fake-brane' target (e.g., '--packages 500 --result-kind data').")
     parser.add_argument("-D", "--docker", default="docker", help="The `docker`-command to call for any Docker commands.")
     parser.add_argument("-C", "--docker-compose", default="docker compose", help="The `docker compose`-command to call for any Docker Compose commands.")
     parser.add_argument("-S", "--docker-socket", default=("npipe:////./pipe/docker_engine" if Os.default() == Os.windows() else "/var/run/docker.sock"), help="The location of the Docker socket to connect to.")
@@ -1951,6 +3114,47 @@ if __name__ == "__main__":
     TARGET_ARGS["brane_certs_dir"] = args.brane_certs_dir
     TARGET_ARGS["brane_notebook_dir"] = args.brane_notebook_dir
     TARGET_ARGS["brane_result_user"] = args.brane_result_user
+    TARGET_ARGS["background_downloads"] = "1" if args.background_downloads else "0"
+    TARGET_ARGS["max_jobs"] = str(args.max_jobs)
+    TARGET_ARGS["max_background"] = str(args.max_background)
+    TARGET_ARGS["max_submissions"] = str(args.max_submissions)
+    TARGET_ARGS["driver_check"] = str(args.driver_check)
+    TARGET_ARGS["reconnect_timeout"] = str(args.reconnect_timeout)
+    TARGET_ARGS["cache_size"] = args.cache_size
+    TARGET_ARGS["kernel_pool"] = str(args.kernel_pool)
+    TARGET_ARGS["ready_timeout"] = str(args.ready_timeout)
+    batch_notebooks = container_notebook_path(args.brane_notebook_dir, args.batch_notebooks if args.batch_notebooks is not None else args.brane_notebook_dir)
+    batch_output = container_notebook_path(args.brane_notebook_dir, args.batch_output) if args.batch_output is not None else None
+    if batch_notebooks is None or (args.batch_output is not None and batch_output is None):
+        perror(f"The '--batch-notebooks' and '--batch-output' directories must be in the notebook directory '{args.brane_notebook_dir}'")
+        exit(1)
+    TARGET_ARGS["batch_notebooks"] = batch_notebooks
+    TARGET_ARGS["batch_args"] = [ "--output", batch_output ] if batch_output is not None else []
+    TARGET_ARGS["batch_parallel"] = str(args.batch_parallel)
+    TARGET_ARGS["batch_timeout"] = str(args.batch_timeout)
+    TARGET_ARGS["image"] = "brane-ide-server-slim" if args.slim else "brane-ide-server"
+    TARGET_ARGS["image_target"] = "run-slim" if args.slim else "run"
+    TARGET_ARGS["image_size_budget"] = args.image_size_budget
+    TARGET_ARGS["build_cache"] = args.build_cache
+    TARGET_ARGS["build_cache_size"] = args.build_cache_size
+    TARGET_ARGS["build_cache_age"] = str(args.build_cache_age)
+    TARGET_ARGS["startup_budget"] = str(args.startup_budget)
+    TARGET_ARGS["output_budget"] = args.output_budget
+    TARGET_ARGS["hibernate_after"] = str(args.hibernate_after)
+    TARGET_ARGS["cull_after"] = str(args.cull_after)
+    TARGET_ARGS["libbrane"] = os.path.abspath(args.libbrane)
+    TARGET_ARGS["native_data_dir"] = os.path.abspath(args.brane_data_dir)
+    TARGET_ARGS["native_certs_dir"] = os.path.abspath(args.brane_certs_dir)
+    TARGET_ARGS["cmake_args"] = shlex.split(args.cmake_args)
+    TARGET_ARGS["build_jobs"] = str(args.jobs)
+    TARGET_ARGS["index_snapshot"] = args.index_snapshot
+    TARGET_ARGS["check_args"] = [ "--refresh-snapshot" ] if args.refresh_snapshot else []
+    TARGET_ARGS["test_filter"] = args.test_filter
+    TARGET_ARGS["bscript"] = args.bscript
+    TARGET_ARGS["bench_kernels"] = str(args.bench_kernels)
+    TARGET_ARGS["bench_requests"] = str(args.bench_requests)
+    TARGET_ARGS["bench_make_args"] = shlex.split(args.bench_make_args)
+    TARGET_ARGS["fake_brane_args"] = shlex.split(args.fake_brane_args)
     TARGET_ARGS["docker"] = args.docker
     TARGET_ARGS["docker_compose"] = args.docker_compose
     TARGET_ARGS["docker_socket"] = args.docker_socket
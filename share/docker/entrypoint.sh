@@ -0,0 +1,24 @@
+#!/usr/bin/env bash
+# ENTRYPOINT.sh
+#   by Lut99
+#
+# Created:
+#   19 Oct 2026, 19:41:06
+# Last edited:
+#   20 Oct 2026, 00:52:36
+# Auto updated?
+#   Yes
+#
+# Description:
+#   Entrypoint of the `run-slim` image, which starts the JupyterLab
+#   server as the `brane` user.
+#
+
+
+su brane <<'END'
+export PATH="/opt/lab/bin:$PATH"
+export LIBBRANE_PATH="/libbrane_cli.so"
+cd "/home/brane/notebooks"
+if [[ "$DEBUG" -eq 1 ]]; then DEBUG_FLAG=' --debug'; else DEBUG_FLAG=''; fi
+exec jupyter-lab$DEBUG_FLAG --ip 0.0.0.0 --no-browser --KernelSpecManager.ensure_native_kernel=False --ServerApp.kernel_manager_class=brane_kernel_pool.PooledKernelManager --PooledKernelManager.pool_size="${BRANE_KERNEL_POOL:-0}" --MappingKernelManager.cull_idle_timeout="${BRANE_CULL_AFTER:-0}"
+END
@@ -0,0 +1,196 @@
+# BRANE KERNEL POOL.py
+#   by Lut99
+#
+# Created:
+#   19 Oct 2026, 14:48:19
+# Last edited:
+#   19 Oct 2026, 14:48:19
+# Auto updated?
+#   Yes
+#
+# Description:
+#   Implements a kernel manager for the Jupyter server that keeps a pool
+#   of BraneScript kernels warm, so that opening a notebook does not
+#   have to wait for the kernel to load `libbrane_cli.so` and fetch the
+#   package- and data indices.
+#
+#   Enable it with:
+#   ```bash
+#   jupyter-lab --ServerApp.kernel_manager_class=brane_kernel_pool.PooledKernelManager --PooledKernelManager.pool_size=4
+#   ```
+#
+
+import asyncio
+import typing
+import uuid
+
+from jupyter_client.utils import ensure_async
+from jupyter_server._tz import utcnow
+from jupyter_server.services.kernels.kernelmanager import AsyncMappingKernelManager
+from tornado.ioloop import IOLoop
+from traitlets import Float, Integer, Unicode
+
+
+##### LIBRARY #####
+class PooledKernelManager(AsyncMappingKernelManager):
+    """
+        A kernel manager that starts kernels of a given kind ahead of time, and hands them out to new notebooks once they ask for one.
+
+        Kernels in the pool have finished starting (i.e., they answered a `kernel_info` request, which the BraneScript kernel only does once it has connected to the instance). They are hidden from the list of running kernels until claimed. Note that pooled kernels run in the server's root directory, not in the directory of the notebook that claims them.
+    """
+
+    pool_size = Integer(0, config=True, help="The number of kernels to keep warm. Use 0 to disable the pool.")
+    pool_kernel_name = Unicode("bscript", config=True, help="The name of the kernelspec of the kernels to keep warm.")
+    pool_timeout = Float(120.0, config=True, help="The maximum time (in seconds) a kernel may take to start before it is discarded from the pool.")
+
+    _pool    : typing.List[str]
+    _warming : typing.Set[str]
+    _filling : bool
+    _closing : bool
+
+
+    def __init__(self, **kwargs: typing.Any):
+        """
+            Constructor for the PooledKernelManager.
+
+            # Arguments
+            - `kwargs`: Any arguments to pass to the parent kernel manager.
+
+            # Returns
+            A new PooledKernelManager instance.
+        """
+
+        super().__init__(**kwargs)
+        self._pool = []
+        self._warming = set()
+        self._filling = False
+        self._closing = False
+
+        # Start warming up as soon as the server runs
+        if self.pool_size > 0:
+            IOLoop.current().add_callback(self._fill)
+
+
+
+    async def _warm_one(self) -> bool:
+        """
+            Starts a new kernel and adds it to the pool once it's ready.
+
+            # Returns
+            Whether the kernel was started successfully.
+        """
+
+        kernel_id = str(uuid.uuid4())
+        self._warming.add(kernel_id)
+        try:
+            await super().start_kernel(kernel_id=kernel_id, kernel_name=self.pool_kernel_name)
+
+            # Wait until it answers, as that only happens once it's done configuring
+            client = self.get_kernel(kernel_id).client()
+            client.start_channels()
+            try:
+                await ensure_async(client.wait_for_ready(timeout=self.pool_timeout))
+            finally:
+                client.stop_channels()
+            if self._closing: raise RuntimeError("Server is shutting down")
+        except Exception as e:
+            self.log.warning(f"Failed to start kernel '{kernel_id}' for the pool: {e}")
+            if kernel_id in self:
+                await ensure_async(self.shutdown_kernel(kernel_id, now=True))
+            return False
+        finally:
+            self._warming.discard(kernel_id)
+
+        self._pool.append(kernel_id)
+        self.log.info(f"Kernel '{kernel_id}' ready in the pool ({len(self._pool)}/{self.pool_size})")
+        return True
+
+    async def _fill(self):
+        """
+            Starts kernels until the pool is full again.
+
+            Stops early if any kernel fails to start, to prevent spinning on a broken configuration; the next claim tries again.
+        """
+
+        if self._filling or self._closing: return
+        self._filling = True
+        try:
+            while not self._closing and len(self._pool) + len(self._warming) < self.pool_size:
+                missing = self.pool_size - len(self._pool) - len(self._warming)
+                results = await asyncio.gather(*[ self._warm_one() for _ in range(missing) ])
+                if not all(results): break
+        finally:
+            self._filling = False
+
+    async def _claim(self) -> typing.Optional[str]:
+        """
+            Takes a ready kernel from the pool, if any.
+
+            # Returns
+            The ID of the claimed kernel, or `None` if none was ready.
+        """
+
+        while len(self._pool) > 0:
+            kernel_id = self._pool.pop(0)
+            if kernel_id in self and await ensure_async(self.get_kernel(kernel_id).is_alive()):
+                self.get_kernel(kernel_id).last_activity = utcnow()
+                self.log.info(f"Claimed kernel '{kernel_id}' from the pool ({len(self._pool)} left)")
+                return kernel_id
+            self.log.warning(f"Discarding dead kernel '{kernel_id}' from the pool")
+            if kernel_id in self:
+                await ensure_async(self.shutdown_kernel(kernel_id, now=True))
+        return None
+
+
+
+    async def start_kernel(self, kernel_id: typing.Optional[str] = None, path: typing.Optional[str] = None, **kwargs: typing.Any) -> str:
+        """
+            Starts a kernel for a notebook, or hands out a pooled one if there is one of the right kind.
+
+            # Arguments
+            - `kernel_id`: The ID of a specific kernel to start. Pooled kernels are only handed out if this is `None`.
+            - `path`: The API path of the notebook (used as the working directory of new kernels).
+            - `kwargs`: Any other arguments to pass to the parent kernel manager.
+
+            # Returns
+            The ID of the kernel.
+        """
+
+        kernel_name = kwargs.get("kernel_name") or self.default_kernel_name
+        if self.pool_size > 0 and kernel_id is None and kernel_name == self.pool_kernel_name:
+            claimed = await self._claim()
+            IOLoop.current().add_callback(self._fill)
+            if claimed is not None: return claimed
+        return await super().start_kernel(kernel_id=kernel_id, path=path, **kwargs)
+
+    def list_kernels(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """
+            Lists the running kernels, except for those waiting in the pool.
+        """
+
+        hidden = set(self._pool) | self._warming
+        return [ k for k in super().list_kernels() if k["id"] not in hidden ]
+
+    async def cull_kernel_if_idle(self, kernel_id: str):
+        """
+            Culls a kernel if it has been idle for too long, unless it's waiting in the pool.
+        """
+
+        if kernel_id in self._pool or kernel_id in self._warming: return
+        await super().cull_kernel_if_idle(kernel_id)
+
+    async def shutdown_all(self, now: bool = False):
+        """
+            Shuts down all kernels, including the pooled ones and those still starting for the pool.
+
+            # Arguments
+            - `now`: Whether to kill the kernels instead of asking them to stop.
+        """
+
+        # Kernels still starting for the pool shut themselves down once they're up, so give them a moment to do so (the parent does not handle kernels that are still starting well)
+        self._closing = True
+        deadline = asyncio.get_running_loop().time() + 10.0
+        while len(self._warming) > 0 and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.1)
+
+        await super().shutdown_all(now=now)
@@ -0,0 +1,179 @@
+/* ADMISSION.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 01:14:57
+ * Last edited:
+ *   20 Oct 2026, 01:14:57
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements a queue that all kernels in a container share to limit
+ *   the number of workflows they submit to the instance at the same
+ *   time.
+**/
+
+#include <cerrno>
+#include <cstdio>
+#include <fstream>
+#include <signal.h>
+#include <thread>
+#include <unistd.h>
+#include <unordered_map>
+#include <vector>
+
+#include "nlohmann/json.hpp"
+#include "utils.hpp"
+#include "admission.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** CONSTANTS *****/
+/* How often a waiting workflow checks whether it's its turn. */
+static const chrono::milliseconds POLL_INTERVAL(100);
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Reads the queue, dropping the tickets of processes that no longer exist. Only call while holding the lock.
+ *
+ * # Returns
+ * The queue as an object with the sequence number of the next ticket (`next`) and the `tickets` themselves.
+ */
+static nl::json read_state(const string& path) {
+    ifstream h(path);
+    nl::json state = h.is_open() ? nl::json::parse(h, nullptr, false) : nl::json();
+    if (state.is_discarded() || !state.is_object() || !state.contains("tickets")) {
+        state = { { "next", 0 }, { "tickets", nl::json::array() } };
+    }
+
+    nl::json alive = nl::json::array();
+    for (const nl::json& ticket : state["tickets"]) {
+        if (kill(ticket["pid"].get<pid_t>(), 0) == 0 || errno != ESRCH) { alive.push_back(ticket); }
+    }
+    state["tickets"] = alive;
+    return state;
+}
+
+/* Writes the queue. Only call while holding the lock. */
+static void write_state(const string& path, const nl::json& state) {
+    // Write it next to it first, so that a kernel dying halfway does not leave half a queue
+    string tmp_path = path + "." + to_string(getpid());
+    ofstream(tmp_path) << state.dump();
+    rename(tmp_path.c_str(), path.c_str());
+}
+
+
+
+
+
+/***** LIBRARY *****/
+Admission::Slot::Slot(Admission* admission, function<void(size_t)> waiting) :
+    admission(admission),
+    waited_s(0.0)
+{
+    if (this->admission == nullptr) { return; }
+    chrono::steady_clock::time_point start = chrono::steady_clock::now();
+    this->ticket = this->admission->enqueue();
+
+    // Wait for our turn
+    size_t position = 0, last_position = 0;
+    while (!this->admission->admit(this->ticket, position)) {
+        if (position != last_position && waiting) { waiting(position); }
+        last_position = position;
+        this_thread::sleep_for(POLL_INTERVAL);
+    }
+    this->waited_s = chrono::duration<double>(chrono::steady_clock::now() - start).count();
+}
+
+Admission::Slot::~Slot() {
+    if (this->admission == nullptr) { return; }
+    this->admission->release(this->ticket);
+}
+
+
+
+Admission::Admission(const string& dir, size_t limit) :
+    state_path(dir + "/queue.json"),
+    lock_path(dir + "/queue.lock"),
+    limit(limit > 0 ? limit : 1),
+    n_tickets(0)
+{
+    make_dirs(dir);
+}
+
+
+
+string Admission::enqueue() {
+    string ticket = to_string(getpid()) + "-" + to_string(this->n_tickets++);
+
+    FileLock guard(this->lock_path);
+    nl::json state = read_state(this->state_path);
+    state["tickets"].push_back({ { "id", ticket }, { "pid", getpid() }, { "seq", state["next"] }, { "admitted", false } });
+    state["next"] = state["next"].get<size_t>() + 1;
+    write_state(this->state_path, state);
+    return ticket;
+}
+
+bool Admission::admit(const string& ticket, size_t& position) {
+    FileLock guard(this->lock_path);
+    nl::json state = read_state(this->state_path);
+
+    // Find out how many workflows every kernel is running, and who's waiting
+    unordered_map<pid_t, size_t> load;
+    size_t n_running = 0;
+    vector<nl::json*> waiting;
+    for (nl::json& t : state["tickets"]) {
+        if (t["admitted"].get<bool>()) {
+            load[t["pid"].get<pid_t>()]++;
+            n_running++;
+        } else {
+            waiting.push_back(&t);
+        }
+    }
+
+    // Find our place when handing out slots one by one to the kernel running the fewest workflows (and then to whoever waited longest)
+    size_t rank = 0;
+    nl::json* ours = nullptr;
+    while (!waiting.empty()) {
+        auto next = waiting.begin();
+        for (auto it = waiting.begin(); it != waiting.end(); ++it) {
+            size_t it_load = load[(**it)["pid"].get<pid_t>()], next_load = load[(**next)["pid"].get<pid_t>()];
+            if (it_load < next_load || (it_load == next_load && (**it)["seq"].get<size_t>() < (**next)["seq"].get<size_t>())) { next = it; }
+        }
+        rank++;
+        if ((**next)["id"] == ticket) {
+            ours = *next;
+            break;
+        }
+        load[(**next)["pid"].get<pid_t>()]++;
+        waiting.erase(next);
+    }
+
+    // If we're no longer in the queue, it was mangled somehow; don't hold up the workflow because of it
+    if (ours == nullptr) { return true; }
+    if (n_running + rank <= this->limit) {
+        (*ours)["admitted"] = true;
+        write_state(this->state_path, state);
+        return true;
+    }
+    position = rank - (n_running < this->limit ? this->limit - n_running : 0);
+    return false;
+}
+
+void Admission::release(const string& ticket) {
+    FileLock guard(this->lock_path);
+    nl::json state = read_state(this->state_path);
+    nl::json tickets = nl::json::array();
+    for (const nl::json& t : state["tickets"]) {
+        if (t["id"] != ticket) { tickets.push_back(t); }
+    }
+    state["tickets"] = tickets;
+    write_state(this->state_path, state);
+}
@@ -0,0 +1,112 @@
+/* ADMISSION.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 01:06:24
+ * Last edited:
+ *   20 Oct 2026, 01:06:24
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a queue that all kernels in a container share to limit the
+ *   number of workflows they submit to the instance at the same time.
+**/
+
+#ifndef BSCRIPT_ADMISSION_HPP
+#define BSCRIPT_ADMISSION_HPP
+
+#include <atomic>
+#include <chrono>
+#include <cstddef>
+#include <functional>
+#include <string>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Limits the number of workflows that all kernels sharing a directory (i.e., those in the same container) run at the same time.
+     *
+     * Workflows wait for a slot in a queue that is kept in a file, which the kernels lock with `flock()`. Slots are handed out fairly between kernels (and thus notebooks): the next one goes to the waiting workflow of the kernel with the fewest workflows running, and only then to whichever waited longest. Tickets of kernels that died are dropped.
+     */
+    class Admission {
+    public:
+        /* Holds a slot for as long as it lives. */
+        class Slot {
+        private:
+            /* The queue we hold a slot in, if any. */
+            Admission* admission;
+            /* Our ticket in the queue. */
+            std::string ticket;
+            /* How long we waited for the slot, in seconds. */
+            double waited_s;
+
+        public:
+            /* Constructor for the Slot, which waits until one is available.
+             *
+             * # Arguments
+             * - `admission`: The queue to get a slot in, or `nullptr` to not wait at all (e.g., if there is no limit).
+             * - `waiting`: If given, called with the position in the queue (1 being next) whenever it changes while we wait.
+             */
+            Slot(Admission* admission, std::function<void(size_t)> waiting = nullptr);
+            /* Copy constructor for the Slot, which is deleted. */
+            Slot(const Slot& other) = delete;
+            /* Destructor for the Slot, which gives it back. */
+            ~Slot();
+
+            /* Copy assignment operator for the Slot, which is deleted. */
+            Slot& operator=(const Slot& other) = delete;
+
+            /* Returns how long we waited for the slot, in seconds. */
+            inline double waited() const { return this->waited_s; }
+        };
+
+    private:
+        /* The file with the queue. */
+        std::string state_path;
+        /* The file we lock while reading or writing the queue. */
+        std::string lock_path;
+        /* The maximum number of workflows that may run at the same time. */
+        size_t limit;
+        /* The number of tickets this process has taken so far, to tell them apart. */
+        std::atomic<size_t> n_tickets;
+
+    public:
+        /* Constructor for the Admission.
+         *
+         * # Arguments
+         * - `dir`: The directory with the queue, which all kernels that share the limit use. Created if it does not exist.
+         * - `limit`: The maximum number of workflows that may run at the same time.
+         */
+        Admission(const std::string& dir, size_t limit);
+
+
+
+        /* Joins the queue.
+         *
+         * # Returns
+         * The ticket with which to `admit()` and `release()`.
+         */
+        std::string enqueue();
+
+        /* Gives the ticket a slot if it's its turn.
+         *
+         * # Arguments
+         * - `ticket`: The ticket that waits for a slot.
+         * - `position`: Will be set to the position of the ticket in the queue (1 being next) if it's not its turn yet.
+         *
+         * # Returns
+         * True if the ticket holds a slot now, or false if it has to wait some more.
+         */
+        bool admit(const std::string& ticket, size_t& position);
+
+        /* Gives back the slot of the ticket, or leaves the queue if it did not get one yet.
+         *
+         * # Arguments
+         * - `ticket`: The ticket to release.
+         */
+        void release(const std::string& ticket);
+    };
+}
+
+#endif
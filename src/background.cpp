@@ -0,0 +1,213 @@
+/* BACKGROUND.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 16:48:03
+ * Last edited:
+ *   20 Oct 2026, 11:39:40
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements the execution of workflows in the background (i.e., for
+ *   `%%background` cells), which run on their own VirtualMachines so
+ *   that several of them can be in flight at the same time.
+**/
+
+#include <cstdlib>
+
+#include "connection.hpp"
+#include "download.hpp"
+#include "background.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** GLOBALS *****/
+/* The map of dynamically loaded compiler functions (defined in `custom_interpreter.cpp`). */
+extern Functions* brane_cli;
+
+
+
+
+
+/***** LIBRARY *****/
+VmPool::Indices::~Indices() {
+    brane_cli->dindex_free(this->dindex);
+    brane_cli->pindex_free(this->pindex);
+}
+
+
+
+VmPool::VmPool(const string& api_endpoint, const string& drv_endpoint, const string& certs_dir) :
+    api_endpoint(api_endpoint),
+    drv_endpoint(drv_endpoint),
+    certs_dir(certs_dir)
+{}
+
+VmPool::~VmPool() {
+    for (VirtualMachine* vm : this->idle) {
+        brane_cli->vm_free(vm);
+    }
+}
+
+
+
+Error* VmPool::get_indices(shared_ptr<Indices>& indices) {
+    lock_guard<mutex> guard(this->indices_lock);
+    if (this->indices == nullptr) {
+        // Load them (holding the lock, so that workflows starting at the same time wait for us instead of loading them too)
+        PackageIndex* pindex = nullptr;
+        Error* err = brane_cli->pindex_new_remote(this->api_endpoint.c_str(), &pindex);
+        if (err != nullptr) { return err; }
+        DataIndex* dindex = nullptr;
+        err = brane_cli->dindex_new_remote(this->api_endpoint.c_str(), &dindex);
+        if (err != nullptr) {
+            brane_cli->pindex_free(pindex);
+            return err;
+        }
+        this->indices = shared_ptr<Indices>(new Indices{ pindex, dindex });
+    }
+    indices = this->indices;
+    return nullptr;
+}
+
+
+
+Error* VmPool::acquire(VirtualMachine** vm) {
+    // Re-use an idle VM if there is one
+    {
+        lock_guard<mutex> guard(this->lock);
+        if (!this->idle.empty()) {
+            *vm = this->idle.back();
+            this->idle.pop_back();
+            this->borrowed.insert(*vm);
+            return nullptr;
+        }
+    }
+
+    // Otherwise, create a new one (without holding the lock, as this talks to the instance)
+    shared_ptr<Indices> indices;
+    Error* err = this->get_indices(indices);
+    if (err != nullptr) { return err; }
+    err = brane_cli->vm_new(this->api_endpoint.c_str(), this->drv_endpoint.c_str(), this->certs_dir.c_str(), indices->pindex, indices->dindex, vm);
+    if (err == nullptr) {
+        lock_guard<mutex> guard(this->lock);
+        this->borrowed.insert(*vm);
+    }
+    return err;
+}
+
+void VmPool::release(VirtualMachine* vm, bool broken) {
+    lock_guard<mutex> guard(this->lock);
+    this->borrowed.erase(vm);
+    if (this->outdated.erase(vm) > 0 || broken) {
+        brane_cli->vm_free(vm);
+        return;
+    }
+    this->idle.push_back(vm);
+}
+
+Error* VmPool::new_compiler(Compiler** compiler) {
+    shared_ptr<Indices> indices;
+    Error* err = this->get_indices(indices);
+    if (err != nullptr) { return err; }
+    return brane_cli->compiler_new(indices->pindex, indices->dindex, compiler);
+}
+
+size_t VmPool::invalidate() {
+    {
+        lock_guard<mutex> guard(this->indices_lock);
+        this->indices.reset();
+    }
+
+    lock_guard<mutex> guard(this->lock);
+    size_t n_discarded = this->idle.size() + this->borrowed.size();
+    for (VirtualMachine* vm : this->idle) {
+        brane_cli->vm_free(vm);
+    }
+    this->idle.clear();
+    this->outdated.insert(this->borrowed.begin(), this->borrowed.end());
+    this->borrowed.clear();
+    return n_discarded;
+}
+
+
+
+
+
+BackgroundRun::BackgroundRun(VmPool* vms, Workflow* workflow, const string& data_dir, DataCache* cache, Admission* admission) :
+    vms(vms),
+    workflow(workflow),
+    data_dir(data_dir),
+    cache(cache),
+    admission(admission),
+
+    result(nullptr),
+    err(nullptr)
+{}
+
+BackgroundRun::~BackgroundRun() {
+    if (this->result != nullptr) {
+        brane_cli->fvalue_free(this->result);
+    }
+    if (this->err != nullptr) {
+        brane_cli->error_free(this->err);
+    }
+}
+
+
+
+void BackgroundRun::run() {
+    // Get a VM to ourselves
+    VirtualMachine* vm = nullptr;
+    this->err = this->vms->acquire(&vm);
+    if (this->err != nullptr) {
+        this->err_step = "connecting to the instance";
+        return;
+    }
+
+    // Run the workflow on it, once it's our turn
+    char* prints = nullptr;
+    {
+        Admission::Slot slot(this->admission);
+        this->err = brane_cli->vm_run(vm, this->workflow, &prints, &(this->result));
+    }
+    if (prints != nullptr) {
+        this->prints = prints;
+        free(prints);
+    }
+    if (this->err != nullptr) {
+        this->err_step = "executing";
+        this->result = nullptr;
+
+        // Don't reuse the VM if its connection to the driver broke
+        char* buffer = nullptr;
+        brane_cli->error_serialize_err(this->err, &buffer);
+        bool broken = connection_lost(buffer);
+        free(buffer);
+        this->vms->release(vm, broken);
+        return;
+    }
+
+    // Download the result, if any
+    if (brane_cli->fvalue_needs_processing(this->result)) {
+        // Only we use this VM, but the download wants to share it; take it back once it's done
+        shared_ptr<SharedVm> shared = make_shared<SharedVm>(vm);
+        {
+            Download download(shared, this->result, this->data_dir, this->cache);
+            download.run();
+            this->err = download.take_error();
+            if (this->err != nullptr) { this->err_step = "processing"; }
+        }
+        vm = shared->release();
+    }
+    this->vms->release(vm);
+}
+
+Error* BackgroundRun::take_error() {
+    Error* err = this->err;
+    this->err = nullptr;
+    return err;
+}
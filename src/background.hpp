@@ -0,0 +1,210 @@
+/* BACKGROUND.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 16:48:03
+ * Last edited:
+ *   20 Oct 2026, 10:14:33
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines the execution of workflows in the background (i.e., for
+ *   `%%background` cells), which run on their own VirtualMachines so
+ *   that several of them can be in flight at the same time.
+**/
+
+#ifndef BSCRIPT_BACKGROUND_HPP
+#define BSCRIPT_BACKGROUND_HPP
+
+#include <memory>
+#include <mutex>
+#include <set>
+#include <string>
+#include <vector>
+
+#include "brane/brane_cli.h"
+#include "admission.hpp"
+#include "data_cache.hpp"
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Keeps VirtualMachines around for workflows that run in the background.
+     *
+     * A VirtualMachine cannot run two workflows at the same time, so every background workflow borrows one for as long as it runs. VMs are created when none is idle, and reused afterwards; as such, there are never more VMs than workflows that ran at the same time.
+     *
+     * The pool loads the package- and data indices once, and then creates every VM (and every compiler for background cells, see `new_compiler()`) with them until it's invalidated.
+     */
+    class VmPool {
+    private:
+        /* A package- and data index, which is freed once the pool and everyone creating a VM or compiler with it have dropped it. */
+        struct Indices {
+            /* The package index. */
+            PackageIndex* pindex;
+            /* The data index. */
+            DataIndex* dindex;
+
+            /* Destructor for the Indices. */
+            ~Indices();
+        };
+
+        /* The Brane API endpoint to connect to. */
+        std::string api_endpoint;
+        /* The Brane driver endpoint to connect to. */
+        std::string drv_endpoint;
+        /* The folder with the certificates to connect with. */
+        std::string certs_dir;
+
+        /* The VMs that are not used by any workflow right now. */
+        std::vector<VirtualMachine*> idle;
+        /* The VMs that are used by a workflow right now. */
+        std::set<VirtualMachine*> borrowed;
+        /* The borrowed VMs that were created before the last call to `invalidate()`, which are freed instead of reused once they are returned. */
+        std::set<VirtualMachine*> outdated;
+        /* Protects `idle`, `borrowed` and `outdated`. */
+        std::mutex lock;
+        /* The indices to create new VMs and compilers with, or `nullptr` if they have not been loaded (since the last call to `invalidate()`). */
+        std::shared_ptr<Indices> indices;
+        /* Protects `indices`. Held while loading them, so that they are only loaded once. */
+        std::mutex indices_lock;
+
+
+        /* Returns the indices to create new VMs and compilers with, loading them first if needed.
+         *
+         * # Arguments
+         * - `indices`: Will be set to the indices.
+         *
+         * # Returns
+         * `nullptr` if the indices are available, or else the error that occurred while loading them.
+         */
+        Error* get_indices(std::shared_ptr<Indices>& indices);
+
+    public:
+        /* Constructor for the VmPool.
+         *
+         * # Arguments
+         * - `api_endpoint`: The Brane API endpoint to connect to.
+         * - `drv_endpoint`: The Brane driver endpoint to connect to.
+         * - `certs_dir`: Path to a folder with certificates.
+         */
+        VmPool(const std::string& api_endpoint, const std::string& drv_endpoint, const std::string& certs_dir);
+        /* Copy constructor for the VmPool, which is deleted. */
+        VmPool(const VmPool& other) = delete;
+        /* Destructor for the VmPool. Any VMs that are still borrowed must have been returned. */
+        ~VmPool();
+
+        /* Copy assignment operator for the VmPool, which is deleted. */
+        VmPool& operator=(const VmPool& other) = delete;
+
+
+
+        /* Borrows a VM from the pool, creating a new one if none is idle.
+         *
+         * Creating a VM may take a while, so this is meant to be called from a worker thread.
+         *
+         * # Arguments
+         * - `vm`: Will be set to the borrowed VM.
+         *
+         * # Returns
+         * `nullptr` if a VM was borrowed, or else the error that occurred while creating one.
+         */
+        Error* acquire(VirtualMachine** vm);
+
+        /* Returns a borrowed VM to the pool.
+         *
+         * # Arguments
+         * - `vm`: The VM to return.
+         * - `broken`: If true, the VM lost its connection to the driver, and is freed instead of reused.
+         */
+        void release(VirtualMachine* vm, bool broken = false);
+
+        /* Creates a compiler with the same indices as the VMs in the pool.
+         *
+         * The compiler has not seen any snippet yet, so it can be used to compile a cell that runs in the background without reading or changing the state of the session (i.e., the cell cannot use what earlier cells defined).
+         *
+         * # Arguments
+         * - `compiler`: Will be set to the new compiler. Ownership is passed to the caller.
+         *
+         * # Returns
+         * `nullptr` if the compiler was created, or else the error that occurred.
+         */
+        Error* new_compiler(Compiler** compiler);
+
+        /* Discards all VMs created so far (as soon as they are returned, for borrowed ones) and the indices, so that new workflows are compiled and run with fresh package- and data indices.
+         *
+         * # Returns
+         * The number of VMs that were discarded.
+         */
+        size_t invalidate();
+    };
+
+
+
+    /* Represents the execution of a single workflow in the background.
+     *
+     * `run()` is meant to be called on a worker thread (see `JobQueue`), whereas the other functions may be called from the kernel thread once it has completed.
+     */
+    class BackgroundRun {
+    private:
+        /* The pool to borrow a VM from. Not owned by us. */
+        VmPool* vms;
+        /* The workflow to run. Not owned by us. */
+        Workflow* workflow;
+        /* The data directory to download the result to, if needed. */
+        std::string data_dir;
+        /* The cache to serve the result from if possible, or `nullptr` to always download it. Not owned by us. */
+        DataCache* cache;
+        /* The queue to wait in for a slot before running the workflow, or `nullptr` to run it right away. Not owned by us. */
+        Admission* admission;
+
+        /* Anything the workflow printed. */
+        std::string prints;
+        /* The result of the workflow, or `nullptr` if it failed. */
+        FullValue* result;
+        /* The error that occurred, if any. */
+        Error* err;
+        /* The step in which `err` occurred (e.g., "executing"). */
+        std::string err_step;
+
+    public:
+        /* Constructor for the BackgroundRun.
+         *
+         * # Arguments
+         * - `vms`: The pool to borrow a VM from.
+         * - `workflow`: The (compiled) workflow to run.
+         * - `data_dir`: The generic data directory to download the result to, if it's a dataset.
+         * - `cache`: The cache to serve the result from, if it's in there, or `nullptr` to always download it.
+         * - `admission`: The queue to wait in for a slot before running the workflow, or `nullptr` to run it right away.
+         */
+        BackgroundRun(VmPool* vms, Workflow* workflow, const std::string& data_dir, DataCache* cache = nullptr, Admission* admission = nullptr);
+        /* Copy constructor for the BackgroundRun, which is deleted. */
+        BackgroundRun(const BackgroundRun& other) = delete;
+        /* Destructor for the BackgroundRun. */
+        ~BackgroundRun();
+
+        /* Copy assignment operator for the BackgroundRun, which is deleted. */
+        BackgroundRun& operator=(const BackgroundRun& other) = delete;
+
+
+
+        /* Runs the workflow, and downloads its result if needed. Blocks until it's done. */
+        void run();
+
+        /* Returns anything the workflow printed. */
+        inline const std::string& get_prints() const { return this->prints; }
+        /* Returns the result of the workflow, or `nullptr` if it failed. Still owned by us. */
+        inline FullValue* get_result() const { return this->result; }
+        /* Returns the step in which the run failed (e.g., "executing"), if it did. */
+        inline const std::string& get_err_step() const { return this->err_step; }
+
+        /* Takes the error that occurred during the run, if any.
+         *
+         * # Returns
+         * The error, or `nullptr` if the run succeeded. Ownership is passed to the caller.
+         */
+        Error* take_error();
+    };
+}
+
+#endif
@@ -4,7 +4,7 @@
  * Created:
  *   14 Jun 2023, 11:49:07
  * Last edited:
- *   04 Mar 2024, 13:48:40
+ *   20 Oct 2026, 00:21:47
  * Auto updated?
  *   Yes
  *
@@ -25,6 +25,9 @@
 #define LOAD_SYMBOL(TARGET, PROTOTYPE) \
     (state->TARGET) = (PROTOTYPE) dlsym(state->handle, (#TARGET)); \
     if ((state->TARGET) == NULL) { fprintf(stderr, "Failed to load symbol '%s': %s\n", (#TARGET), dlerror()); return NULL; }
+/* Defines a shortcut for loading a symbol that not every version of the library provides. If it's missing, the field is set to `NULL`. */
+#define LOAD_OPTIONAL_SYMBOL(TARGET, PROTOTYPE) \
+    (state->TARGET) = (PROTOTYPE) dlsym(state->handle, (#TARGET));
 
 
 
@@ -504,6 +507,117 @@ struct _functions {
      * This function may panic if the input `vm` or `result` pointed to a NULL-pointer, or if `data_dir` did not point to a valid UTF-8 string.
      */
     Error* (*vm_process)(VirtualMachine* vm, FullValue* result, const char* data_dir);
+
+
+
+    /***** OPTIONAL *****/
+    /* The functions below are not provided by every version of the library. If they are missing, their pointer is [`NULL`]; so check before calling them! */
+
+    /* Returns the identifier of the dataset referred to by a [`FullValue`].
+     * 
+     * # Arguments
+     * - `fvalue`: The [`FullValue`] to analyse.
+     * - `name`: Will point to the name of the dataset, or [`NULL`] if the value does not refer to a (downloadable) dataset. Can be freed using `free()`.
+     * - `version`: Will point to a string that changes whenever the contents of the dataset do (e.g., its creation timestamp), or [`NULL`] if the value does not refer to a dataset. Can be freed using `free()`.
+     * 
+     * # Panics
+     * This function can panic if `fvalue`, `name` or `version` pointed to [`NULL`].
+     */
+    void (*fvalue_data_id)(FullValue* fvalue, char** name, char** version);
+    /* Serializes a [`FullValue`] as JSON, for frontends that can render structured results.
+     * 
+     * Arrays are serialized as JSON arrays, class instances as JSON objects mapping field names to values and datasets as `{ "data": "<name>" }`. Other values are serialized as the JSON primitive closest to them (`null` for void).
+     * 
+     * # Arguments
+     * - `fvalue`: The [`FullValue`] to serialize.
+     * - `data_dir`: The data directory to which we downloaded the `fvalue`, if we did so.
+     * - `result`: The buffer to serialize to. Will be freshly allocated using `malloc` for the correct size; can be freed using `free()`.
+     * 
+     * # Panics
+     * This function can panic if the given `fvalue` is a NULL-pointer or if `data_dir` did not point to a valid UTF-8 string.
+     */
+    void (*fvalue_to_json)(FullValue* fvalue, const char* data_dir, char** result);
+
+    /* Returns when the tasks and data transfers of the last workflow run on a [`VirtualMachine`] happened, for profiling.
+     * 
+     * The events are serialized as a JSON array with an object per task or transfer, which has the following fields:
+     * - `name`: The name of the task (e.g., `hello_world.hello_world`) or of the transferred dataset.
+     * - `kind`: Either `"task"` or `"transfer"`.
+     * - `location`: The location where the task ran, or to which the dataset was transferred.
+     * - `submitted`, `scheduled`, `started`, `finished`: When the task got to that stage, in milliseconds since the Unix epoch, or `null` if it never did.
+     * - `bytes`: The number of bytes transferred (transfers only).
+     * 
+     * # Arguments
+     * - `vm`: The [`VirtualMachine`] that ran the workflow.
+     * - `events`: Will point to the serialized events. Will be freshly allocated using `malloc` for the correct size; can be freed using `free()`.
+     * 
+     * # Returns
+     * An [`Error`]-struct that contains the error occurred, or [`NULL`] otherwise.
+     * 
+     * # Panics
+     * This function can panic if the given `vm` or `events` is a NULL-pointer.
+     */
+    Error* (*vm_trace)(VirtualMachine* vm, char** events);
+
+    /* Updates a [`PackageIndex`] in place with the packages that were added, changed or removed in a remote instance since it was created (or last updated).
+     * 
+     * Only the changes are downloaded. Compilers and VMs created with the index share it, so they see the changes as well; it is safe to call this while they are in use on other threads.
+     * 
+     * # Arguments
+     * - `pindex`: The [`PackageIndex`] to update.
+     * - `endpoint`: The remote API-endpoint to read the changes from. The path (`/graphql`) will be deduced and needn't be given, just the host and port.
+     * - `n_changed`: Will be set to the number of packages that were added, changed or removed.
+     * 
+     * # Returns
+     * [`Null`] in all cases except when an error occurs. Then, an [`Error`]-struct is returned describing the error (and the index is left untouched). Don't forget this has to be freed using [`error_free()`]!
+     * 
+     * # Panics
+     * This function can panic if the given `pindex` or `n_changed` is a NULL-pointer, or if `endpoint` does not point to a valid UTF-8 string.
+     */
+    Error* (*pindex_update)(PackageIndex* pindex, const char* endpoint, size_t* n_changed);
+    /* Updates a [`DataIndex`] in place with the datasets that were added, changed or removed in a remote instance since it was created (or last updated).
+     * 
+     * Only the changes are downloaded. Compilers and VMs created with the index share it, so they see the changes as well; it is safe to call this while they are in use on other threads.
+     * 
+     * # Arguments
+     * - `dindex`: The [`DataIndex`] to update.
+     * - `endpoint`: The remote API-endpoint to read the changes from. The path (`/data/info`) will be deduced and needn't be given, just the host and port.
+     * - `n_changed`: Will be set to the number of datasets that were added, changed or removed.
+     * 
+     * # Returns
+     * [`Null`] in all cases except when an error occurs. Then, an [`Error`]-struct is returned describing the error (and the index is left untouched). Don't forget this has to be freed using [`error_free()`]!
+     * 
+     * # Panics
+     * This function can panic if the given `dindex` or `n_changed` is a NULL-pointer, or if `endpoint` does not point to a valid UTF-8 string.
+     */
+    Error* (*dindex_update)(DataIndex* dindex, const char* endpoint, size_t* n_changed);
+
+    /* Serializes the state that a [`VirtualMachine`] keeps between workflows (i.e., the values of global variables), so that it can be restored in another VM later.
+     * 
+     * # Arguments
+     * - `vm`: The [`VirtualMachine`] to serialize the state of.
+     * - `state`: Will point to the serialized state, which is an opaque string. Will be freshly allocated using `malloc` for the correct size; can be freed using `free()`.
+     * 
+     * # Returns
+     * An [`Error`]-struct that contains the error occurred, or [`NULL`] otherwise.
+     * 
+     * # Panics
+     * This function can panic if the given `vm` or `state` is a NULL-pointer.
+     */
+    Error* (*vm_serialize_state)(VirtualMachine* vm, char** state);
+    /* Restores the state serialized by [`vm_serialize_state()`] in a [`VirtualMachine`], replacing whatever state it had.
+     * 
+     * # Arguments
+     * - `vm`: The [`VirtualMachine`] to restore the state in. Must have been created with indices that know the packages and datasets the state refers to.
+     * - `state`: The serialized state.
+     * 
+     * # Returns
+     * An [`Error`]-struct that contains the error occurred, or [`NULL`] otherwise.
+     * 
+     * # Panics
+     * This function can panic if the given `vm` or `state` is a NULL-pointer, or if `state` does not point to a valid UTF-8 string.
+     */
+    Error* (*vm_deserialize_state)(VirtualMachine* vm, const char* state);
 };
 typedef struct _functions Functions;
 
@@ -520,7 +634,7 @@ typedef struct _functions Functions;
  * # Returns
  * The [`Functions`]-struct with everything loaded, including the dlopen handle - unless an error occurred. Then `NULL` is returned.
  */
-Functions* functions_load(const char* path) {
+static inline Functions* functions_load(const char* path) {
     // Allocate the struct
     Functions* state = (Functions*) malloc(sizeof(Functions));
 
@@ -576,6 +690,15 @@ Functions* functions_load(const char* path) {
     LOAD_SYMBOL(vm_run, Error* (*)(VirtualMachine*, Workflow*, char**, FullValue**));
     LOAD_SYMBOL(vm_process, Error* (*)(VirtualMachine*, FullValue*, const char*));
 
+    // Load the optional symbols
+    LOAD_OPTIONAL_SYMBOL(fvalue_data_id, void (*)(FullValue*, char**, char**));
+    LOAD_OPTIONAL_SYMBOL(fvalue_to_json, void (*)(FullValue*, const char*, char**));
+    LOAD_OPTIONAL_SYMBOL(vm_trace, Error* (*)(VirtualMachine*, char**));
+    LOAD_OPTIONAL_SYMBOL(pindex_update, Error* (*)(PackageIndex*, const char*, size_t*));
+    LOAD_OPTIONAL_SYMBOL(dindex_update, Error* (*)(DataIndex*, const char*, size_t*));
+    LOAD_OPTIONAL_SYMBOL(vm_serialize_state, Error* (*)(VirtualMachine*, char**));
+    LOAD_OPTIONAL_SYMBOL(vm_deserialize_state, Error* (*)(VirtualMachine*, const char*));
+
     // Done
     return state;
 }
@@ -584,7 +707,7 @@ Functions* functions_load(const char* path) {
  * # Arguments
  * - `state`: The [`Functions`]-struct to free.
  */
-void functions_unload(Functions* state) {
+static inline void functions_unload(Functions* state) {
     // Close the handle, then free
     dlclose(state->handle);
     free(state);
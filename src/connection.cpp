@@ -0,0 +1,208 @@
+/* CONNECTION.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 01:58:13
+ * Last edited:
+ *   20 Oct 2026, 12:28:45
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements a watcher that checks whether the Brane driver can be
+ *   reached, and keeps statistics on how long connecting to it takes.
+**/
+
+#include <algorithm>
+#include <cctype>
+#include <cerrno>
+#include <cstdio>
+#include <fcntl.h>
+#include <netdb.h>
+#include <poll.h>
+#include <sys/socket.h>
+#include <unistd.h>
+
+#include "logging.hpp"
+#include "utils.hpp"
+#include "connection.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** CONSTANTS *****/
+/* The maximum time a probe waits for the driver to accept the connection, in milliseconds. */
+static const int PROBE_TIMEOUT_MS = 3000;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Formats a number of milliseconds with one decimal. */
+static string format_ms(double ms) {
+    char buffer[32];
+    snprintf(buffer, sizeof(buffer), "%.1f ms", ms);
+    return string(buffer);
+}
+
+
+
+
+
+/***** LIBRARY *****/
+bool bscript::connection_lost(const string& message) {
+    string lower = message;
+    transform(lower.begin(), lower.end(), lower.begin(), [](unsigned char c) { return tolower(c); });
+
+    // Only match what the transport says, since the driver and packages may use any wording in their own errors
+    for (const char* pattern : { "transport error", "connection refused", "connection reset", "connection closed", "broken pipe", "dns error", "h2 protocol error" }) {
+        if (lower.find(pattern) != string::npos) { return true; }
+    }
+    return false;
+}
+
+
+
+DriverMonitor::DriverMonitor(const string& endpoint, chrono::seconds interval) :
+    endpoint(endpoint),
+    interval(interval),
+
+    reachable(true),
+    n_probes(0),
+    n_failed(0),
+    last_connect_ms(0.0),
+    total_connect_ms(0.0),
+    last_probe(0),
+    n_setups(0),
+    n_reconnects(0),
+    last_setup_s(0.0),
+    total_setup_s(0.0),
+
+    stopping(false)
+{
+    // Split the endpoint in its host and port (e.g., `grpc://[::1]:50053/` -> `::1`, `50053`)
+    string address = endpoint;
+    size_t scheme_end = address.find("://");
+    string scheme = scheme_end != string::npos ? address.substr(0, scheme_end) : "";
+    if (scheme_end != string::npos) { address = address.substr(scheme_end + 3); }
+    address = address.substr(0, address.find('/'));
+    size_t port_start = address.rfind(':');
+    if (port_start != string::npos && address.find(']', port_start) == string::npos) {
+        this->host = address.substr(0, port_start);
+        this->port = address.substr(port_start + 1);
+    } else {
+        this->host = address;
+        this->port = scheme == "https" ? "443" : "80";
+    }
+    if (this->host.size() >= 2 && this->host.front() == '[' && this->host.back() == ']') { this->host = this->host.substr(1, this->host.size() - 2); }
+
+    if (this->interval.count() > 0) {
+        this->checker = thread(&DriverMonitor::checker_main, this);
+    }
+}
+
+DriverMonitor::~DriverMonitor() {
+    {
+        lock_guard<mutex> guard(this->lock);
+        this->stopping = true;
+    }
+    this->cond.notify_all();
+    if (this->checker.joinable()) { this->checker.join(); }
+}
+
+
+
+void DriverMonitor::checker_main() {
+    unique_lock<mutex> guard(this->lock);
+    while (!this->stopping) {
+        this->cond.wait_for(guard, this->interval);
+        if (this->stopping) { return; }
+
+        // Probe without holding the lock, since it may take a while
+        guard.unlock();
+        bool was_reachable = this->is_reachable();
+        bool reachable = this->probe();
+        if (was_reachable && !reachable) { LOG_WARN("Driver '" << this->endpoint << "' is unreachable; reconnecting before the next workflow runs"); }
+        else if (!was_reachable && reachable) { LOG_INFO("Driver '" << this->endpoint << "' is reachable again"); }
+        guard.lock();
+    }
+}
+
+
+
+bool DriverMonitor::probe() {
+    chrono::steady_clock::time_point start = chrono::steady_clock::now();
+    bool connected = false;
+
+    // Try every address the host resolves to until one accepts
+    struct addrinfo hints = {};
+    hints.ai_family = AF_UNSPEC;
+    hints.ai_socktype = SOCK_STREAM;
+    struct addrinfo* addrs = nullptr;
+    if (getaddrinfo(this->host.c_str(), this->port.c_str(), &hints, &addrs) == 0) {
+        for (struct addrinfo* addr = addrs; addr != nullptr && !connected; addr = addr->ai_next) {
+            int fd = socket(addr->ai_family, addr->ai_socktype | SOCK_CLOEXEC | SOCK_NONBLOCK, addr->ai_protocol);
+            if (fd < 0) { continue; }
+            if (connect(fd, addr->ai_addr, addr->ai_addrlen) == 0) {
+                connected = true;
+            } else if (errno == EINPROGRESS) {
+                struct pollfd pfd = { fd, POLLOUT, 0 };
+                int error = 0;
+                socklen_t len = sizeof(error);
+                connected = poll(&pfd, 1, PROBE_TIMEOUT_MS) == 1 && getsockopt(fd, SOL_SOCKET, SO_ERROR, &error, &len) == 0 && error == 0;
+            }
+            close(fd);
+        }
+        freeaddrinfo(addrs);
+    }
+    double elapsed_ms = chrono::duration<double, milli>(chrono::steady_clock::now() - start).count();
+
+    // Remember how it went
+    lock_guard<mutex> guard(this->lock);
+    this->reachable = connected;
+    this->n_probes++;
+    this->last_probe = time(nullptr);
+    if (connected) {
+        this->last_connect_ms = elapsed_ms;
+        this->total_connect_ms += elapsed_ms;
+    } else {
+        this->n_failed++;
+    }
+    return connected;
+}
+
+void DriverMonitor::record_setup(double seconds, bool reconnect) {
+    lock_guard<mutex> guard(this->lock);
+    this->n_setups++;
+    if (reconnect) { this->n_reconnects++; }
+    this->last_setup_s = seconds;
+    this->total_setup_s += seconds;
+}
+
+bool DriverMonitor::is_reachable() const {
+    lock_guard<mutex> guard(this->lock);
+    return this->reachable;
+}
+
+string DriverMonitor::summary() const {
+    lock_guard<mutex> guard(this->lock);
+    string text = "Driver: " + this->endpoint + " (" + (this->last_probe == 0 ? "not checked yet" : string(this->reachable ? "accepts TCP connections" : "does not accept TCP connections") + ", last checked " + format_duration((double) (time(nullptr) - this->last_probe)) + " ago") + ")";
+
+    text += "\nDriver check (TCP connect): " + (this->interval.count() > 0 ? "every " + format_duration((double) this->interval.count()) : string("not periodic"));
+    text += "; " + to_string(this->n_probes) + " probe" + (this->n_probes == 1 ? "" : "s") + ", " + to_string(this->n_failed) + " failed";
+    size_t n_connected = this->n_probes - this->n_failed;
+    if (n_connected > 0) {
+        text += "; connecting took " + format_ms(this->last_connect_ms) + " (" + format_ms(this->total_connect_ms / n_connected) + " on average)";
+    }
+
+    text += "\nConnection setup: " + to_string(this->n_setups) + " VM" + (this->n_setups == 1 ? "" : "s") + " created, of which " + to_string(this->n_reconnects) + " to reconnect";
+    if (this->n_setups > 0) {
+        text += "; the last took " + format_duration(this->last_setup_s) + " (" + format_duration(this->total_setup_s / this->n_setups) + " on average)";
+    }
+
+    // Don't let the above suggest more than it does
+    text += "\n\nNote: the driver check only tells whether the driver accepts new TCP connections, not whether the kernel's own connection to it still works. A broken connection is replaced as soon as a workflow fails on it (after which you have to run the cell again).";
+    return text;
+}
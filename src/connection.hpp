@@ -0,0 +1,128 @@
+/* CONNECTION.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 01:52:40
+ * Last edited:
+ *   20 Oct 2026, 12:28:45
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a watcher that checks whether the Brane driver can be
+ *   reached, and keeps statistics on how long connecting to it takes.
+**/
+
+#ifndef BSCRIPT_CONNECTION_HPP
+#define BSCRIPT_CONNECTION_HPP
+
+#include <chrono>
+#include <condition_variable>
+#include <cstddef>
+#include <ctime>
+#include <mutex>
+#include <string>
+#include <thread>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Finds out whether an error returned by `vm_run()` means that the connection to the driver broke (i.e., whether the transport reported an error).
+     *
+     * This only tells whether the VM needs a new connection; the workflow may still have (partially) run, so it is never safe to run it again because of it.
+     *
+     * # Arguments
+     * - `message`: The serialized error.
+     *
+     * # Returns
+     * True if the connection broke, or false otherwise.
+     */
+    bool connection_lost(const std::string& message);
+
+
+
+    /* Checks whether the driver accepts connections, on a thread of its own every so often (the driver check) or when asked.
+     *
+     * This does not keep any connection alive: `libbrane_cli.so` manages the connection of a VM itself, and we cannot touch that one. Instead, a probe makes a TCP connection to the driver and closes it right away, which only tells whether the driver is reachable (not whether the connection of the VM still works). This catches a driver that went away while the kernel was idle before the next workflow fails on it, and measures how long setting up a connection takes. The monitor also keeps statistics on how long it took to create VMs (which connect to the instance).
+     */
+    class DriverMonitor {
+    private:
+        /* The driver endpoint as given. */
+        std::string endpoint;
+        /* The host and port to connect to. */
+        std::string host;
+        std::string port;
+        /* The time between two probes by the driver check. */
+        std::chrono::seconds interval;
+
+        /* Whether the last probe succeeded. */
+        bool reachable;
+        /* The number of probes so far, and how many of them failed. */
+        size_t n_probes;
+        size_t n_failed;
+        /* How long the last successful probe took to connect, and all of them together, in milliseconds. */
+        double last_connect_ms;
+        double total_connect_ms;
+        /* When the last probe happened (0 if none has). */
+        time_t last_probe;
+        /* The number of VMs created so far (including the first), how many of them replaced a VM that lost its connection, and how long the last one and all of them together took, in seconds. */
+        size_t n_setups;
+        size_t n_reconnects;
+        double last_setup_s;
+        double total_setup_s;
+
+        /* Whether we are being destroyed. */
+        bool stopping;
+        /* Protects all of the above. */
+        mutable std::mutex lock;
+        /* Signalled when we're stopping. */
+        std::condition_variable cond;
+        /* The thread that runs the driver check, if any. */
+        std::thread checker;
+
+
+        /* The main loop of the driver check thread. */
+        void checker_main();
+
+    public:
+        /* Constructor for the DriverMonitor.
+         *
+         * # Arguments
+         * - `endpoint`: The driver endpoint (e.g., `http://127.0.0.1:50053`).
+         * - `interval`: The time between two probes by the driver check. Use 0 to only probe when asked to.
+         */
+        DriverMonitor(const std::string& endpoint, std::chrono::seconds interval);
+        /* Copy constructor for the DriverMonitor, which is deleted. */
+        DriverMonitor(const DriverMonitor& other) = delete;
+        /* Destructor for the DriverMonitor. */
+        ~DriverMonitor();
+
+        /* Copy assignment operator for the DriverMonitor, which is deleted. */
+        DriverMonitor& operator=(const DriverMonitor& other) = delete;
+
+
+
+        /* Checks whether the driver accepts connections right now. Blocks for at most a few seconds.
+         *
+         * # Returns
+         * True if it does, or false otherwise.
+         */
+        bool probe();
+
+        /* Records that a VM was created (i.e., a connection to the instance was set up).
+         *
+         * # Arguments
+         * - `seconds`: How long it took.
+         * - `reconnect`: Whether it replaced a VM that lost its connection.
+         */
+        void record_setup(double seconds, bool reconnect = false);
+
+        /* Returns whether the last probe succeeded (or true if there has not been any). */
+        bool is_reachable() const;
+
+        /* Returns a human-readable summary of the statistics, which points out that the probes only check whether the driver is reachable. */
+        std::string summary() const;
+    };
+}
+
+#endif
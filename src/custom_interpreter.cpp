@@ -4,7 +4,7 @@
  * Created:
  *   13 Jun 2023, 17:39:03
  * Last edited:
- *   04 Mar 2024, 15:44:01
+ *   20 Oct 2026, 12:18:07
  * Auto updated?
  *   Yes
  *
@@ -14,14 +14,41 @@
  *   Based on: https://xeus.readthedocs.io/en/latest/kernel_implementation.html
 **/
 
+#include <algorithm>
+#include <cctype>
+#include <chrono>
+#include <cstdio>
+#include <cstring>
+#include <deque>
+#include <fstream>
+#include <functional>
+#include <memory>
+#include <set>
 #include <string>
+#include <thread>
 #include <unordered_map>
+#include <vector>
 #include <iostream>
+#include <unistd.h>
 #include <xeus/xinterpreter.hpp>
 #include <xeus/xhelper.hpp>
 
 #include "brane/brane_cli.h"
 #include "logging.hpp"
+#include "admission.hpp"
+#include "connection.hpp"
+#include "jobs.hpp"
+#include "download.hpp"
+#include "background.hpp"
+#include "dependencies.hpp"
+#include "data_cache.hpp"
+#include "hibernation.hpp"
+#include "results.hpp"
+#include "outputs.hpp"
+#include "magics.hpp"
+#include "sweeps.hpp"
+#include "timeline.hpp"
+#include "utils.hpp"
 #include "custom_interpreter.hpp"
 
 using namespace std;
@@ -33,6 +60,10 @@ using namespace bscript;
 #define READ_ENV(VAR_NAME, ENV_NAME) \
     const char* (VAR_NAME) = std::getenv(#ENV_NAME); \
     if ((VAR_NAME) == nullptr) { cerr << "Environment variable '" #ENV_NAME "' not specified" << endl; exit(EXIT_FAILURE); }
+/* Reads a particular environment variable, falling back to the given default if it's not (or empty). */
+#define READ_ENV_OPT(VAR_NAME, ENV_NAME, DEFAULT) \
+    const char* (VAR_NAME) = std::getenv(#ENV_NAME); \
+    if ((VAR_NAME) == nullptr || (VAR_NAME)[0] == '\0') { (VAR_NAME) = (DEFAULT); }
 
 
 
@@ -41,6 +72,10 @@ using namespace bscript;
 /***** CONSTANTS *****/
 /// The kernel version.
 const static char* KERNEL_VERSION = "1.0.0";
+/* The number of (most recent) workflows of which we keep the timeline. */
+const static size_t MAX_TRACES = 16;
+/* The maximum total size of the snippets we keep to restore the compiler after hibernating (see `Journal`), in bytes. A session with more cannot hibernate. */
+const static size_t MAX_JOURNAL_BYTES = 1024 * 1024;
 
 
 
@@ -51,6 +86,80 @@ const static char* KERNEL_VERSION = "1.0.0";
 Functions* brane_cli;
 /* The end result user, loaded at startup. */
 const char* workflow_result_user;
+/* Whether to download results in the background (true) or block the cell until they are downloaded (false). */
+bool background_downloads = false;
+/* The queue of jobs (downloads, workflows) that run off the kernel thread. */
+JobQueue* jobs = nullptr;
+/* The cache of downloaded datasets shared with other kernels, or `nullptr` if it's disabled. */
+DataCache* cache = nullptr;
+/* The store that keeps cell outputs within budget, spilling anything larger to disk. */
+OutputStore* outputs = nullptr;
+/* The queue of workflows run by `%%background` cells, which is separate from `jobs` so they cannot hold up downloads of foreground cells. */
+JobQueue* background_jobs = nullptr;
+/* The VMs on which `%%background` cells run. */
+VmPool* background_vms = nullptr;
+/* The queue that all kernels in the container share to limit the number of workflows running at the same time, or `nullptr` if there is no limit. */
+Admission* admission = nullptr;
+/* The cells executed so far, to find out which are stale. */
+DependencyGraph* dependencies = nullptr;
+/* The timelines of the most recent workflows (as returned by `vm_trace()`), with the execution counter of the cell that ran them. */
+deque<pair<int, nl::json>> traces;
+/* The display IDs of the cell outputs published so far (see `custom_interpreter::publish_cell_output()`). */
+set<string> cell_displays;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Serializes the given error to a string, without freeing it.
+ *
+ * # Arguments
+ * - `err`: The [`Error`] to serialize.
+ *
+ * # Returns
+ * The error message.
+ */
+string error_message(Error* err) {
+    char* buffer = nullptr;
+    brane_cli->error_serialize_err(err, &buffer);
+    string message(buffer);
+    free(buffer);
+    return message;
+}
+
+/* Serializes the given error to a string, and frees it.
+ *
+ * # Arguments
+ * - `err`: The [`Error`] to serialize. Will be freed by this function.
+ *
+ * # Returns
+ * The error message.
+ */
+string serialize_error(Error* err) {
+    string message = error_message(err);
+    brane_cli->error_free(err);
+    return message;
+}
+
+/* Returns the display ID under which the given output of a cell is published.
+ *
+ * # Arguments
+ * - `cell`: The execution counter of the cell.
+ * - `kind`: The kind of output (`prints` or `result`).
+ *
+ * # Returns
+ * The display ID.
+ */
+string cell_display_id(int cell, const string& kind) {
+    return "brane-cell-" + to_string(cell) + "-" + kind;
+}
+
+/* Publishes the results of any jobs (downloads, background cells) that completed in the meantime. Must be called from the kernel thread. */
+void poll_jobs() {
+    if (jobs != nullptr) { jobs->poll(); }
+    if (background_jobs != nullptr) { background_jobs->poll(); }
+}
 
 
 
@@ -62,72 +171,174 @@ class Session {
 public:
     /* The folder to download data to when it occurs. */
     string data_dir;
-
+    /* The Brane API endpoint to connect to (and to refresh the indices from). */
+    string api_endpoint;
+    /* The Brane driver endpoint to connect to. */
+    string drv_endpoint;
+    /* The folder with the certificates to connect with. */
+    string certs_dir;
+
+    /* The package index shared by the compiler and the VM, which we keep to refresh it (or `nullptr` if the library cannot refresh indices, see `can_refresh()`). */
+    PackageIndex* pindex;
+    /* The data index shared by the compiler and the VM, which we keep to refresh it (or `nullptr` if the library cannot refresh indices, see `can_refresh()`). */
+    DataIndex* dindex;
     /* The compiler with which we compile successive snippets. */
     Compiler* compiler;
-    /* The VirtualMachine with which we execute successive snippets. */
-    VirtualMachine* vm;
+    /* The VirtualMachine with which we execute successive snippets, which jobs (i.e., downloads) share. */
+    shared_ptr<SharedVm> vm;
 
-public:
-    /* Constructor for the Session.
-     * 
+    /* The snippets compiled so far that shaped the compiler's state, which we compile again to restore it after hibernating. */
+    Journal journal;
+    /* The file the session is hibernating in, or empty if it's awake. */
+    string state_path;
+
+private:
+    /* Loads the package and data indices from the instance.
+     *
      * # Arguments
-     * - `api_endpoint`: The Brane API endpoint to connect to.
-     * - `drv_endpoint`: The Brane driver endpoint to connect to.
-     * - `certs_dir`: Path to a folder with directories.
-     * - `data_dir`: Path to a folder where we download datasets to, if any.
-     * 
+     * - `pindex`: Will be set to the package index.
+     * - `dindex`: Will be set to the data index.
+     * - `step`: Will be set to what we failed to do if an error occurs.
+     *
      * # Returns
-     * A new Session object.
+     * `nullptr` if both were loaded, or else the error that occurred (in which case neither was).
      */
-    Session(const string& api_endpoint, const string& drv_endpoint, const string& certs_dir, const string& data_dir) :
-        data_dir(data_dir)
-    {
-        // Load the package index for this sesh
-        PackageIndex* pindex = nullptr;
-        Error* err = brane_cli->pindex_new_remote(api_endpoint.c_str(), &pindex);
+    Error* load_indices(PackageIndex** pindex, DataIndex** dindex, string& step) {
+        Error* err = brane_cli->pindex_new_remote(this->api_endpoint.c_str(), pindex);
         if (err != nullptr) {
-            brane_cli->error_print_err(err);
-            brane_cli->error_free(err);
-            throw string("Failed to get package index (see output above)");
+            step = "get package index";
+            return err;
         }
-
-        // Load the data index for this sesh
-        DataIndex* dindex = nullptr;
-        err = brane_cli->dindex_new_remote(api_endpoint.c_str(), &dindex);
+        err = brane_cli->dindex_new_remote(this->api_endpoint.c_str(), dindex);
         if (err != nullptr) {
-            brane_cli->error_print_err(err);
-            brane_cli->error_free(err);
+            brane_cli->pindex_free(*pindex);
+            *pindex = nullptr;
+            step = "get data index";
+            return err;
+        }
+        return nullptr;
+    }
+
+    /* Creates the compiler with the indices we keep, or with newly loaded ones if we don't keep them.
+     *
+     * # Arguments
+     * - `step`: Will be set to what we failed to do if an error occurs.
+     *
+     * # Returns
+     * `nullptr` if the compiler was created, or else the error that occurred.
+     */
+    Error* open_compiler(string& step) {
+        PackageIndex* pindex = this->pindex;
+        DataIndex* dindex = this->dindex;
+        if (pindex == nullptr) {
+            Error* err = this->load_indices(&pindex, &dindex, step);
+            if (err != nullptr) { return err; }
+        }
+        Compiler* compiler = nullptr;
+        Error* err = brane_cli->compiler_new(pindex, dindex, &compiler);
+        if (pindex != this->pindex) {
+            brane_cli->dindex_free(dindex);
             brane_cli->pindex_free(pindex);
-            throw string("Failed to get data index (see output above)");
         }
+        if (err != nullptr) {
+            step = "create compiler";
+            return err;
+        }
+        this->compiler = compiler;
+        return nullptr;
+    }
+
+    /* Loads the indices, and creates the compiler and VM with them.
+     *
+     * # Arguments
+     * - `step`: Will be set to what we failed to do if an error occurs.
+     *
+     * # Returns
+     * `nullptr` if the session is ready, or else the error that occurred (in which case nothing was loaded).
+     */
+    Error* open(string& step) {
+        // Load the indices for this sesh
+        PackageIndex* pindex = nullptr;
+        DataIndex* dindex = nullptr;
+        Error* err = this->load_indices(&pindex, &dindex, step);
+        if (err != nullptr) { return err; }
 
         // Load the compiler
-        this->compiler = nullptr;
-        err = brane_cli->compiler_new(pindex, dindex, &(this->compiler));
+        Compiler* compiler = nullptr;
+        err = brane_cli->compiler_new(pindex, dindex, &compiler);
         if (err != nullptr) {
-            brane_cli->error_print_err(err);
-            brane_cli->error_free(err);
             brane_cli->dindex_free(dindex);
             brane_cli->pindex_free(pindex);
-            throw string("Failed to create compiler (see output above)");
+            step = "create compiler";
+            return err;
         }
 
         // Load the virtual machine representation
-        this->vm = nullptr;
-        err = brane_cli->vm_new(api_endpoint.c_str(), drv_endpoint.c_str(), certs_dir.c_str(), pindex, dindex, &(this->vm));
+        VirtualMachine* vm = nullptr;
+        err = brane_cli->vm_new(this->api_endpoint.c_str(), this->drv_endpoint.c_str(), this->certs_dir.c_str(), pindex, dindex, &vm);
         if (err != nullptr) {
-            brane_cli->error_print_err(err);
-            brane_cli->error_free(err);
-            brane_cli->compiler_free(this->compiler);
+            brane_cli->compiler_free(compiler);
+            brane_cli->dindex_free(dindex);
+            brane_cli->pindex_free(pindex);
+            step = "create virtual machine";
+            return err;
+        }
+
+        // Keep our handles on the indices (which the VM & compiler share) too, so that we can refresh them; if we can't, let the VM & compiler own them
+        if (can_refresh()) {
+            this->pindex = pindex;
+            this->dindex = dindex;
+        } else {
             brane_cli->dindex_free(dindex);
             brane_cli->pindex_free(pindex);
-            throw string("Failed to create virtual machine (see output above)");
         }
+        this->compiler = compiler;
+        this->vm = make_shared<SharedVm>(vm);
+        return nullptr;
+    }
+
+    /* Frees the VM (once no job uses it anymore), compiler and indices, if any. */
+    void close() {
+        if (this->compiler != nullptr) { brane_cli->compiler_free(this->compiler); }
+        if (this->dindex != nullptr) { brane_cli->dindex_free(this->dindex); }
+        if (this->pindex != nullptr) { brane_cli->pindex_free(this->pindex); }
+        this->vm.reset();
+        this->compiler = nullptr;
+        this->dindex = nullptr;
+        this->pindex = nullptr;
+    }
 
-        // Discard the index handles since they are owned by VM & compiler now
-        brane_cli->dindex_free(dindex);
-        brane_cli->pindex_free(pindex);
+public:
+    /* Constructor for the Session.
+     * 
+     * # Arguments
+     * - `api_endpoint`: The Brane API endpoint to connect to.
+     * - `drv_endpoint`: The Brane driver endpoint to connect to.
+     * - `certs_dir`: Path to a folder with directories.
+     * - `data_dir`: Path to a folder where we download datasets to, if any.
+     * 
+     * # Returns
+     * A new Session object.
+     */
+    Session(const string& api_endpoint, const string& drv_endpoint, const string& certs_dir, const string& data_dir) :
+        data_dir(data_dir),
+        api_endpoint(api_endpoint),
+        drv_endpoint(drv_endpoint),
+        certs_dir(certs_dir),
+
+        pindex(nullptr),
+        dindex(nullptr),
+        compiler(nullptr),
+
+        journal(MAX_JOURNAL_BYTES)
+    {
+        string step;
+        Error* err = this->open(step);
+        if (err != nullptr) {
+            brane_cli->error_print_err(err);
+            brane_cli->error_free(err);
+            throw string("Failed to " + step + " (see output above)");
+        }
     }
 
     /* Copy constructor for the Session, which is deleted. */
@@ -143,26 +354,239 @@ public:
      */
     Session(Session&& other) :
         data_dir(other.data_dir),
+        api_endpoint(other.api_endpoint),
+        drv_endpoint(other.drv_endpoint),
+        certs_dir(other.certs_dir),
 
+        pindex(other.pindex),
+        dindex(other.dindex),
         compiler(other.compiler),
-        vm(other.vm)
+        vm(move(other.vm)),
+
+        journal(move(other.journal)),
+        state_path(move(other.state_path))
     {
         // Nullify fields that would other be invalidly deleted.
+        other.pindex = nullptr;
+        other.dindex = nullptr;
         other.compiler = nullptr;
-        other.vm = nullptr;
+        other.state_path.clear();
     }
 
     /* Destructor for the Session. */
     ~Session() {
-        // Free the internal VM, if any
-        if (this->vm != nullptr) {
-            brane_cli->vm_free(this->vm);
+        this->close();
+
+        // Remove the state we hibernated in, if any
+        if (!this->state_path.empty()) {
+            remove(this->state_path.c_str());
+        }
+    }
+
+
+
+    /* Records that a snippet compiled successfully, so that it's compiled again when waking up from hibernation.
+     *
+     * # Arguments
+     * - `code`: The snippet that compiled.
+     */
+    inline void record(const string& code) { this->journal.record(code); }
+
+    /* Returns whether the session is hibernating (i.e., whether it needs to `wake()` before it can be used). */
+    inline bool asleep() const { return !this->state_path.empty(); }
+
+    /* Returns whether the session can hibernate, which it cannot if the snippets to restore the compiler with outgrew `MAX_JOURNAL_BYTES`. */
+    inline bool can_hibernate() const { return this->journal.fits(); }
+
+    /* Returns whether hibernating frees the VM too.
+     *
+     * The values of globals live in the VM, so it can only be freed if there are none or if the library can serialize its state (i.e., provides `vm_serialize_state()` and `vm_deserialize_state()`). Otherwise, the session only partially hibernates and keeps the VM.
+     */
+    inline bool can_free_vm() const { return !this->journal.stateful() || (brane_cli->vm_serialize_state != nullptr && brane_cli->vm_deserialize_state != nullptr); }
+
+    /* Hibernates the session: writes the journal (and the state of the VM, if it has any and we can free it) to a file, and frees the compiler and, if `can_free_vm()`, the VM and indices. Only call this if `can_hibernate()`, and not while anything uses the VM.
+     *
+     * # Arguments
+     * - `path`: The file to write the state to.
+     * - `err`: Will be set to a description of the error that occurred, if any.
+     *
+     * # Returns
+     * True if the session is hibernating, or false if an error occurred (in which case it's still awake).
+     */
+    bool hibernate(const string& path, string& err) {
+        bool free_vm = this->can_free_vm();
+        nl::json state({ { "journal", this->journal.get() } });
+        if (free_vm && this->journal.stateful()) {
+            char* vm_state = nullptr;
+            Error* vm_err = brane_cli->vm_serialize_state(this->vm->get(), &vm_state);
+            if (vm_err != nullptr) {
+                err = "Failed to serialize the state of the VM: " + serialize_error(vm_err);
+                return false;
+            }
+            state["vm_state"] = vm_state;
+            free(vm_state);
+        }
+
+        // Write it
+        ofstream h(path, ios::binary);
+        h << state.dump();
+        h.close();
+        if (!h.good()) {
+            remove(path.c_str());
+            err = "Failed to write '" + path + "'";
+            return false;
         }
 
-        // Free the internal compiler, if any
-        if (this->compiler != nullptr) {
+        // Now we can let go of everything (except the VM, if it holds globals we cannot restore; any indices we keep are shared with it, so those stay too)
+        if (free_vm) {
+            this->close();
+        } else {
             brane_cli->compiler_free(this->compiler);
+            this->compiler = nullptr;
+        }
+        this->journal.clear();
+        this->state_path = path;
+        return true;
+    }
+
+    /* Wakes the session from hibernation: creates a new compiler (and, if it was freed, loads the indices again and creates a new VM) and restores their state.
+     *
+     * # Arguments
+     * - `err`: Will be set to a description of the error that occurred, if any.
+     *
+     * # Returns
+     * True if the session is awake, or false if an error occurred (in which case it's still hibernating, and this may be tried again).
+     */
+    bool wake(string& err) {
+        ifstream h(this->state_path, ios::binary);
+        nl::json state = nl::json::parse(h, nullptr, false);
+        if (state.is_discarded() || !state.contains("journal")) {
+            err = "Failed to read '" + this->state_path + "'";
+            return false;
+        }
+        bool kept_vm = this->vm != nullptr;
+        string step;
+        Error* open_err = kept_vm ? this->open_compiler(step) : this->open(step);
+        if (open_err != nullptr) {
+            err = "Failed to " + step + ":\n\n" + serialize_error(open_err);
+            return false;
+        }
+
+        // Compile the journal again to get the compiler in the same state (a snippet may no longer compile if the instance changed in the meantime, but then there's nothing we can do about it)
+        for (const string& code : state["journal"].get<vector<string>>()) {
+            Workflow* workflow = nullptr;
+            SourceError* serr = brane_cli->compiler_compile(this->compiler, "<cell>", code.c_str(), &workflow);
+            if (brane_cli->serror_has_err(serr) || brane_cli->serror_has_serrs(serr)) {
+                LOG_WARN("Snippet no longer compiles after waking up:\n" << code);
+            } else {
+                brane_cli->workflow_free(workflow);
+            }
+            brane_cli->serror_free(serr);
+            this->journal.record(code);
+        }
+        if (state.contains("vm_state")) {
+            Error* vm_err = brane_cli->vm_deserialize_state(this->vm->get(), state["vm_state"].get<string>().c_str());
+            if (vm_err != nullptr) {
+                err = "Failed to restore the state of the VM: " + serialize_error(vm_err);
+                this->close();
+                this->journal.clear();
+                return false;
+            }
+        }
+
+        // Done
+        remove(this->state_path.c_str());
+        this->state_path.clear();
+        return true;
+    }
+
+    /* Replaces the VM with a new one (i.e., with a new connection to the driver), keeping the compiler and indices as they are. Only call this if the session is awake. Downloads that still use the old VM keep it until they are done, since it is shared.
+     *
+     * The values of globals are carried over to the new VM if the library can serialize its state (i.e., provides `vm_serialize_state()` and `vm_deserialize_state()`).
+     *
+     * # Arguments
+     * - `err`: Will be set to a description of the error that occurred, if any.
+     * - `lost_state`: Will be set to whether the values of globals were lost.
+     *
+     * # Returns
+     * True if the session has a new VM, or false if an error occurred (in which case it keeps the old one).
+     */
+    bool reconnect(string& err, bool& lost_state) {
+        // Get the state out of the old VM first (which lives in memory, so it's fine that its connection broke)
+        lost_state = false;
+        char* vm_state = nullptr;
+        if (this->journal.stateful()) {
+            if (brane_cli->vm_serialize_state == nullptr || brane_cli->vm_deserialize_state == nullptr) {
+                lost_state = true;
+            } else {
+                // (downloads may still be using the old VM)
+                lock_guard<mutex> vm_guard(this->vm->get_lock());
+                Error* vm_err = brane_cli->vm_serialize_state(this->vm->get(), &vm_state);
+                if (vm_err != nullptr) {
+                    LOG_WARN("Failed to serialize the state of the VM: " << serialize_error(vm_err));
+                    lost_state = true;
+                }
+            }
+        }
+
+        // Create the new one (loading the indices again if we did not keep them)
+        PackageIndex* pindex = this->pindex;
+        DataIndex* dindex = this->dindex;
+        if (pindex == nullptr) {
+            string step;
+            Error* index_err = this->load_indices(&pindex, &dindex, step);
+            if (index_err != nullptr) {
+                free(vm_state);
+                err = "Failed to " + step + ": " + serialize_error(index_err);
+                return false;
+            }
+        }
+        VirtualMachine* vm = nullptr;
+        Error* vm_err = brane_cli->vm_new(this->api_endpoint.c_str(), this->drv_endpoint.c_str(), this->certs_dir.c_str(), pindex, dindex, &vm);
+        if (pindex != this->pindex) {
+            brane_cli->dindex_free(dindex);
+            brane_cli->pindex_free(pindex);
+        }
+        if (vm_err != nullptr) {
+            free(vm_state);
+            err = serialize_error(vm_err);
+            return false;
         }
+        if (vm_state != nullptr) {
+            vm_err = brane_cli->vm_deserialize_state(vm, vm_state);
+            free(vm_state);
+            if (vm_err != nullptr) {
+                LOG_WARN("Failed to restore the state of the VM: " << serialize_error(vm_err));
+                lost_state = true;
+            }
+        }
+
+        // Swap them
+        this->vm = make_shared<SharedVm>(vm);
+        return true;
+    }
+
+
+    /* Returns whether the library can refresh the indices in place (i.e., whether it provides `pindex_update()` and `dindex_update()`). */
+    inline static bool can_refresh() { return brane_cli->pindex_update != nullptr && brane_cli->dindex_update != nullptr; }
+
+    /* Refreshes the package- and data indices in place with whatever changed in the instance since they were loaded (or last refreshed).
+     * 
+     * The compiler and VM share the indices, so they keep their state but see the changes. Only call this if `can_refresh()`.
+     * 
+     * # Arguments
+     * - `n_packages`: Will be set to the number of packages that were added, changed or removed.
+     * - `n_datasets`: Will be set to the number of datasets that were added, changed or removed.
+     * 
+     * # Returns
+     * `nullptr` if the indices were refreshed, or else the error that occurred.
+     */
+    Error* refresh(size_t& n_packages, size_t& n_datasets) {
+        n_packages = 0;
+        n_datasets = 0;
+        Error* err = brane_cli->pindex_update(this->pindex, this->api_endpoint.c_str(), &n_packages);
+        if (err != nullptr) { return err; }
+        return brane_cli->dindex_update(this->dindex, this->api_endpoint.c_str(), &n_datasets);
     }
 
 
@@ -194,9 +618,17 @@ void swap(Session& s1, Session& s2) {
     using std::swap;
 
     swap(s1.data_dir, s2.data_dir);
+    swap(s1.api_endpoint, s2.api_endpoint);
+    swap(s1.drv_endpoint, s2.drv_endpoint);
+    swap(s1.certs_dir, s2.certs_dir);
 
+    swap(s1.pindex, s2.pindex);
+    swap(s1.dindex, s2.dindex);
     swap(s1.compiler, s2.compiler);
     swap(s1.vm, s2.vm);
+
+    swap(s1.journal, s2.journal);
+    swap(s1.state_path, s2.state_path);
 }
 
 
@@ -206,6 +638,118 @@ void swap(Session& s1, Session& s2) {
 /***** MORE GLOBALS *****/
 /* The session that we connect with. */
 Session* session = nullptr;
+/* Checks whether the driver can be reached, and keeps statistics on connecting to it. */
+DriverMonitor* driver = nullptr;
+/* The maximum time to keep trying to reconnect to the driver. */
+chrono::seconds reconnect_timeout(60);
+/* Puts the session to sleep once the kernel has been idle for long enough, or `nullptr` if hibernation is disabled. */
+Hibernator* hibernator = nullptr;
+/* The file that the session hibernates in. */
+string hibernate_path;
+
+
+
+
+
+/***** MORE HELPER FUNCTIONS *****/
+/* Refreshes the package- and data indices of the session in place, and discards the VMs of `%%background` cells so that new ones load fresh indices.
+ *
+ * Only call this if `Session::can_refresh()`.
+ *
+ * # Arguments
+ * - `summary`: Will be set to a human-readable summary of what changed, or of the error that occurred.
+ * - `n_changed`: Will be set to the number of packages and datasets that were added, changed or removed.
+ *
+ * # Returns
+ * True if the indices were refreshed, or false if an error occurred.
+ */
+bool refresh_indices(string& summary, size_t& n_changed) {
+    LOG_DEBUG("Refreshing package and data indices...");
+    chrono::steady_clock::time_point start = chrono::steady_clock::now();
+    size_t n_packages = 0, n_datasets = 0;
+    Error* err = session->refresh(n_packages, n_datasets);
+    if (err != nullptr) {
+        summary = "Failed to refresh the package and data indices:\n\n" + serialize_error(err);
+        n_changed = 0;
+        return false;
+    }
+    double elapsed = chrono::duration<double>(chrono::steady_clock::now() - start).count();
+    n_changed = n_packages + n_datasets;
+
+    // Background cells run on VMs with their own indices, so have them create new ones
+    if (n_changed > 0 && background_vms != nullptr) { background_vms->invalidate(); }
+    summary = "Refreshed the package and data indices in " + format_duration(elapsed) + ": " + to_string(n_packages) + " package" + (n_packages == 1 ? "" : "s") + " and " + to_string(n_datasets) + " dataset" + (n_datasets == 1 ? "" : "s") + " changed.";
+    return true;
+}
+
+/* Reconnects the session to the driver, waiting (with exponential backoff) until it accepts connections again or `reconnect_timeout` expires. Discards the VMs of `%%background` cells too, as their connections are likely broken as well.
+ *
+ * # Arguments
+ * - `summary`: Will be set to a human-readable summary of how it went.
+ * - `waiting`: Called with a message whenever we are about to wait before trying again.
+ *
+ * # Returns
+ * True if the session reconnected, or false otherwise.
+ */
+bool reconnect_driver(string& summary, function<void(const string&)> waiting) {
+    LOG_INFO("Reconnecting to the driver...");
+    chrono::steady_clock::time_point start = chrono::steady_clock::now();
+    chrono::milliseconds backoff(250);
+    string err;
+    for (size_t attempt = 1; ; attempt++) {
+        if (driver->probe()) {
+            chrono::steady_clock::time_point setup_start = chrono::steady_clock::now();
+            bool lost_state = false;
+            if (session->reconnect(err, lost_state)) {
+                driver->record_setup(chrono::duration<double>(chrono::steady_clock::now() - setup_start).count(), true);
+                if (background_vms != nullptr) { background_vms->invalidate(); }
+                summary = "Reconnected to the driver in " + format_duration(chrono::duration<double>(chrono::steady_clock::now() - start).count()) + (lost_state ? "; the values of variables defined so far were lost (the libbrane_cli.so in use cannot keep them), so re-run the cells that define them." : ".");
+                return true;
+            }
+        } else {
+            err = "Driver '" + session->drv_endpoint + "' does not accept connections";
+        }
+
+        // Wait a bit longer every time, unless we've waited long enough
+        if (chrono::steady_clock::now() + backoff - start > reconnect_timeout) {
+            summary = "Failed to reconnect to the driver after " + to_string(attempt) + " attempt" + (attempt == 1 ? "" : "s") + " in " + format_duration(chrono::duration<double>(chrono::steady_clock::now() - start).count()) + ":\n\n" + err;
+            return false;
+        }
+        waiting("Lost the connection to the driver; reconnecting (attempt " + to_string(attempt + 1) + " in " + format_duration(backoff.count() / 1000.0) + ")...");
+        this_thread::sleep_for(backoff);
+        backoff = min(backoff * 2, chrono::milliseconds(8000));
+    }
+}
+
+/* Hibernates the session if nothing is running. Called by the `hibernator` on its own thread.
+ *
+ * # Returns
+ * False if the kernel should try again after another idle period (because jobs are still running), or true otherwise.
+ */
+bool hibernate_session() {
+    if (session->asleep()) { return true; }
+    if (jobs->in_flight() > 0 || background_jobs->in_flight() > 0) {
+        LOG_DEBUG("Not hibernating, as jobs are still running");
+        return false;
+    }
+    if (!session->can_hibernate()) {
+        LOG_DEBUG("Not hibernating, as the snippets to restore the compiler with take up more than " << format_bytes(MAX_JOURNAL_BYTES));
+        return true;
+    }
+
+    LOG_INFO("Hibernating after being idle...");
+    if (!session->can_free_vm()) { LOG_DEBUG("Keeping the VM, as the libbrane_cli.so in use cannot serialize the globals defined so far (it lacks `vm_serialize_state()` and `vm_deserialize_state()`)"); }
+
+    // Let go of the background VMs too; they are created again when needed
+    size_t n_vms = background_vms->invalidate();
+    string err;
+    if (!session->hibernate(hibernate_path, err)) {
+        LOG_WARN("Failed to hibernate: " << err);
+        return true;
+    }
+    LOG_DEBUG("Hibernated in '" << hibernate_path << "' (freed " << n_vms << " background VM(s))");
+    return true;
+}
 
 
 
@@ -223,7 +767,19 @@ void custom_interpreter::configure_impl() {
     READ_ENV(certs_dir, BRANE_CERTS_DIR);
     READ_ENV(data_dir, BRANE_DATA_DIR);
     READ_ENV(result_user, BRANE_RESULT_USER);
+    READ_ENV_OPT(background, BRANE_BACKGROUND_DOWNLOADS, "0");
+    READ_ENV_OPT(max_jobs, BRANE_MAX_JOBS, "4");
+    READ_ENV_OPT(max_background, BRANE_MAX_BACKGROUND, "4");
+    READ_ENV_OPT(cache_size, BRANE_CACHE_SIZE, "10G");
+    READ_ENV_OPT(output_budget, BRANE_OUTPUT_BUDGET, "1M");
+    READ_ENV_OPT(output_dir, BRANE_OUTPUT_DIR, "brane-outputs");
+    READ_ENV_OPT(hibernate_after, BRANE_HIBERNATE_AFTER, "0");
+    READ_ENV_OPT(max_submissions, BRANE_MAX_SUBMISSIONS, "0");
+    READ_ENV_OPT(driver_check, BRANE_DRIVER_CHECK, "30");
+    READ_ENV_OPT(reconnect_after, BRANE_RECONNECT_TIMEOUT, "60");
+    READ_ENV_OPT(tmp_dir, TMPDIR, "/tmp");
     workflow_result_user = result_user;
+    background_downloads = strcmp(background, "1") == 0 || strcmp(background, "true") == 0;
 
     // Load the dynamic functions
     brane_cli = functions_load(libbrane_path);
@@ -236,8 +792,43 @@ void custom_interpreter::configure_impl() {
     // Set the colour mode
     brane_cli->set_force_colour(true);
 
-    // Initialize the session
+    // Initialize the session (and keep an eye on its connection to the driver)
+    chrono::steady_clock::time_point start = chrono::steady_clock::now();
     session = new Session(api_addr, drv_addr, certs_dir, data_dir);
+    driver = new DriverMonitor(drv_addr, chrono::seconds(strtoul(driver_check, nullptr, 10)));
+    driver->record_setup(chrono::duration<double>(chrono::steady_clock::now() - start).count());
+    reconnect_timeout = chrono::seconds(strtoul(reconnect_after, nullptr, 10));
+
+    // Prepare the workers for anything running off the kernel thread
+    jobs = new JobQueue(strtoul(max_jobs, nullptr, 10));
+    background_jobs = new JobQueue(strtoul(max_background, nullptr, 10));
+    background_vms = new VmPool(api_addr, drv_addr, certs_dir);
+
+    // Share the limit on running workflows with the other kernels in the container, if any
+    if (strtoul(max_submissions, nullptr, 10) > 0) {
+        admission = new Admission(string(tmp_dir) + "/brane-admission", strtoul(max_submissions, nullptr, 10));
+    }
+
+    // Prepare the dataset cache, if enabled and supported
+    if (parse_bytes(cache_size) > 0) {
+        if (brane_cli->fvalue_data_id != nullptr) {
+            cache = new DataCache(data_dir, parse_bytes(cache_size));
+        } else {
+            LOG_WARN("'" << libbrane_path << "' does not support identifying datasets (no fvalue_data_id()); dataset cache disabled, so results are downloaded every time");
+        }
+    }
+
+    // Start tracking dependencies between cells
+    dependencies = new DependencyGraph();
+
+    // Prepare the store for outputs that are too large to publish
+    outputs = new OutputStore(output_dir, parse_bytes(output_budget));
+
+    // Free the session while the kernel is idle, if told to
+    if (strtoul(hibernate_after, nullptr, 10) > 0) {
+        hibernate_path = string(tmp_dir) + "/bscript-" + to_string(getpid()) + ".json";
+        hibernator = new Hibernator(chrono::seconds(strtoul(hibernate_after, nullptr, 10)), hibernate_session);
+    }
 
     // Done
     LOG_DEBUG("Initialization done.");
@@ -248,7 +839,25 @@ void custom_interpreter::shutdown_request_impl() {
     if (session == nullptr) { return; }
     LOG_INFO("Terminating BraneScript kernel...");
 
-    // Clean the globals
+    // Clean the globals (stop hibernating and wait for any running jobs first, since they use the session)
+    delete hibernator;
+    hibernator = nullptr;
+    delete driver;
+    driver = nullptr;
+    delete background_jobs;
+    background_jobs = nullptr;
+    delete background_vms;
+    background_vms = nullptr;
+    delete jobs;
+    jobs = nullptr;
+    delete cache;
+    cache = nullptr;
+    delete admission;
+    admission = nullptr;
+    delete outputs;
+    outputs = nullptr;
+    delete dependencies;
+    dependencies = nullptr;
     delete session;
     functions_unload(brane_cli);
 
@@ -267,10 +876,227 @@ nl::json custom_interpreter::execute_request_impl(int execution_counter, const s
         return xeus::create_error_reply("init_failure", "Failed to initialize kernel; check the log");
     }
 
+    // Wake up the session if it's hibernating (and keep it from hibernating while we're busy)
+    Hibernator::Activity activity(hibernator);
+    if (session->asleep()) {
+        LOG_INFO("Waking up from hibernation...");
+        chrono::steady_clock::time_point start = chrono::steady_clock::now();
+        string err;
+        if (!session->wake(err)) {
+            publish_execution_error("wake_error", "Failed to wake up the kernel from hibernation (run the cell again to retry):\n\n" + err, {});
+            return xeus::create_error_reply();
+        }
+        double elapsed = chrono::duration<double>(chrono::steady_clock::now() - start).count();
+        driver->record_setup(elapsed);
+        LOG_DEBUG("Woke up in " << format_duration(elapsed));
+    }
+
+    // Publish the results of any background jobs that completed in the meantime
+    poll_jobs();
+
+    // Magics are handled by the kernel itself
+    Magic magic;
+    if (parse_magic(code, magic)) {
+        return execute_magic(execution_counter, magic);
+    }
+    return execute_cell(execution_counter, code, execution_counter);
+}
+
+nl::json custom_interpreter::execute_cell(int execution_counter, const std::string& code, int cell) {
+    // Compile the input
+    Workflow* workflow = compile_snippet(code);
+    if (workflow == nullptr) { return xeus::create_error_reply(); }
+
+    // If the driver cannot be reached, reconnect before we find out the hard way
+    nl::json connection_transient({ { "display_id", "brane-connection-" + to_string(execution_counter) } });
+    bool connection_shown = false;
+    function<void(const string&)> show_connection = [this, &connection_transient, &connection_shown](const string& text) {
+        if (connection_shown) { update_display_data({ { "text/plain", text } }, nl::json::object(), connection_transient); }
+        else { display_data({ { "text/plain", text } }, nl::json::object(), connection_transient); }
+        connection_shown = true;
+    };
+    if (!driver->probe()) {
+        string summary;
+        show_connection("Cannot reach the driver; reconnecting...");
+        if (!reconnect_driver(summary, show_connection)) {
+            brane_cli->workflow_free(workflow);
+            show_connection("Failed to reconnect to the driver");
+            publish_execution_error("connection_error", summary, {});
+            return xeus::create_error_reply();
+        }
+        show_connection(summary);
+    }
+
+    // Run the snippet in the VM, once there is room for it (keeping the user posted on their place in the queue)
+    char* prints = nullptr;
+    FullValue* result = nullptr;
+    Error* err = nullptr;
+    string err_note;
+    {
+        nl::json transient({ { "display_id", "brane-queue-" + to_string(execution_counter) } });
+        bool queued = false;
+        Admission::Slot slot(admission, [this, &transient, &queued](size_t position) {
+            nl::json pub_data({ { "text/plain", "Waiting for other workflows in the IDE to complete (position " + to_string(position) + " in the queue)..." } });
+            if (queued) { update_display_data(pub_data, nl::json::object(), transient); }
+            else { display_data(pub_data, nl::json::object(), transient); }
+            queued = true;
+        });
+        if (queued) { update_display_data({ { "text/plain", "Waited " + format_duration(slot.waited()) + " for other workflows in the IDE to complete." } }, nl::json::object(), transient); }
+
+        LOG_DEBUG("Executing compiled workflow...");
+        // Error* err = brane_cli->vm_run(session->vm, workflow, &prints, &result);
+        err = run_workflow(session->vm, workflow, &prints, &result, execution_counter);
+    }
+
+    // If the connection to the driver broke, give the session a new one (after giving back our slot, as this may take a while); but never run the workflow again, since it may (partially) have run already
+    if (err != nullptr && connection_lost(error_message(err))) {
+        LOG_WARN("Lost the connection to the driver: " << error_message(err));
+        string summary;
+        show_connection("Lost the connection to the driver; reconnecting...");
+        if (!reconnect_driver(summary, show_connection)) {
+            show_connection("Failed to reconnect to the driver");
+            err_note = "\n\n" + summary;
+        } else {
+            show_connection(summary);
+            err_note = "\n\n" + summary + " The workflow may have (partially) run before the connection broke; run the cell again to run it again.";
+        }
+    }
+    if (err != nullptr) {
+        // Get the error as a string
+        string message = serialize_error(err) + err_note;
+        brane_cli->workflow_free(workflow);
+
+        // Publish it in an error reply
+        publish_execution_error("internal_execute_error", message, {});
+        return xeus::create_error_reply();
+    }
+
+    // Remember what this cell defined, so we know which cells depend on it
+    dependencies->record(cell, code);
+
+    // Keep the timeline of the workflow around, if the library can tell us
+    if (brane_cli->vm_trace != nullptr) {
+        char* events = nullptr;
+        Error* trace_err = nullptr;
+        {
+            lock_guard<mutex> vm_guard(session->vm->get_lock());
+            trace_err = brane_cli->vm_trace(session->vm->get(), &events);
+        }
+        if (trace_err != nullptr) {
+            LOG_WARN("Failed to get the timeline of the workflow: " << serialize_error(trace_err));
+        } else {
+            traces.push_back({ cell, nl::json::parse(events, nullptr, false) });
+            if (traces.size() > MAX_TRACES) { traces.pop_front(); }
+            free(events);
+        }
+    }
+
+    // Publish any prints as intermediary results (keeping them within budget, and clearing those of an earlier run if there are none now)
+    size_t prints_len = strlen(prints);
+    size_t used = 0;
+    if (prints_len > 0 || cell_displays.count(cell_display_id(cell, "prints")) > 0) {
+        LOG_DEBUG("Publishing prints of workflow (" << prints_len << " characters)...");
+        nl::json pub_data = outputs->limit({ { "text/plain", prints } }, to_string(cell) + "-prints", outputs->budget(), used);
+        publish_cell_output(cell, "prints", pub_data);
+    }
+    free(prints);
+
+    // Process the result
+    if (brane_cli->fvalue_needs_processing(result)) {
+        LOG_DEBUG("Processing returned result...");
+        shared_ptr<Download> download = make_shared<Download>(session->vm, result, session->data_dir, cache);
+        nl::json transient({ { "display_id", "brane-download-" + to_string(execution_counter) } });
+
+        // If told to, hand back control right away and publish the result once the download completes
+        if (background_downloads) {
+            LOG_DEBUG("Downloading result in the background...");
+            publish_cell_output(cell, "result", { { "text/plain", "Downloading result in the background..." } });
+            string data_dir = session->data_dir;
+            // (the job owns the result and workflow, so that they are freed even if it never runs because the kernel shuts down first)
+            shared_ptr<FullValue> owned_result(result, brane_cli->fvalue_free);
+            shared_ptr<Workflow> owned_workflow(workflow, brane_cli->workflow_free);
+            jobs->submit([download]() { download->run(); }, [this, cell, download, data_dir, owned_result, owned_workflow]() {
+                Error* err = download->take_error();
+                if (err != nullptr) {
+                    publish_cell_output(cell, "result", { { "text/plain", "An internal error occurred while processing the snippet:\n\n" + serialize_error(err) } });
+                } else {
+                    LOG_DEBUG(download->summary());
+                    size_t size;
+                    nl::json pub_data = outputs->limit(result_bundle(owned_result.get(), data_dir), to_string(cell) + "-result", outputs->budget(), size);
+                    publish_cell_output(cell, "result", pub_data);
+                }
+            });
+            return xeus::create_successful_reply();
+        }
+
+        // Otherwise, keep the user posted while we wait for it
+        display_data({ { "text/plain", download->progress() } }, nl::json::object(), transient);
+        size_t job = jobs->submit([download]() { download->run(); }, []() {});
+        while (!jobs->wait(job, chrono::milliseconds(500))) {
+            update_display_data({ { "text/plain", download->progress() } }, nl::json::object(), transient);
+        }
+        Error* err = download->take_error();
+        if (err != nullptr) {
+            update_display_data({ { "text/plain", "Download failed" } }, nl::json::object(), transient);
+            string message = "An internal error occurred while processing the snippet:\n\n" + serialize_error(err);
+            brane_cli->fvalue_free(result);
+            brane_cli->workflow_free(workflow);
+
+            // Publish it in an error reply
+            publish_execution_error("internal_process_error", message, {});
+            return xeus::create_error_reply();
+        }
+        LOG_DEBUG(download->summary());
+        update_display_data({ { "text/plain", download->summary() } }, nl::json::object(), transient);
+    }
+
+    // Now serialize the result
+    LOG_DEBUG("Serializing returned result...");
+    // (the result gets whatever the prints left of the budget, but always at least a quarter of it so it's not reduced to nothing)
+    size_t budget = outputs->budget();
+    size_t left = budget == 0 ? 0 : max(budget - min(used, budget), budget / 4);
+    nl::json pub_data = outputs->limit(result_bundle(result, session->data_dir), to_string(cell) + "-result", left, used);
+
+    // Publish it!
+    LOG_DEBUG("Publishing result of workflow (" << (pub_data.contains("application/json") ? "application/json" : "text/plain") << ")...");
+    publish_cell_output(cell, "result", pub_data);
+
+    // Done, cleanup and return OK
+    brane_cli->fvalue_free(result);
+    brane_cli->workflow_free(workflow);
+    return xeus::create_successful_reply();
+}
+
+Error* custom_interpreter::run_workflow(shared_ptr<SharedVm> vm, Workflow* workflow, char** prints, FullValue** result, int execution_counter) {
+    // A download in the background may still be using the VM, which cannot do two things at once; if so, wait for it
+    unique_lock<mutex> guard(vm->get_lock(), try_to_lock);
+    if (!guard.owns_lock()) {
+        LOG_DEBUG("Waiting for a download in the background to release the VM...");
+        nl::json transient({ { "display_id", "brane-vm-" + to_string(execution_counter) } });
+        display_data({ { "text/plain", "Waiting for the download of an earlier result to complete..." } }, nl::json::object(), transient);
+        chrono::steady_clock::time_point start = chrono::steady_clock::now();
+        guard.lock();
+        update_display_data({ { "text/plain", "Waited " + format_duration(chrono::duration<double>(chrono::steady_clock::now() - start).count()) + " for the download of an earlier result to complete." } }, nl::json::object(), transient);
+    }
+    return brane_cli->vm_run(vm->get(), workflow, prints, result);
+}
+
+void custom_interpreter::publish_cell_output(int cell, const std::string& kind, const nl::json& data) {
+    string id = cell_display_id(cell, kind);
+    nl::json transient({ { "display_id", id } });
+    if (cell_displays.count(id) > 0) {
+        update_display_data(data, nl::json::object(), transient);
+    } else {
+        display_data(data, nl::json::object(), transient);
+        cell_displays.insert(id);
+    }
+}
+
+Workflow* custom_interpreter::compile_snippet(const std::string& code, Compiler* isolated) {
     // Attempt to compile the input
-    LOG_DEBUG("Compiling input snippet...");
+    LOG_DEBUG("Compiling input snippet" << (isolated != nullptr ? " in isolation" : "") << "...");
     Workflow* workflow = nullptr;
-    SourceError* serr = brane_cli->compiler_compile(session->compiler, "<cell>", code.c_str(), &workflow);
+    SourceError* serr = brane_cli->compiler_compile(isolated != nullptr ? isolated : session->compiler, "<cell>", code.c_str(), &workflow);
     if (brane_cli->serror_has_err(serr)) {
         // Get the error as a string
         char* buffer = nullptr;
@@ -289,7 +1115,7 @@ nl::json custom_interpreter::execute_request_impl(int execution_counter, const s
 
         // Done, cleanup
         delete[] message;
-        return xeus::create_error_reply();
+        return nullptr;
     }
     if (brane_cli->serror_has_serrs(serr)) {
         // Get the errors as a string
@@ -302,12 +1128,16 @@ nl::json custom_interpreter::execute_request_impl(int execution_counter, const s
 
         // Done, cleanup
         free(buffer);
-        return xeus::create_error_reply();
+        return nullptr;
     }
     brane_cli->serror_free(serr);
 
     // Inject the end user
     brane_cli->workflow_set_user(workflow, workflow_result_user);
+    if (isolated != nullptr) { return workflow; }
+
+    // The compiler's state now includes this snippet, so remember it in case we hibernate
+    session->record(code);
 
     // Show the assembly as output for now
     char* disas = nullptr;
@@ -330,99 +1160,307 @@ nl::json custom_interpreter::execute_request_impl(int execution_counter, const s
 
         // Done, cleanup
         delete[] message;
-        return xeus::create_error_reply();
+        brane_cli->workflow_free(workflow);
+        return nullptr;
     }
     cout << disas << endl;
     free(disas);
 
-    // Run the snippet in the VM
-    LOG_DEBUG("Executing compiled workflow...");
-    char* prints = nullptr;
-    FullValue* result = nullptr;
-    // Error* err = brane_cli->vm_run(session->vm, workflow, &prints, &result);
-    err = brane_cli->vm_run(session->vm, workflow, &prints, &result);
-    if (err != nullptr) {
-        // Get the error as a string
-        char* buffer = nullptr;
-        brane_cli->error_serialize_err(err, &buffer);
-        brane_cli->error_free(err);
-        brane_cli->workflow_free(workflow);
+    // Done
+    return workflow;
+}
 
-        // Publish it in an error reply
-        publish_execution_error("internal_execute_error", buffer, {});
+nl::json custom_interpreter::execute_magic(int execution_counter, const Magic& magic) {
+    LOG_DEBUG("Handling magic '" << (magic.cell ? "%%" : "%") << magic.name << "'...");
 
-        // Done, cleanup
-        free(buffer);
-        return xeus::create_error_reply();
+    // Page through spilled outputs
+    if (!magic.cell && magic.name == "page") {
+        if (magic.args.size() < 1 || magic.args.size() > 2) {
+            publish_execution_error("magic_error", "Usage: %page <id> [<page>]", {});
+            return xeus::create_error_reply();
+        }
+        size_t page = magic.args.size() > 1 ? strtoul(magic.args[1].c_str(), nullptr, 10) : 1;
+
+        // Read the page
+        string text;
+        size_t n_pages = 0;
+        if (page == 0 || !outputs->page(magic.args[0], page, text, n_pages)) {
+            publish_execution_error("magic_error", "No page " + (magic.args.size() > 1 ? magic.args[1] : "1") + " of output '" + magic.args[0] + "'" + (n_pages > 0 ? " (it has " + to_string(n_pages) + " pages)" : ""), {});
+            return xeus::create_error_reply();
+        }
+        if (page < n_pages) {
+            text += "\n[Page " + to_string(page) + " of " + to_string(n_pages) + "; run `%page " + magic.args[0] + " " + to_string(page + 1) + "` for the next one.]";
+        } else {
+            text += "\n[Page " + to_string(page) + " of " + to_string(n_pages) + ".]";
+        }
+        publish_execution_result(execution_counter, { { "text/plain", text } }, {});
+        return xeus::create_successful_reply();
     }
 
-    // Publish any prints as intermediary results
-    size_t prints_len = strlen(prints);
-    if (prints_len > 0) {
-        LOG_DEBUG("Publishing prints of workflow (" << prints_len << " characters)...");
-        nl::json pub_data({ { "text/plain", prints } });
+    // Run the cell's workflow in the background
+    if (magic.cell && magic.name == "background") {
+        if (!magic.args.empty()) {
+            publish_execution_error("magic_error", "Usage: %%background (followed by the BraneScript to run on the next lines)", {});
+            return xeus::create_error_reply();
+        }
+        // Compile it on its own, since it runs next to whatever the session does next (and thus must not depend on, or change, its state)
+        Compiler* compiler = nullptr;
+        Error* err = background_vms->new_compiler(&compiler);
+        if (err != nullptr) {
+            publish_execution_error("internal_compile_error", "An internal error occurred while preparing to compile the snippet:\n\n" + serialize_error(err), {});
+            return xeus::create_error_reply();
+        }
+        Workflow* workflow = compile_snippet(magic.body, compiler);
+        brane_cli->compiler_free(compiler);
+        if (workflow == nullptr) { return xeus::create_error_reply(); }
+
+        // Submit it, and tell the user where the result will show up
+        shared_ptr<BackgroundRun> run = make_shared<BackgroundRun>(background_vms, workflow, session->data_dir, cache, admission);
+        nl::json transient({ { "display_id", "brane-background-" + to_string(execution_counter) } });
+        string data_dir = session->data_dir;
+        shared_ptr<Workflow> owned_workflow(workflow, brane_cli->workflow_free);
+        background_jobs->submit([run]() { run->run(); }, [this, execution_counter, run, transient, data_dir, owned_workflow]() {
+            Error* err = run->take_error();
+            if (err != nullptr) {
+                update_display_data({ { "text/plain", "Background workflow failed while " + run->get_err_step() + ":\n\n" + serialize_error(err) } }, nl::json::object(), transient);
+                return;
+            }
+
+            // Show the prints and the result together, as this is the only output we can still update; they share the budget, and are shown in HTML too so that frontends which prefer the result's JSON still show the prints
+            // (the result goes first, but leaves at least a quarter of the budget to the prints, and room for the line break that joins them)
+            size_t budget = outputs->budget();
+            bool has_prints = !run->get_prints().empty();
+            size_t used = 0;
+            nl::json pub_data = outputs->limit(result_bundle(run->get_result(), data_dir), to_string(execution_counter) + "-result", has_prints ? budget - budget / 4 : budget, used, has_prints);
+            if (has_prints) {
+                size_t left = budget == 0 ? 0 : max(budget - min(used + 1, budget), (size_t) 1);
+                size_t size = 0;
+                nl::json prints = outputs->limit({ { "text/plain", run->get_prints() } }, to_string(execution_counter) + "-prints", left, size, true);
+                pub_data = merge_bundles(prints, pub_data);
+            }
+            LOG_DEBUG("Publishing result of background workflow " << execution_counter << "...");
+            update_display_data(pub_data, nl::json::object(), transient);
+        });
+        size_t in_flight = background_jobs->in_flight();
+        display_data({ { "text/plain", "Running in the background as job " + to_string(execution_counter) + " (" + to_string(in_flight) + " background job" + (in_flight == 1 ? "" : "s") + " in flight); the result replaces this message once it completes. Run `%wait` to wait for all background jobs." } }, nl::json::object(), transient);
+        return xeus::create_successful_reply();
+    }
+
+    // Run the cell once for every combination of parameters
+    if (magic.cell && magic.name == "sweep") {
+        Sweep sweep;
+        string err;
+        if (!Sweep::parse(magic.args, sweep, err)) {
+            publish_execution_error("magic_error", err + "\n\nUsage: %%sweep <name>=<value>,<value>,... [<name>=<value>,<value>,... ...] (followed by the BraneScript to run on the next lines, with `{{<name>}}` where a value should go)", {});
+            return xeus::create_error_reply();
+        }
+        string missing = sweep.missing_from(magic.body);
+        if (!missing.empty()) {
+            publish_execution_error("magic_error", "Parameter '" + missing + "' does not occur in the cell (use `{{" + missing + "}}` where its values should go)", {});
+            return xeus::create_error_reply();
+        }
+
+        // Compile all variants first, so that mistakes are caught before anything runs; and like background cells, compile each on its own, so that they neither see nor change the session's state (or each other's)
+        LOG_DEBUG("Compiling " << sweep.size() << " variant(s) of sweep...");
+        vector<Workflow*> workflows;
+        for (size_t i = 0; i < sweep.size(); i++) {
+            Compiler* compiler = nullptr;
+            Error* compiler_err = background_vms->new_compiler(&compiler);
+            if (compiler_err != nullptr) {
+                publish_execution_error("internal_compile_error", "An internal error occurred while preparing to compile the snippet:\n\n" + serialize_error(compiler_err), {});
+                for (Workflow* w : workflows) { brane_cli->workflow_free(w); }
+                return xeus::create_error_reply();
+            }
+            Workflow* workflow = compile_snippet(sweep.instantiate(magic.body, i), compiler);
+            brane_cli->compiler_free(compiler);
+            if (workflow == nullptr) {
+                for (Workflow* w : workflows) { brane_cli->workflow_free(w); }
+                return xeus::create_error_reply();
+            }
+            workflows.push_back(workflow);
+        }
+
+        // Submit them all, reporting on every variant that completes
+        chrono::steady_clock::time_point start = chrono::steady_clock::now();
+        nl::json transient({ { "display_id", "brane-sweep-" + to_string(execution_counter) } });
+        shared_ptr<vector<SweepResult>> results = make_shared<vector<SweepResult>>(sweep.size());
+        shared_ptr<pair<size_t, size_t>> counts = make_shared<pair<size_t, size_t>>(0, 0);
+        display_data({ { "text/plain", "Sweep: running " + to_string(sweep.size()) + " variant(s)..." } }, nl::json::object(), transient);
+        vector<size_t> ids;
+        string data_dir = session->data_dir;
+        for (size_t i = 0; i < workflows.size(); i++) {
+            shared_ptr<BackgroundRun> run = make_shared<BackgroundRun>(background_vms, workflows[i], data_dir, cache, admission);
+            shared_ptr<Workflow> owned_workflow(workflows[i], brane_cli->workflow_free);
+            ids.push_back(background_jobs->submit([run]() { run->run(); }, [this, i, run, owned_workflow, results, counts, sweep, transient, data_dir]() {
+                SweepResult& result = (*results)[i];
+                Error* err = run->take_error();
+                if (err != nullptr) {
+                    result.ok = false;
+                    result.text = "Failed while " + run->get_err_step() + ": " + serialize_error(err);
+                    counts->second++;
+                } else {
+                    result.ok = true;
+                    result.text = run->get_prints();
+                    string value = result_bundle(run->get_result(), data_dir)["text/plain"].get<string>();
+                    if (!value.empty()) { result.text += (result.text.empty() || result.text.back() == '\n' ? "" : "\n") + value; }
+                }
+                counts->first++;
+
+                // Tell the user
+                string params;
+                vector<string> values = sweep.variant(i);
+                for (size_t p = 0; p < values.size(); p++) { params += (p > 0 ? ", " : "") + sweep.params()[p] + "=" + values[p]; }
+                update_display_data({ { "text/plain", "Sweep: " + to_string(counts->first) + " of " + to_string(results->size()) + " variant(s) completed (" + to_string(counts->second) + " failed); last: " + params + (result.ok ? "" : " (failed)") } }, nl::json::object(), transient);
+            }));
+        }
+        for (size_t id : ids) {
+            while (!background_jobs->wait(id, chrono::milliseconds(500))) {}
+        }
+        double elapsed = chrono::duration<double>(chrono::steady_clock::now() - start).count();
+        update_display_data({ { "text/plain", "Sweep: " + to_string(results->size()) + " variant(s) completed in " + format_duration(elapsed) + " (" + to_string(counts->second) + " failed)" } }, nl::json::object(), transient);
+
+        // Gather the results in one table
+        size_t size;
+        nl::json pub_data = outputs->limit(sweep.table(*results), to_string(execution_counter) + "-sweep", outputs->budget(), size);
         publish_execution_result(execution_counter, pub_data, {});
+        return counts->second == 0 ? xeus::create_successful_reply() : xeus::create_error_reply("sweep_error", to_string(counts->second) + " of " + to_string(results->size()) + " variant(s) failed");
     }
-    free(prints);
 
-    // Process the result
-    if (brane_cli->fvalue_needs_processing(result)) {
-        LOG_DEBUG("Processing returned result...");
-        err = brane_cli->vm_process(session->vm, result, session->data_dir.c_str());
-        if (err != nullptr) {
-            // Get the error as a string
-            char* buffer = nullptr;
-            brane_cli->error_serialize_err(err, &buffer);
-            brane_cli->error_free(err);
-            brane_cli->fvalue_free(result);
-            brane_cli->workflow_free(workflow);
+    // Show or re-run the cells that depend on cells that were re-run since
+    if (!magic.cell && (magic.name == "stale" || magic.name == "rerun")) {
+        vector<int> stale = dependencies->stale();
+        if (stale.empty()) {
+            publish_execution_result(execution_counter, { { "text/plain", "No stale cells." } }, {});
+            return xeus::create_successful_reply();
+        }
 
-            // Put it a bit in a bigger buffer with text
-            size_t buffer_len = strlen(buffer);
-            char* message = new char[58 + buffer_len];
-            strncpy(message, "An internal error occurred while processing the snippet:\n\n", 58);
-            strncpy(58 + message, buffer, buffer_len);
-            free(buffer);
+        // Only list them if that's all we're asked
+        if (magic.name == "stale") {
+            string text = to_string(stale.size()) + " stale cell" + (stale.size() == 1 ? "" : "s") + " (run `%rerun` to re-run them):";
+            for (int cell : stale) {
+                const string& code = dependencies->code(cell);
+                size_t start = code.find_first_not_of(" \t\r\n");
+                size_t end = code.find('\n', start);
+                text += "\n  In [" + to_string(cell) + "]: " + code.substr(start, end == string::npos ? string::npos : end - start) + (end == string::npos ? "" : " ...") + (dependencies->imports(cell) ? " (imports packages; re-run it yourself)" : "");
+            }
+            publish_execution_result(execution_counter, { { "text/plain", text } }, {});
+            return xeus::create_successful_reply();
+        }
 
-            // Publish it in an error reply
-            publish_execution_error("internal_process_error", message, {});
+        // Otherwise, re-run them in order (copying the code first, as re-running it updates the graph), replacing their outputs
+        vector<string> codes;
+        for (int cell : stale) {
+            if (dependencies->imports(cell)) {
+                publish_execution_error("rerun_error", "Cannot re-run a cell that imports packages (In [" + to_string(cell) + "]):\n\n" + dependencies->code(cell) + "\n\nRe-run it yourself (without the imports that already happened), and then run `%rerun` again.", {});
+                return xeus::create_error_reply();
+            }
+            codes.push_back(dependencies->code(cell));
+        }
+        nl::json transient({ { "display_id", "brane-rerun-" + to_string(execution_counter) } });
+        for (size_t i = 0; i < codes.size(); i++) {
+            LOG_DEBUG("Re-running stale cell " << stale[i] << " (" << (i + 1) << " of " << codes.size() << ")...");
+            nl::json pub_data({ { "text/plain", "Re-running stale cell In [" + to_string(stale[i]) + "] (" + to_string(i + 1) + " of " + to_string(codes.size()) + ")..." } });
+            if (i == 0) { display_data(pub_data, nl::json::object(), transient); }
+            else { update_display_data(pub_data, nl::json::object(), transient); }
+            nl::json reply = this->execute_cell(execution_counter, codes[i], stale[i]);
+            if (reply["status"] != "ok") {
+                update_display_data({ { "text/plain", "Failed to re-run stale cell In [" + to_string(stale[i]) + "]" } }, nl::json::object(), transient);
+                return reply;
+            }
+        }
+        dependencies->settle(stale);
+        update_display_data({ { "text/plain", "Re-ran " + to_string(codes.size()) + " stale cell" + (codes.size() == 1 ? "" : "s") + "; their outputs have been updated." } }, nl::json::object(), transient);
+        return xeus::create_successful_reply();
+    }
+
+    // Show when the tasks of a workflow ran
+    if (!magic.cell && magic.name == "timeline") {
+        if (magic.args.size() > 1) {
+            publish_execution_error("magic_error", "Usage: %timeline [<cell>]", {});
+            return xeus::create_error_reply();
+        }
+        if (brane_cli->vm_trace == nullptr) {
+            publish_execution_error("magic_error", "The libbrane_cli.so in use cannot report the timeline of workflows (it lacks `vm_trace()`)", {});
+            return xeus::create_error_reply();
+        }
 
-            // Done, cleanup
-            delete[] message;
+        // Find the timeline of the requested cell (or of the last one)
+        int cell = magic.args.empty() ? (traces.empty() ? -1 : traces.back().first) : atoi(magic.args[0].c_str());
+        auto it = find_if(traces.begin(), traces.end(), [cell](const pair<int, nl::json>& trace) { return trace.first == cell; });
+        if (it == traces.end()) {
+            publish_execution_error("magic_error", (magic.args.empty() ? string("No workflow has run yet") : "No timeline of cell " + magic.args[0]) + " (timelines are kept for the last " + to_string(MAX_TRACES) + " cells that ran a workflow)", {});
             return xeus::create_error_reply();
         }
+
+        // Export it, and then show it
+        string path = outputs->save(to_string(cell) + "-trace", "json", trace_events(it->second).dump());
+        publish_execution_result(execution_counter, timeline_bundle(it->second, "Timeline of cell " + to_string(cell), path), {});
+        return xeus::create_successful_reply();
     }
 
-    // Now serialize the result
-    LOG_DEBUG("Serializing returned result...");
-    char* buffer = nullptr;
-    brane_cli->fvalue_serialize(result, session->data_dir.c_str(), &buffer);
+    // Show how the connection to the driver is doing
+    if (!magic.cell && magic.name == "connection") {
+        if (!magic.args.empty()) {
+            publish_execution_error("magic_error", "Usage: %connection", {});
+            return xeus::create_error_reply();
+        }
+        driver->probe();
+        publish_execution_result(execution_counter, { { "text/plain", driver->summary() } }, {});
+        return xeus::create_successful_reply();
+    }
 
-    // Publish it!
-    LOG_DEBUG("Publishing result of workflow (" << strlen(buffer) << " characters)...");
-    nl::json pub_data({ { "text/plain", buffer } });
-    publish_execution_result(execution_counter, pub_data, {});
+    // Pick up packages and datasets that were added to the instance since the kernel started
+    if (!magic.cell && magic.name == "refresh") {
+        if (!magic.args.empty()) {
+            publish_execution_error("magic_error", "Usage: %refresh", {});
+            return xeus::create_error_reply();
+        }
+        if (!Session::can_refresh()) {
+            publish_execution_error("magic_error", "The libbrane_cli.so in use cannot refresh the package and data indices (it lacks `pindex_update()` and `dindex_update()`); restart the kernel instead", {});
+            return xeus::create_error_reply();
+        }
 
-    // Done, cleanup and return OK
-    free(buffer);
-    brane_cli->fvalue_free(result);
-    brane_cli->workflow_free(workflow);
-    return xeus::create_successful_reply();
+        string summary;
+        size_t n_changed = 0;
+        if (!refresh_indices(summary, n_changed)) {
+            publish_execution_error("refresh_error", summary, {});
+            return xeus::create_error_reply();
+        }
+        publish_execution_result(execution_counter, { { "text/plain", summary } }, {});
+        return xeus::create_successful_reply();
+    }
+
+    // Wait for all background cells to complete
+    if (!magic.cell && magic.name == "wait") {
+        size_t in_flight = background_jobs->in_flight();
+        LOG_DEBUG("Waiting for " << in_flight << " background job(s)...");
+        background_jobs->wait_all();
+        publish_execution_result(execution_counter, { { "text/plain", "Waited for " + to_string(in_flight) + " background job" + (in_flight == 1 ? "" : "s") + "." } }, {});
+        return xeus::create_successful_reply();
+    }
+
+    // Otherwise, we don't know it
+    publish_execution_error("magic_error", string("Unknown magic '") + (magic.cell ? "%%" : "%") + magic.name + "'", {});
+    return xeus::create_error_reply();
 }
 
 nl::json custom_interpreter::complete_request_impl(const std::string& code, int cursor_pos) {
+    poll_jobs();
     return xeus::create_complete_reply({}, 0, 0);
 }
 
 nl::json custom_interpreter::inspect_request_impl(const std::string& code, int cursor_pos, int detail_level) {
+    poll_jobs();
     return xeus::create_inspect_reply();
 }
 
 nl::json custom_interpreter::is_complete_request_impl(const std::string& code) {
+    poll_jobs();
     return xeus::create_is_complete_reply();
 }
 
 nl::json custom_interpreter::kernel_info_request_impl() {
     LOG_INFO("Handling kernel info request");
+    poll_jobs();
     return xeus::create_info_reply("", "bscript", brane_cli->version(), "BraneScript", "2.0.0", "application/brane-script", ".bs");
 }
@@ -4,7 +4,7 @@
  * Created:
  *   13 Jun 2023, 16:09:11
  * Last edited:
- *   10 Aug 2023, 13:20:40
+ *   20 Oct 2026, 10:37:24
  * Auto updated?
  *   Yes
  *
@@ -17,8 +17,12 @@
 #ifndef BSCRIPT_CUSTOM_INTERPRETER_HPP
 #define BSCRIPT_CUSTOM_INTERPRETER_HPP
 
+#include <memory>
 #include <xeus/xinterpreter.hpp>
 #include "nlohmann/json.hpp"
+#include "brane/brane_cli.h"
+#include "download.hpp"
+#include "magics.hpp"
 
 using xeus::xinterpreter;
 namespace nl = nlohmann;
@@ -98,6 +102,66 @@ namespace bscript {
          * JSON describing the kernel. Generated by `xeus::create_info_reply()`.
          */
          nl::json kernel_info_request_impl() override;
+
+
+
+    private:
+        /* Runs a workflow on the given VM, waiting until a download in the background is done with it if needed (and telling the user so).
+         * 
+         * # Arguments
+         * - `vm`: The VM to run the workflow on.
+         * - `workflow`: The workflow to run.
+         * - `prints`: Will be set to anything the workflow printed.
+         * - `result`: Will be set to the result of the workflow.
+         * - `execution_counter`: The number of times a cell has already been executed.
+         * 
+         * # Returns
+         * `nullptr` if the workflow ran, or else the error that occurred.
+         */
+        Error* run_workflow(std::shared_ptr<SharedVm> vm, Workflow* workflow, char** prints, FullValue** result, int execution_counter);
+
+        /* Compiles and runs a snippet of BraneScript, and publishes what it printed and returned.
+         * 
+         * # Arguments
+         * - `execution_counter`: The number of times a cell has already been executed.
+         * - `code`: The snippet to run.
+         * - `cell`: The execution counter of the cell whose outputs to publish (or replace, if it ran before); this differs from `execution_counter` when `%rerun` re-runs a stale cell.
+         * 
+         * # Returns
+         * JSON signalling either a successfull execution or a failing execution, like `execute_request_impl()`.
+         */
+        nl::json execute_cell(int execution_counter, const std::string& code, int cell);
+
+        /* Publishes an output of a cell under a display ID of its own, or replaces it if the cell published it before (i.e., it's being re-run by `%rerun`).
+         * 
+         * # Arguments
+         * - `cell`: The execution counter of the cell.
+         * - `kind`: The kind of output (`prints` or `result`).
+         * - `data`: The output itself.
+         */
+        void publish_cell_output(int cell, const std::string& kind, const nl::json& data);
+
+        /* Compiles a snippet to a workflow, publishing any errors (and logging the workflow's assembly).
+         * 
+         * # Arguments
+         * - `code`: The snippet to compile.
+         * - `isolated`: If given, compiles the snippet with this compiler instead of the session's. The snippet then cannot use what earlier snippets defined, nor is it remembered for later ones (or for hibernating). Its assembly is not logged either.
+         * 
+         * # Returns
+         * The compiled workflow, or `nullptr` if compilation failed (in which case the error has already been published).
+         */
+        Workflow* compile_snippet(const std::string& code, Compiler* isolated = nullptr);
+
+        /* Handles a magic command (i.e., a cell starting with `%`) instead of executing it as BraneScript.
+         * 
+         * # Arguments
+         * - `execution_counter`: The number of times a cell has already been executed.
+         * - `magic`: The parsed magic command.
+         * 
+         * # Returns
+         * JSON signalling either a successfull execution or a failing execution, like `execute_request_impl()`.
+         */
+        nl::json execute_magic(int execution_counter, const Magic& magic);
     };
 }
 
@@ -0,0 +1,292 @@
+/* DATA CACHE.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 11:46:58
+ * Last edited:
+ *   20 Oct 2026, 12:14:51
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements a cache of downloaded datasets that is shared by all
+ *   kernels using the same data directory.
+**/
+
+#include <algorithm>
+#include <cerrno>
+#include <cstdio>
+#include <fstream>
+#include <fcntl.h>
+#include <sys/ioctl.h>
+#include <sys/stat.h>
+#include <sys/time.h>
+#include <unistd.h>
+#include <tuple>
+#include <vector>
+#ifdef __linux__
+#include <linux/fs.h>
+#endif
+
+#include "nlohmann/json.hpp"
+#include "logging.hpp"
+#include "utils.hpp"
+#include "data_cache.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** HELPER FUNCTIONS *****/
+/* Checks whether the given dataset name is safe to use as a directory name. */
+static bool valid_name(const string& name) {
+    return !name.empty() && name[0] != '.' && name.find('/') == string::npos;
+}
+
+/* Copies the contents of the file `in` to the file `out`.
+ *
+ * # Returns
+ * True if everything was copied, or false otherwise.
+ */
+static bool copy_contents(int in, int out) {
+    vector<char> buffer(1024 * 1024);
+    while (true) {
+        ssize_t n_read = read(in, buffer.data(), buffer.size());
+        if (n_read < 0 && errno == EINTR) { continue; }
+        if (n_read < 0) { return false; }
+        if (n_read == 0) { return true; }
+        for (ssize_t n_written = 0; n_written < n_read; ) {
+            ssize_t n = write(out, buffer.data() + n_written, (size_t) (n_read - n_written));
+            if (n < 0 && errno == EINTR) { continue; }
+            if (n < 0) { return false; }
+            n_written += n;
+        }
+    }
+}
+
+/* Materializes the file or directory at `src` at `dst`, hard-linking, reflinking or copying every file (whichever works first).
+ *
+ * Cache entries are read-only (see `make_read_only()`), so hard-linked files are too, and cannot be edited in place without touching the cache; reflinked and copied files get back their write permission.
+ *
+ * # Returns
+ * True if everything was materialized, or false otherwise.
+ */
+static bool materialize_tree(const string& src, const string& dst) {
+    struct stat info;
+    if (lstat(src.c_str(), &info) != 0) { return false; }
+
+    if (S_ISDIR(info.st_mode)) {
+        // Recreate the directory, then its contents
+        if (mkdir(dst.c_str(), info.st_mode & 07777) != 0 && errno != EEXIST) { return false; }
+        for (const string& entry : list_dir(src)) {
+            if (!materialize_tree(src + "/" + entry, dst + "/" + entry)) { return false; }
+        }
+        return true;
+
+    } else if (S_ISLNK(info.st_mode)) {
+        // Recreate the link itself
+        vector<char> target((size_t) info.st_size + 1, '\0');
+        ssize_t n = readlink(src.c_str(), target.data(), target.size() - 1);
+        if (n < 0) { return false; }
+        return symlink(target.data(), dst.c_str()) == 0;
+
+    } else {
+        // Hard-link it if it's on the same filesystem, which takes no time nor space at all
+        if (link(src.c_str(), dst.c_str()) == 0) { return true; }
+
+        int in = open(src.c_str(), O_RDONLY | O_CLOEXEC);
+        int out = open(dst.c_str(), O_WRONLY | O_CREAT | O_EXCL | O_CLOEXEC, (info.st_mode & 07777) | S_IWUSR);
+        bool copied = in >= 0 && out >= 0;
+        #ifdef FICLONE
+        // Attempt to reflink it, which is instant and shares the data until either side changes
+        if (copied && ioctl(out, FICLONE, in) == 0) {
+            close(in);
+            close(out);
+            return true;
+        }
+        #endif
+
+        // The filesystem does not support it, so copy it instead
+        copied = copied && copy_contents(in, out);
+        if (in >= 0) { close(in); }
+        if (out >= 0 && close(out) != 0) { copied = false; }
+        if (!copied && out >= 0) { unlink(dst.c_str()); }
+        return copied;
+    }
+}
+
+/* Removes the write permission of every file in the file or directory at `path`, so that files hard-linked to it cannot be edited in place (e.g., by a download writing over them). */
+static void make_read_only(const string& path) {
+    struct stat info;
+    if (lstat(path.c_str(), &info) != 0) { return; }
+    if (S_ISDIR(info.st_mode)) {
+        for (const string& entry : list_dir(path)) { make_read_only(path + "/" + entry); }
+    } else if (S_ISREG(info.st_mode)) {
+        chmod(path.c_str(), info.st_mode & 07555);
+    }
+}
+
+/* Checks whether any file in the file or directory at `path` has other (hard) links to it (i.e., whether it was materialized from the cache by linking). */
+static bool has_links(const string& path) {
+    struct stat info;
+    if (lstat(path.c_str(), &info) != 0) { return false; }
+    if (S_ISDIR(info.st_mode)) {
+        for (const string& entry : list_dir(path)) {
+            if (has_links(path + "/" + entry)) { return true; }
+        }
+        return false;
+    }
+    return S_ISREG(info.st_mode) && info.st_nlink > 1;
+}
+
+/* Reads the metadata file of a cache entry.
+ *
+ * # Returns
+ * The metadata, or `null` if it could not be read.
+ */
+static nl::json read_meta(const string& path) {
+    ifstream h(path);
+    if (!h.is_open()) { return nullptr; }
+    nl::json meta = nl::json::parse(h, nullptr, false);
+    if (meta.is_discarded() || !meta.is_object()) { return nullptr; }
+    return meta;
+}
+
+
+
+
+
+/***** LIBRARY *****/
+DataCache::DataCache(const string& data_dir, uint64_t max_size) :
+    data_dir(data_dir),
+    cache_dir(data_dir + "/.cache"),
+    max_size(max_size)
+{
+    make_dirs(this->cache_dir + "/objects");
+    make_dirs(this->cache_dir + "/locks");
+}
+
+
+
+string DataCache::key(const string& name, const string& version) {
+    // Hash the name and version with 64-bit FNV-1a (the metadata file resolves any collisions)
+    uint64_t hash = 14695981039346656037ULL;
+    string id = name + '\0' + version;
+    for (char c : id) {
+        hash ^= (uint64_t) (unsigned char) c;
+        hash *= 1099511628211ULL;
+    }
+
+    char buffer[17];
+    snprintf(buffer, sizeof(buffer), "%016llx", (unsigned long long) hash);
+    return string(buffer);
+}
+
+
+
+string DataCache::lock_path(const string& name) const {
+    // Lock on the path we materialize to rather than on the entry, since every version of a dataset ends up in the same place
+    return this->cache_dir + "/locks/" + DataCache::key(name, "") + ".lock";
+}
+
+bool DataCache::fetch(const string& name, const string& version) {
+    if (!valid_name(name)) { return false; }
+    string entry = this->cache_dir + "/objects/" + DataCache::key(name, version);
+
+    // Check if we have it (and it's not a colliding one); if not, make sure the download that follows does not write into another version that was linked from the cache
+    string target = this->data_dir + "/" + name;
+    nl::json meta = read_meta(entry + "/meta.json");
+    if (meta.is_null() || meta.value("name", "") != name || meta.value("version", "") != version) {
+        if (has_links(target)) { remove_all(target); }
+        return false;
+    }
+    // (a linked file may still have been edited in place by someone who can write to read-only files, e.g., root; catch that if it changed its size)
+    if (path_size(entry + "/data") != meta.value("size", (uint64_t) 0)) {
+        LOG_WARN("Cached dataset '" << name << "' (version '" << version << "') was modified; removing it from the cache");
+        remove_all(target);
+        remove_all(entry);
+        return false;
+    }
+
+    // Replace whatever is in the target location with the cached version
+    if (!remove_all(target) || !materialize_tree(entry + "/data", target)) {
+        LOG_WARN("Failed to materialize cached dataset '" << name << "' at '" << target << "'");
+        remove_all(target);
+        return false;
+    }
+
+    // Mark it as recently used
+    utimes((entry + "/meta.json").c_str(), nullptr);
+    LOG_DEBUG("Materialized dataset '" << name << "' (version '" << version << "') from the cache");
+    return true;
+}
+
+bool DataCache::store(const string& name, const string& version) {
+    if (!valid_name(name)) { return false; }
+    string key = DataCache::key(name, version);
+    string entry = this->cache_dir + "/objects/" + key;
+    string staging = this->cache_dir + "/objects/.tmp-" + key + "-" + to_string(getpid());
+    string source = this->data_dir + "/" + name;
+
+    // Move the dataset into a staging entry (cheap, since it's on the same filesystem)
+    if (!remove_all(staging) || !make_dirs(staging)) { return false; }
+    if (rename(source.c_str(), (staging + "/data").c_str()) != 0) {
+        LOG_WARN("Failed to move dataset '" << source << "' into the cache");
+        remove_all(staging);
+        return false;
+    }
+    make_read_only(staging + "/data");
+    uint64_t size = path_size(staging + "/data");
+    ofstream((staging + "/meta.json").c_str()) << nl::json({ { "name", name }, { "version", version }, { "size", size } }).dump();
+
+    // Publish the entry, then materialize it where the user expects it
+    remove_all(entry);
+    if (rename(staging.c_str(), entry.c_str()) != 0 || !materialize_tree(entry + "/data", source)) {
+        LOG_WARN("Failed to add dataset '" << name << "' to the cache");
+        remove_all(source);
+        if (rename((entry + "/data").c_str(), source.c_str()) != 0) { rename((staging + "/data").c_str(), source.c_str()); }
+        remove_all(entry);
+        remove_all(staging);
+        return false;
+    }
+    LOG_DEBUG("Added dataset '" << name << "' (version '" << version << "', " << format_bytes(size) << ") to the cache");
+
+    // Make room if necessary
+    this->evict();
+    return true;
+}
+
+void DataCache::evict() {
+    FileLock guard(this->cache_dir + "/lock");
+
+    // Collect the entries, the datasets they are and their sizes, oldest first
+    vector<tuple<time_t, string, string, uint64_t>> entries;
+    uint64_t total = 0;
+    for (const string& key : list_dir(this->cache_dir + "/objects")) {
+        if (key[0] == '.') { continue; }
+        string meta_path = this->cache_dir + "/objects/" + key + "/meta.json";
+        nl::json meta = read_meta(meta_path);
+        if (meta.is_null()) { continue; }
+        uint64_t size = meta.value("size", (uint64_t) 0);
+        entries.push_back(make_tuple(path_mtime(meta_path), key, meta.value("name", ""), size));
+        total += size;
+    }
+    sort(entries.begin(), entries.end());
+
+    // Remove them until we're below the limit
+    for (const tuple<time_t, string, string, uint64_t>& entry : entries) {
+        if (total <= this->max_size) { break; }
+        const string& key = get<1>(entry);
+        uint64_t size = get<3>(entry);
+
+        // Skip entries of datasets that are being downloaded or materialized right now
+        FileLock entry_guard(this->lock_path(get<2>(entry)), false);
+        if (!entry_guard.held()) { continue; }
+
+        if (remove_all(this->cache_dir + "/objects/" + key)) {
+            LOG_DEBUG("Evicted cache entry '" << key << "' (" << format_bytes(size) << ")");
+            total -= size;
+        }
+    }
+}
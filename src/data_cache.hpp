@@ -0,0 +1,91 @@
+/* DATA CACHE.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 11:31:15
+ * Last edited:
+ *   20 Oct 2026, 12:14:51
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a cache of downloaded datasets that is shared by all kernels
+ *   using the same data directory.
+**/
+
+#ifndef BSCRIPT_DATA_CACHE_HPP
+#define BSCRIPT_DATA_CACHE_HPP
+
+#include <cstdint>
+#include <string>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* A content-addressed cache of downloaded datasets, shared by all kernels that use the same data directory.
+     *
+     * Datasets are stored once under `<data_dir>/.cache/objects/<key>`, where `<key>` is derived from the dataset's name and version. They are then materialized where users expect them (`<data_dir>/<name>`) as hard links if possible (i.e., if the cache and data directory are on the same filesystem), as reflinks if the filesystem supports them, or as copies otherwise. The files in the cache are read-only, so hard-linked files cannot be edited in place (but can be replaced); reflinked and copied files can be edited freely. Evicting an entry only frees its space once the materialized dataset is removed or replaced too, if it was hard-linked.
+     *
+     * Other kernels are synchronized with using file locks: one per materialized path (i.e., per dataset name; held while it's being downloaded or materialized) and one for the cache as a whole (held while evicting). If the cache exceeds its maximum size, the least recently used entries are evicted.
+     */
+    class DataCache {
+    private:
+        /* The data directory in which we materialize datasets. */
+        std::string data_dir;
+        /* The directory with the cache itself (`<data_dir>/.cache`). */
+        std::string cache_dir;
+        /* The maximum size of all entries together, in bytes. */
+        uint64_t max_size;
+
+
+        /* Computes the key of the entry for the given dataset. */
+        static std::string key(const std::string& name, const std::string& version);
+
+    public:
+        /* Constructor for the DataCache.
+         *
+         * # Arguments
+         * - `data_dir`: The data directory to cache the datasets of.
+         * - `max_size`: The maximum size (in bytes) of the cache before entries are evicted.
+         */
+        DataCache(const std::string& data_dir, uint64_t max_size);
+
+
+
+        /* Returns the path of the lock file that guards the location the given dataset is materialized at (`<data_dir>/<name>`), and the cache entries of all its versions.
+         *
+         * Lock it (see `FileLock`) around calls to `fetch()` and `store()` and the download in between, so that other kernels don't download (or materialize another version of) the same dataset at the same time.
+         */
+        std::string lock_path(const std::string& name) const;
+
+        /* Materializes the given dataset from the cache, if it's in there.
+         *
+         * # Arguments
+         * - `name`: The name of the dataset.
+         * - `version`: The version of the dataset.
+         *
+         * # Returns
+         * True if the dataset was cached (and is now available at `<data_dir>/<name>`), or false otherwise. In the latter case, a dataset that is hard-linked from the cache is removed from `<data_dir>/<name>`, so that downloading another version does not write into the cache.
+         */
+        bool fetch(const std::string& name, const std::string& version);
+
+        /* Adds a freshly downloaded dataset to the cache, and then evicts entries as necessary.
+         *
+         * # Arguments
+         * - `name`: The name of the dataset. It's expected to be downloaded to `<data_dir>/<name>`, where it will be materialized from the cache again.
+         * - `version`: The version of the dataset.
+         *
+         * # Returns
+         * True if the dataset was added, or false otherwise (in which case `<data_dir>/<name>` is left untouched).
+         */
+        bool store(const std::string& name, const std::string& version);
+
+        /* Evicts the least recently used entries until the cache is within its maximum size.
+         *
+         * Entries that are locked by some kernel are skipped.
+         */
+        void evict();
+    };
+}
+
+#endif
@@ -0,0 +1,212 @@
+/* DEPENDENCIES.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 18:21:37
+ * Last edited:
+ *   20 Oct 2026, 10:33:02
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements the tracking of dependencies between cells, based on the
+ *   (global) names each cell defines and uses, which tells us which
+ *   cells are stale after another one has been re-run.
+**/
+
+#include <cctype>
+
+#include "dependencies.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** CONSTANTS *****/
+/* The keywords of BraneScript, which are never names. */
+const static set<string> KEYWORDS = {
+    "break", "class", "continue", "else", "false", "for", "func", "if", "import", "let", "new", "null", "on", "parallel", "return", "true", "while",
+};
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Splits a snippet of BraneScript in the tokens that matter to us: identifiers, `:=` and brackets. Comments, strings, numbers and other operators are dropped (except for `.` and `;`, which tell us about the identifiers around them). */
+static vector<string> tokenize(const string& code) {
+    vector<string> tokens;
+    size_t i = 0;
+    while (i < code.size()) {
+        char c = code[i];
+        if (isspace((unsigned char) c)) {
+            i++;
+        } else if (code.compare(i, 2, "//") == 0) {
+            size_t end = code.find('\n', i);
+            i = end == string::npos ? code.size() : end + 1;
+        } else if (code.compare(i, 2, "/*") == 0) {
+            size_t end = code.find("*/", i + 2);
+            i = end == string::npos ? code.size() : end + 2;
+        } else if (c == '"') {
+            i++;
+            while (i < code.size() && code[i] != '"') { i += code[i] == '\\' ? 2 : 1; }
+            i++;
+        } else if (isalpha((unsigned char) c) || c == '_') {
+            size_t start = i;
+            while (i < code.size() && (isalnum((unsigned char) code[i]) || code[i] == '_')) { i++; }
+            tokens.push_back(code.substr(start, i - start));
+        } else if (isdigit((unsigned char) c)) {
+            while (i < code.size() && (isalnum((unsigned char) code[i]) || code[i] == '.')) { i++; }
+        } else if (code.compare(i, 2, ":=") == 0) {
+            tokens.push_back(":=");
+            i += 2;
+        } else {
+            if (string("{}()[].;").find(c) != string::npos) { tokens.push_back(string(1, c)); }
+            i++;
+        }
+    }
+    return tokens;
+}
+
+/* Returns whether the given token is a name (i.e., an identifier but not a keyword). */
+static bool is_name(const string& token) {
+    return !token.empty() && (isalpha((unsigned char) token[0]) || token[0] == '_') && KEYWORDS.count(token) == 0;
+}
+
+
+
+
+
+/***** LIBRARY *****/
+CellNames bscript::analyze_cell(const string& code) {
+    CellNames names;
+    names.imports = false;
+
+    vector<string> tokens = tokenize(code);
+    int depth = 0;
+    for (size_t i = 0; i < tokens.size(); i++) {
+        const string& token = tokens[i];
+        const string& next = i + 1 < tokens.size() ? tokens[i + 1] : "";
+        if (token == "{" || token == "(" || token == "[") { depth++; continue; }
+        if (token == "}" || token == ")" || token == "]") { depth--; continue; }
+
+        // Imports make packages available, but we don't know what's in them; skip until the end of the statement
+        if (token == "import") {
+            names.imports = true;
+            while (i + 1 < tokens.size() && tokens[i + 1] != ";") { i++; }
+            continue;
+        }
+
+        // Only definitions at the top level are global; the name being declared is not read either way
+        if ((token == "let" || token == "func" || token == "class") && is_name(next)) {
+            if (depth == 0) { names.defines.insert(next); }
+            i++;
+            continue;
+        }
+        if (!is_name(token)) { continue; }
+
+        // Fields and methods are not names on their own
+        if (i > 0 && tokens[i - 1] == ".") { continue; }
+        if (depth == 0 && next == ":=") {
+            names.defines.insert(token);
+            continue;
+        }
+        names.uses.insert(token);
+    }
+    return names;
+}
+
+
+
+DependencyGraph::DependencyGraph() :
+    clock(0)
+{}
+
+
+
+size_t DependencyGraph::find(int id) const {
+    for (size_t i = 0; i < this->cells.size(); i++) {
+        if (this->cells[i].id == id) { return i; }
+    }
+    return this->cells.size();
+}
+
+
+
+void DependencyGraph::record(int id, const string& code) {
+    CellNames names = analyze_cell(code);
+    if (names.defines.empty() && names.uses.empty() && !names.imports) { return; }
+    this->clock++;
+    for (const string& name : names.defines) { this->defined[name] = this->clock; }
+
+    // Update the cell if it ran before, either because it's re-run or because the same code was executed again
+    size_t i = this->find(id);
+    if (i == this->cells.size()) {
+        for (i = 0; i < this->cells.size() && this->cells[i].code != code; i++) {}
+    }
+    if (i < this->cells.size()) {
+        this->cells[i] = Cell{ id, code, names, this->clock };
+    } else {
+        this->cells.push_back(Cell{ id, code, names, this->clock });
+    }
+}
+
+void DependencyGraph::settle(const vector<int>& ids) {
+    for (int id : ids) {
+        size_t i = this->find(id);
+        if (i < this->cells.size()) { this->cells[i].executed = this->clock; }
+    }
+}
+
+vector<int> DependencyGraph::stale() const {
+    // Skip earlier versions of cells that were edited (i.e., cells of which a later one defines and reads the same names), since the later version overwrites whatever they define
+    vector<bool> replaced(this->cells.size(), false);
+    for (size_t i = 0; i < this->cells.size(); i++) {
+        const Cell& cell = this->cells[i];
+        if (cell.names.defines.empty()) { continue; }
+        for (const Cell& other : this->cells) {
+            if (other.executed > cell.executed && other.names.defines == cell.names.defines && other.names.uses == cell.names.uses) { replaced[i] = true; break; }
+        }
+    }
+
+    // Mark cells that read names redefined after they ran, and then those that read names defined by stale cells until nothing changes
+    vector<bool> stale(this->cells.size(), false);
+    set<string> dirty;
+    bool changed = true;
+    while (changed) {
+        changed = false;
+        for (size_t i = 0; i < this->cells.size(); i++) {
+            if (stale[i] || replaced[i]) { continue; }
+            const Cell& cell = this->cells[i];
+            for (const string& name : cell.names.uses) {
+                auto it = this->defined.find(name);
+                if ((it != this->defined.end() && it->second > cell.executed) || dirty.count(name) > 0) {
+                    stale[i] = true;
+                    dirty.insert(cell.names.defines.begin(), cell.names.defines.end());
+                    changed = true;
+                    break;
+                }
+            }
+        }
+    }
+
+    // Return them in order
+    vector<int> result;
+    for (size_t i = 0; i < stale.size(); i++) {
+        if (stale[i]) { result.push_back(this->cells[i].id); }
+    }
+    return result;
+}
+
+
+
+const string& DependencyGraph::code(int id) const {
+    static const string none;
+    size_t i = this->find(id);
+    return i < this->cells.size() ? this->cells[i].code : none;
+}
+
+bool DependencyGraph::imports(int id) const {
+    size_t i = this->find(id);
+    return i < this->cells.size() && this->cells[i].names.imports;
+}
@@ -0,0 +1,119 @@
+/* DEPENDENCIES.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 18:21:37
+ * Last edited:
+ *   20 Oct 2026, 10:31:46
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines the tracking of dependencies between cells, based on the
+ *   (global) names each cell defines and uses, which tells us which
+ *   cells are stale after another one has been re-run.
+**/
+
+#ifndef BSCRIPT_DEPENDENCIES_HPP
+#define BSCRIPT_DEPENDENCIES_HPP
+
+#include <cstddef>
+#include <set>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* The names that a snippet of BraneScript defines and uses. */
+    struct CellNames {
+        /* The global names that the snippet defines (i.e., top-level `let`s, assignments, functions and classes). */
+        std::set<std::string> defines;
+        /* The names that the snippet reads (which excludes names it only assigns to). */
+        std::set<std::string> uses;
+        /* Whether the snippet imports packages, which cannot be done twice. */
+        bool imports;
+    };
+
+    /* Finds the names that a snippet of BraneScript defines and uses.
+     *
+     * This is a lightweight pass over the snippet's tokens, not a full parse. It errs on the side of caution; e.g., any identifier is considered used, even if it's a local variable or function parameter.
+     *
+     * # Arguments
+     * - `code`: The snippet to analyze.
+     *
+     * # Returns
+     * The names it defines and uses.
+     */
+    CellNames analyze_cell(const std::string& code);
+
+
+
+    /* Keeps track of the cells that have been executed, and which of them are stale.
+     *
+     * The kernel does not know which cell in the notebook a snippet came from, so cells are identified by the execution counter with which they last ran. Running the same code again (e.g., the same notebook cell) updates the earlier cell instead of adding a new one. A cell is stale if a name it reads has been redefined since it was last executed, or if it reads a name defined by a stale cell. A cell that defines something is never stale if a cell that defines and reads the same names ran after it, since that's most likely a newer version of the same notebook cell (and would overwrite whatever the old version defines anyway).
+     */
+    class DependencyGraph {
+    private:
+        /* Represents a single executed cell. */
+        struct Cell {
+            /* The execution counter with which the cell last ran. */
+            int id;
+            /* The code of the cell, as last executed. */
+            std::string code;
+            /* The names the cell defines and uses. */
+            CellNames names;
+            /* The time (see `clock`) at which the cell was last executed. */
+            size_t executed;
+        };
+
+        /* The cells, in the order in which they were first executed. */
+        std::vector<Cell> cells;
+        /* The time (see `clock`) at which every name was last defined. */
+        std::unordered_map<std::string, size_t> defined;
+        /* A counter that increases with every executed cell. */
+        size_t clock;
+
+
+        /* Returns the index of the given cell in `cells`, or `cells.size()` if there is no such cell. */
+        size_t find(int id) const;
+
+    public:
+        /* Constructor for the DependencyGraph. */
+        DependencyGraph();
+
+
+
+        /* Records that a snippet has been executed successfully.
+         *
+         * # Arguments
+         * - `id`: The execution counter of the cell. If it's that of a known cell, that cell was re-run (see `stale()`).
+         * - `code`: The snippet that was executed.
+         */
+        void record(int id, const std::string& code);
+
+        /* Marks the given cells as up-to-date, after they have been re-run together.
+         *
+         * Re-running stale cells in order may redefine names that earlier ones in the batch read; this keeps those from becoming stale all over again.
+         *
+         * # Arguments
+         * - `ids`: The cells that were re-run.
+         */
+        void settle(const std::vector<int>& ids);
+
+        /* Returns the cells that are stale, in the order in which they were first executed.
+         *
+         * # Returns
+         * The execution counters of the stale cells (see `code()`).
+         */
+        std::vector<int> stale() const;
+
+        /* Returns the code of the given cell, as last executed, or an empty string if there is no such cell. */
+        const std::string& code(int id) const;
+        /* Returns whether the given cell imports packages (and thus cannot be re-run). */
+        bool imports(int id) const;
+    };
+}
+
+#endif
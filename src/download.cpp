@@ -0,0 +1,140 @@
+/* DOWNLOAD.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 10:17:50
+ * Last edited:
+ *   20 Oct 2026, 09:56:10
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements a wrapper around `vm_process()` that downloads a workflow
+ *   result on a worker thread, while the kernel thread reports on its
+ *   progress.
+**/
+
+#include "utils.hpp"
+#include "download.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** GLOBALS *****/
+/* The map of dynamically loaded compiler functions (defined in `custom_interpreter.cpp`). */
+extern Functions* brane_cli;
+
+
+
+
+
+/***** LIBRARY *****/
+SharedVm::SharedVm(VirtualMachine* vm) :
+    vm(vm)
+{}
+
+SharedVm::~SharedVm() {
+    if (this->vm != nullptr) {
+        brane_cli->vm_free(this->vm);
+    }
+}
+
+
+
+VirtualMachine* SharedVm::release() {
+    VirtualMachine* vm = this->vm;
+    this->vm = nullptr;
+    return vm;
+}
+
+
+
+
+
+Download::Download(shared_ptr<SharedVm> vm, FullValue* result, const string& data_dir, DataCache* cache) :
+    vm(vm),
+    result(result),
+    data_dir(data_dir),
+    cache(cache),
+
+    start(chrono::steady_clock::now()),
+    stop(chrono::steady_clock::now()),
+    completed(false),
+    cached(false),
+
+    err(nullptr)
+{
+    // Find out which dataset we're downloading, if the library can tell us
+    if (brane_cli->fvalue_data_id != nullptr) {
+        char* name = nullptr;
+        char* version = nullptr;
+        brane_cli->fvalue_data_id(this->result, &name, &version);
+        if (name != nullptr && version != nullptr) {
+            this->name = name;
+            this->version = version;
+        }
+        free(name);
+        free(version);
+    }
+}
+
+Download::~Download() {
+    if (this->err != nullptr) {
+        brane_cli->error_free(this->err);
+    }
+}
+
+
+
+void Download::run() {
+    if (this->cache != nullptr && !this->name.empty()) {
+        // Serve it from the cache, or download it and add it to the cache; but in either case, make sure other kernels don't do the same
+        FileLock guard(this->cache->lock_path(this->name));
+        if (this->cache->fetch(this->name, this->version)) {
+            this->cached = true;
+        } else {
+            {
+                lock_guard<mutex> vm_guard(this->vm->get_lock());
+                this->err = brane_cli->vm_process(this->vm->get(), this->result, this->data_dir.c_str());
+            }
+            if (this->err == nullptr) { this->cache->store(this->name, this->version); }
+        }
+    } else {
+        lock_guard<mutex> vm_guard(this->vm->get_lock());
+        this->err = brane_cli->vm_process(this->vm->get(), this->result, this->data_dir.c_str());
+    }
+
+    this->stop = chrono::steady_clock::now();
+    this->completed = true;
+}
+
+uint64_t Download::bytes() const {
+    // Only count our own dataset, as other kernels may be downloading to the same directory
+    return this->name.empty() ? 0 : path_size(this->data_dir + "/" + this->name);
+}
+
+double Download::elapsed() const {
+    chrono::steady_clock::time_point end = this->completed ? this->stop : chrono::steady_clock::now();
+    return chrono::duration_cast<chrono::duration<double>>(end - this->start).count();
+}
+
+
+
+string Download::progress() const {
+    return "Downloading result... " + (this->sized() ? format_bytes(this->bytes()) + " " : string()) + "(" + format_duration(this->elapsed()) + ")";
+}
+
+string Download::summary() const {
+    string size = this->sized() ? format_bytes(this->bytes()) + " in " : string();
+    if (this->cached) {
+        return "Loaded result from the cache (" + size + format_duration(this->elapsed()) + ")";
+    }
+    return "Downloaded result (" + size + format_duration(this->elapsed()) + ")";
+}
+
+Error* Download::take_error() {
+    Error* err = this->err;
+    this->err = nullptr;
+    return err;
+}
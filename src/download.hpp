@@ -0,0 +1,153 @@
+/* DOWNLOAD.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 10:02:37
+ * Last edited:
+ *   20 Oct 2026, 12:24:11
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a wrapper around `vm_process()` that downloads a workflow
+ *   result on a worker thread, while the kernel thread reports on its
+ *   progress.
+**/
+
+#ifndef BSCRIPT_DOWNLOAD_HPP
+#define BSCRIPT_DOWNLOAD_HPP
+
+#include <atomic>
+#include <chrono>
+#include <cstdint>
+#include <ctime>
+#include <memory>
+#include <mutex>
+#include <string>
+
+#include "brane/brane_cli.h"
+#include "data_cache.hpp"
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* A VirtualMachine that is shared between the kernel thread and the jobs running off it (e.g., downloads).
+     *
+     * A VM cannot do two things at the same time, so whoever uses it must hold its lock (see `get_lock()`). It's freed once the last `shared_ptr` to it is dropped, so that a job can keep using it even if the kernel has replaced it in the meantime.
+     */
+    class SharedVm {
+    private:
+        /* The VM itself, or `nullptr` if we gave it up. */
+        VirtualMachine* vm;
+        /* Serializes the use of the VM. */
+        std::mutex lock;
+
+    public:
+        /* Constructor for the SharedVm.
+         *
+         * # Arguments
+         * - `vm`: The VirtualMachine to share. Ownership is passed to the SharedVm.
+         */
+        SharedVm(VirtualMachine* vm);
+        /* Copy constructor for the SharedVm, which is deleted. */
+        SharedVm(const SharedVm& other) = delete;
+        /* Destructor for the SharedVm, which frees the VM unless it was given up. */
+        ~SharedVm();
+
+        /* Copy assignment operator for the SharedVm, which is deleted. */
+        SharedVm& operator=(const SharedVm& other) = delete;
+
+
+
+        /* Returns the VM. Only use it while holding its lock. */
+        inline VirtualMachine* get() const { return this->vm; }
+        /* Returns the lock to hold while using the VM. */
+        inline std::mutex& get_lock() { return this->lock; }
+
+        /* Gives up ownership of the VM without freeing it (e.g., to return it to a pool).
+         *
+         * # Returns
+         * The VM, which is now owned by the caller.
+         */
+        VirtualMachine* release();
+    };
+
+
+
+    /* Represents the processing (i.e., downloading) of a single workflow result.
+     *
+     * `run()` is meant to be called on a worker thread (see `JobQueue`), whereas the other functions may be called from the kernel thread at any time.
+     *
+     * The transfer itself is a single call to `vm_process()`, which the library does not let us split up, resume or verify (nor does it tell us the size or checksum of a dataset up front); an interrupted download starts over from scratch.
+     */
+    class Download {
+    private:
+        /* The VM to download with. */
+        std::shared_ptr<SharedVm> vm;
+        /* The result to download. Not owned by us. */
+        FullValue* result;
+        /* The data directory to download to. */
+        std::string data_dir;
+        /* The cache to serve the result from if possible, or `nullptr` to always download it. Not owned by us. */
+        DataCache* cache;
+        /* The name and version of the dataset we're downloading, or empty if the library cannot tell us (see `fvalue_data_id()`). */
+        std::string name;
+        std::string version;
+
+        /* The (monotonic) time at which the download was created. */
+        std::chrono::steady_clock::time_point start;
+        /* The (monotonic) time at which `run()` completed. */
+        std::chrono::steady_clock::time_point stop;
+        /* Whether `run()` has completed. */
+        std::atomic<bool> completed;
+        /* Whether the result was served from the cache. */
+        bool cached;
+
+        /* The error that occurred while downloading, if any. */
+        Error* err;
+
+    public:
+        /* Constructor for the Download.
+         *
+         * # Arguments
+         * - `vm`: The VirtualMachine to download with. Its lock is held only while downloading, not while serving the result from the cache.
+         * - `result`: The FullValue to download. Should be one for which `fvalue_needs_processing()` is true. Must outlive the Download.
+         * - `data_dir`: The generic data directory to download to.
+         * - `cache`: The cache to serve the result from, if it's in there, or `nullptr` to always download it.
+         */
+        Download(std::shared_ptr<SharedVm> vm, FullValue* result, const std::string& data_dir, DataCache* cache = nullptr);
+        /* Copy constructor for the Download, which is deleted. */
+        Download(const Download& other) = delete;
+        /* Destructor for the Download. */
+        ~Download();
+
+        /* Copy assignment operator for the Download, which is deleted. */
+        Download& operator=(const Download& other) = delete;
+
+
+
+        /* Runs the download. Blocks until it's done. */
+        void run();
+
+        /* Returns whether we know which dataset we're downloading, and thus can tell how large it is (see `bytes()`). */
+        inline bool sized() const { return !this->name.empty(); }
+        /* Returns the number of bytes of the dataset downloaded so far, or 0 if we don't know which dataset it is (see `sized()`). */
+        uint64_t bytes() const;
+        /* Returns the number of seconds the download has been running (or took, once completed). */
+        double elapsed() const;
+
+        /* Returns a one-line, human-readable progress report. */
+        std::string progress() const;
+        /* Returns a one-line, human-readable summary of a completed download. */
+        std::string summary() const;
+
+        /* Takes the error that occurred during the download, if any.
+         *
+         * # Returns
+         * The error, or `nullptr` if the download succeeded. Ownership is passed to the caller.
+         */
+        Error* take_error();
+    };
+}
+
+#endif
@@ -0,0 +1,140 @@
+/* HIBERNATION.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 00:29:50
+ * Last edited:
+ *   20 Oct 2026, 11:14:05
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements a watcher that puts the kernel to sleep (i.e., frees its
+ *   session) once it has been idle for a while, and the journal with
+ *   which the session is restored afterwards.
+**/
+
+#include <algorithm>
+
+#include "dependencies.hpp"
+#include "hibernation.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** LIBRARY *****/
+Hibernator::Activity::Activity(Hibernator* hibernator) :
+    hibernator(hibernator)
+{
+    if (this->hibernator == nullptr) { return; }
+
+    // Only the watcher thread holds the lock for long (while hibernating), so this is where we wait for it
+    lock_guard<mutex> guard(this->hibernator->lock);
+    this->hibernator->n_active++;
+    this->hibernator->asleep = false;
+    this->hibernator->used = true;
+}
+
+Hibernator::Activity::~Activity() {
+    if (this->hibernator == nullptr) { return; }
+    {
+        lock_guard<mutex> guard(this->hibernator->lock);
+        this->hibernator->n_active--;
+        this->hibernator->last_active = chrono::steady_clock::now();
+    }
+    this->hibernator->cond.notify_all();
+}
+
+
+
+Hibernator::Hibernator(chrono::milliseconds after, function<bool()> hibernate) :
+    after(after),
+    hibernate(hibernate),
+    n_active(0),
+    last_active(chrono::steady_clock::now()),
+    used(false),
+    asleep(false),
+    stopping(false)
+{
+    this->watcher = thread(&Hibernator::watcher_main, this);
+}
+
+Hibernator::~Hibernator() {
+    {
+        lock_guard<mutex> guard(this->lock);
+        this->stopping = true;
+    }
+    this->cond.notify_all();
+    this->watcher.join();
+}
+
+
+
+void Hibernator::watcher_main() {
+    unique_lock<mutex> guard(this->lock);
+    while (!this->stopping) {
+        // Wait until there is something to wait for
+        if (!this->used || this->n_active > 0 || this->asleep) {
+            this->cond.wait(guard);
+            continue;
+        }
+
+        // Then wait until the kernel has been idle long enough (or until something changes)
+        chrono::steady_clock::time_point deadline = this->last_active + this->after;
+        if (chrono::steady_clock::now() < deadline) {
+            this->cond.wait_until(guard, deadline);
+            continue;
+        }
+
+        // Hibernate with the lock held, so that new requests wait until we're done; if we can't right now, try again after another idle period
+        if (this->hibernate()) {
+            this->asleep = true;
+        } else {
+            this->last_active = chrono::steady_clock::now();
+        }
+    }
+}
+
+
+
+Journal::Journal(size_t limit) :
+    n_bytes(0),
+    limit(limit),
+    overflowed(false),
+    defines(false)
+{}
+
+
+
+void Journal::record(const string& code) {
+    CellNames names = analyze_cell(code);
+    if (names.defines.empty() && !names.imports) { return; }
+    if (!names.defines.empty()) { this->defines = true; }
+    if (this->overflowed) { return; }
+
+    // Compile it again after everything else, but only once
+    auto it = find(this->snippets.begin(), this->snippets.end(), code);
+    if (it != this->snippets.end()) {
+        this->snippets.erase(it);
+        this->n_bytes -= code.size();
+    }
+    this->snippets.push_back(code);
+    this->n_bytes += code.size();
+
+    // Give up if it gets too much
+    if (this->n_bytes > this->limit) {
+        this->snippets.clear();
+        this->snippets.shrink_to_fit();
+        this->n_bytes = 0;
+        this->overflowed = true;
+    }
+}
+
+void Journal::clear() {
+    this->snippets.clear();
+    this->snippets.shrink_to_fit();
+    this->n_bytes = 0;
+    this->overflowed = false;
+    this->defines = false;
+}
@@ -0,0 +1,153 @@
+/* HIBERNATION.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 00:26:13
+ * Last edited:
+ *   20 Oct 2026, 11:12:40
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a watcher that puts the kernel to sleep (i.e., frees its
+ *   session) once it has been idle for a while, and the journal with
+ *   which the session is restored afterwards.
+**/
+
+#ifndef BSCRIPT_HIBERNATION_HPP
+#define BSCRIPT_HIBERNATION_HPP
+
+#include <chrono>
+#include <condition_variable>
+#include <cstddef>
+#include <functional>
+#include <mutex>
+#include <string>
+#include <thread>
+#include <vector>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Calls a function once the kernel has been idle for a given time, on a thread of its own.
+     *
+     * The kernel marks the time it is busy (i.e., handling a request) with an `Activity`, during which the function is never called. It is called once per idle period; if it asks to (e.g., because jobs were still running), it's called again after another idle period. The first idle period only starts after the first `Activity`, so that a kernel that nobody uses yet (e.g., one waiting in a pool) is never put to sleep.
+     */
+    class Hibernator {
+    public:
+        /* Marks that the kernel is busy for as long as it lives. The idle period starts anew once the last one is destroyed. */
+        class Activity {
+        private:
+            /* The hibernator we keep from hibernating, if any. */
+            Hibernator* hibernator;
+
+        public:
+            /* Constructor for the Activity, which waits until any ongoing hibernation has completed.
+             *
+             * # Arguments
+             * - `hibernator`: The hibernator to keep from hibernating, or `nullptr` to do nothing (e.g., if hibernation is disabled).
+             */
+            Activity(Hibernator* hibernator);
+            /* Copy constructor for the Activity, which is deleted. */
+            Activity(const Activity& other) = delete;
+            /* Destructor for the Activity. */
+            ~Activity();
+
+            /* Copy assignment operator for the Activity, which is deleted. */
+            Activity& operator=(const Activity& other) = delete;
+        };
+
+    private:
+        /* The time the kernel must be idle before we hibernate. */
+        std::chrono::milliseconds after;
+        /* The function that hibernates. Returns false if it should be called again after another idle period. */
+        std::function<bool()> hibernate;
+
+        /* The number of `Activity`s alive right now. */
+        size_t n_active;
+        /* When the last `Activity` was destroyed. */
+        std::chrono::steady_clock::time_point last_active;
+        /* Whether there has been any `Activity` yet. */
+        bool used;
+        /* Whether `hibernate` was done (i.e., returned true) since the last `Activity`. */
+        bool asleep;
+        /* Whether we are being destroyed. */
+        bool stopping;
+
+        /* Protects all of the above. */
+        std::mutex lock;
+        /* Signalled when any of the above changes. */
+        std::condition_variable cond;
+        /* The thread that watches for idleness. */
+        std::thread watcher;
+
+
+        /* The main loop of the watcher thread. */
+        void watcher_main();
+
+    public:
+        /* Constructor for the Hibernator.
+         *
+         * # Arguments
+         * - `after`: The time the kernel must be idle before we hibernate.
+         * - `hibernate`: The function that hibernates. It should return false if it should be called again after another idle period, or true if not until the kernel was busy again. Called from the watcher thread, but never while an `Activity` is alive.
+         */
+        Hibernator(std::chrono::milliseconds after, std::function<bool()> hibernate);
+        /* Copy constructor for the Hibernator, which is deleted. */
+        Hibernator(const Hibernator& other) = delete;
+        /* Destructor for the Hibernator. Waits until any ongoing hibernation has completed. */
+        ~Hibernator();
+
+        /* Copy assignment operator for the Hibernator, which is deleted. */
+        Hibernator& operator=(const Hibernator& other) = delete;
+    };
+
+
+
+    /* The snippets that shaped the state of a compiler, so that a new compiler can be brought in the same state by compiling them again.
+     *
+     * Only snippets that define globals or import packages are kept, since others leave nothing behind for later snippets. A snippet that is compiled again (e.g., a re-run cell) is moved to the end rather than kept twice. Once the snippets take up more than a given number of bytes, the journal gives up on them and no longer `fits()`.
+     */
+    class Journal {
+    private:
+        /* The snippets, in the order in which they should be compiled again. */
+        std::vector<std::string> snippets;
+        /* The total size of the snippets, in bytes. */
+        size_t n_bytes;
+        /* The maximum total size of the snippets, in bytes. */
+        size_t limit;
+        /* Whether the snippets outgrew `limit` (in which case we no longer keep them). */
+        bool overflowed;
+        /* Whether any recorded snippet defines globals. */
+        bool defines;
+
+    public:
+        /* Constructor for the Journal.
+         *
+         * # Arguments
+         * - `limit`: The maximum total size of the snippets, in bytes.
+         */
+        Journal(size_t limit);
+
+        /* Records that a snippet compiled successfully (if it matters for the state of the compiler).
+         *
+         * # Arguments
+         * - `code`: The snippet that compiled.
+         */
+        void record(const std::string& code);
+
+        /* Forgets all snippets (e.g., because the compiler they shaped was freed). */
+        void clear();
+
+        /* Returns whether the snippets are all there (i.e., whether they did not outgrow the limit). */
+        inline bool fits() const { return !this->overflowed; }
+        /* Returns whether any of the snippets defines globals (whose values live in the VM rather than the compiler). */
+        inline bool stateful() const { return this->defines; }
+        /* Returns the snippets, in the order in which they should be compiled again. */
+        inline const std::vector<std::string>& get() const { return this->snippets; }
+        /* Returns the total size of the snippets, in bytes. */
+        inline size_t size() const { return this->n_bytes; }
+    };
+}
+
+#endif
@@ -0,0 +1,132 @@
+/* JOBS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 09:31:02
+ * Last edited:
+ *   20 Oct 2026, 09:26:51
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements the pool of worker threads that runs long-lasting work
+ *   (downloads, workflows) off the kernel thread.
+**/
+
+#include "jobs.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** LIBRARY *****/
+JobQueue::JobQueue(size_t max_workers) :
+    max_workers(max_workers > 0 ? max_workers : 1),
+    n_busy(0),
+    next_id(0),
+    stopping(false)
+{}
+
+JobQueue::~JobQueue() {
+    // Tell the workers to stop
+    {
+        lock_guard<mutex> guard(this->lock);
+        this->stopping = true;
+        this->pending.clear();
+    }
+    this->work_cond.notify_all();
+
+    // Wait until they did
+    for (thread& worker : this->workers) {
+        worker.join();
+    }
+}
+
+
+
+void JobQueue::worker_main() {
+    unique_lock<mutex> guard(this->lock);
+    while (true) {
+        // Wait until there is something to do
+        this->work_cond.wait(guard, [this]() { return this->stopping || !this->pending.empty(); });
+        if (this->stopping) { return; }
+        Job job = move(this->pending.front());
+        this->pending.pop_front();
+        this->n_busy++;
+
+        // Run it without holding the lock
+        guard.unlock();
+        job.work();
+        guard.lock();
+
+        // Mark it as finished
+        this->n_busy--;
+        this->unfinished_ids.erase(job.id);
+        this->finished.push_back(move(job));
+        this->done_cond.notify_all();
+    }
+}
+
+
+
+size_t JobQueue::submit(function<void()> work, function<void()> done) {
+    lock_guard<mutex> guard(this->lock);
+
+    // Queue the job
+    size_t id = this->next_id++;
+    this->pending.push_back({ id, move(work), move(done) });
+    this->unfinished_ids.insert(id);
+
+    // Spawn a new worker if all existing ones are busy and we're allowed to
+    if (this->n_busy + this->pending.size() > this->workers.size() && this->workers.size() < this->max_workers) {
+        this->workers.emplace_back(&JobQueue::worker_main, this);
+    }
+    this->work_cond.notify_one();
+    return id;
+}
+
+size_t JobQueue::poll() {
+    // Take the finished jobs out first, so that `done` may submit new jobs
+    deque<Job> finished;
+    {
+        lock_guard<mutex> guard(this->lock);
+        finished.swap(this->finished);
+    }
+
+    // Now run them
+    for (Job& job : finished) {
+        job.done();
+    }
+    return finished.size();
+}
+
+bool JobQueue::wait(size_t id, chrono::milliseconds timeout) {
+    bool completed;
+    {
+        unique_lock<mutex> guard(this->lock);
+        // (don't look for the job in `finished`, as an earlier `poll()` may have taken it out already)
+        completed = this->done_cond.wait_for(guard, timeout, [this, id]() { return this->unfinished_ids.count(id) == 0; });
+    }
+
+    // Run any `done`s, including the one of our job if it completed
+    this->poll();
+    return completed;
+}
+
+void JobQueue::wait_all() {
+    while (true) {
+        {
+            unique_lock<mutex> guard(this->lock);
+            this->done_cond.wait(guard, [this]() { return !this->finished.empty() || (this->pending.empty() && this->n_busy == 0); });
+        }
+        this->poll();
+
+        // Stop if nothing is left (note that `done` may have submitted new jobs)
+        if (this->in_flight() == 0) { this->poll(); return; }
+    }
+}
+
+size_t JobQueue::in_flight() const {
+    lock_guard<mutex> guard(this->lock);
+    return this->pending.size() + this->n_busy;
+}
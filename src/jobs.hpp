@@ -0,0 +1,134 @@
+/* JOBS.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 09:14:21
+ * Last edited:
+ *   20 Oct 2026, 09:26:51
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a small pool of worker threads that runs long-lasting work
+ *   (downloads, workflows) off the kernel thread.
+**/
+
+#ifndef BSCRIPT_JOBS_HPP
+#define BSCRIPT_JOBS_HPP
+
+#include <chrono>
+#include <condition_variable>
+#include <deque>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <unordered_set>
+#include <vector>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Runs jobs on a bounded number of worker threads.
+     *
+     * Xeus only allows us to publish messages from the kernel thread. Hence, every job is split in a `work`-part, which runs on a worker thread, and a `done`-part, which is run on the kernel thread the next time `poll()` or `wait()` is called.
+     *
+     * Jobs that have not started when the queue is destroyed are dropped without running either part, so anything that `done` would free should be owned by the functions themselves (e.g., through a `std::shared_ptr` they capture).
+     */
+    class JobQueue {
+    private:
+        /* Represents a single job in the queue. */
+        struct Job {
+            /* The identifier of the job. */
+            size_t id;
+            /* The part of the job that runs on a worker thread. */
+            std::function<void()> work;
+            /* The part of the job that runs on the kernel thread once `work` has completed. */
+            std::function<void()> done;
+        };
+
+        /* The maximum number of worker threads to spawn. */
+        size_t max_workers;
+        /* The worker threads spawned so far. */
+        std::vector<std::thread> workers;
+        /* The number of workers currently executing a job. */
+        size_t n_busy;
+
+        /* Jobs that are waiting for a worker. */
+        std::deque<Job> pending;
+        /* Jobs whose `work` has completed but whose `done` has not run yet. */
+        std::deque<Job> finished;
+        /* The identifiers of the jobs whose `work` has not completed yet (i.e., that are pending or running). */
+        std::unordered_set<size_t> unfinished_ids;
+        /* The identifier of the next job. */
+        size_t next_id;
+        /* Whether the queue is being destroyed. */
+        bool stopping;
+
+        /* Protects all of the above. */
+        mutable std::mutex lock;
+        /* Signalled when a job is pushed to `pending` or when we're stopping. */
+        std::condition_variable work_cond;
+        /* Signalled when a job is pushed to `finished`. */
+        std::condition_variable done_cond;
+
+
+        /* The main loop of every worker thread. */
+        void worker_main();
+
+    public:
+        /* Constructor for the JobQueue.
+         *
+         * # Arguments
+         * - `max_workers`: The maximum number of jobs that can run at the same time. Any others are queued.
+         */
+        JobQueue(size_t max_workers);
+        /* Copy constructor for the JobQueue, which is deleted. */
+        JobQueue(const JobQueue& other) = delete;
+        /* Destructor for the JobQueue. Waits until running jobs are completed, but drops any pending ones (and the `done`-part of completed ones). */
+        ~JobQueue();
+
+        /* Copy assignment operator for the JobQueue, which is deleted. */
+        JobQueue& operator=(const JobQueue& other) = delete;
+
+
+
+        /* Schedules a new job.
+         *
+         * # Arguments
+         * - `work`: The part of the job to run on a worker thread. Must not publish anything.
+         * - `done`: The part of the job to run on the kernel thread once `work` has completed.
+         *
+         * # Returns
+         * The identifier of the new job.
+         */
+        size_t submit(std::function<void()> work, std::function<void()> done);
+
+        /* Runs the `done`-part of any job that has completed. Must be called from the kernel thread.
+         *
+         * # Returns
+         * The number of jobs that were completed.
+         */
+        size_t poll();
+
+        /* Waits until the given job has completed, or until the timeout expires. Must be called from the kernel thread.
+         *
+         * Note that this also runs the `done`-part of any other job that has completed in the meantime. Likewise, the `done`-part of the given job may already have been run by an earlier call to `poll()` or `wait()`, in which case this returns right away.
+         *
+         * # Arguments
+         * - `id`: The identifier of the job to wait for.
+         * - `timeout`: The maximum time to wait.
+         *
+         * # Returns
+         * True if the job has completed (and its `done` has been run, possibly by an earlier call), or false if the timeout expired first.
+         */
+        bool wait(size_t id, std::chrono::milliseconds timeout);
+
+        /* Waits until all jobs have completed. Must be called from the kernel thread. */
+        void wait_all();
+
+        /* Returns the number of jobs that are pending or running. */
+        size_t in_flight() const;
+    };
+}
+
+#endif
@@ -4,7 +4,7 @@
  * Created:
  *   09 Aug 2023, 11:43:56
  * Last edited:
- *   09 Aug 2023, 13:45:06
+ *   19 Oct 2026, 10:24:09
  * Auto updated?
  *   Yes
  *
@@ -36,7 +36,7 @@
 /* Dummy struct to trigger our operator. */
 struct Now {};
 /* Defines the operator for streaming. */
-std::ostream& operator<<(std::ostream& os, const Now& _now) {
+inline std::ostream& operator<<(std::ostream& os, const Now& _now) {
     // Compute the current time string with everything except the milliseconds
     std::chrono::system_clock::time_point now = std::chrono::system_clock::now();
     std::time_t current_time = std::chrono::system_clock::to_time_t(now);
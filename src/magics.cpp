@@ -0,0 +1,51 @@
+/* MAGICS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 15:52:37
+ * Last edited:
+ *   19 Oct 2026, 15:52:37
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements the parsing of "magic" commands, i.e., cells starting with
+ *   `%` or `%%` that instruct the kernel instead of running BraneScript.
+**/
+
+#include <sstream>
+
+#include "magics.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** LIBRARY *****/
+bool bscript::parse_magic(const string& code, Magic& magic) {
+    // Skip leading whitespace; magics must start with a `%`
+    size_t start = code.find_first_not_of(" \t\r\n");
+    if (start == string::npos || code[start] != '%') { return false; }
+    bool cell = start + 1 < code.size() && code[start + 1] == '%';
+
+    // Split the first line from the rest
+    size_t name_start = start + (cell ? 2 : 1);
+    size_t line_end = code.find('\n', name_start);
+    string line = code.substr(name_start, line_end == string::npos ? string::npos : line_end - name_start);
+    string body = line_end == string::npos ? "" : code.substr(line_end + 1);
+
+    // Line magics take up the entire cell
+    if (!cell && body.find_first_not_of(" \t\r\n") != string::npos) { return false; }
+
+    // Split the line in the name and its arguments
+    istringstream words(line);
+    string name;
+    if (!(words >> name)) { return false; }
+    magic.name = name;
+    magic.args.clear();
+    string arg;
+    while (words >> arg) { magic.args.push_back(arg); }
+    magic.cell = cell;
+    magic.body = cell ? body : "";
+    return true;
+}
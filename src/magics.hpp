@@ -0,0 +1,53 @@
+/* MAGICS.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 15:52:37
+ * Last edited:
+ *   19 Oct 2026, 15:52:37
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines the parsing of "magic" commands, i.e., cells starting with
+ *   `%` or `%%` that instruct the kernel instead of running BraneScript.
+**/
+
+#ifndef BSCRIPT_MAGICS_HPP
+#define BSCRIPT_MAGICS_HPP
+
+#include <string>
+#include <vector>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* A magic command that was parsed from a cell. */
+    struct Magic {
+        /* The name of the magic, without any `%`. */
+        std::string name;
+        /* The whitespace-separated arguments given after the name. */
+        std::vector<std::string> args;
+        /* Whether this is a cell magic (`%%name`), which applies to the rest of the cell. */
+        bool cell;
+        /* The rest of the cell (i.e., everything after the first line) if this is a cell magic, or empty otherwise. */
+        std::string body;
+    };
+
+
+
+    /* Parses a magic command from a cell.
+     *
+     * Line magics (`%name args`) take up the whole cell, whereas cell magics (`%%name args`) take up its first line and apply to the rest. Leading blank lines are ignored.
+     *
+     * # Arguments
+     * - `code`: The cell to parse.
+     * - `magic`: The [`Magic`] to parse to.
+     *
+     * # Returns
+     * True if the cell is a magic, or false if it is ordinary BraneScript (in which case `magic` is left untouched).
+     */
+    bool parse_magic(const std::string& code, Magic& magic);
+}
+
+#endif
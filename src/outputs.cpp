@@ -0,0 +1,231 @@
+/* OUTPUTS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 16:04:11
+ * Last edited:
+ *   20 Oct 2026, 12:01:44
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements a store that keeps cell outputs within a size budget, by
+ *   writing whatever does not fit to a file and publishing a preview.
+**/
+
+#include <algorithm>
+#include <cstdio>
+#include <fstream>
+#include <ctime>
+#include <random>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include "logging.hpp"
+#include "utils.hpp"
+#include "outputs.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** CONSTANTS *****/
+/* The number of bytes of the budget we reserve for the notice that an output was truncated. */
+const static size_t NOTICE_SIZE = 512;
+/* The age (in seconds) after which files that other kernels left behind are removed. */
+const static time_t MAX_AGE = 7 * 24 * 60 * 60;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Moves the given offset back until it's at the start of a UTF-8 character. */
+static size_t utf8_boundary(const string& text, size_t offset) {
+    while (offset > 0 && offset < text.size() && (((unsigned char) text[offset]) & 0xC0) == 0x80) { offset--; }
+    return offset;
+}
+
+/* Finds where a page of output that starts at the given offset ends, preferably at a line break.
+ *
+ * # Arguments
+ * - `text`: The full output.
+ * - `start`: The offset where the page starts.
+ * - `limit`: The maximum size of a page (including the notice we add to it).
+ *
+ * # Returns
+ * The offset just past the end of the page.
+ */
+static size_t page_end(const string& text, size_t start, size_t limit) {
+    size_t size = max(limit > NOTICE_SIZE ? limit - NOTICE_SIZE : 0, max(limit / 2, (size_t) 1));
+    if (start + size >= text.size()) { return text.size(); }
+    size_t end = utf8_boundary(text, start + size);
+    size_t newline = text.rfind('\n', end);
+    if (newline != string::npos && newline > start + size / 2) { return newline + 1; }
+    return end > start ? end : start + size;
+}
+
+/* Cuts a preview of at most the given size from the start of the output, preferably at a line break. */
+static string cut_preview(const string& text, size_t size) {
+    if (size >= text.size()) { return text; }
+    size_t end = utf8_boundary(text, size);
+    size_t newline = end > 0 ? text.rfind('\n', end - 1) : string::npos;
+    if (newline != string::npos && newline + 1 > size / 2) { return text.substr(0, newline + 1); }
+    return text.substr(0, end);
+}
+
+/* Builds the bundle that replaces an output that did not fit.
+ *
+ * # Arguments
+ * - `preview`: The start of the output to show.
+ * - `full_size`: The size of the full output.
+ * - `path`: The file the full output was spilled to, or an empty string if that failed.
+ * - `id`: The identifier with which to page through the spilled output.
+ * - `html`: Whether to add a `text/html` part even if the output was not spilled.
+ * - `size`: Will be set to the size of the bundle, counting all of its MIME types.
+ */
+static nl::json truncated_bundle(const string& preview, size_t full_size, const string& path, const string& id, bool html, size_t& size) {
+    string shown = format_bytes(preview.size()) + " of " + format_bytes(full_size);
+    nl::json result;
+    if (!path.empty()) {
+        result["text/plain"] = preview + "\n\n[Output truncated (showing " + shown + "). The full output is in '" + path + "'; run `%page " + id + "` to page through it.]";
+        result["text/html"] = "<pre>" + html_escape(preview) + "</pre><p><i>Output truncated (showing " + shown + "). The full output is in <a href=\"" + html_escape(path) + "\" target=\"_blank\">" + html_escape(path) + "</a>; run <code>%page " + html_escape(id) + "</code> to page through it.</i></p>";
+        size = result["text/plain"].get_ref<const string&>().size() + result["text/html"].get_ref<const string&>().size();
+    } else {
+        result["text/plain"] = preview + "\n\n[Output truncated (showing " + shown + "); failed to save the full output.]";
+        size = result["text/plain"].get_ref<const string&>().size();
+        if (html) {
+            result["text/html"] = "<pre>" + html_escape(preview) + "</pre><p><i>Output truncated (showing " + shown + "); failed to save the full output.</i></p>";
+            size += result["text/html"].get_ref<const string&>().size();
+        }
+    }
+    return result;
+}
+
+/* Returns the `text/html` part of a MIME bundle, or its `text/plain` part rendered as preformatted text if it has none. */
+static string html_part(const nl::json& bundle) {
+    if (bundle.contains("text/html") && bundle["text/html"].is_string()) { return bundle["text/html"].get<string>(); }
+    if (bundle.contains("text/plain") && bundle["text/plain"].is_string()) { return "<pre>" + html_escape(bundle["text/plain"].get_ref<const string&>()) + "</pre>"; }
+    return "";
+}
+
+/* Returns the size of a MIME bundle as far as we're concerned, i.e., of its `text/plain` and `application/json` parts. */
+static size_t bundle_size(const nl::json& bundle) {
+    size_t size = 0;
+    if (bundle.contains("text/plain") && bundle["text/plain"].is_string()) { size += bundle["text/plain"].get_ref<const string&>().size(); }
+    if (bundle.contains("application/json")) { size += bundle["application/json"].dump(-1, ' ', false, nl::json::error_handler_t::replace).size(); }
+    return size;
+}
+
+/* Generates a fresh, short random identifier (e.g., `3fa9c1`). */
+static string random_id() {
+    static mt19937 rng(random_device{}());
+    char buffer[7];
+    snprintf(buffer, sizeof(buffer), "%06x", (unsigned int) (rng() & 0xFFFFFF));
+    return string(buffer);
+}
+
+
+
+
+
+/***** LIBRARY *****/
+OutputStore::OutputStore(const string& dir, size_t max_size) :
+    dir(dir),
+    max_size(max_size)
+{
+    // Remove whatever kernels that did not shut down cleanly left behind (but not what running ones may still refer to)
+    time_t now = time(nullptr);
+    for (const string& entry : list_dir(this->dir)) {
+        string path = this->dir + "/" + entry;
+        if (entry[0] != '.' && now - path_mtime(path) > MAX_AGE) {
+            LOG_DEBUG("Removing stale output '" << path << "'");
+            remove(path.c_str());
+        }
+    }
+}
+
+OutputStore::~OutputStore() {
+    for (const string& path : this->written) {
+        remove(path.c_str());
+    }
+    // Remove the directory too if that leaves it empty (which fails harmlessly if it does not)
+    if (!this->written.empty()) { rmdir(this->dir.c_str()); }
+}
+
+
+
+nl::json OutputStore::limit(nl::json bundle, const string& label, size_t limit, size_t& size, bool html) {
+    if (html && !bundle.contains("text/html")) { bundle["text/html"] = html_part(bundle); }
+    size = bundle_size(bundle) + (html ? bundle["text/html"].get_ref<const string&>().size() : 0);
+    if (limit == 0 || size <= limit) { return bundle; }
+
+    // Get the full output as text
+    string full;
+    if (bundle.contains("application/json")) {
+        full = bundle["application/json"].dump(4, ' ', false, nl::json::error_handler_t::replace);
+    } else {
+        full = bundle["text/plain"].get<string>();
+    }
+
+    // Write the full output to a file
+    string path = this->save(label, "txt", full);
+    string id = !path.empty() ? path.substr(this->dir.size() + 1, path.size() - this->dir.size() - 5) : label;
+    if (!path.empty()) { LOG_DEBUG("Spilled " << format_bytes(full.size()) << " of output to '" << path << "'"); }
+    else { LOG_WARN("Failed to spill output to '" << this->dir << "'"); }
+
+    // Show as much of its start as fits in the limit, together with the notice of where to find the rest (and in every MIME type we send, the HTML one escaped)
+    string preview = cut_preview(full, !path.empty() || html ? limit / 2 : limit);
+    nl::json result = truncated_bundle(preview, full.size(), path, id, html, size);
+    while (size > limit && !preview.empty()) {
+        // Shrink it as much as the bundle is too large (at least a byte), which quickly settles since the notices are small
+        preview = cut_preview(full, min(preview.size() * limit / size, preview.size() - 1));
+        result = truncated_bundle(preview, full.size(), path, id, html, size);
+    }
+    return result;
+}
+
+string OutputStore::save(const string& label, const string& ext, const string& contents) {
+    if (!make_dirs(this->dir)) { return ""; }
+    string path = this->dir + "/" + label + "-" + random_id() + "." + ext;
+    ofstream h(path, ios::binary);
+    h << contents;
+    this->written.push_back(path);
+    return h.good() ? path : "";
+}
+
+bool OutputStore::page(const string& id, size_t page, string& text, size_t& n_pages) const {
+    if (id.empty() || id[0] == '.' || id.find('/') != string::npos || page == 0) { return false; }
+
+    // Read the whole output (it's on disk because it was too large to send, not because it's too large to read)
+    ifstream h(this->dir + "/" + id + ".txt", ios::binary);
+    if (!h.is_open()) { return false; }
+    string full((istreambuf_iterator<char>(h)), istreambuf_iterator<char>());
+
+    // Find the page in it
+    size_t limit = this->max_size > 0 ? this->max_size : full.size() + NOTICE_SIZE;
+    size_t start = 0;
+    n_pages = 0;
+    bool found = false;
+    do {
+        size_t end = page_end(full, start, limit);
+        if (++n_pages == page) {
+            text = full.substr(start, end - start);
+            found = true;
+        }
+        start = end;
+    } while (start < full.size());
+    return found;
+}
+
+
+
+nl::json bscript::merge_bundles(const nl::json& first, const nl::json& second) {
+    nl::json merged = second;
+    string first_text = first.contains("text/plain") && first["text/plain"].is_string() ? first["text/plain"].get<string>() : "";
+    string second_text = second.contains("text/plain") && second["text/plain"].is_string() ? second["text/plain"].get<string>() : "";
+    merged["text/plain"] = first_text.empty() || second_text.empty() ? first_text + second_text : first_text + "\n" + second_text;
+    if (first.contains("text/html") || second.contains("text/html")) { merged["text/html"] = html_part(first) + html_part(second); }
+    return merged;
+}
@@ -0,0 +1,118 @@
+/* OUTPUTS.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 16:04:11
+ * Last edited:
+ *   20 Oct 2026, 12:01:44
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a store that keeps cell outputs within a size budget, by
+ *   writing whatever does not fit to a file and publishing a preview.
+**/
+
+#ifndef BSCRIPT_OUTPUTS_HPP
+#define BSCRIPT_OUTPUTS_HPP
+
+#include <cstddef>
+#include <string>
+#include <vector>
+
+#include "nlohmann/json.hpp"
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Keeps the outputs published to the frontend within a size budget.
+     *
+     * Outputs that exceed it are written (or "spilled") to a file in the output directory, and replaced by a preview of their start with a link to the file. The rest can be paged through with `page()`, which is what the `%page` magic does.
+     *
+     * The files a store writes are removed when it's destroyed (i.e., when the kernel shuts down or restarts). Files that kernels which did not shut down cleanly left behind are removed once they are a week old.
+     */
+    class OutputStore {
+    private:
+        /* The directory to spill outputs to. */
+        std::string dir;
+        /* The maximum size of the outputs of a single cell, in bytes. 0 means unlimited. */
+        size_t max_size;
+        /* The files we wrote, which we remove again when we're destroyed. */
+        std::vector<std::string> written;
+
+    public:
+        /* Constructor for the OutputStore.
+         *
+         * # Arguments
+         * - `dir`: The directory to spill outputs to. Created when first needed. If relative, it's relative to the kernel's working directory (i.e., that of the notebook), which lets the frontend link to it.
+         * - `max_size`: The maximum size of the outputs of a single cell, in bytes. Use 0 to never spill.
+         */
+        OutputStore(const std::string& dir, size_t max_size);
+        /* Copy constructor for the OutputStore, which is deleted. */
+        OutputStore(const OutputStore& other) = delete;
+        /* Destructor for the OutputStore, which removes the files it wrote. */
+        ~OutputStore();
+
+        /* Copy assignment operator for the OutputStore, which is deleted. */
+        OutputStore& operator=(const OutputStore& other) = delete;
+
+
+
+        /* Returns the maximum size of the outputs of a single cell, in bytes (0 means unlimited). */
+        inline size_t budget() const { return this->max_size; }
+
+        /* Limits a MIME bundle to the given number of bytes.
+         *
+         * # Arguments
+         * - `bundle`: The bundle to limit. Only its `application/json` and `text/plain` parts are considered (and its `text/html` part if `html` is given).
+         * - `label`: A short description of the output, which ends up in the spilled file's name (e.g., `3-prints`).
+         * - `limit`: The maximum size of the bundle. Use 0 to never spill.
+         * - `size`: Will be set to the size of the returned bundle, counting all of its MIME types.
+         * - `html`: If true, the returned bundle always has a `text/html` part (the text as preformatted, if the bundle had none), which counts towards the limit.
+         *
+         * # Returns
+         * The `bundle` if it fits, or else a bundle with a preview and a link to the spilled output (or, if spilling failed, just the preview). The preview is cut such that the bundle as a whole (its `text/plain` and `text/html` parts, notices included) fits in `limit`, unless the notices alone do not.
+         */
+        nlohmann::json limit(nlohmann::json bundle, const std::string& label, size_t limit, size_t& size, bool html = false);
+
+        /* Saves a file next to the spilled outputs (e.g., an export that the user can download).
+         *
+         * # Arguments
+         * - `label`: A short description of the file, which ends up in its name (e.g., `3-trace`).
+         * - `ext`: The extension of the file (e.g., `json`).
+         * - `contents`: The contents of the file.
+         *
+         * # Returns
+         * The path of the file, or an empty string if it could not be written.
+         */
+        std::string save(const std::string& label, const std::string& ext, const std::string& contents);
+
+        /* Reads a page of a spilled output.
+         *
+         * # Arguments
+         * - `id`: The identifier of the spilled output (as shown in its preview).
+         * - `page`: The page to read, starting at 1. Pages are (roughly) as large as the budget.
+         * - `text`: Will be set to the contents of the page.
+         * - `n_pages`: Will be set to the total number of pages.
+         *
+         * # Returns
+         * True if the page was read, or false if the output or page does not exist.
+         */
+        bool page(const std::string& id, size_t page, std::string& text, size_t& n_pages) const;
+    };
+
+    /* Merges two MIME bundles into one that shows them one after the other (e.g., the prints and the result of a workflow).
+     *
+     * Their `text/plain` parts are joined, and so are their `text/html` parts if either has one (using the text, as preformatted, of one that does not). Any other parts are taken from `second`.
+     *
+     * # Arguments
+     * - `first`: The bundle to show first.
+     * - `second`: The bundle to show after it.
+     *
+     * # Returns
+     * The merged bundle, which is as large as the two together (as far as `OutputStore::limit()` counts, plus a line break) if both have a `text/html` part.
+     */
+    nlohmann::json merge_bundles(const nlohmann::json& first, const nlohmann::json& second);
+}
+
+#endif
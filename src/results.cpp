@@ -0,0 +1,127 @@
+/* RESULTS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 15:24:03
+ * Last edited:
+ *   20 Oct 2026, 10:01:37
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements functions that turn workflow results into something to
+ *   publish to the frontend.
+**/
+
+#include <cstdlib>
+
+#include "logging.hpp"
+#include "results.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** CONSTANTS *****/
+/* The maximum number of characters of any string shown in a preview. */
+const static size_t MAX_PREVIEW_STRING = 64;
+
+
+
+
+
+/***** GLOBALS *****/
+/* The map of dynamically loaded compiler functions (defined in `custom_interpreter.cpp`). */
+extern Functions* brane_cli;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Writes the preview of a JSON value to the given string.
+ *
+ * # Arguments
+ * - `value`: The value to preview.
+ * - `max_items`: The maximum number of elements of any array or object to show.
+ * - `depth`: The remaining nesting depth to show.
+ * - `out`: The string to append to.
+ */
+static void write_preview(const nl::json& value, size_t max_items, size_t depth, string& out) {
+    if (value.is_array()) {
+        if (value.empty()) { out += "[]"; return; }
+        if (depth == 0) { out += "[...]"; return; }
+        out += "[";
+        size_t i = 0;
+        for (const nl::json& elem : value) {
+            if (i == max_items) { out += ", ... (" + to_string(value.size() - i) + " more)"; break; }
+            if (i > 0) { out += ", "; }
+            write_preview(elem, max_items, depth - 1, out);
+            i++;
+        }
+        out += "]";
+
+    } else if (value.is_object()) {
+        if (value.empty()) { out += "{}"; return; }
+        if (depth == 0) { out += "{...}"; return; }
+        out += "{ ";
+        size_t i = 0;
+        for (nl::json::const_iterator iter = value.begin(); iter != value.end(); ++iter) {
+            if (i == max_items) { out += ", ... (" + to_string(value.size() - i) + " more)"; break; }
+            if (i > 0) { out += ", "; }
+            // (keys may contain anything, so quote them like the strings they are)
+            out += nl::json(iter.key()).dump(-1, ' ', false, nl::json::error_handler_t::replace) + ": ";
+            write_preview(iter.value(), max_items, depth - 1, out);
+            i++;
+        }
+        out += " }";
+
+    } else if (value.is_string()) {
+        const string& text = value.get_ref<const string&>();
+        if (text.size() > MAX_PREVIEW_STRING) {
+            out += nl::json(text.substr(0, MAX_PREVIEW_STRING)).dump(-1, ' ', false, nl::json::error_handler_t::replace);
+            out += "...";
+        } else {
+            out += value.dump(-1, ' ', false, nl::json::error_handler_t::replace);
+        }
+
+    } else {
+        out += value.dump();
+    }
+}
+
+
+
+
+
+/***** LIBRARY *****/
+nl::json bscript::result_bundle(FullValue* result, const string& data_dir) {
+    // Try the structured route first, except for datasets (and intermediate results), which we leave to the text route since that says where they were downloaded to
+    if (brane_cli->fvalue_to_json != nullptr && !brane_cli->fvalue_needs_processing(result)) {
+        char* buffer = nullptr;
+        brane_cli->fvalue_to_json(result, data_dir.c_str(), &buffer);
+        nl::json value = nl::json::parse(buffer, nullptr, false);
+        free(buffer);
+
+        if (value.is_discarded()) {
+            LOG_WARN("Library returned invalid JSON for result; falling back to text");
+        } else if (value.is_array() || value.is_object()) {
+            string preview = json_preview(value);
+            return nl::json({ { "application/json", move(value) }, { "text/plain", move(preview) } });
+        }
+    }
+
+    // Otherwise, use the text the library makes of it
+    char* buffer = nullptr;
+    brane_cli->fvalue_serialize(result, data_dir.c_str(), &buffer);
+    nl::json bundle({ { "text/plain", buffer } });
+    free(buffer);
+    return bundle;
+}
+
+string bscript::json_preview(const nl::json& value, size_t max_items, size_t max_depth) {
+    string out;
+    write_preview(value, max_items, max_depth, out);
+    return out;
+}
@@ -0,0 +1,54 @@
+/* RESULTS.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 15:24:03
+ * Last edited:
+ *   19 Oct 2026, 15:24:03
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines functions that turn workflow results into something to
+ *   publish to the frontend.
+**/
+
+#ifndef BSCRIPT_RESULTS_HPP
+#define BSCRIPT_RESULTS_HPP
+
+#include <cstddef>
+#include <string>
+
+#include "nlohmann/json.hpp"
+#include "brane/brane_cli.h"
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Builds the MIME bundle with which to publish a workflow result.
+     *
+     * If the library can serialize results as JSON (`fvalue_to_json()`), arrays and class instances are published as `application/json` together with a compact `text/plain` preview. This saves rendering them as one (potentially huge) string, both in the library and in the frontend. Any other result is published as `text/plain`, as produced by `fvalue_serialize()`.
+     *
+     * # Arguments
+     * - `result`: The [`FullValue`] to publish.
+     * - `data_dir`: The directory to which the result was downloaded, if applicable.
+     *
+     * # Returns
+     * The MIME bundle (i.e., the `data` of a display message).
+     */
+    nlohmann::json result_bundle(FullValue* result, const std::string& data_dir);
+
+    /* Renders a compact, single-line preview of a JSON value.
+     *
+     * # Arguments
+     * - `value`: The value to preview.
+     * - `max_items`: The maximum number of elements of any array or object to show.
+     * - `max_depth`: The maximum nesting depth to show. Deeper arrays and objects are elided.
+     *
+     * # Returns
+     * The preview.
+     */
+    std::string json_preview(const nlohmann::json& value, size_t max_items = 8, size_t max_depth = 2);
+}
+
+#endif
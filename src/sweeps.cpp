@@ -0,0 +1,223 @@
+/* SWEEPS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 17:35:52
+ * Last edited:
+ *   19 Oct 2026, 17:35:52
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements parameter sweeps, i.e., the grid of parameter values with
+ *   which a `%%sweep` cell is instantiated, and the table in which the
+ *   results of all variants are gathered.
+**/
+
+#include <algorithm>
+
+#include "utils.hpp"
+#include "sweeps.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** CONSTANTS *****/
+/* The maximum number of variants in a single sweep, to protect against accidentally huge grids. */
+const static size_t MAX_VARIANTS = 1024;
+/* The maximum width of a cell in the text representation of the table. */
+const static size_t MAX_CELL_WIDTH = 60;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Renders a value as a single line of at most `MAX_CELL_WIDTH` characters, for the text representation of the table. */
+static string cell_text(const string& value) {
+    string line;
+    for (char c : value) {
+        if (c == '\n' || c == '\r' || c == '\t') {
+            if (!line.empty() && line.back() != ' ') { line += ' '; }
+        } else {
+            line += c;
+        }
+    }
+    while (!line.empty() && line.back() == ' ') { line.pop_back(); }
+    if (line.size() > MAX_CELL_WIDTH) {
+        // Don't cut in the middle of a UTF-8 character
+        size_t end = MAX_CELL_WIDTH - 3;
+        while (end > 0 && (((unsigned char) line[end]) & 0xC0) == 0x80) { end--; }
+        line = line.substr(0, end) + "...";
+    }
+    return line;
+}
+
+
+
+
+
+/***** LIBRARY *****/
+bool Sweep::parse(const vector<string>& args, Sweep& sweep, string& err) {
+    if (args.empty()) {
+        err = "No parameters given";
+        return false;
+    }
+
+    sweep.names.clear();
+    sweep.values.clear();
+    for (const string& arg : args) {
+        // Split the name from the values
+        size_t eq = arg.find('=');
+        if (eq == string::npos || eq == 0) {
+            err = "Expected a parameter of the form 'name=value1,value2,...', got '" + arg + "'";
+            return false;
+        }
+        string name = arg.substr(0, eq);
+        if (find(sweep.names.begin(), sweep.names.end(), name) != sweep.names.end()) {
+            err = "Parameter '" + name + "' is given more than once";
+            return false;
+        }
+
+        // Split the values
+        vector<string> values;
+        size_t start = eq + 1;
+        while (true) {
+            size_t comma = arg.find(',', start);
+            values.push_back(arg.substr(start, comma == string::npos ? string::npos : comma - start));
+            if (comma == string::npos) { break; }
+            start = comma + 1;
+        }
+
+        sweep.names.push_back(name);
+        sweep.values.push_back(values);
+    }
+
+    // Refuse grids that are (accidentally) huge
+    size_t size = 1;
+    for (const vector<string>& values : sweep.values) {
+        size *= values.size();
+        if (size > MAX_VARIANTS) {
+            err = "The sweep has more than " + to_string(MAX_VARIANTS) + " variants";
+            return false;
+        }
+    }
+    return true;
+}
+
+
+
+size_t Sweep::size() const {
+    size_t size = 1;
+    for (const vector<string>& values : this->values) { size *= values.size(); }
+    return size;
+}
+
+vector<string> Sweep::variant(size_t i) const {
+    // Decode the index as a mixed-radix number, of which the last parameter is the least significant digit
+    vector<string> result(this->values.size());
+    for (size_t p = this->values.size(); p > 0; p--) {
+        const vector<string>& values = this->values[p - 1];
+        result[p - 1] = values[i % values.size()];
+        i /= values.size();
+    }
+    return result;
+}
+
+
+
+string Sweep::missing_from(const string& tmpl) const {
+    for (const string& name : this->names) {
+        if (tmpl.find("{{" + name + "}}") == string::npos) { return name; }
+    }
+    return "";
+}
+
+string Sweep::instantiate(const string& tmpl, size_t i) const {
+    vector<string> values = this->variant(i);
+    string result;
+    size_t pos = 0;
+    while (pos < tmpl.size()) {
+        // Find the next placeholder
+        size_t open = tmpl.find("{{", pos);
+        size_t close = open == string::npos ? string::npos : tmpl.find("}}", open + 2);
+        if (close == string::npos) {
+            result += tmpl.substr(pos);
+            break;
+        }
+
+        // Substitute it if it's one of ours, or keep it as-is otherwise
+        string name = tmpl.substr(open + 2, close - open - 2);
+        auto it = find(this->names.begin(), this->names.end(), name);
+        result += tmpl.substr(pos, open - pos);
+        if (it != this->names.end()) {
+            result += values[it - this->names.begin()];
+            pos = close + 2;
+        } else {
+            result += "{{";
+            pos = open + 2;
+        }
+    }
+    return result;
+}
+
+
+
+nl::json Sweep::table(const vector<SweepResult>& results) const {
+    // Collect the rows of the table, header first
+    vector<string> header(this->names);
+    header.push_back("output");
+    vector<vector<string>> rows;
+    for (size_t i = 0; i < results.size(); i++) {
+        vector<string> row = this->variant(i);
+        row.push_back(results[i].ok ? results[i].text : "(failed) " + results[i].text);
+        rows.push_back(row);
+    }
+
+    // Render it as HTML
+    string html = "<table><thead><tr>";
+    for (const string& name : header) { html += "<th>" + html_escape(name) + "</th>"; }
+    html += "</tr></thead><tbody>";
+    for (size_t i = 0; i < rows.size(); i++) {
+        html += "<tr>";
+        for (size_t c = 0; c < rows[i].size(); c++) {
+            if (c < this->names.size()) {
+                html += "<td><code>" + html_escape(rows[i][c]) + "</code></td>";
+            } else {
+                html += string("<td style=\"text-align: left\"><pre") + (results[i].ok ? "" : " style=\"color: red\"") + ">" + html_escape(results[i].text) + "</pre></td>";
+            }
+        }
+        html += "</tr>";
+    }
+    html += "</tbody></table>";
+
+    // Render it as aligned text
+    vector<vector<string>> cells = { header };
+    for (const vector<string>& row : rows) {
+        vector<string> line;
+        for (const string& cell : row) { line.push_back(cell_text(cell)); }
+        cells.push_back(line);
+    }
+    vector<size_t> widths(header.size(), 0);
+    for (const vector<string>& line : cells) {
+        for (size_t c = 0; c < line.size(); c++) { widths[c] = max(widths[c], line[c].size()); }
+    }
+    string text;
+    for (size_t r = 0; r < cells.size(); r++) {
+        string line;
+        for (size_t c = 0; c < cells[r].size(); c++) {
+            line += cells[r][c];
+            if (c + 1 < cells[r].size()) { line += string(widths[c] - cells[r][c].size() + 2, ' '); }
+        }
+        text += line + "\n";
+        if (r == 0) {
+            string rule;
+            for (size_t c = 0; c < widths.size(); c++) { rule += string(widths[c], '-') + (c + 1 < widths.size() ? "  " : ""); }
+            text += rule + "\n";
+        }
+    }
+
+    return { { "text/plain", text }, { "text/html", html } };
+}
@@ -0,0 +1,101 @@
+/* SWEEPS.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 17:35:52
+ * Last edited:
+ *   19 Oct 2026, 17:35:52
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines parameter sweeps, i.e., the grid of parameter values with
+ *   which a `%%sweep` cell is instantiated, and the table in which the
+ *   results of all variants are gathered.
+**/
+
+#ifndef BSCRIPT_SWEEPS_HPP
+#define BSCRIPT_SWEEPS_HPP
+
+#include <cstddef>
+#include <string>
+#include <vector>
+
+#include "nlohmann/json.hpp"
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* The outcome of a single variant of a sweep. */
+    struct SweepResult {
+        /* Whether the variant completed successfully. */
+        bool ok;
+        /* The (text representation of the) result, or the error if it failed. */
+        std::string text;
+    };
+
+
+
+    /* A grid of parameter values, of which every combination is one variant of a sweep.
+     *
+     * Parameters are given as `name=value1,value2,...`, and substituted for `{{name}}` in the cell. Variants are ordered such that the last parameter varies fastest.
+     */
+    class Sweep {
+    private:
+        /* The names of the parameters. */
+        std::vector<std::string> names;
+        /* The values of every parameter. */
+        std::vector<std::vector<std::string>> values;
+
+    public:
+        /* Parses a sweep from the arguments of a `%%sweep` magic.
+         *
+         * # Arguments
+         * - `args`: The arguments, each of the form `name=value1,value2,...`.
+         * - `sweep`: Will be set to the parsed sweep.
+         * - `err`: Will be set to a description of what's wrong if parsing fails.
+         *
+         * # Returns
+         * True if the sweep was parsed, or false otherwise.
+         */
+        static bool parse(const std::vector<std::string>& args, Sweep& sweep, std::string& err);
+
+
+
+        /* Returns the number of variants in the sweep. */
+        size_t size() const;
+        /* Returns the names of the parameters. */
+        inline const std::vector<std::string>& params() const { return this->names; }
+        /* Returns the parameter values of the given variant, in the order of `params()`. */
+        std::vector<std::string> variant(size_t i) const;
+
+        /* Checks that every parameter occurs in the given template.
+         *
+         * # Returns
+         * The name of the first parameter that does not occur, or an empty string if they all do.
+         */
+        std::string missing_from(const std::string& tmpl) const;
+        /* Substitutes the values of the given variant in the template.
+         *
+         * # Arguments
+         * - `tmpl`: The template (i.e., the body of the cell), in which `{{name}}` is replaced by the variant's value of `name`.
+         * - `i`: The variant to instantiate.
+         *
+         * # Returns
+         * The instantiated snippet.
+         */
+        std::string instantiate(const std::string& tmpl, size_t i) const;
+
+        /* Gathers the outcomes of all variants in a table.
+         *
+         * # Arguments
+         * - `results`: The outcome of every variant, in order.
+         *
+         * # Returns
+         * A MIME bundle with the table as `text/html` and as `text/plain`.
+         */
+        nlohmann::json table(const std::vector<SweepResult>& results) const;
+    };
+}
+
+#endif
@@ -0,0 +1,257 @@
+/* TIMELINE.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 19:07:14
+ * Last edited:
+ *   19 Oct 2026, 19:07:14
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements the rendering of the timing events of a workflow (as
+ *   returned by `vm_trace()`) as a Gantt chart, and their export in the
+ *   trace-event format understood by `chrome://tracing` and Perfetto.
+**/
+
+#include <algorithm>
+#include <cmath>
+#include <cstdio>
+#include <map>
+#include <vector>
+
+#include "utils.hpp"
+#include "timeline.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** CONSTANTS *****/
+/* The width of the column with task names in the chart, in pixels. */
+const static double LABEL_WIDTH = 220.0;
+/* The width of the chart itself, in pixels. */
+const static double CHART_WIDTH = 640.0;
+/* The height of a single row in the chart, in pixels. */
+const static double ROW_HEIGHT = 18.0;
+/* The height of the axis above the chart, in pixels. */
+const static double AXIS_HEIGHT = 24.0;
+/* The maximum number of rows in the text summary. */
+const static size_t MAX_SUMMARY_ROWS = 20;
+
+
+
+
+
+/***** HELPER STRUCTS *****/
+/* A single task or transfer, with times in seconds since the first event (NaN if it never got to that stage). */
+struct Span {
+    /* The name of the task or dataset. */
+    string name;
+    /* Either `task` or `transfer`. */
+    string kind;
+    /* Where it happened. */
+    string location;
+    /* When it was submitted. */
+    double submitted;
+    /* When it was scheduled. */
+    double scheduled;
+    /* When it started. */
+    double started;
+    /* When it finished. */
+    double finished;
+    /* The number of bytes transferred. */
+    uint64_t bytes;
+};
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Reads a timestamp (in milliseconds) from an event, returning NaN if it's missing. */
+static double timestamp(const nl::json& event, const char* field) {
+    if (!event.contains(field) || !event[field].is_number()) { return NAN; }
+    return event[field].get<double>() / 1000.0;
+}
+
+/* Parses the events returned by `vm_trace()` as spans relative to the earliest timestamp among them, ordered by when they were submitted. */
+static vector<Span> parse_spans(const nl::json& events) {
+    vector<Span> spans;
+    if (!events.is_array()) { return spans; }
+    double origin = INFINITY;
+    for (const nl::json& event : events) {
+        if (!event.is_object()) { continue; }
+        Span span;
+        span.name = event.value("name", string("<unnamed>"));
+        span.kind = event.value("kind", string("task"));
+        span.location = event.value("location", string("<unknown>"));
+        span.submitted = timestamp(event, "submitted");
+        span.scheduled = timestamp(event, "scheduled");
+        span.started = timestamp(event, "started");
+        span.finished = timestamp(event, "finished");
+        span.bytes = event.contains("bytes") && event["bytes"].is_number_unsigned() ? event["bytes"].get<uint64_t>() : 0;
+        for (double t : { span.submitted, span.scheduled, span.started, span.finished }) {
+            if (!isnan(t)) { origin = min(origin, t); }
+        }
+        spans.push_back(span);
+    }
+
+    // Make everything relative to the first event
+    for (Span& span : spans) {
+        span.submitted -= origin;
+        span.scheduled -= origin;
+        span.started -= origin;
+        span.finished -= origin;
+    }
+    stable_sort(spans.begin(), spans.end(), [](const Span& lhs, const Span& rhs) {
+        double l = isnan(lhs.submitted) ? lhs.started : lhs.submitted;
+        double r = isnan(rhs.submitted) ? rhs.started : rhs.submitted;
+        return l < r || (!isnan(l) && isnan(r));
+    });
+    return spans;
+}
+
+/* Returns the time at which the last of the given spans ended. */
+static double span_end(const vector<Span>& spans) {
+    double end = 0.0;
+    for (const Span& span : spans) {
+        for (double t : { span.submitted, span.scheduled, span.started, span.finished }) {
+            if (!isnan(t)) { end = max(end, t); }
+        }
+    }
+    return end;
+}
+
+/* Formats a number with a fixed number of decimals. */
+static string fixed(double value, int decimals = 1) {
+    char buffer[32];
+    snprintf(buffer, sizeof(buffer), "%.*f", decimals, value);
+    return string(buffer);
+}
+
+/* Formats the time a span was queued and running, e.g., `queued 1.2s, ran 3.4s`. */
+static string span_times(const Span& span) {
+    string result;
+    if (!isnan(span.submitted) && !isnan(span.started)) { result += "queued " + format_duration(span.started - span.submitted); }
+    if (!isnan(span.started)) {
+        if (!result.empty()) { result += ", "; }
+        result += isnan(span.finished) ? string("did not finish") : "ran " + format_duration(span.finished - span.started);
+    } else {
+        result += result.empty() ? "never started" : ", never started";
+    }
+    if (span.bytes > 0) { result += " (" + format_bytes(span.bytes) + ")"; }
+    return result;
+}
+
+
+
+
+
+/***** LIBRARY *****/
+nl::json bscript::timeline_bundle(const nl::json& events, const string& title, const string& trace_path) {
+    vector<Span> spans = parse_spans(events);
+    double end = span_end(spans);
+    double scale = end > 0.0 ? CHART_WIDTH / end : 0.0;
+
+    // Summarize
+    size_t n_tasks = 0, n_transfers = 0;
+    uint64_t bytes = 0;
+    map<string, size_t> locations;
+    for (const Span& span : spans) {
+        if (span.kind == "transfer") { n_transfers++; } else { n_tasks++; }
+        bytes += span.bytes;
+        locations[span.location]++;
+    }
+    string summary = title + ": " + to_string(n_tasks) + " task(s) and " + to_string(n_transfers) + " transfer(s) at " + to_string(locations.size()) + " location(s), spanning " + format_duration(end) + (bytes > 0 ? "; " + format_bytes(bytes) + " transferred" : "");
+
+    // Render the axis, choosing a step of 1, 2 or 5 times a power of ten such that there are at most 8 ticks
+    double height = AXIS_HEIGHT + ROW_HEIGHT * spans.size();
+    string svg = "<svg xmlns=\"http://www.w3.org/2000/svg\" width=\"" + fixed(LABEL_WIDTH + CHART_WIDTH + 20.0, 0) + "\" height=\"" + fixed(height + 4.0, 0) + "\" font-family=\"sans-serif\" font-size=\"11\">";
+    if (end > 0.0) {
+        double step = pow(10.0, floor(log10(end / 8.0)));
+        for (double factor : { 2.0, 5.0, 10.0 }) {
+            if (end / step <= 8.0) { break; }
+            step = pow(10.0, floor(log10(end / 8.0))) * factor;
+        }
+        for (double t = 0.0; t <= end + 1e-9; t += step) {
+            double x = LABEL_WIDTH + t * scale;
+            svg += "<line x1=\"" + fixed(x) + "\" y1=\"" + fixed(AXIS_HEIGHT - 4.0) + "\" x2=\"" + fixed(x) + "\" y2=\"" + fixed(height) + "\" stroke=\"#e0e0e0\"/>";
+            svg += "<text x=\"" + fixed(x) + "\" y=\"" + fixed(AXIS_HEIGHT - 8.0) + "\" text-anchor=\"middle\" fill=\"#666\">" + format_duration(t) + "</text>";
+        }
+    }
+
+    // Render a row per span
+    for (size_t i = 0; i < spans.size(); i++) {
+        const Span& span = spans[i];
+        double y = AXIS_HEIGHT + ROW_HEIGHT * i;
+        string tooltip = "<title>" + html_escape(span.name + " @ " + span.location + ": " + span_times(span)) + "</title>";
+        svg += "<text x=\"" + fixed(LABEL_WIDTH - 6.0) + "\" y=\"" + fixed(y + ROW_HEIGHT - 5.0) + "\" text-anchor=\"end\">" + html_escape(span.name) + " <tspan fill=\"#888\">@ " + html_escape(span.location) + "</tspan>" + tooltip + "</text>";
+
+        // The time it was queued, the moment it was scheduled and the time it ran
+        double started = isnan(span.started) ? end : span.started;
+        if (!isnan(span.submitted) && started > span.submitted) {
+            svg += "<rect x=\"" + fixed(LABEL_WIDTH + span.submitted * scale) + "\" y=\"" + fixed(y + 4.0) + "\" width=\"" + fixed((started - span.submitted) * scale) + "\" height=\"" + fixed(ROW_HEIGHT - 8.0) + "\" fill=\"#d0d0d0\">" + tooltip + "</rect>";
+        }
+        if (!isnan(span.scheduled)) {
+            svg += "<line x1=\"" + fixed(LABEL_WIDTH + span.scheduled * scale) + "\" y1=\"" + fixed(y + 2.0) + "\" x2=\"" + fixed(LABEL_WIDTH + span.scheduled * scale) + "\" y2=\"" + fixed(y + ROW_HEIGHT - 2.0) + "\" stroke=\"#666\"/>";
+        }
+        if (!isnan(span.started)) {
+            double finished = isnan(span.finished) ? end : span.finished;
+            string colour = span.kind == "transfer" ? "#f58518" : "#4c78a8";
+            svg += "<rect x=\"" + fixed(LABEL_WIDTH + span.started * scale) + "\" y=\"" + fixed(y + 2.0) + "\" width=\"" + fixed(max((finished - span.started) * scale, 1.0)) + "\" height=\"" + fixed(ROW_HEIGHT - 4.0) + "\" fill=\"" + colour + "\"" + (isnan(span.finished) ? " fill-opacity=\"0.4\"" : "") + ">" + tooltip + "</rect>";
+        }
+    }
+    svg += "</svg>";
+
+    // Wrap it in some HTML
+    string html = "<p><b>" + html_escape(title) + "</b>: " + html_escape(summary.substr(title.size() + 2)) + "</p>" + svg;
+    html += "<p><small><span style=\"color: #4c78a8\">&#9632;</span> task &nbsp; <span style=\"color: #f58518\">&#9632;</span> transfer &nbsp; <span style=\"color: #b0b0b0\">&#9632;</span> queued &nbsp; | scheduled";
+    if (!trace_path.empty()) { html += " &nbsp; &mdash; &nbsp; <a href=\"" + html_escape(trace_path) + "\" target=\"_blank\">Download trace</a> (open in <code>chrome://tracing</code> or Perfetto)"; }
+    html += "</small></p>";
+
+    // Also give a textual version
+    string text = summary + "\n";
+    for (size_t i = 0; i < spans.size() && i < MAX_SUMMARY_ROWS; i++) {
+        text += "  " + spans[i].name + " @ " + spans[i].location + ": " + span_times(spans[i]) + "\n";
+    }
+    if (spans.size() > MAX_SUMMARY_ROWS) { text += "  ... and " + to_string(spans.size() - MAX_SUMMARY_ROWS) + " more\n"; }
+    if (!trace_path.empty()) { text += "Trace saved to '" + trace_path + "'\n"; }
+
+    return { { "text/plain", text }, { "text/html", html } };
+}
+
+nl::json bscript::trace_events(const nl::json& events) {
+    vector<Span> spans = parse_spans(events);
+
+    // Every location becomes a process
+    map<string, size_t> pids;
+    nl::json trace = nl::json::array();
+    for (const Span& span : spans) {
+        if (pids.count(span.location) > 0) { continue; }
+        size_t pid = pids.size() + 1;
+        pids[span.location] = pid;
+        trace.push_back({ { "name", "process_name" }, { "ph", "M" }, { "pid", pid }, { "args", { { "name", span.location } } } });
+    }
+
+    // Every span becomes a thread, with a slice for the time it was queued and one for the time it ran
+    for (size_t i = 0; i < spans.size(); i++) {
+        const Span& span = spans[i];
+        size_t pid = pids[span.location];
+        size_t tid = i + 1;
+        trace.push_back({ { "name", "thread_name" }, { "ph", "M" }, { "pid", pid }, { "tid", tid }, { "args", { { "name", span.name } } } });
+        if (!isnan(span.submitted) && !isnan(span.started)) {
+            trace.push_back({ { "name", "queued" }, { "cat", "queue" }, { "ph", "X" }, { "pid", pid }, { "tid", tid }, { "ts", span.submitted * 1e6 }, { "dur", (span.started - span.submitted) * 1e6 } });
+        }
+        if (!isnan(span.scheduled)) {
+            trace.push_back({ { "name", "scheduled" }, { "cat", "queue" }, { "ph", "i" }, { "s", "t" }, { "pid", pid }, { "tid", tid }, { "ts", span.scheduled * 1e6 } });
+        }
+        if (!isnan(span.started) && !isnan(span.finished)) {
+            nl::json slice = { { "name", span.name }, { "cat", span.kind }, { "ph", "X" }, { "pid", pid }, { "tid", tid }, { "ts", span.started * 1e6 }, { "dur", (span.finished - span.started) * 1e6 } };
+            if (span.bytes > 0) { slice["args"] = { { "bytes", span.bytes } }; }
+            trace.push_back(slice);
+        }
+    }
+    return { { "traceEvents", trace }, { "displayTimeUnit", "ms" } };
+}
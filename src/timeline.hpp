@@ -0,0 +1,52 @@
+/* TIMELINE.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 19:07:14
+ * Last edited:
+ *   19 Oct 2026, 19:07:14
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines the rendering of the timing events of a workflow (as returned
+ *   by `vm_trace()`) as a Gantt chart, and their export in the
+ *   trace-event format understood by `chrome://tracing` and Perfetto.
+**/
+
+#ifndef BSCRIPT_TIMELINE_HPP
+#define BSCRIPT_TIMELINE_HPP
+
+#include <string>
+
+#include "nlohmann/json.hpp"
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Renders the timing events of a workflow as a Gantt chart.
+     *
+     * # Arguments
+     * - `events`: The events, as returned by `vm_trace()`.
+     * - `title`: A title to show above the chart.
+     * - `trace_path`: The path of the exported trace (see `trace_events()`) to link to, or an empty string if there is none.
+     *
+     * # Returns
+     * A MIME bundle with the chart as `text/html` (an inline SVG) and a summary as `text/plain`.
+     */
+    nlohmann::json timeline_bundle(const nlohmann::json& events, const std::string& title, const std::string& trace_path);
+
+    /* Converts the timing events of a workflow to the trace-event format.
+     *
+     * Every task becomes a thread in the process of its location, with a slice for the time it was queued and one for the time it ran.
+     *
+     * # Arguments
+     * - `events`: The events, as returned by `vm_trace()`.
+     *
+     * # Returns
+     * The trace, as a JSON object with `traceEvents`.
+     */
+    nlohmann::json trace_events(const nlohmann::json& events);
+}
+
+#endif
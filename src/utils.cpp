@@ -0,0 +1,177 @@
+/* UTILS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 09:48:13
+ * Last edited:
+ *   19 Oct 2026, 17:31:20
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Implements some filesystem- and formatting helpers shared by the
+ *   kernel's modules.
+**/
+
+#include <cerrno>
+#include <cstdio>
+#include <cstdlib>
+#include <dirent.h>
+#include <fcntl.h>
+#include <sys/file.h>
+#include <sys/stat.h>
+#include <unistd.h>
+
+#include "utils.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** LIBRARY *****/
+FileLock::FileLock(const string& path, bool block) {
+    this->fd = open(path.c_str(), O_RDWR | O_CREAT | O_CLOEXEC, 0666);
+    if (this->fd < 0) { return; }
+    if (flock(this->fd, LOCK_EX | (block ? 0 : LOCK_NB)) != 0) {
+        close(this->fd);
+        this->fd = -1;
+    }
+}
+
+FileLock::~FileLock() {
+    if (this->fd >= 0) {
+        flock(this->fd, LOCK_UN);
+        close(this->fd);
+    }
+}
+
+
+
+vector<string> bscript::list_dir(const string& path) {
+    vector<string> entries;
+    DIR* dir = opendir(path.c_str());
+    if (dir == nullptr) { return entries; }
+    struct dirent* entry;
+    while ((entry = readdir(dir)) != nullptr) {
+        string name(entry->d_name);
+        if (name == "." || name == "..") { continue; }
+        entries.push_back(name);
+    }
+    closedir(dir);
+    return entries;
+}
+
+uint64_t bscript::path_size(const string& path) {
+    struct stat info;
+    if (lstat(path.c_str(), &info) != 0) { return 0; }
+
+    // Recurse into directories
+    if (S_ISDIR(info.st_mode)) {
+        uint64_t total = 0;
+        for (const string& entry : list_dir(path)) {
+            total += path_size(path + "/" + entry);
+        }
+        return total;
+    } else if (S_ISREG(info.st_mode)) {
+        return (uint64_t) info.st_size;
+    } else {
+        return 0;
+    }
+}
+
+time_t bscript::path_mtime(const string& path) {
+    struct stat info;
+    if (lstat(path.c_str(), &info) != 0) { return 0; }
+    return info.st_mtime;
+}
+
+bool bscript::make_dirs(const string& path) {
+    // Create the parents first
+    size_t pos = 0;
+    while ((pos = path.find('/', pos + 1)) != string::npos) {
+        string parent = path.substr(0, pos);
+        if (mkdir(parent.c_str(), 0755) != 0 && errno != EEXIST) { return false; }
+    }
+
+    // Then ourselves
+    if (mkdir(path.c_str(), 0755) != 0 && errno != EEXIST) { return false; }
+    return true;
+}
+
+bool bscript::remove_all(const string& path) {
+    struct stat info;
+    if (lstat(path.c_str(), &info) != 0) { return errno == ENOENT; }
+
+    // Empty directories first
+    if (S_ISDIR(info.st_mode)) {
+        for (const string& entry : list_dir(path)) {
+            if (!remove_all(path + "/" + entry)) { return false; }
+        }
+        return rmdir(path.c_str()) == 0;
+    } else {
+        return unlink(path.c_str()) == 0;
+    }
+}
+
+
+
+uint64_t bscript::parse_bytes(const string& raw) {
+    char* end = nullptr;
+    double value = strtod(raw.c_str(), &end);
+    if (end == raw.c_str() || value < 0) { return 0; }
+
+    // Apply the suffix, if any
+    switch (*end) {
+        case '\0': break;
+        case 'k': case 'K': value *= 1024.0; break;
+        case 'm': case 'M': value *= 1024.0 * 1024.0; break;
+        case 'g': case 'G': value *= 1024.0 * 1024.0 * 1024.0; break;
+        case 't': case 'T': value *= 1024.0 * 1024.0 * 1024.0 * 1024.0; break;
+        default: return 0;
+    }
+    return (uint64_t) value;
+}
+
+string bscript::format_bytes(uint64_t n_bytes) {
+    const char* units[] = { "B", "KiB", "MiB", "GiB", "TiB" };
+    double value = (double) n_bytes;
+    size_t unit = 0;
+    while (value >= 1024.0 && unit < 4) {
+        value /= 1024.0;
+        unit++;
+    }
+
+    char buffer[32];
+    if (unit == 0) {
+        snprintf(buffer, sizeof(buffer), "%llu B", (unsigned long long) n_bytes);
+    } else {
+        snprintf(buffer, sizeof(buffer), "%.1f %s", value, units[unit]);
+    }
+    return string(buffer);
+}
+
+string bscript::format_duration(double seconds) {
+    char buffer[32];
+    if (seconds < 60.0) {
+        snprintf(buffer, sizeof(buffer), "%.1fs", seconds);
+    } else {
+        unsigned long minutes = (unsigned long) (seconds / 60.0);
+        snprintf(buffer, sizeof(buffer), "%lum %04.1fs", minutes, seconds - 60.0 * minutes);
+    }
+    return string(buffer);
+}
+
+string bscript::html_escape(const string& text) {
+    string result;
+    result.reserve(text.size());
+    for (char c : text) {
+        switch (c) {
+            case '&': result += "&amp;"; break;
+            case '<': result += "&lt;"; break;
+            case '>': result += "&gt;"; break;
+            case '"': result += "&quot;"; break;
+            default: result += c; break;
+        }
+    }
+    return result;
+}
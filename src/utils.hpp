@@ -0,0 +1,108 @@
+/* UTILS.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   19 Oct 2026, 09:40:56
+ * Last edited:
+ *   19 Oct 2026, 17:31:20
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines some filesystem- and formatting helpers shared by the kernel's
+ *   modules.
+**/
+
+#ifndef BSCRIPT_UTILS_HPP
+#define BSCRIPT_UTILS_HPP
+
+#include <cstdint>
+#include <ctime>
+#include <string>
+#include <vector>
+
+
+/***** LIBRARY *****/
+namespace bscript {
+    /* Holds an exclusive `flock()` on a file for as long as it lives, which synchronizes with other processes (i.e., other kernels) too. */
+    class FileLock {
+    private:
+        /* The file descriptor of the lock file, or -1 if we don't hold it. */
+        int fd;
+
+    public:
+        /* Constructor for the FileLock, which creates the lock file if needed and then acquires the lock.
+         *
+         * # Arguments
+         * - `path`: The path of the lock file.
+         * - `block`: If true, waits until the lock is available. Otherwise, gives up right away if another process holds it (see `held()`).
+         */
+        FileLock(const std::string& path, bool block = true);
+        /* Copy constructor for the FileLock, which is deleted. */
+        FileLock(const FileLock& other) = delete;
+        /* Destructor for the FileLock, which releases the lock. */
+        ~FileLock();
+
+        /* Copy assignment operator for the FileLock, which is deleted. */
+        FileLock& operator=(const FileLock& other) = delete;
+
+        /* Returns whether we actually acquired the lock. */
+        inline bool held() const { return this->fd >= 0; }
+    };
+
+
+
+    /* Returns the names of the entries in the given directory, excluding `.` and `..`.
+     *
+     * # Arguments
+     * - `path`: The directory to list.
+     *
+     * # Returns
+     * The names of the entries, or an empty list if the directory does not exist.
+     */
+    std::vector<std::string> list_dir(const std::string& path);
+
+    /* Computes the total size of the given file, or of all files in the given directory (recursively).
+     *
+     * Symbolic links are not followed. Hard-linked files are counted once per link.
+     *
+     * # Arguments
+     * - `path`: The path to compute the size of.
+     *
+     * # Returns
+     * The size in bytes, or 0 if the path does not exist.
+     */
+    uint64_t path_size(const std::string& path);
+
+    /* Returns the last modification time of the given path, or 0 if it does not exist. */
+    time_t path_mtime(const std::string& path);
+
+    /* Creates the given directory and any missing parents.
+     *
+     * # Returns
+     * True if the directory exists afterwards, or false otherwise.
+     */
+    bool make_dirs(const std::string& path);
+
+    /* Removes the given file, or the given directory and everything in it.
+     *
+     * # Returns
+     * True if the path does not exist afterwards, or false otherwise.
+     */
+    bool remove_all(const std::string& path);
+
+    /* Parses a human-readable number of bytes (e.g., `512M` or `10G`; the suffix is a power of 1024).
+     *
+     * # Returns
+     * The number of bytes, or 0 if the string is not a valid size.
+     */
+    uint64_t parse_bytes(const std::string& raw);
+    /* Formats a number of bytes as a human-readable string (e.g., `12.3 MiB`). */
+    std::string format_bytes(uint64_t n_bytes);
+    /* Formats a number of seconds as a human-readable string (e.g., `1m 02.3s`). */
+    std::string format_duration(double seconds);
+    /* Escapes the given text for use in HTML. */
+    std::string html_escape(const std::string& text);
+}
+
+#endif
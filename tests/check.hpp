@@ -0,0 +1,104 @@
+/* CHECK.hpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 09:43:12
+ * Last edited:
+ *   20 Oct 2026, 09:43:12
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Defines a minimal framework for the unit tests of the kernel's
+ *   modules, which run against the mock `libbrane_cli.so` (see
+ *   `bench/mock_brane_cli.cpp`).
+**/
+
+#ifndef BSCRIPT_TESTS_CHECK_HPP
+#define BSCRIPT_TESTS_CHECK_HPP
+
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+#include "brane/brane_cli.h"
+
+
+/***** LIBRARY *****/
+namespace tests {
+    /* A single test case. */
+    struct Test {
+        /* The name of the test. */
+        const char* name;
+        /* The test itself, which throws a `Failure` if it fails. */
+        void (*func)();
+    };
+
+    /* Thrown by the `CHECK`-macros when a check fails. */
+    class Failure: public std::runtime_error {
+    public:
+        /* Constructor for the Failure. */
+        Failure(const std::string& what): std::runtime_error(what) {}
+    };
+
+    /* Returns the list of all tests, in the order in which they were registered. */
+    std::vector<Test>& registry();
+
+    /* Registers a test when it's constructed (see `TEST()`). */
+    struct Register {
+        /* Constructor for the Register. */
+        Register(const char* name, void (*func)()) { registry().push_back({ name, func }); }
+    };
+
+    /* Creates a new, empty directory for a test to work in. It is removed once all tests have run. */
+    std::string temp_dir();
+
+    /* Creates a VirtualMachine with the mock library. */
+    VirtualMachine* mock_vm();
+    /* Compiles a snippet with a fresh (mock) compiler.
+     *
+     * # Returns
+     * The workflow. Ownership is passed to the caller.
+     */
+    Workflow* mock_workflow(const std::string& code);
+    /* Runs a snippet on the given (mock) VM.
+     *
+     * # Arguments
+     * - `vm`: The VM to run on.
+     * - `data_bytes`: If non-zero, the result is a dataset of this size that has to be downloaded; otherwise, it's a plain value.
+     *
+     * # Returns
+     * The result. Ownership is passed to the caller.
+     */
+    FullValue* mock_result(VirtualMachine* vm, size_t data_bytes = 0);
+}
+
+
+
+/***** MACROS *****/
+/* Defines a test with the given name. */
+#define TEST(NAME) \
+    static void test_##NAME(); \
+    static tests::Register register_##NAME(#NAME, test_##NAME); \
+    static void test_##NAME()
+
+/* Fails the current test if the given condition does not hold. */
+#define CHECK(COND) \
+    do { \
+        if (!(COND)) { throw tests::Failure(std::string(__FILE__) + ":" + std::to_string(__LINE__) + ": CHECK(" #COND ") failed"); } \
+    } while (0)
+
+/* Fails the current test if the given values are not equal. */
+#define CHECK_EQ(LHS, RHS) \
+    do { \
+        auto _lhs = (LHS); \
+        auto _rhs = (RHS); \
+        if (!(_lhs == _rhs)) { \
+            std::stringstream _sstr; \
+            _sstr << __FILE__ << ":" << __LINE__ << ": CHECK_EQ(" #LHS ", " #RHS ") failed: " << _lhs << " != " << _rhs; \
+            throw tests::Failure(_sstr.str()); \
+        } \
+    } while (0)
+
+#endif
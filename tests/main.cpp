@@ -0,0 +1,130 @@
+/* MAIN.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 09:44:37
+ * Last edited:
+ *   20 Oct 2026, 09:44:37
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Entrypoint of the unit tests. Loads the mock `libbrane_cli.so` and
+ *   then runs every test (or only those whose name contains the given
+ *   filter).
+**/
+
+#include <cstdlib>
+#include <exception>
+#include <iostream>
+#include <string>
+#include <vector>
+
+#include "brane/brane_cli.h"
+#include "utils.hpp"
+#include "check.hpp"
+
+using namespace std;
+
+
+/***** GLOBALS *****/
+/* The functions of the (mock) `libbrane_cli.so`, which the modules under test use. */
+Functions* brane_cli;
+
+/* The directories created by `temp_dir()`. */
+static vector<string> temp_dirs;
+
+
+
+
+
+/***** LIBRARY *****/
+vector<tests::Test>& tests::registry() {
+    static vector<tests::Test> tests;
+    return tests;
+}
+
+string tests::temp_dir() {
+    const char* tmp = getenv("TMPDIR");
+    string pattern = string(tmp != nullptr ? tmp : "/tmp") + "/bscript-tests-XXXXXX";
+    if (mkdtemp(&pattern[0]) == nullptr) { throw tests::Failure("Failed to create a temporary directory"); }
+    temp_dirs.push_back(pattern);
+    return pattern;
+}
+
+VirtualMachine* tests::mock_vm() {
+    VirtualMachine* vm = nullptr;
+    Error* err = brane_cli->vm_new("http://127.0.0.1:50051", "http://127.0.0.1:50053", "/tmp", nullptr, nullptr, &vm);
+    if (err != nullptr) {
+        brane_cli->error_free(err);
+        throw tests::Failure("Failed to create a mock VM");
+    }
+    return vm;
+}
+
+Workflow* tests::mock_workflow(const string& code) {
+    PackageIndex* pindex = nullptr;
+    DataIndex* dindex = nullptr;
+    Compiler* compiler = nullptr;
+    Workflow* workflow = nullptr;
+    brane_cli->pindex_new_remote("http://127.0.0.1:50051", &pindex);
+    brane_cli->dindex_new_remote("http://127.0.0.1:50051", &dindex);
+    brane_cli->compiler_new(pindex, dindex, &compiler);
+    brane_cli->serror_free(brane_cli->compiler_compile(compiler, "<test>", code.c_str(), &workflow));
+    brane_cli->compiler_free(compiler);
+    brane_cli->dindex_free(dindex);
+    brane_cli->pindex_free(pindex);
+    if (workflow == nullptr) { throw tests::Failure("Failed to compile '" + code + "' with the mock compiler"); }
+    return workflow;
+}
+
+FullValue* tests::mock_result(VirtualMachine* vm, size_t data_bytes) {
+    Workflow* workflow = tests::mock_workflow("println(\"test\");");
+
+    // The mock decides on the kind of result based on the environment
+    setenv("BRANE_MOCK_DATA_BYTES", to_string(data_bytes).c_str(), 1);
+    char* prints = nullptr;
+    FullValue* result = nullptr;
+    Error* err = brane_cli->vm_run(vm, workflow, &prints, &result);
+    unsetenv("BRANE_MOCK_DATA_BYTES");
+    brane_cli->workflow_free(workflow);
+    free(prints);
+    if (err != nullptr) {
+        brane_cli->error_free(err);
+        throw tests::Failure("Failed to run a snippet on the mock VM");
+    }
+    return result;
+}
+
+
+
+
+
+/***** ENTRYPOINT *****/
+int main(int argc, char* argv[]) {
+    if (argc < 2 || argc > 3) { cerr << "Usage: " << argv[0] << " <MOCK_LIBBRANE_SO_PATH> [<FILTER>]\n"; return 1; }
+    string filter = argc == 3 ? argv[2] : "";
+
+    // Load the mock library
+    brane_cli = functions_load(argv[1]);
+    if (brane_cli == nullptr) { return 1; }
+
+    // Run the tests
+    size_t n_run = 0, n_failed = 0;
+    for (const tests::Test& test : tests::registry()) {
+        if (string(test.name).find(filter) == string::npos) { continue; }
+        n_run++;
+        try {
+            test.func();
+            cout << "test " << test.name << " ... ok" << endl;
+        } catch (const exception& e) {
+            n_failed++;
+            cout << "test " << test.name << " ... FAILED" << endl << "    " << e.what() << endl;
+        }
+    }
+    for (const string& dir : temp_dirs) { bscript::remove_all(dir); }
+
+    cout << endl << (n_run - n_failed) << " passed, " << n_failed << " failed" << endl;
+    functions_unload(brane_cli);
+    return n_failed == 0 ? 0 : 1;
+}
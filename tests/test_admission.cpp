@@ -0,0 +1,162 @@
+/* TEST ADMISSION.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 11:31:48
+ * Last edited:
+ *   20 Oct 2026, 11:31:48
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the queue with which kernels limit the number of workflows
+ *   they run at the same time.
+**/
+
+#include <chrono>
+#include <fstream>
+#include <string>
+#include <sys/wait.h>
+#include <thread>
+#include <unistd.h>
+#include <vector>
+
+#include "nlohmann/json.hpp"
+#include "admission.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** HELPER FUNCTIONS *****/
+/* Returns the pid of a process that no longer exists. */
+static pid_t dead_pid() {
+    pid_t pid = fork();
+    if (pid == 0) { _exit(0); }
+    waitpid(pid, nullptr, 0);
+    return pid;
+}
+
+/* Writes a queue with the given tickets of other kernels, as `(pid, admitted)` pairs. */
+static void write_queue(const string& dir, const vector<pair<pid_t, bool>>& tickets) {
+    nl::json state = { { "next", tickets.size() }, { "tickets", nl::json::array() } };
+    for (size_t i = 0; i < tickets.size(); i++) {
+        state["tickets"].push_back({ { "id", to_string(tickets[i].first) + "-" + to_string(i) }, { "pid", tickets[i].first }, { "seq", i }, { "admitted", tickets[i].second } });
+    }
+    ofstream(dir + "/queue.json") << state.dump();
+}
+
+
+
+
+
+/***** TESTS *****/
+TEST(admission_limits_running_workflows) {
+    Admission admission(tests::temp_dir() + "/queue", 2);
+    string a = admission.enqueue(), b = admission.enqueue(), c = admission.enqueue(), d = admission.enqueue();
+
+    size_t position = 0;
+    CHECK(admission.admit(a, position));
+    CHECK(admission.admit(b, position));
+    CHECK(!admission.admit(c, position));
+    CHECK_EQ(position, (size_t) 1);
+    CHECK(!admission.admit(d, position));
+    CHECK_EQ(position, (size_t) 2);
+
+    // Giving back a slot admits the next in line
+    admission.release(a);
+    CHECK(!admission.admit(d, position));
+    CHECK_EQ(position, (size_t) 1);
+    CHECK(admission.admit(c, position));
+
+    // Leaving the queue before getting a slot
+    admission.release(d);
+    string e = admission.enqueue();
+    CHECK(!admission.admit(e, position));
+    CHECK_EQ(position, (size_t) 1);
+    admission.release(b);
+    CHECK(admission.admit(e, position));
+}
+
+TEST(admission_is_fair_between_kernels) {
+    string dir = tests::temp_dir();
+    // Another kernel (which is alive, as pid 1 always is) runs two workflows and waits for a third, longer than we do
+    write_queue(dir, { { 1, true }, { 1, true }, { 1, false } });
+    Admission admission(dir, 3);
+    string ours = admission.enqueue();
+
+    // We run nothing yet, so we go first
+    size_t position = 0;
+    CHECK(admission.admit(ours, position));
+
+    // We still run fewer, so our next one goes before theirs too
+    string next = admission.enqueue();
+    CHECK(!admission.admit(next, position));
+    CHECK_EQ(position, (size_t) 1);
+
+    // Once we run as many as they do, whoever waited longest goes first
+    admission.release("1-0");
+    CHECK(!admission.admit(next, position));
+    CHECK_EQ(position, (size_t) 1);
+    CHECK(admission.admit("1-2", position));
+    CHECK(!admission.admit(next, position));
+    CHECK_EQ(position, (size_t) 1);
+}
+
+TEST(admission_drops_dead_kernels) {
+    string dir = tests::temp_dir();
+    pid_t dead = dead_pid();
+    write_queue(dir, { { dead, true }, { dead, true }, { dead, false } });
+    Admission admission(dir, 1);
+    string ours = admission.enqueue();
+
+    size_t position = 0;
+    CHECK(admission.admit(ours, position));
+    ifstream h(dir + "/queue.json");
+    nl::json state = nl::json::parse(h);
+    CHECK_EQ(state["tickets"].size(), (size_t) 1);
+}
+
+TEST(admission_survives_mangled_queue) {
+    string dir = tests::temp_dir();
+    Admission admission(dir, 1);
+    string ours = admission.enqueue();
+    ofstream(dir + "/queue.json") << "{ not json";
+
+    // The ticket is gone, so it is let through rather than waiting forever
+    size_t position = 0;
+    CHECK(admission.admit(ours, position));
+    admission.release(ours);
+}
+
+TEST(admission_slot_waits_its_turn) {
+    // Without a queue, there is nothing to wait for
+    {
+        Admission::Slot slot(nullptr);
+        CHECK_EQ(slot.waited(), 0.0);
+    }
+
+    Admission admission(tests::temp_dir(), 1);
+    vector<size_t> positions;
+    double waited = 0.0;
+    thread holder;
+    {
+        Admission::Slot first(&admission);
+        holder = thread([&admission, &positions, &waited]() {
+            Admission::Slot second(&admission, [&positions](size_t position) { positions.push_back(position); });
+            waited = second.waited();
+        });
+        this_thread::sleep_for(chrono::milliseconds(300));
+    }
+    holder.join();
+    CHECK(positions == vector<size_t>({ 1 }));
+    CHECK(waited >= 0.2);
+
+    // Both slots were given back
+    size_t position = 0;
+    string ticket = admission.enqueue();
+    CHECK(admission.admit(ticket, position));
+    admission.release(ticket);
+}
@@ -0,0 +1,100 @@
+/* TEST BACKGROUND.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 10:19:44
+ * Last edited:
+ *   20 Oct 2026, 10:19:44
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the execution of workflows in the background.
+**/
+
+#include <cstdlib>
+#include <memory>
+#include <string>
+
+#include "utils.hpp"
+#include "background.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** GLOBALS *****/
+extern Functions* brane_cli;
+
+
+
+
+
+/***** TESTS *****/
+TEST(background_pool_reuses_vms) {
+    VmPool pool("http://127.0.0.1:50051", "http://127.0.0.1:50053", "/tmp");
+    VirtualMachine* first = nullptr;
+    CHECK(pool.acquire(&first) == nullptr);
+    pool.release(first);
+
+    VirtualMachine* second = nullptr;
+    CHECK(pool.acquire(&second) == nullptr);
+    CHECK(second == first);
+
+    // Invalidating it frees the borrowed VM once it's returned, and the idle ones right away
+    CHECK_EQ(pool.invalidate(), (size_t) 1);
+    pool.release(second);
+    CHECK_EQ(pool.invalidate(), (size_t) 0);
+}
+
+TEST(background_pool_compilers_are_isolated) {
+    VmPool pool("http://127.0.0.1:50051", "http://127.0.0.1:50053", "/tmp");
+    Compiler* first = nullptr;
+    Compiler* second = nullptr;
+    CHECK(pool.new_compiler(&first) == nullptr);
+    CHECK(pool.new_compiler(&second) == nullptr);
+    CHECK(first != second);
+
+    // Compilers survive the indices they were created with being invalidated
+    pool.invalidate();
+    Workflow* workflow = nullptr;
+    SourceError* serr = brane_cli->compiler_compile(first, "<test>", "println(\"hi\");", &workflow);
+    CHECK(!brane_cli->serror_has_serrs(serr));
+    brane_cli->serror_free(serr);
+    brane_cli->workflow_free(workflow);
+    brane_cli->compiler_free(first);
+    brane_cli->compiler_free(second);
+}
+
+TEST(background_run_downloads_result) {
+    string data_dir = tests::temp_dir();
+    VmPool pool("http://127.0.0.1:50051", "http://127.0.0.1:50053", "/tmp");
+    shared_ptr<Workflow> workflow(tests::mock_workflow("println(\"hi\");"), brane_cli->workflow_free);
+
+    setenv("BRANE_MOCK_DATA_BYTES", "64", 1);
+    BackgroundRun run(&pool, workflow.get(), data_dir);
+    run.run();
+    unsetenv("BRANE_MOCK_DATA_BYTES");
+
+    CHECK(run.take_error() == nullptr);
+    CHECK(run.get_result() != nullptr);
+    CHECK(brane_cli->fvalue_needs_processing(run.get_result()));
+    CHECK_EQ(path_size(data_dir + "/mock_result_0"), (uint64_t) 64);
+
+    // The VM went back to the pool
+    CHECK_EQ(pool.invalidate(), (size_t) 1);
+}
+
+TEST(background_run_reports_failures) {
+    VmPool pool("http://127.0.0.1:50051", "http://127.0.0.1:50053", "/tmp");
+    shared_ptr<Workflow> workflow(tests::mock_workflow("mock_fail();"), brane_cli->workflow_free);
+
+    BackgroundRun run(&pool, workflow.get(), tests::temp_dir());
+    run.run();
+    Error* err = run.take_error();
+    CHECK(err != nullptr);
+    brane_cli->error_free(err);
+    CHECK_EQ(run.get_err_step(), string("executing"));
+    CHECK(run.get_result() == nullptr);
+}
@@ -0,0 +1,160 @@
+/* TEST CONNECTION.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 11:44:27
+ * Last edited:
+ *   20 Oct 2026, 12:29:30
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests recognizing broken connections to the driver, and the checks
+ *   of whether it can be reached.
+**/
+
+#include <arpa/inet.h>
+#include <chrono>
+#include <cstdlib>
+#include <netinet/in.h>
+#include <string>
+#include <sys/socket.h>
+#include <thread>
+#include <unistd.h>
+
+#include "connection.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** GLOBALS *****/
+extern Functions* brane_cli;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Starts listening on a free port on localhost, playing the driver.
+ *
+ * # Arguments
+ * - `endpoint`: Will be set to the endpoint to connect to it with.
+ *
+ * # Returns
+ * The listening socket, which stops the driver when closed.
+ */
+static int start_driver(string& endpoint) {
+    int fd = socket(AF_INET, SOCK_STREAM | SOCK_CLOEXEC, 0);
+    struct sockaddr_in addr = {};
+    addr.sin_family = AF_INET;
+    addr.sin_addr.s_addr = htonl(INADDR_LOOPBACK);
+    socklen_t len = sizeof(addr);
+    if (fd < 0 || ::bind(fd, (struct sockaddr*) &addr, len) != 0 || listen(fd, 16) != 0 || getsockname(fd, (struct sockaddr*) &addr, &len) != 0) {
+        throw tests::Failure("Failed to start a driver to test with");
+    }
+    endpoint = "grpc://127.0.0.1:" + to_string(ntohs(addr.sin_port));
+    return fd;
+}
+
+/* Returns the serialized form of an error, freeing it. */
+static string take_message(Error* err) {
+    char* buffer = nullptr;
+    brane_cli->error_serialize_err(err, &buffer);
+    string message = buffer != nullptr ? buffer : "";
+    free(buffer);
+    brane_cli->error_free(err);
+    return message;
+}
+
+
+
+
+
+/***** TESTS *****/
+TEST(connection_lost_on_transport_errors) {
+    CHECK(connection_lost("failed to connect to driver 'grpc://x:50053': transport error: connection refused"));
+    CHECK(connection_lost("Transport Error: Connection Reset by peer"));
+    CHECK(connection_lost("error writing a body to connection: Broken pipe (os error 32)"));
+    CHECK(connection_lost("h2 protocol error: stream no longer needed"));
+    CHECK(connection_lost("dns error: failed to lookup address information"));
+
+    // Errors of the workflow itself may use any wording, so these are not a reason to reconnect
+    CHECK(!connection_lost("Service unavailable"));
+    CHECK(!connection_lost("Task 'fetch' failed: failed to connect to https://example.com"));
+    CHECK(!connection_lost("Undeclared variable 'x'"));
+    CHECK(!connection_lost(""));
+}
+
+TEST(connection_probe_reachability) {
+    string endpoint;
+    int fd = start_driver(endpoint);
+    DriverMonitor monitor(endpoint + "/", chrono::seconds(0));
+    CHECK(monitor.is_reachable());
+    CHECK(monitor.summary().find("(not checked yet)") != string::npos);
+
+    CHECK(monitor.probe());
+    CHECK(monitor.is_reachable());
+    close(fd);
+    CHECK(!monitor.probe());
+    CHECK(!monitor.is_reachable());
+
+    string summary = monitor.summary();
+    CHECK(summary.find("Driver: " + endpoint + "/ (does not accept TCP connections, last checked") == 0);
+    CHECK(summary.find("not whether the kernel's own connection to it still works") != string::npos);
+    CHECK(summary.find("Driver check (TCP connect): not periodic; 2 probes, 1 failed; connecting took") != string::npos);
+}
+
+TEST(connection_probe_unknown_host) {
+    DriverMonitor monitor("http://brane-driver.invalid", chrono::seconds(0));
+    CHECK(!monitor.probe());
+}
+
+TEST(connection_checks_periodically) {
+    string endpoint;
+    int fd = start_driver(endpoint);
+    DriverMonitor monitor(endpoint, chrono::seconds(1));
+    close(fd);
+    this_thread::sleep_for(chrono::milliseconds(1500));
+    CHECK(!monitor.is_reachable());
+    CHECK(monitor.summary().find("Driver check (TCP connect): every 1.0s; 1 probe, 1 failed") != string::npos);
+}
+
+TEST(connection_records_setups) {
+    DriverMonitor monitor("grpc://127.0.0.1:1", chrono::seconds(0));
+    CHECK(monitor.summary().find("Connection setup: 0 VMs created, of which 0 to reconnect") != string::npos);
+    monitor.record_setup(1.0);
+    monitor.record_setup(3.0, true);
+    CHECK(monitor.summary().find("Connection setup: 2 VMs created, of which 1 to reconnect; the last took 3.0s (2.0s on average)") != string::npos);
+}
+
+TEST(connection_lost_by_mock_vm) {
+    // The mock keeps a connection to the driver, like the real VM does
+    setenv("BRANE_MOCK_DRIVER", "1", 1);
+    string endpoint;
+    int fd = start_driver(endpoint);
+    VirtualMachine* vm = nullptr;
+    Error* err = brane_cli->vm_new("http://127.0.0.1:50051", endpoint.c_str(), "/tmp", nullptr, nullptr, &vm);
+    CHECK(err == nullptr);
+
+    // The driver going away breaks the VM...
+    int conn = accept(fd, nullptr, nullptr);
+    close(conn);
+    close(fd);
+    Workflow* workflow = tests::mock_workflow("println(\"test\");");
+    char* prints = nullptr;
+    FullValue* result = nullptr;
+    err = brane_cli->vm_run(vm, workflow, &prints, &result);
+    brane_cli->workflow_free(workflow);
+    brane_cli->vm_free(vm);
+    CHECK(err != nullptr);
+    CHECK(connection_lost(take_message(err)));
+
+    // ...and no new one can be made until it's back
+    vm = nullptr;
+    err = brane_cli->vm_new("http://127.0.0.1:50051", endpoint.c_str(), "/tmp", nullptr, nullptr, &vm);
+    unsetenv("BRANE_MOCK_DRIVER");
+    CHECK(err != nullptr);
+    CHECK(connection_lost(take_message(err)));
+}
@@ -0,0 +1,176 @@
+/* TEST DATA CACHE.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 09:58:21
+ * Last edited:
+ *   20 Oct 2026, 12:16:30
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the cache of downloaded datasets.
+**/
+
+#include <fstream>
+#include <iterator>
+#include <string>
+#include <sys/stat.h>
+#include <sys/time.h>
+
+#include "nlohmann/json.hpp"
+#include "utils.hpp"
+#include "data_cache.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** HELPER FUNCTIONS *****/
+/* "Downloads" a dataset of the given size to `<data_dir>/<name>/data.bin`. */
+static void download(const string& data_dir, const string& name, size_t size, char fill = 'x') {
+    make_dirs(data_dir + "/" + name);
+    ofstream(data_dir + "/" + name + "/data.bin") << string(size, fill);
+}
+
+/* Reads a whole file. */
+static string read_file(const string& path) {
+    ifstream h(path);
+    return string(istreambuf_iterator<char>(h), istreambuf_iterator<char>());
+}
+
+/* Finds the metadata file of the cache entry for the given dataset, or returns an empty string if there is none. */
+static string meta_path(const string& data_dir, const string& name) {
+    string objects = data_dir + "/.cache/objects";
+    for (const string& key : list_dir(objects)) {
+        string path = objects + "/" + key + "/meta.json";
+        ifstream h(path);
+        nl::json meta = nl::json::parse(h, nullptr, false);
+        if (!meta.is_discarded() && meta.value("name", "") == name) { return path; }
+    }
+    return "";
+}
+
+/* Pretends the cache entry for the given dataset was last used at the given time. */
+static void set_used(const string& data_dir, const string& name, time_t when) {
+    struct timeval times[2] = { { when, 0 }, { when, 0 } };
+    utimes(meta_path(data_dir, name).c_str(), times);
+}
+
+
+
+
+
+/***** TESTS *****/
+TEST(data_cache_store_and_fetch) {
+    string data_dir = tests::temp_dir();
+    DataCache cache(data_dir, 1024 * 1024);
+
+    CHECK(!cache.fetch("numbers", "1.0.0"));
+    download(data_dir, "numbers", 100);
+    CHECK(cache.store("numbers", "1.0.0"));
+    CHECK_EQ(path_size(data_dir + "/numbers"), (uint64_t) 100);
+
+    // The user removes it, and then we need it again
+    CHECK(remove_all(data_dir + "/numbers"));
+    CHECK(cache.fetch("numbers", "1.0.0"));
+    CHECK_EQ(read_file(data_dir + "/numbers/data.bin"), string(100, 'x'));
+    CHECK(!cache.fetch("numbers", "2.0.0"));
+}
+
+TEST(data_cache_materializes_read_only_links) {
+    string data_dir = tests::temp_dir();
+    DataCache cache(data_dir, 1024 * 1024);
+    download(data_dir, "numbers", 100);
+    CHECK(cache.store("numbers", "1.0.0"));
+
+    // The cache is on the same filesystem, so the materialized file is the cached one, which is read-only
+    struct stat info;
+    CHECK(stat((data_dir + "/numbers/data.bin").c_str(), &info) == 0);
+    CHECK_EQ(info.st_nlink, (nlink_t) 2);
+    CHECK_EQ(info.st_mode & 0222, (mode_t) 0);
+
+    // Replacing it leaves the cache untouched
+    CHECK(remove_all(data_dir + "/numbers/data.bin"));
+    ofstream(data_dir + "/numbers/data.bin") << "edited";
+    CHECK(cache.fetch("numbers", "1.0.0"));
+    CHECK_EQ(read_file(data_dir + "/numbers/data.bin"), string(100, 'x'));
+}
+
+TEST(data_cache_drops_modified_entries) {
+    string data_dir = tests::temp_dir();
+    DataCache cache(data_dir, 1024 * 1024);
+    download(data_dir, "numbers", 100);
+    CHECK(cache.store("numbers", "1.0.0"));
+
+    // Someone who may write to read-only files edits it in place, and thus the cache too
+    chmod((data_dir + "/numbers/data.bin").c_str(), 0644);
+    ofstream(data_dir + "/numbers/data.bin") << "edited";
+    CHECK(!cache.fetch("numbers", "1.0.0"));
+    CHECK(meta_path(data_dir, "numbers").empty());
+    CHECK_EQ(path_size(data_dir + "/numbers"), (uint64_t) 0);
+}
+
+TEST(data_cache_unlinks_before_download) {
+    string data_dir = tests::temp_dir();
+    DataCache cache(data_dir, 1024 * 1024);
+    download(data_dir, "numbers", 100);
+    CHECK(cache.store("numbers", "1.0.0"));
+
+    // Another version is about to be downloaded to the same place, which must not write into the linked version
+    CHECK(!cache.fetch("numbers", "2.0.0"));
+    CHECK_EQ(path_size(data_dir + "/numbers"), (uint64_t) 0);
+    download(data_dir, "numbers", 50, 'y');
+    CHECK(cache.store("numbers", "2.0.0"));
+    CHECK(cache.fetch("numbers", "1.0.0"));
+    CHECK_EQ(read_file(data_dir + "/numbers/data.bin"), string(100, 'x'));
+}
+
+TEST(data_cache_evicts_least_recently_used) {
+    string data_dir = tests::temp_dir();
+    DataCache cache(data_dir, 250);
+    download(data_dir, "a", 100);
+    CHECK(cache.store("a", "1"));
+    download(data_dir, "b", 100);
+    CHECK(cache.store("b", "1"));
+
+    // `a` was used more recently than `b`, so adding `c` evicts `b`
+    set_used(data_dir, "a", 2000000000);
+    set_used(data_dir, "b", 1000000000);
+    download(data_dir, "c", 100);
+    CHECK(cache.store("c", "1"));
+    CHECK(!meta_path(data_dir, "a").empty());
+    CHECK(meta_path(data_dir, "b").empty());
+    CHECK(!meta_path(data_dir, "c").empty());
+    CHECK(path_size(data_dir + "/.cache/objects") <= 250 + 3 * 64);
+
+    // The materialized copy of an evicted entry stays where it is
+    CHECK_EQ(path_size(data_dir + "/b"), (uint64_t) 100);
+}
+
+TEST(data_cache_skips_locked_entries) {
+    string data_dir = tests::temp_dir();
+    DataCache cache(data_dir, 1000);
+    download(data_dir, "a", 400);
+    CHECK(cache.store("a", "1"));
+    download(data_dir, "b", 400);
+    CHECK(cache.store("b", "1"));
+    set_used(data_dir, "a", 1000000000);
+    set_used(data_dir, "b", 1500000000);
+
+    // Another kernel is materializing `a`, so `b` goes instead
+    FileLock guard(cache.lock_path("a"));
+    download(data_dir, "c", 400);
+    CHECK(cache.store("c", "1"));
+    CHECK(!meta_path(data_dir, "a").empty());
+    CHECK(meta_path(data_dir, "b").empty());
+}
+
+TEST(data_cache_locks_per_materialized_path) {
+    string data_dir = tests::temp_dir();
+    DataCache cache(data_dir, 1000);
+    CHECK_EQ(cache.lock_path("numbers"), cache.lock_path("numbers"));
+    CHECK(cache.lock_path("numbers") != cache.lock_path("letters"));
+}
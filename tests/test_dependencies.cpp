@@ -0,0 +1,129 @@
+/* TEST DEPENDENCIES.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 10:39:51
+ * Last edited:
+ *   20 Oct 2026, 10:39:51
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the analysis of the names that cells define and use, and the
+ *   tracking of which cells are stale.
+**/
+
+#include <set>
+#include <string>
+#include <vector>
+
+#include "dependencies.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** TESTS *****/
+TEST(dependencies_analyze_definitions) {
+    CellNames names = analyze_cell("let x := 1;\nfunc f(a) { let y := a + x; return y; }\nclass C { func m(self) { return z; } }\nw := x;");
+    CHECK(names.defines == set<string>({ "x", "f", "C", "w" }));
+    // (locals and parameters are considered used, but never the names being declared)
+    CHECK(names.uses == set<string>({ "a", "x", "y", "self", "z" }));
+    CHECK(!names.imports);
+}
+
+TEST(dependencies_analyze_assignments) {
+    // Assigning to a name does not read it, but updating it does
+    CHECK(analyze_cell("x := 2;").uses.empty());
+    CellNames names = analyze_cell("x := x + 1;");
+    CHECK(names.defines == set<string>({ "x" }));
+    CHECK(names.uses == set<string>({ "x" }));
+
+    // Only top-level assignments define globals
+    names = analyze_cell("if (c) { x := 2; }");
+    CHECK(names.defines.empty());
+    CHECK(names.uses == set<string>({ "c", "x" }));
+}
+
+TEST(dependencies_analyze_skips_noise) {
+    CellNames names = analyze_cell("// let a := 1;\n/* let b := 2; */\nprintln(\"let c := \\\"3\\\"\");\nlet d := obj.field + 1.5e3;");
+    CHECK(names.defines == set<string>({ "d" }));
+    CHECK(names.uses == set<string>({ "println", "obj" }));
+}
+
+TEST(dependencies_analyze_imports) {
+    CellNames names = analyze_cell("import hello_world;\nimport data_init[1.0.0];\nlet x := hello_world();");
+    CHECK(names.imports);
+    CHECK(names.defines == set<string>({ "x" }));
+    CHECK(names.uses == set<string>({ "hello_world" }));
+}
+
+TEST(dependencies_stale_after_redefinition) {
+    DependencyGraph graph;
+    graph.record(1, "let x := 1;");
+    graph.record(2, "let y := x + 1;");
+    graph.record(3, "let z := y * 2;");
+    graph.record(4, "println(42);");
+    CHECK(graph.stale().empty());
+
+    // Re-running the first cell (same code, new execution count) makes the others stale, in order
+    graph.record(5, "let x := 1;");
+    CHECK(graph.stale() == vector<int>({ 2, 3 }));
+    CHECK_EQ(graph.code(2), string("let y := x + 1;"));
+    CHECK_EQ(graph.code(1), string(""));
+    CHECK_EQ(graph.code(5), string("let x := 1;"));
+
+    // Re-running them under their own identity makes them up-to-date again
+    graph.record(2, "let y := x + 1;");
+    graph.record(3, "let z := y * 2;");
+    graph.settle({ 2, 3 });
+    CHECK(graph.stale().empty());
+}
+
+TEST(dependencies_keep_cells_defining_the_same_name) {
+    DependencyGraph graph;
+    graph.record(1, "let x := 1;");
+    graph.record(2, "x := x + 1;");
+    graph.record(3, "let y := x;");
+    // Both cells that define `x` are still known, so changing the first one makes the second stale too
+    graph.record(4, "let x := 10;");
+    CHECK(graph.stale() == vector<int>({ 2, 3 }));
+}
+
+TEST(dependencies_skip_edited_cells) {
+    DependencyGraph graph;
+    graph.record(1, "let x := 1;");
+    graph.record(2, "let y := x + 1;");
+    // The second cell is edited; its old version is not stale, since the new one overwrites what it defines
+    graph.record(3, "let y := x + 2;");
+    graph.record(4, "let x := 5;");
+    CHECK(graph.stale() == vector<int>({ 3 }));
+}
+
+TEST(dependencies_settle_cycles) {
+    DependencyGraph graph;
+    graph.record(1, "let a := 1;");
+    graph.record(2, "let b := a + c;");
+    graph.record(3, "let c := b;");
+    graph.record(4, "let a := 2;");
+    CHECK(graph.stale() == vector<int>({ 2, 3 }));
+
+    // Re-running 3 after 2 redefines what 2 read; settling keeps that from going on forever
+    graph.record(2, "let b := a + c;");
+    graph.record(3, "let c := b;");
+    CHECK(graph.stale() == vector<int>({ 2, 3 }));
+    graph.settle({ 2, 3 });
+    CHECK(graph.stale().empty());
+}
+
+TEST(dependencies_report_imports) {
+    DependencyGraph graph;
+    graph.record(1, "let n := 3;");
+    graph.record(2, "import hello_world;\nlet s := hello_world() + n;");
+    graph.record(3, "let n := 4;");
+    CHECK(graph.stale() == vector<int>({ 2 }));
+    CHECK(graph.imports(2));
+    CHECK(!graph.imports(3));
+    CHECK(!graph.imports(99));
+}
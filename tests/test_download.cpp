@@ -0,0 +1,119 @@
+/* TEST DOWNLOAD.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 09:52:14
+ * Last edited:
+ *   20 Oct 2026, 09:52:14
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the processing (i.e., downloading) of workflow results.
+**/
+
+#include <atomic>
+#include <chrono>
+#include <cstdlib>
+#include <fstream>
+#include <memory>
+#include <mutex>
+#include <thread>
+
+#include "utils.hpp"
+#include "download.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** GLOBALS *****/
+extern Functions* brane_cli;
+
+
+
+
+
+/***** TESTS *****/
+TEST(download_writes_dataset) {
+    string data_dir = tests::temp_dir();
+    shared_ptr<SharedVm> vm = make_shared<SharedVm>(tests::mock_vm());
+    shared_ptr<FullValue> result(tests::mock_result(vm->get(), 2048), brane_cli->fvalue_free);
+
+    setenv("BRANE_MOCK_DATA_BYTES", "2048", 1);
+    Download download(vm, result.get(), data_dir);
+    download.run();
+    unsetenv("BRANE_MOCK_DATA_BYTES");
+
+    Error* err = download.take_error();
+    CHECK(err == nullptr);
+    CHECK(download.sized());
+    CHECK_EQ(download.bytes(), (uint64_t) 2048);
+    CHECK(download.summary().find("Downloaded result (2.0 KiB in ") == 0);
+}
+
+TEST(download_bytes_ignores_other_downloads) {
+    string data_dir = tests::temp_dir();
+    shared_ptr<SharedVm> vm = make_shared<SharedVm>(tests::mock_vm());
+    shared_ptr<FullValue> result(tests::mock_result(vm->get(), 100), brane_cli->fvalue_free);
+
+    // Another kernel downloads something else to the same directory in the meantime
+    CHECK(make_dirs(data_dir + "/other_dataset"));
+    ofstream(data_dir + "/other_dataset/data.bin") << string(5000, 'x');
+
+    setenv("BRANE_MOCK_DATA_BYTES", "100", 1);
+    Download download(vm, result.get(), data_dir);
+    download.run();
+    unsetenv("BRANE_MOCK_DATA_BYTES");
+    CHECK(download.take_error() == nullptr);
+    CHECK_EQ(download.bytes(), (uint64_t) 100);
+}
+
+TEST(download_waits_for_vm) {
+    string data_dir = tests::temp_dir();
+    shared_ptr<SharedVm> vm = make_shared<SharedVm>(tests::mock_vm());
+    shared_ptr<FullValue> result(tests::mock_result(vm->get(), 10), brane_cli->fvalue_free);
+
+    // Use the VM ourselves while the download wants it
+    atomic<bool> done(false);
+    Download download(vm, result.get(), data_dir);
+    thread worker;
+    {
+        lock_guard<mutex> guard(vm->get_lock());
+        worker = thread([&download, &done]() { download.run(); done = true; });
+        this_thread::sleep_for(chrono::milliseconds(50));
+        CHECK(!done);
+    }
+    worker.join();
+    CHECK(done);
+    CHECK(download.take_error() == nullptr);
+}
+
+TEST(download_keeps_replaced_vm_alive) {
+    string data_dir = tests::temp_dir();
+    shared_ptr<SharedVm> vm = make_shared<SharedVm>(tests::mock_vm());
+    shared_ptr<FullValue> result(tests::mock_result(vm->get(), 10), brane_cli->fvalue_free);
+
+    // The kernel replaces its VM while the download still uses the old one
+    weak_ptr<SharedVm> old = vm;
+    unique_ptr<Download> download(new Download(vm, result.get(), data_dir));
+    vm = make_shared<SharedVm>(tests::mock_vm());
+    CHECK(!old.expired());
+    download->run();
+    CHECK(download->take_error() == nullptr);
+    download.reset();
+    CHECK(old.expired());
+}
+
+TEST(shared_vm_release) {
+    VirtualMachine* raw = tests::mock_vm();
+    VirtualMachine* released;
+    {
+        SharedVm vm(raw);
+        released = vm.release();
+        CHECK(vm.get() == nullptr);
+    }
+    CHECK(released == raw);
+    brane_cli->vm_free(released);
+}
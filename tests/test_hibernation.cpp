@@ -0,0 +1,131 @@
+/* TEST HIBERNATION.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 11:21:33
+ * Last edited:
+ *   20 Oct 2026, 11:21:33
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests putting idle kernels to sleep, and the journal with which
+ *   their compiler is restored.
+**/
+
+#include <atomic>
+#include <chrono>
+#include <string>
+#include <thread>
+#include <vector>
+
+#include "hibernation.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** CONSTANTS *****/
+/* The idle time after which the hibernators in these tests hibernate. */
+static const chrono::milliseconds IDLE(30);
+/* Comfortably longer than `IDLE`, to wait for the hibernator to have done its thing. */
+static const chrono::milliseconds SETTLE(200);
+
+
+
+
+
+/***** TESTS *****/
+TEST(hibernation_waits_for_first_activity) {
+    atomic<int> n_calls(0);
+    Hibernator hibernator(IDLE, [&n_calls]() { n_calls++; return true; });
+
+    // A kernel that nobody used yet (e.g., one in the pool) is left alone
+    this_thread::sleep_for(SETTLE);
+    CHECK_EQ(n_calls.load(), 0);
+
+    // Once it was used, it hibernates after being idle, but only once per idle period
+    { Hibernator::Activity activity(&hibernator); }
+    this_thread::sleep_for(SETTLE);
+    CHECK_EQ(n_calls.load(), 1);
+    this_thread::sleep_for(SETTLE);
+    CHECK_EQ(n_calls.load(), 1);
+
+    // The next activity starts a new idle period
+    { Hibernator::Activity activity(&hibernator); }
+    this_thread::sleep_for(SETTLE);
+    CHECK_EQ(n_calls.load(), 2);
+}
+
+TEST(hibernation_not_while_active) {
+    atomic<int> n_calls(0);
+    Hibernator hibernator(IDLE, [&n_calls]() { n_calls++; return true; });
+    {
+        Hibernator::Activity activity(&hibernator);
+        this_thread::sleep_for(SETTLE);
+        CHECK_EQ(n_calls.load(), 0);
+    }
+    this_thread::sleep_for(SETTLE);
+    CHECK_EQ(n_calls.load(), 1);
+}
+
+TEST(hibernation_retries_when_asked) {
+    // The first attempt asks to be tried again (e.g., because jobs were running)
+    atomic<int> n_calls(0);
+    Hibernator hibernator(IDLE, [&n_calls]() { return ++n_calls >= 2; });
+    { Hibernator::Activity activity(&hibernator); }
+    this_thread::sleep_for(SETTLE);
+    CHECK_EQ(n_calls.load(), 2);
+    this_thread::sleep_for(SETTLE);
+    CHECK_EQ(n_calls.load(), 2);
+}
+
+TEST(hibernation_disabled) {
+    // Activities without a hibernator do nothing
+    Hibernator::Activity activity(nullptr);
+}
+
+TEST(hibernation_journal_keeps_definitions_and_imports) {
+    Journal journal(1024);
+    journal.record("println(\"hello\");");
+    CHECK(journal.get().empty());
+    CHECK(!journal.stateful());
+
+    journal.record("import hello_world;");
+    CHECK(!journal.stateful());
+    journal.record("let x := hello_world();");
+    journal.record("println(x);");
+    journal.record("func f(a) { return a + x; }");
+    CHECK(journal.get() == vector<string>({ "import hello_world;", "let x := hello_world();", "func f(a) { return a + x; }" }));
+    CHECK(journal.stateful());
+    CHECK_EQ(journal.size(), string("import hello_world;let x := hello_world();func f(a) { return a + x; }").size());
+}
+
+TEST(hibernation_journal_moves_duplicates_to_the_end) {
+    Journal journal(1024);
+    journal.record("let x := 1;");
+    journal.record("let y := x;");
+    journal.record("let x := 1;");
+    CHECK(journal.get() == vector<string>({ "let y := x;", "let x := 1;" }));
+    CHECK_EQ(journal.size(), string("let y := x;let x := 1;").size());
+}
+
+TEST(hibernation_journal_overflows) {
+    Journal journal(32);
+    journal.record("let a := 1;");
+    CHECK(journal.fits());
+    journal.record("let b := \"a rather long string\";");
+    CHECK(!journal.fits());
+    CHECK(journal.get().empty());
+    CHECK(journal.stateful());
+
+    // It stays that way until it's cleared
+    journal.record("let c := 3;");
+    CHECK(!journal.fits());
+    journal.clear();
+    CHECK(journal.fits());
+    CHECK(!journal.stateful());
+    journal.record("let c := 3;");
+    CHECK(journal.get() == vector<string>({ "let c := 3;" }));
+}
@@ -0,0 +1,95 @@
+/* TEST JOBS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 09:46:02
+ * Last edited:
+ *   20 Oct 2026, 09:46:02
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the queue that runs jobs on worker threads.
+**/
+
+#include <atomic>
+#include <chrono>
+#include <memory>
+#include <thread>
+
+#include "jobs.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** TESTS *****/
+TEST(jobs_done_runs_on_calling_thread) {
+    JobQueue jobs(2);
+    thread::id work_thread, done_thread;
+    size_t id = jobs.submit([&work_thread]() { work_thread = this_thread::get_id(); }, [&done_thread]() { done_thread = this_thread::get_id(); });
+
+    CHECK(jobs.wait(id, chrono::milliseconds(5000)));
+    CHECK(work_thread != this_thread::get_id());
+    CHECK(done_thread == this_thread::get_id());
+    CHECK_EQ(jobs.in_flight(), (size_t) 0);
+}
+
+TEST(jobs_wait_after_poll_returns) {
+    JobQueue jobs(1);
+    size_t n_done = 0;
+    size_t id = jobs.submit([]() {}, [&n_done]() { n_done++; });
+
+    // Let `poll()` run the `done` first; waiting for the job afterwards must not hang until the timeout
+    while (jobs.poll() == 0) { this_thread::sleep_for(chrono::milliseconds(1)); }
+    chrono::steady_clock::time_point start = chrono::steady_clock::now();
+    CHECK(jobs.wait(id, chrono::milliseconds(5000)));
+    CHECK(chrono::steady_clock::now() - start < chrono::milliseconds(1000));
+    CHECK_EQ(n_done, (size_t) 1);
+}
+
+TEST(jobs_wait_times_out) {
+    JobQueue jobs(1);
+    atomic<bool> release(false);
+    size_t id = jobs.submit([&release]() { while (!release) { this_thread::sleep_for(chrono::milliseconds(1)); } }, []() {});
+
+    CHECK(!jobs.wait(id, chrono::milliseconds(50)));
+    release = true;
+    CHECK(jobs.wait(id, chrono::milliseconds(5000)));
+}
+
+TEST(jobs_respects_max_workers) {
+    JobQueue jobs(2);
+    atomic<size_t> running(0), max_running(0);
+    for (size_t i = 0; i < 8; i++) {
+        jobs.submit([&running, &max_running]() {
+            size_t now = ++running;
+            size_t seen = max_running;
+            while (now > seen && !max_running.compare_exchange_weak(seen, now)) {}
+            this_thread::sleep_for(chrono::milliseconds(10));
+            running--;
+        }, []() {});
+    }
+    jobs.wait_all();
+    CHECK_EQ(jobs.in_flight(), (size_t) 0);
+    CHECK(max_running <= 2);
+}
+
+TEST(jobs_destruction_drops_pending_without_leaking) {
+    weak_ptr<int> resource;
+    {
+        JobQueue jobs(1);
+        atomic<bool> release(false);
+        jobs.submit([&release]() { while (!release) { this_thread::sleep_for(chrono::milliseconds(1)); } }, []() {});
+
+        // This one never gets to run, but whatever its functions own must still be freed
+        shared_ptr<int> owned = make_shared<int>(42);
+        resource = owned;
+        jobs.submit([owned]() {}, [owned]() {});
+        owned.reset();
+        CHECK(!resource.expired());
+        release = true;
+    }
+    CHECK(resource.expired());
+}
@@ -0,0 +1,135 @@
+/* TEST OUTPUTS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 10:10:26
+ * Last edited:
+ *   20 Oct 2026, 12:04:02
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the store that keeps cell outputs within a size budget.
+**/
+
+#include <fstream>
+#include <string>
+#include <sys/time.h>
+
+#include "nlohmann/json.hpp"
+#include "utils.hpp"
+#include "outputs.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** TESTS *****/
+TEST(outputs_small_bundles_pass) {
+    string dir = tests::temp_dir() + "/outputs";
+    OutputStore store(dir, 1024);
+    size_t size;
+    nl::json bundle = store.limit({ { "text/plain", "hello" } }, "1-prints", store.budget(), size);
+    CHECK_EQ(bundle["text/plain"].get<string>(), string("hello"));
+    CHECK_EQ(size, (size_t) 5);
+    CHECK(list_dir(dir).empty());
+}
+
+TEST(outputs_spill_and_page) {
+    string dir = tests::temp_dir() + "/outputs";
+    OutputStore store(dir, 1024);
+    string full;
+    for (int i = 0; i < 1000; i++) { full += "line " + to_string(i) + "\n"; }
+
+    size_t size;
+    nl::json bundle = store.limit({ { "text/plain", full } }, "2-prints", store.budget(), size);
+    CHECK(size <= 1024);
+    CHECK_EQ(size, bundle["text/plain"].get<string>().size() + bundle["text/html"].get<string>().size());
+    CHECK(bundle["text/plain"].get<string>().find("Output truncated") != string::npos);
+    CHECK_EQ(list_dir(dir).size(), (size_t) 1);
+
+    // Paging through it gives back everything
+    string id = list_dir(dir)[0];
+    id = id.substr(0, id.size() - 4);
+    string text, paged;
+    size_t n_pages = 0;
+    for (size_t page = 1; page == 1 || page <= n_pages; page++) {
+        CHECK(store.page(id, page, text, n_pages));
+        paged += text;
+    }
+    CHECK(n_pages > 1);
+    CHECK(paged == full);
+    CHECK(!store.page(id, n_pages + 1, text, n_pages));
+    CHECK(!store.page("../" + id, 1, text, n_pages));
+}
+
+TEST(outputs_preview_fits_when_escaped) {
+    // Escaping for HTML makes this output five times as large
+    string dir = tests::temp_dir() + "/outputs";
+    OutputStore store(dir, 1024);
+    size_t size;
+    nl::json bundle = store.limit({ { "text/plain", string(10000, '<') } }, "4-result", store.budget(), size);
+    CHECK(size <= 1024);
+    CHECK(bundle["text/html"].get<string>().find("<pre>&lt;") == 0);
+    CHECK(bundle["text/plain"].get<string>().find("<<<") == 0);
+}
+
+TEST(outputs_html_counts_towards_limit) {
+    string dir = tests::temp_dir() + "/outputs";
+    OutputStore store(dir, 1024);
+    size_t size;
+    nl::json bundle = store.limit({ { "text/plain", "a < b" } }, "5-prints", store.budget(), size, true);
+    CHECK_EQ(bundle["text/html"].get<string>(), string("<pre>a &lt; b</pre>"));
+    CHECK_EQ(size, (size_t) (5 + 19));
+
+    // Fitting in plain text alone is not enough
+    bundle = store.limit({ { "text/plain", string(600, 'x') } }, "5-result", store.budget(), size, true);
+    CHECK(size <= 1024);
+    CHECK(bundle["text/plain"].get<string>().find("Output truncated") != string::npos);
+    CHECK(bundle["text/html"].get<string>().find("Output truncated") != string::npos);
+}
+
+TEST(outputs_merge_bundles) {
+    nl::json prints = { { "text/plain", "hello" }, { "text/html", "<pre>hello</pre>" } };
+    nl::json result = { { "text/plain", "[1, 2]" }, { "application/json", { 1, 2 } } };
+    nl::json merged = merge_bundles(prints, result);
+    CHECK_EQ(merged["text/plain"].get<string>(), string("hello\n[1, 2]"));
+    CHECK_EQ(merged["text/html"].get<string>(), string("<pre>hello</pre><pre>[1, 2]</pre>"));
+    CHECK(merged["application/json"] == nl::json({ 1, 2 }));
+
+    // Without HTML, there is none in the merged bundle either
+    merged = merge_bundles({ { "text/plain", "hello" } }, { { "text/plain", "42" } });
+    CHECK(merged == nl::json({ { "text/plain", "hello\n42" } }));
+}
+
+TEST(outputs_removed_on_destruction) {
+    string dir = tests::temp_dir() + "/outputs";
+    CHECK(make_dirs(dir));
+    ofstream(dir + "/other-kernel.txt") << "still in use";
+    {
+        OutputStore store(dir, 16);
+        size_t size;
+        store.limit({ { "text/plain", string(100, 'x') } }, "3-result", store.budget(), size);
+        CHECK(!store.save("3-trace", "json", "{}").empty());
+        CHECK_EQ(list_dir(dir).size(), (size_t) 3);
+    }
+
+    // Only our own files are gone
+    CHECK_EQ(list_dir(dir).size(), (size_t) 1);
+    CHECK_EQ(list_dir(dir)[0], string("other-kernel.txt"));
+}
+
+TEST(outputs_prunes_stale_files) {
+    string dir = tests::temp_dir() + "/outputs";
+    CHECK(make_dirs(dir));
+    ofstream(dir + "/old.txt") << "left behind";
+    ofstream(dir + "/recent.txt") << "in use";
+    struct timeval old[2] = { { 1000000000, 0 }, { 1000000000, 0 } };
+    utimes((dir + "/old.txt").c_str(), old);
+
+    OutputStore store(dir, 16);
+    CHECK_EQ(list_dir(dir).size(), (size_t) 1);
+    CHECK_EQ(list_dir(dir)[0], string("recent.txt"));
+}
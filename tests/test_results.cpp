@@ -0,0 +1,87 @@
+/* TEST RESULTS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 10:04:48
+ * Last edited:
+ *   20 Oct 2026, 10:04:48
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests turning workflow results into something to publish.
+**/
+
+#include <cstdlib>
+#include <memory>
+#include <string>
+
+#include "nlohmann/json.hpp"
+#include "results.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** GLOBALS *****/
+extern Functions* brane_cli;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Runs a snippet that returns the given JSON value, and returns the bundle that would be published for it. */
+static nl::json bundle_of(const string& json) {
+    VirtualMachine* vm = tests::mock_vm();
+    setenv("BRANE_MOCK_RESULT_JSON", json.c_str(), 1);
+    FullValue* result = tests::mock_result(vm);
+    unsetenv("BRANE_MOCK_RESULT_JSON");
+
+    nl::json bundle = result_bundle(result, "/data");
+    brane_cli->fvalue_free(result);
+    brane_cli->vm_free(vm);
+    return bundle;
+}
+
+
+
+
+
+/***** TESTS *****/
+TEST(results_arrays_and_objects_as_json) {
+    nl::json bundle = bundle_of("[1, 2, 3]");
+    CHECK(bundle.contains("application/json"));
+    CHECK_EQ(bundle["text/plain"].get<string>(), string("[1, 2, 3]"));
+
+    // An instance of a class that happens to have a single `data` field is not a dataset
+    bundle = bundle_of("{\"data\": [1, 2]}");
+    CHECK(bundle.contains("application/json"));
+    CHECK_EQ(bundle["application/json"]["data"].size(), (size_t) 2);
+}
+
+TEST(results_datasets_as_text) {
+    VirtualMachine* vm = tests::mock_vm();
+    FullValue* result = tests::mock_result(vm, 10);
+    nl::json bundle = result_bundle(result, "/data");
+    brane_cli->fvalue_free(result);
+    brane_cli->vm_free(vm);
+
+    CHECK(!bundle.contains("application/json"));
+    CHECK(bundle["text/plain"].get<string>().find("/data/mock_result_0") != string::npos);
+}
+
+TEST(results_preview_limits) {
+    nl::json value = nl::json::array();
+    for (int i = 0; i < 10; i++) { value.push_back(i); }
+    CHECK_EQ(json_preview(value, 3), string("[0, 1, 2, ... (7 more)]"));
+    CHECK_EQ(json_preview(nl::json::parse("[[[1]], {}]"), 8, 2), string("[[[...]], {}]"));
+    CHECK_EQ(json_preview(string(100, 'x')), "\"" + string(64, 'x') + "\"...");
+}
+
+TEST(results_preview_escapes_keys) {
+    CHECK_EQ(json_preview(nl::json::parse("{\"a\\\"b\": 1}")), string("{ \"a\\\"b\": 1 }"));
+    CHECK_EQ(json_preview(nl::json::parse("{\"line\\nbreak\": \"x\"}")), string("{ \"line\\nbreak\": \"x\" }"));
+}
@@ -0,0 +1,78 @@
+/* TEST SWEEPS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 10:25:09
+ * Last edited:
+ *   20 Oct 2026, 10:25:09
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the expansion of parameter sweeps.
+**/
+
+#include <string>
+#include <vector>
+
+#include "nlohmann/json.hpp"
+#include "sweeps.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** TESTS *****/
+TEST(sweeps_expand_last_parameter_fastest) {
+    Sweep sweep;
+    string err;
+    CHECK(Sweep::parse({ "size=1,2,3", "model=a,b" }, sweep, err));
+    CHECK_EQ(sweep.size(), (size_t) 6);
+    CHECK(sweep.variant(0) == vector<string>({ "1", "a" }));
+    CHECK(sweep.variant(1) == vector<string>({ "1", "b" }));
+    CHECK(sweep.variant(2) == vector<string>({ "2", "a" }));
+    CHECK(sweep.variant(5) == vector<string>({ "3", "b" }));
+}
+
+TEST(sweeps_reject_invalid_parameters) {
+    Sweep sweep;
+    string err;
+    CHECK(!Sweep::parse({}, sweep, err));
+    CHECK(!Sweep::parse({ "size" }, sweep, err));
+    CHECK(!Sweep::parse({ "=1,2" }, sweep, err));
+    CHECK(!Sweep::parse({ "size=1", "size=2" }, sweep, err));
+    CHECK(err.find("more than once") != string::npos);
+
+    // Grids that are too large
+    string values = "0";
+    for (int i = 1; i < 33; i++) { values += "," + to_string(i); }
+    CHECK(!Sweep::parse({ "a=" + values, "b=" + values }, sweep, err));
+}
+
+TEST(sweeps_instantiate) {
+    Sweep sweep;
+    string err;
+    CHECK(Sweep::parse({ "n=10,20", "f=x" }, sweep, err));
+    CHECK_EQ(sweep.missing_from("println({{n}});"), string("f"));
+    CHECK_EQ(sweep.missing_from("{{f}}({{n}});"), string(""));
+
+    // Unknown placeholders are kept as-is
+    CHECK_EQ(sweep.instantiate("{{f}}({{n}}, \"{{other}}\", {{n}});", 1), string("x(20, \"{{other}}\", 20);"));
+    CHECK_EQ(sweep.instantiate("{{n}} {{", 0), string("10 {{"));
+}
+
+TEST(sweeps_table) {
+    Sweep sweep;
+    string err;
+    CHECK(Sweep::parse({ "n=1,2" }, sweep, err));
+    nl::json table = sweep.table({ { true, "first\nresult" }, { false, "<oops>" } });
+
+    string text = table["text/plain"].get<string>();
+    CHECK(text.find("first result") != string::npos);
+    CHECK(text.find("(failed) <oops>") != string::npos);
+    string html = table["text/html"].get<string>();
+    CHECK(html.find("&lt;oops&gt;") != string::npos);
+    CHECK(html.find("<oops>") == string::npos);
+}
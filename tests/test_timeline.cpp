@@ -0,0 +1,140 @@
+/* TEST TIMELINE.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 10:46:18
+ * Last edited:
+ *   20 Oct 2026, 10:46:18
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests rendering the timing events of workflows as a chart and a
+ *   trace.
+**/
+
+#include <cstdlib>
+#include <string>
+
+#include "nlohmann/json.hpp"
+#include "timeline.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+namespace nl = nlohmann;
+
+
+/***** GLOBALS *****/
+extern Functions* brane_cli;
+
+
+
+
+
+/***** HELPER FUNCTIONS *****/
+/* Returns a trace with two tasks at different locations (one that never finished) and a transfer, with times in milliseconds. */
+static nl::json sample_events() {
+    return nl::json::parse(R"([
+        { "name": "b.task", "kind": "task", "location": "site1", "submitted": 1500, "scheduled": 1600, "started": 2000, "finished": null },
+        { "name": "a.task", "kind": "task", "location": "site0", "submitted": 1000, "scheduled": 1100, "started": 1500, "finished": 4000 },
+        { "name": "result", "kind": "transfer", "location": "site0", "submitted": 4000, "scheduled": null, "started": 4000, "finished": 5000, "bytes": 2048 }
+    ])");
+}
+
+/* Returns the events in a trace with the given name and phase. */
+static nl::json find_events(const nl::json& trace, const string& name, const string& ph) {
+    nl::json found = nl::json::array();
+    for (const nl::json& event : trace["traceEvents"]) {
+        if (event["name"] == name && event["ph"] == ph) { found.push_back(event); }
+    }
+    return found;
+}
+
+
+
+
+
+/***** TESTS *****/
+TEST(timeline_summarizes_spans) {
+    nl::json bundle = timeline_bundle(sample_events(), "Timeline of cell 3", "");
+    string text = bundle["text/plain"].get<string>();
+    CHECK(text.find("Timeline of cell 3: 2 task(s) and 1 transfer(s) at 2 location(s), spanning 4.0s; 2.0 KiB transferred") == 0);
+
+    // Rows are ordered by submission and relative to the first event
+    size_t a = text.find("a.task @ site0: queued 0.5s, ran 2.5s");
+    size_t b = text.find("b.task @ site1: queued 0.5s, did not finish");
+    size_t result = text.find("result @ site0: queued 0.0s, ran 1.0s (2.0 KiB)");
+    CHECK(a != string::npos && b != string::npos && result != string::npos);
+    CHECK(a < b && b < result);
+    CHECK(text.find("Trace saved") == string::npos);
+}
+
+TEST(timeline_renders_chart) {
+    nl::json bundle = timeline_bundle(sample_events(), "Cell <1>", "outputs/trace.json");
+    string html = bundle["text/html"].get<string>();
+    CHECK(html.find("<b>Cell &lt;1&gt;</b>") != string::npos);
+    CHECK(html.find("<svg") != string::npos && html.find("</svg>") != string::npos);
+    // (the task that did not finish is drawn faded, up to the end of the chart)
+    CHECK(html.find("fill-opacity=\"0.4\"") != string::npos);
+    CHECK(html.find("href=\"outputs/trace.json\"") != string::npos);
+    CHECK(bundle["text/plain"].get<string>().find("Trace saved to 'outputs/trace.json'") != string::npos);
+}
+
+TEST(timeline_handles_bad_events) {
+    // Anything that is not a list of objects yields an empty chart rather than an error
+    for (const char* raw : { "null", "{}", "[1, \"x\"]", "[]" }) {
+        nl::json bundle = timeline_bundle(nl::json::parse(raw), "T", "");
+        CHECK(bundle["text/plain"].get<string>().find("T: 0 task(s) and 0 transfer(s)") == 0);
+        CHECK(trace_events(nl::json::parse(raw))["traceEvents"].empty());
+    }
+
+    // Missing fields get defaults
+    nl::json bundle = timeline_bundle(nl::json::parse(R"([{ "started": 0, "finished": 1000 }])"), "T", "");
+    CHECK(bundle["text/plain"].get<string>().find("<unnamed> @ <unknown>: ran 1.0s") != string::npos);
+}
+
+TEST(timeline_exports_trace_events) {
+    nl::json trace = trace_events(sample_events());
+    CHECK_EQ(trace["displayTimeUnit"].get<string>(), string("ms"));
+
+    // Every location is a process and every span a thread
+    nl::json processes = find_events(trace, "process_name", "M");
+    CHECK_EQ(processes.size(), (size_t) 2);
+    CHECK_EQ(processes[0]["args"]["name"].get<string>(), string("site0"));
+    CHECK_EQ(find_events(trace, "thread_name", "M").size(), (size_t) 3);
+
+    // Times are in microseconds since the first event
+    nl::json slices = find_events(trace, "a.task", "X");
+    CHECK_EQ(slices.size(), (size_t) 1);
+    CHECK_EQ(slices[0]["ts"].get<double>(), 500000.0);
+    CHECK_EQ(slices[0]["dur"].get<double>(), 2500000.0);
+    CHECK_EQ(find_events(trace, "result", "X")[0]["args"]["bytes"].get<uint64_t>(), (uint64_t) 2048);
+    // (the task that did not finish only has a queued slice)
+    CHECK(find_events(trace, "b.task", "X").empty());
+    CHECK_EQ(find_events(trace, "queued", "X").size(), (size_t) 3);
+    CHECK_EQ(find_events(trace, "scheduled", "i").size(), (size_t) 2);
+}
+
+TEST(timeline_of_mock_workflow) {
+    // The events as `vm_trace()` reports them
+    VirtualMachine* vm = tests::mock_vm();
+    setenv("BRANE_MOCK_TASKS", "4", 1);
+    FullValue* result = tests::mock_result(vm, 1024);
+    char* raw = nullptr;
+    // (the mock reports the download of the result as a transfer if there is data to download)
+    setenv("BRANE_MOCK_DATA_BYTES", "1024", 1);
+    Error* err = brane_cli->vm_trace(vm, &raw);
+    unsetenv("BRANE_MOCK_DATA_BYTES");
+    unsetenv("BRANE_MOCK_TASKS");
+    CHECK(err == nullptr);
+    nl::json events = nl::json::parse(raw);
+    free(raw);
+    brane_cli->fvalue_free(result);
+    brane_cli->vm_free(vm);
+
+    string text = timeline_bundle(events, "T", "")["text/plain"].get<string>();
+    CHECK(text.find("T: 4 task(s) and 1 transfer(s) at 2 location(s)") == 0);
+    CHECK(text.find("1.0 KiB transferred") != string::npos);
+    CHECK_EQ(trace_events(events)["traceEvents"].size(), (size_t) (2 + 4 * 4 + 3));
+}
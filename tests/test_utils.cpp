@@ -0,0 +1,60 @@
+/* TEST UTILS.cpp
+ *   by Lut99
+ *
+ * Created:
+ *   20 Oct 2026, 09:47:25
+ * Last edited:
+ *   20 Oct 2026, 09:47:25
+ * Auto updated?
+ *   Yes
+ *
+ * Description:
+ *   Tests the helpers shared by the kernel's modules.
+**/
+
+#include <fstream>
+#include <string>
+
+#include "utils.hpp"
+#include "check.hpp"
+
+using namespace std;
+using namespace bscript;
+
+
+/***** TESTS *****/
+TEST(utils_parse_bytes) {
+    CHECK_EQ(parse_bytes("0"), (uint64_t) 0);
+    CHECK_EQ(parse_bytes("512"), (uint64_t) 512);
+    CHECK_EQ(parse_bytes("2k"), (uint64_t) 2048);
+    CHECK_EQ(parse_bytes("512M"), (uint64_t) 512 * 1024 * 1024);
+    CHECK_EQ(parse_bytes("1.5G"), (uint64_t) 3 * 512 * 1024 * 1024);
+    CHECK_EQ(parse_bytes("1T"), (uint64_t) 1024 * 1024 * 1024 * 1024);
+}
+
+TEST(utils_parse_bytes_invalid) {
+    CHECK_EQ(parse_bytes(""), (uint64_t) 0);
+    CHECK_EQ(parse_bytes("lots"), (uint64_t) 0);
+    CHECK_EQ(parse_bytes("-5M"), (uint64_t) 0);
+    CHECK_EQ(parse_bytes("10X"), (uint64_t) 0);
+}
+
+TEST(utils_format) {
+    CHECK_EQ(format_bytes(1023), string("1023 B"));
+    CHECK_EQ(format_bytes(1536), string("1.5 KiB"));
+    CHECK_EQ(format_duration(2.34), string("2.3s"));
+    CHECK_EQ(format_duration(62.3), string("1m 02.3s"));
+    CHECK_EQ(html_escape("<a href=\"x\">&</a>"), string("&lt;a href=&quot;x&quot;&gt;&amp;&lt;/a&gt;"));
+}
+
+TEST(utils_path_size_and_remove) {
+    string dir = tests::temp_dir();
+    CHECK(make_dirs(dir + "/a/b"));
+    ofstream(dir + "/a/one") << string(100, 'x');
+    ofstream(dir + "/a/b/two") << string(28, 'y');
+
+    CHECK_EQ(path_size(dir + "/a"), (uint64_t) 128);
+    CHECK_EQ(list_dir(dir + "/a").size(), (size_t) 2);
+    CHECK(remove_all(dir + "/a"));
+    CHECK_EQ(path_size(dir + "/a"), (uint64_t) 0);
+}
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# CHECK NOTEBOOKS.py
+#   by Lut99
+#
+# Created:
+#   19 Oct 2026, 22:52:06
+# Last edited:
+#   19 Oct 2026, 22:52:06
+# Auto updated?
+#   Yes
+#
+# Description:
+#   Compiles every BraneScript cell of every notebook in a directory,
+#   without running anything, and reports the errors and warnings with
+#   the cell they occur in.
+#
+#   The package and data indices are loaded only once, either from a
+#   Brane instance's API or from a snapshot of one. Then, the notebooks
+#   are compiled in parallel by worker processes that share those
+#   indices, each notebook with its own `Compiler` (just like every
+#   notebook gets its own kernel).
+#
+#   Snapshots are recordings of the requests that `libbrane_cli.so`
+#   sends to the API to load the indices, which are replayed by a local
+#   server when it loads them again; this way, no driver (or instance)
+#   is needed at all.
+#
+
+import argparse
+import concurrent.futures
+import ctypes
+import http.server
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import typing
+import urllib.error
+import urllib.request
+
+
+##### GLOBALS #####
+# The functions of `libbrane_cli.so` that we use, with their (restype, argtypes). See `src/brane/brane_cli.h`.
+FUNCTIONS: typing.Dict[str, typing.Tuple[typing.Any, typing.List[typing.Any]]] = {
+    "version": (ctypes.c_char_p, []),
+    "set_force_colour": (None, [ctypes.c_bool]),
+    "error_free": (None, [ctypes.c_void_p]),
+    "error_serialize_err": (None, [ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p)]),
+    "serror_free": (None, [ctypes.c_void_p]),
+    "serror_has_swarns": (ctypes.c_bool, [ctypes.c_void_p]),
+    "serror_has_serrs": (ctypes.c_bool, [ctypes.c_void_p]),
+    "serror_has_err": (ctypes.c_bool, [ctypes.c_void_p]),
+    "serror_serialize_swarns": (None, [ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p)]),
+    "serror_serialize_serrs": (None, [ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p)]),
+    "serror_serialize_err": (None, [ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p)]),
+    "pindex_new_remote": (ctypes.c_void_p, [ctypes.c_char_p, ctypes.POINTER(ctypes.c_void_p)]),
+    "pindex_free": (None, [ctypes.c_void_p]),
+    "dindex_new_remote": (ctypes.c_void_p, [ctypes.c_char_p, ctypes.POINTER(ctypes.c_void_p)]),
+    "dindex_free": (None, [ctypes.c_void_p]),
+    "workflow_free": (None, [ctypes.c_void_p]),
+    "compiler_new": (ctypes.c_void_p, [ctypes.c_void_p, ctypes.c_void_p, ctypes.POINTER(ctypes.c_void_p)]),
+    "compiler_free": (None, [ctypes.c_void_p]),
+    "compiler_compile": (ctypes.c_void_p, [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p, ctypes.POINTER(ctypes.c_void_p)]),
+}
+
+# The loaded library and indices, which the worker processes inherit when they are forked.
+LIB: typing.Optional[ctypes.CDLL] = None
+LIBC: typing.Optional[ctypes.CDLL] = None
+PINDEX: typing.Optional[int] = None
+DINDEX: typing.Optional[int] = None
+
+
+
+
+
+##### HELPER FUNCTIONS #####
+def take_string(buffer: ctypes.c_void_p) -> str:
+    """
+        Reads a string that the library allocated, and frees it.
+
+        # Arguments
+        - `buffer`: The pointer to the string.
+
+        # Returns
+        The string.
+    """
+
+    if not buffer.value: return ""
+    result = ctypes.string_at(buffer.value).decode("utf-8", errors="replace")
+    typing.cast(ctypes.CDLL, LIBC).free(buffer)
+    return result
+
+def take_error(err: int) -> str:
+    """
+        Serializes an `Error` that the library returned, and frees it.
+
+        # Arguments
+        - `err`: The pointer to the error.
+
+        # Returns
+        The error message.
+    """
+
+    lib = typing.cast(ctypes.CDLL, LIB)
+    buffer = ctypes.c_void_p()
+    lib.error_serialize_err(err, ctypes.byref(buffer))
+    lib.error_free(err)
+    return take_string(buffer)
+
+def load_library(path: str):
+    """
+        Loads `libbrane_cli.so` and declares the functions that we use.
+
+        # Arguments
+        - `path`: The path to the library.
+
+        # Errors
+        This function raises an `OSError` if the library could not be loaded, or an `AttributeError` if it misses a function.
+    """
+
+    global LIB, LIBC
+    LIB = ctypes.CDLL(path)
+    LIBC = ctypes.CDLL(None)
+    LIBC.free.argtypes = [ ctypes.c_void_p ]
+    for (name, (restype, argtypes)) in FUNCTIONS.items():
+        func = getattr(LIB, name)
+        func.restype = restype
+        func.argtypes = argtypes
+    LIB.set_force_colour(False)
+
+def load_indices(endpoint: str):
+    """
+        Loads the package and data indices from the given API endpoint, which the worker processes then share.
+
+        # Arguments
+        - `endpoint`: The address of the API service (or of the server replaying a snapshot of it).
+
+        # Errors
+        This function raises a `RuntimeError` if either index could not be loaded.
+    """
+
+    global PINDEX, DINDEX
+    lib = typing.cast(ctypes.CDLL, LIB)
+    pindex = ctypes.c_void_p()
+    err = lib.pindex_new_remote(endpoint.encode(), ctypes.byref(pindex))
+    if err: raise RuntimeError(f"Failed to load package index from '{endpoint}': {take_error(err)}")
+    dindex = ctypes.c_void_p()
+    err = lib.dindex_new_remote(endpoint.encode(), ctypes.byref(dindex))
+    if err:
+        lib.pindex_free(pindex)
+        raise RuntimeError(f"Failed to load data index from '{endpoint}': {take_error(err)}")
+    (PINDEX, DINDEX) = (pindex.value, dindex.value)
+
+def find_notebooks(root: str) -> typing.List[str]:
+    """
+        Finds all notebooks in a directory, recursively.
+
+        # Arguments
+        - `root`: The directory to search (or a single notebook).
+
+        # Returns
+        The paths of the notebooks, sorted.
+    """
+
+    if os.path.isfile(root): return [ root ]
+    notebooks = []
+    for (dir, subdirs, files) in os.walk(root):
+        # Skip hidden directories (like `.ipynb_checkpoints` and `.batch-results`)
+        subdirs[:] = [ d for d in subdirs if d[0] != '.' ]
+        notebooks += [ os.path.join(dir, file) for file in files if file.endswith(".ipynb") and file[0] != '.' ]
+    return sorted(notebooks)
+
+def cell_snippets(source: str) -> typing.List[str]:
+    """
+        Returns the BraneScript snippets that the kernel would compile for a cell.
+
+        This mirrors the magics of the kernel (see `src/magics.cpp`): line magics compile nothing, `%%background` cells compile their body and `%%sweep` cells compile every variant of theirs.
+
+        # Arguments
+        - `source`: The source of the cell.
+
+        # Returns
+        The snippets to compile, in order.
+    """
+
+    stripped = source.lstrip(" \t\r\n")
+    if len(stripped) == 0: return []
+    if stripped[0] != '%': return [ source ]
+    cell = stripped.startswith("%%")
+    (line, _, body) = stripped[2 if cell else 1:].partition("\n")
+    words = line.split()
+    if not cell: return [] if len(body.strip()) == 0 and len(words) > 0 else [ source ]
+    if len(words) == 0: return [ source ]
+    if words[0] != "sweep": return [ body ]
+
+    # Instantiate every variant of the sweep, the last parameter varying fastest
+    variants = [ body ]
+    for arg in words[1:]:
+        (name, _, values) = arg.partition("=")
+        variants = [ v.replace("{{" + name + "}}", value) for v in variants for value in values.split(",") ]
+    return variants
+
+
+
+class SnapshotHandler(http.server.BaseHTTPRequestHandler):
+    """
+        Serves the API requests that load the indices, either by replaying them from a snapshot or by forwarding them to a live API (and recording them).
+    """
+
+    # The recorded responses, as a map of `<method> <path>` to the status, content type and body.
+    responses : typing.Dict[str, typing.Dict[str, typing.Any]]
+    # The live API to forward requests to, or `None` to only replay.
+    upstream  : typing.Optional[str]
+
+
+    def log_message(self, format: str, *args: typing.Any):
+        pass
+
+    def handle_request(self, method: str):
+        body = self.rfile.read(int(self.headers.get("Content-Length", "0"))) if method == "POST" else None
+        key = f"{method} {self.path}"
+        if self.upstream is not None:
+            # Forward it, and record the response
+            request = urllib.request.Request(f"{self.upstream}{self.path}", data=body, method=method, headers={ k: v for (k, v) in self.headers.items() if k.lower() in [ "content-type", "accept" ] })
+            try:
+                with urllib.request.urlopen(request) as h:
+                    (status, content_type, raw) = (h.status, h.headers.get("Content-Type", "application/json"), h.read())
+            except urllib.error.HTTPError as e:
+                (status, content_type, raw) = (e.code, e.headers.get("Content-Type", "text/plain"), e.read())
+            except urllib.error.URLError as e:
+                (status, content_type, raw) = (502, "text/plain", f"Failed to reach '{self.upstream}': {e.reason}".encode())
+            self.responses[key] = { "status": status, "content_type": content_type, "body": raw.decode("utf-8", errors="replace") }
+        elif key not in self.responses:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        # Reply with the recorded response
+        response = self.responses[key]
+        raw = response["body"].encode()
+        self.send_response(response["status"])
+        self.send_header("Content-Type", response["content_type"])
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self):
+        self.handle_request("GET")
+
+    def do_POST(self):
+        self.handle_request("POST")
+
+def serve_snapshot(responses: typing.Dict[str, typing.Dict[str, typing.Any]], upstream: typing.Optional[str]) -> http.server.ThreadingHTTPServer:
+    """
+        Starts a local server that replays (or records) the API requests that load the indices.
+
+        # Arguments
+        - `responses`: The recorded responses. If `upstream` is given, new responses are added to it.
+        - `upstream`: The live API to forward requests to, or `None` to only replay `responses`.
+
+        # Returns
+        The server, which runs in a background thread until it is shut down.
+    """
+
+    handler = type("Handler", (SnapshotHandler,), { "responses": responses, "upstream": upstream.rstrip("/") if upstream is not None else None })
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, kwargs={ "poll_interval": 0.05 }, daemon=True).start()
+    return server
+
+
+
+def check_notebook(path: str, display: str) -> typing.Dict[str, typing.Any]:
+    """
+        Compiles all cells of a notebook, in order, with a new compiler on the shared indices.
+
+        Runs in the worker processes.
+
+        # Arguments
+        - `path`: The path to the notebook.
+        - `display`: The path to show in diagnostics.
+
+        # Returns
+        The result of the notebook: its `path`, the number of `cells` compiled, and its `diagnostics` (each with its `cell`, `severity` and `message`).
+    """
+
+    lib = typing.cast(ctypes.CDLL, LIB)
+    result: typing.Dict[str, typing.Any] = { "path": display, "cells": 0, "diagnostics": [] }
+    try:
+        with open(path, "r") as h:
+            nb = json.load(h)
+    except (OSError, ValueError) as e:
+        result["diagnostics"].append({ "cell": None, "severity": "error", "message": f"Failed to read notebook: {e}" })
+        return result
+
+    # Only BraneScript notebooks are ours to check
+    kernelspec = nb.get("metadata", {}).get("kernelspec", {})
+    if kernelspec.get("name", "bscript") != "bscript" and kernelspec.get("language", None) != "BraneScript": return result
+
+    compiler = ctypes.c_void_p()
+    err = lib.compiler_new(PINDEX, DINDEX, ctypes.byref(compiler))
+    if err:
+        result["diagnostics"].append({ "cell": None, "severity": "error", "message": f"Failed to create compiler: {take_error(err)}" })
+        return result
+    try:
+        code_cells = [ c for c in nb.get("cells", []) if c.get("cell_type", None) == "code" ]
+        for (i, cell) in enumerate(code_cells):
+            source = cell.get("source", "")
+            source = "".join(source) if type(source) == list else source
+            snippets = cell_snippets(source)
+            if len(snippets) > 0: result["cells"] += 1
+            for snippet in snippets:
+                # Compile it, and collect what went wrong
+                workflow = ctypes.c_void_p()
+                serr = lib.compiler_compile(compiler, f"{display}[{i + 1}]".encode(), snippet.encode(), ctypes.byref(workflow))
+                for (severity, has, serialize) in [ ("error", lib.serror_has_err, lib.serror_serialize_err), ("error", lib.serror_has_serrs, lib.serror_serialize_serrs), ("warning", lib.serror_has_swarns, lib.serror_serialize_swarns) ]:
+                    if has(serr):
+                        buffer = ctypes.c_void_p()
+                        serialize(serr, ctypes.byref(buffer))
+                        result["diagnostics"].append({ "cell": i + 1, "severity": severity, "message": take_string(buffer).rstrip() })
+                lib.serror_free(serr)
+                if workflow.value: lib.workflow_free(workflow)
+    finally:
+        lib.compiler_free(compiler)
+    return result
+
+
+
+
+
+##### ENTRYPOINT #####
+def main(paths: typing.List[str], libbrane: str, api: typing.Optional[str], snapshot: typing.Optional[str], refresh: bool, n_workers: int, output: typing.Optional[str]) -> int:
+    """
+        Entrypoint to the script.
+
+        # Arguments
+        - `paths`: The notebooks or directories with notebooks to check.
+        - `libbrane`: The path to `libbrane_cli.so`.
+        - `api`: The address of the API service to load the indices from, if any.
+        - `snapshot`: The snapshot of the indices to load them from, if any. If it doesn't exist (or `refresh` is given), it is recorded from `api`.
+        - `refresh`: Whether to record `snapshot` again even if it exists.
+        - `n_workers`: The number of worker processes that compile notebooks in parallel.
+        - `output`: If given, the path to write the diagnostics to as JSON.
+
+        # Returns
+        The exit code of the script.
+    """
+
+    # Load the library
+    try:
+        load_library(libbrane)
+    except (OSError, AttributeError) as e:
+        print(f"Failed to load '{libbrane}': {e}", file=sys.stderr)
+        return 1
+    notebooks = [ nb for path in paths for nb in find_notebooks(path) ]
+    if len(notebooks) == 0:
+        print(f"No notebooks found in {', '.join([ repr(p) for p in paths ])}", file=sys.stderr)
+        return 1
+
+    # Load the indices, from the snapshot if we have one
+    start = time.monotonic()
+    responses = {}
+    record = snapshot is not None and (refresh or not os.path.exists(snapshot))
+    if snapshot is not None and not record:
+        with open(snapshot, "r") as h:
+            responses = json.load(h)["responses"]
+    elif api is None:
+        print("Either an API address or an existing snapshot is required to load the indices", file=sys.stderr)
+        return 1
+    server = serve_snapshot(responses, api if record else None) if snapshot is not None else None
+    try:
+        load_indices(f"http://127.0.0.1:{server.server_address[1]}" if server is not None else typing.cast(str, api))
+    except RuntimeError as e:
+        print(f"{e}", file=sys.stderr)
+        return 1
+    finally:
+        if server is not None: server.shutdown()
+    if record:
+        os.makedirs(os.path.dirname(os.path.abspath(typing.cast(str, snapshot))), exist_ok=True)
+        with open(typing.cast(str, snapshot), "w") as h:
+            json.dump({ "api": api, "recorded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "responses": responses }, h)
+        print(f"Recorded snapshot of the indices of '{api}' to '{snapshot}'")
+    index_time = time.monotonic() - start
+
+    # Compile the notebooks in worker processes that inherit the indices
+    start = time.monotonic()
+    results: typing.List[typing.Dict[str, typing.Any]] = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max(n_workers, 1), mp_context=multiprocessing.get_context("fork")) as pool:
+        futures = { pool.submit(check_notebook, nb, os.path.relpath(nb)): nb for nb in notebooks }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({ "path": os.path.relpath(futures[future]), "cells": 0, "diagnostics": [ { "cell": None, "severity": "error", "message": f"Compiler crashed: {type(e).__name__}: {e}" } ] })
+    results.sort(key=lambda r: r["path"])
+    compile_time = time.monotonic() - start
+
+    # Report the diagnostics
+    n_errors = sum([ 1 for r in results for d in r["diagnostics"] if d["severity"] == "error" ])
+    n_warnings = sum([ 1 for r in results for d in r["diagnostics"] if d["severity"] == "warning" ])
+    for r in results:
+        for d in r["diagnostics"]:
+            location = f"{r['path']}, cell {d['cell']}" if d["cell"] is not None else r["path"]
+            print(f"{location}: {d['severity']}:\n    " + "\n    ".join(d["message"].splitlines()) + "\n")
+    n_failed = len([ r for r in results if any([ d["severity"] == "error" for d in r["diagnostics"] ]) ])
+    print(f"Checked {sum([ r['cells'] for r in results ])} cell(s) in {len(results)} notebook(s) in {compile_time:.2f}s (indices loaded in {index_time:.2f}s): {n_errors} error(s), {n_warnings} warning(s) in {n_failed} notebook(s)")
+    if output is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as h:
+            json.dump({ "index_time": index_time, "compile_time": compile_time, "notebooks": results }, h, indent=4)
+
+    # Done
+    return 0 if n_errors == 0 else 1
+
+
+
+# Actual entrypoint
+if __name__ == "__main__":
+    # Define the arguments
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("PATHS", nargs="+", help="The notebooks, or directories with notebooks (searched recursively), to check.")
+    parser.add_argument("-l", "--libbrane", default=os.environ.get("LIBBRANE_PATH", "./libbrane_cli.so"), help="The `libbrane_cli.so` to compile with.")
+    parser.add_argument("-a", "--api", default=None, help="The address of the Brane API service to load the package and data indices from (e.g., 'http://127.0.0.1:50051'). Not needed if '--snapshot' exists.")
+    parser.add_argument("-s", "--snapshot", default=None, help="A snapshot of the indices to load them from instead of the API. If it does not exist, it is recorded from '--api' first. Use an empty string to always load them from the API.")
+    parser.add_argument("-r", "--refresh-snapshot", action="store_true", help="If given, records '--snapshot' from '--api' even if it already exists.")
+    parser.add_argument("-j", "--parallel", type=int, default=os.cpu_count() or 1, help="The number of worker processes that compile notebooks in parallel.")
+    parser.add_argument("-o", "--output", default=None, help="If given, writes the diagnostics to this file as JSON.")
+
+    # Parse the arguments & run
+    args = parser.parse_args()
+    exit(main(args.PATHS, args.libbrane, args.api, args.snapshot if args.snapshot else None, args.refresh_snapshot, args.parallel, args.output))
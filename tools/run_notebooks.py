@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# RUN NOTEBOOKS.py
+#   by Lut99
+#
+# Created:
+#   19 Oct 2026, 22:21:14
+# Last edited:
+#   20 Oct 2026, 10:58:37
+# Auto updated?
+#   Yes
+#
+# Description:
+#   Executes every notebook in a directory headlessly, a given number at
+#   a time, and reports which failed and which cells were slowest.
+#
+#   This is meant to run in the IDE container (see the 'run-notebooks'
+#   target in `make.py`), where the BraneScript kernel and its
+#   connection to the instance are available. Every notebook runs on a
+#   fresh kernel; to not wait for those to connect to the instance,
+#   kernels are started ahead of time.
+#
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+import typing
+
+try:
+    import nbformat
+    from jupyter_client import AsyncKernelManager
+    from nbclient import NotebookClient
+    from nbclient.exceptions import CellExecutionError, CellTimeoutError
+except ImportError:
+    print("This script requires the `nbclient` package (install it with `pip3 install nbclient`)", file=sys.stderr)
+    exit(1)
+
+
+##### HELPER FUNCTIONS #####
+def find_notebooks(root: str, skip: str) -> typing.List[str]:
+    """
+        Finds all notebooks in a directory, recursively.
+
+        # Arguments
+        - `root`: The directory to search.
+        - `skip`: A directory to skip (i.e., the output directory).
+
+        # Returns
+        The paths of the notebooks, relative to `root` and sorted.
+    """
+
+    notebooks = []
+    for (dir, subdirs, files) in os.walk(root):
+        # Skip hidden directories (like `.ipynb_checkpoints`) and the output directory
+        subdirs[:] = [ d for d in subdirs if d[0] != '.' and os.path.abspath(os.path.join(dir, d)) != os.path.abspath(skip) ]
+        for file in files:
+            if file.endswith(".ipynb") and file[0] != '.':
+                notebooks.append(os.path.relpath(os.path.join(dir, file), root))
+    return sorted(notebooks)
+
+def cell_duration(cell: typing.Dict[str, typing.Any]) -> typing.Optional[float]:
+    """
+        Computes how long a cell took to execute, from the timestamps that `nbclient` records.
+
+        # Arguments
+        - `cell`: The executed cell.
+
+        # Returns
+        The duration in seconds, or `None` if the cell was not executed.
+    """
+
+    timing = cell.get("metadata", {}).get("execution", {})
+    if "iopub.status.busy" not in timing or "iopub.status.idle" not in timing: return None
+    (busy, idle) = [ datetime.datetime.fromisoformat(timing[k].replace("Z", "+00:00")) for k in [ "iopub.status.busy", "iopub.status.idle" ] ]
+    return (idle - busy).total_seconds()
+
+
+
+class KernelPool:
+    """
+        Starts kernels ahead of time, so that a notebook can start executing as soon as it claims one.
+
+        Kernels run in the directory of their notebook (so that relative paths in it work), which is why the pool needs to know the directories of the notebooks in the order in which they claim kernels.
+    """
+
+    kernel_name : str
+    timeout     : float
+
+    _size    : int
+    _dirs    : typing.List[str]
+    _started : int
+    _ready   : "asyncio.Queue[typing.Tuple[str, asyncio.Task]]"
+
+
+    def __init__(self, kernel_name: str, size: int, dirs: typing.List[str], timeout: float):
+        """
+            Constructor for the KernelPool.
+
+            Note that this must be called from within a running event loop, since it immediately starts the first kernels.
+
+            # Arguments
+            - `kernel_name`: The name of the kernelspec of the kernels to start.
+            - `size`: The number of kernels to keep started ahead of time.
+            - `dirs`: The directories in which the kernels will be claimed (see `claim()`), in order. No more kernels than this are started.
+            - `timeout`: The maximum time a kernel may take to start, in seconds.
+
+            # Returns
+            A new KernelPool instance.
+        """
+
+        self.kernel_name = kernel_name
+        self.timeout = timeout
+
+        self._size = size
+        self._dirs = dirs
+        self._started = 0
+        self._ready = asyncio.Queue()
+        for _ in range(min(size, len(dirs))): self._start()
+
+    def _start(self):
+        """
+            Starts a new kernel in the background, in the directory of the next notebook that does not have one yet.
+        """
+
+        cwd = self._dirs[self._started]
+        self._started += 1
+        self._ready.put_nowait((cwd, asyncio.ensure_future(self._start_one(cwd))))
+
+    async def _start_one(self, cwd: str) -> AsyncKernelManager:
+        """
+            Starts a new kernel and waits until it answers (which the BraneScript kernel only does once it has connected to the instance).
+
+            # Arguments
+            - `cwd`: The directory to start the kernel in.
+
+            # Returns
+            The manager of the started kernel.
+        """
+
+        km = AsyncKernelManager(kernel_name=self.kernel_name)
+        await km.start_kernel(cwd=cwd)
+        try:
+            client = km.client()
+            client.start_channels()
+            try:
+                await client.wait_for_ready(timeout=self.timeout)
+            finally:
+                client.stop_channels()
+        except BaseException:
+            await km.shutdown_kernel(now=True)
+            raise
+        return km
+
+    async def claim(self, cwd: str) -> AsyncKernelManager:
+        """
+            Claims the next kernel, waiting for it to be ready if necessary, and starts a replacement.
+
+            # Arguments
+            - `cwd`: The directory the kernel should run in. If the next kernel was started elsewhere (i.e., notebooks claim kernels in another order than given), it is replaced by one started in this directory.
+
+            # Returns
+            The manager of the claimed kernel. The caller is responsible for shutting it down.
+
+            # Errors
+            This function raises any error that occurred while starting the kernel.
+        """
+
+        (started_cwd, task) = await self._ready.get()
+        if self._started < len(self._dirs): self._start()
+        km = await task
+        if started_cwd != cwd:
+            await km.shutdown_kernel(now=True)
+            km = await self._start_one(cwd)
+        return km
+
+    async def close(self):
+        """
+            Shuts down any kernels that were started but never claimed.
+        """
+
+        while not self._ready.empty():
+            (_, task) = self._ready.get_nowait()
+            try:
+                km = await task
+                await km.shutdown_kernel(now=True)
+            except Exception:
+                pass
+
+
+
+async def run_notebook(pool: KernelPool, root: str, path: str, output: str, timeout: typing.Optional[float]) -> typing.Dict[str, typing.Any]:
+    """
+        Executes a single notebook on a kernel from the pool, and writes the executed notebook.
+
+        # Arguments
+        - `pool`: The `KernelPool` to claim a kernel from.
+        - `root`: The directory with the notebooks.
+        - `path`: The path of the notebook, relative to `root`.
+        - `output`: The directory to write the executed notebook to (at the same relative path).
+        - `timeout`: The maximum time any cell may take, in seconds, or `None` to wait indefinitely.
+
+        # Returns
+        The result of the notebook: its `path`, `status` (`ok` or `failed`), `duration` and `cells` (with the `index`, `duration` and first line of the `source` of every executed cell), and the `error` if it failed.
+    """
+
+    result: typing.Dict[str, typing.Any] = { "path": path, "status": "ok", "duration": 0.0, "cells": [], "error": None }
+    nb = nbformat.read(os.path.join(root, path), as_version=4)
+    start = time.monotonic()
+    km = None
+    try:
+        km = await pool.claim(os.path.dirname(os.path.join(root, path)))
+        client = NotebookClient(nb, km=km, timeout=timeout, kernel_name=pool.kernel_name, resources={ "metadata": { "path": os.path.dirname(os.path.join(root, path)) } })
+        await client.async_execute()
+    except CellTimeoutError as e:
+        result["status"] = "failed"
+        result["error"] = f"A cell timed out: {str(e).strip().splitlines()[0]}"
+    except CellExecutionError as e:
+        result["status"] = "failed"
+        result["error"] = f"{e.ename}: {e.evalue}"
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["duration"] = time.monotonic() - start
+        if km is not None: await km.shutdown_kernel(now=True)
+
+    # Collect the cell timings
+    for (i, cell) in enumerate(nb.cells):
+        if cell.cell_type != "code": continue
+        duration = cell_duration(cell)
+        if duration is None: continue
+        lines = cell.source.strip().splitlines()
+        failed = any([ o.get("output_type", None) == "error" for o in cell.get("outputs", []) ])
+        result["cells"].append({ "index": i, "duration": duration, "source": lines[0] if len(lines) > 0 else "", "failed": failed })
+
+    # Write the executed notebook
+    os.makedirs(os.path.dirname(os.path.join(output, path)), exist_ok=True)
+    nbformat.write(nb, os.path.join(output, path))
+    error = f": {result['error']}" if result["error"] is not None else ""
+    print(f"[{result['status'].upper():>6}] {path} ({result['duration']:.1f}s){error}", flush=True)
+    return result
+
+
+
+
+
+##### ENTRYPOINT #####
+async def run(root: str, output: str, kernel_name: str, n_parallel: int, timeout: typing.Optional[float], startup_timeout: float) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+        Executes all notebooks, `n_parallel` at a time.
+
+        # Arguments
+        - `root`: The directory with the notebooks.
+        - `output`: The directory to write the executed notebooks to.
+        - `kernel_name`: The name of the kernelspec to execute them with.
+        - `n_parallel`: The number of notebooks to execute at the same time.
+        - `timeout`: The maximum time any cell may take, in seconds, or `None` to wait indefinitely.
+        - `startup_timeout`: The maximum time a kernel may take to start, in seconds.
+
+        # Returns
+        The results of every notebook (see `run_notebook()`), in the order of their paths.
+    """
+
+    notebooks = find_notebooks(root, output)
+    print(f"Executing {len(notebooks)} notebook(s) in '{root}', {n_parallel} at a time...", flush=True)
+    pool = KernelPool(kernel_name, n_parallel, [ os.path.dirname(os.path.join(root, path)) for path in notebooks ], startup_timeout)
+    todo: "asyncio.Queue[str]" = asyncio.Queue()
+    for path in notebooks: todo.put_nowait(path)
+    results: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+
+    async def worker():
+        while not todo.empty():
+            path = todo.get_nowait()
+            results[path] = await run_notebook(pool, root, path, output, timeout)
+
+    try:
+        await asyncio.gather(*[ worker() for _ in range(n_parallel) ])
+    finally:
+        await pool.close()
+    return [ results[path] for path in notebooks ]
+
+def main(root: str, output: str, kernel_name: str, n_parallel: int, timeout: float, startup_timeout: float, n_slowest: int) -> int:
+    """
+        Entrypoint to the script.
+
+        # Arguments
+        - `root`: The directory with the notebooks.
+        - `output`: The directory to write the executed notebooks and the report to.
+        - `kernel_name`: The name of the kernelspec to execute them with.
+        - `n_parallel`: The number of notebooks to execute at the same time.
+        - `timeout`: The maximum time any cell may take, in seconds. Use `0` to wait indefinitely.
+        - `startup_timeout`: The maximum time a kernel may take to start, in seconds.
+        - `n_slowest`: The number of slowest cells to report.
+
+        # Returns
+        The exit code of the script.
+    """
+
+    # Run them all
+    start = time.monotonic()
+    results = asyncio.run(run(root, output, kernel_name, max(n_parallel, 1), timeout if timeout > 0 else None, startup_timeout))
+    wall = time.monotonic() - start
+
+    # Summarize
+    failed = [ r for r in results if r["status"] != "ok" ]
+    cells = sorted([ dict(c, path=r["path"]) for r in results for c in r["cells"] ], key=lambda c: c["duration"], reverse=True)
+    lines = [
+        f"{len(results)} notebook(s) executed in {wall:.1f}s: {len(results) - len(failed)} succeeded, {len(failed)} failed",
+    ]
+    if len(failed) > 0:
+        lines += [ "", "Failed notebooks:" ] + [ f"    {r['path']}: {r['error']}" for r in failed ]
+    if len(cells) > 0:
+        lines += [ "", f"Slowest cells:" ] + [ f"    {c['duration']:8.2f}s  {c['path']} [cell {c['index']}]{' (failed)' if c['failed'] else ''}  {c['source'][:60]}" for c in cells[:n_slowest] ]
+    print("\n" + "\n".join(lines))
+
+    # Write the report
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, "report.json"), "w") as h:
+        json.dump({ "duration": wall, "parallel": n_parallel, "notebooks": results }, h, indent=4)
+    with open(os.path.join(output, "summary.txt"), "w") as h:
+        h.write("\n".join(lines) + "\n")
+    print(f"\nExecuted notebooks and report written to '{output}'")
+
+    # Done
+    return 0 if len(failed) == 0 and len(results) > 0 else 1
+
+
+
+# Actual entrypoint
+if __name__ == "__main__":
+    # Define the arguments
+    parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("NOTEBOOKS", help="The directory with the notebooks to execute (recursively).")
+    parser.add_argument("-o", "--output", help="The directory to write the executed notebooks and the report to. Defaults to '.batch-results' in the notebooks directory.")
+    parser.add_argument("-k", "--kernel", default="bscript", help="The name of the kernelspec to execute the notebooks with.")
+    parser.add_argument("-j", "--parallel", type=int, default=4, help="The number of notebooks to execute at the same time.")
+    parser.add_argument("-t", "--timeout", type=float, default=0, help="The maximum time any cell may take, in seconds. Use '0' to wait indefinitely.")
+    parser.add_argument("--startup-timeout", type=float, default=120, help="The maximum time a kernel may take to start (and connect to the instance), in seconds.")
+    parser.add_argument("--slowest", type=int, default=10, help="The number of slowest cells to report.")
+
+    # Parse the arguments & run
+    args = parser.parse_args()
+    exit(main(args.NOTEBOOKS, args.output if args.output is not None else os.path.join(args.NOTEBOOKS, ".batch-results"), args.kernel, args.parallel, args.timeout, args.startup_timeout, args.slowest))